@@ -90,7 +90,19 @@ def run_migrations_online() -> None:
     In this scenario we need to create an Engine
     and associate a connection with the context.
 
+    A connection passed in config.attributes["connection"] (e.g. by
+    bootstrap.py) is used instead, so callers can run migrations over
+    their own connection.
+
     """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     # Override the sqlalchemy.url with our dynamic URL
     configuration = config.get_section(config.config_ini_section) or {}
     configuration['sqlalchemy.url'] = get_database_url()
@@ -0,0 +1,65 @@
+"""Add full-text search index over transaction text columns
+
+Revision ID: g7b1c5e9f3d0
+Revises: f6a0b4d8e2c9
+Create Date: 2025-07-22 10:12:41.530871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'g7b1c5e9f3d0'
+down_revision: Union[str, Sequence[str], None] = 'f6a0b4d8e2c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = 'description, bank_description, counterparty_name, external_memo, note'
+NEW_VALUES = 'new.description, new.bank_description, new.counterparty_name, new.external_memo, new.note'
+OLD_VALUES = 'old.description, old.bank_description, old.counterparty_name, old.external_memo, old.note'
+
+
+def upgrade() -> None:
+    """Create the search index used by models.transaction_search.
+
+    MySQL gets a FULLTEXT index; SQLite gets an external-content FTS5 table kept
+    in sync by triggers and populated from the existing transactions.
+    """
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.execute(f'CREATE FULLTEXT INDEX ft_transactions_search ON transactions ({SEARCH_COLUMNS})')
+    elif dialect == 'sqlite':
+        op.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS transactions_search USING fts5({SEARCH_COLUMNS}, "
+            "content='transactions', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            'CREATE TRIGGER IF NOT EXISTS transactions_search_insert AFTER INSERT ON transactions BEGIN '
+            f'INSERT INTO transactions_search(rowid, {SEARCH_COLUMNS}) VALUES (new.rowid, {NEW_VALUES}); END'
+        )
+        op.execute(
+            'CREATE TRIGGER IF NOT EXISTS transactions_search_delete AFTER DELETE ON transactions BEGIN '
+            f'INSERT INTO transactions_search(transactions_search, rowid, {SEARCH_COLUMNS}) '
+            f"VALUES ('delete', old.rowid, {OLD_VALUES}); END"
+        )
+        op.execute(
+            f'CREATE TRIGGER IF NOT EXISTS transactions_search_update AFTER UPDATE OF {SEARCH_COLUMNS} '
+            'ON transactions BEGIN '
+            f'INSERT INTO transactions_search(transactions_search, rowid, {SEARCH_COLUMNS}) '
+            f"VALUES ('delete', old.rowid, {OLD_VALUES}); "
+            f'INSERT INTO transactions_search(rowid, {SEARCH_COLUMNS}) VALUES (new.rowid, {NEW_VALUES}); END'
+        )
+        op.execute("INSERT INTO transactions_search(transactions_search) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Remove the search index."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.execute('DROP INDEX ft_transactions_search ON transactions')
+    elif dialect == 'sqlite':
+        for trigger in ('insert', 'delete', 'update'):
+            op.execute(f'DROP TRIGGER IF EXISTS transactions_search_{trigger}')
+        op.execute('DROP TABLE IF EXISTS transactions_search')
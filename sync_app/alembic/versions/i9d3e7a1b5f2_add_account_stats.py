@@ -0,0 +1,45 @@
+"""Add account_stats table for per-account summary counters
+
+Revision ID: i9d3e7a1b5f2
+Revises: h8c2d6f0a4e1
+Create Date: 2025-07-28 10:12:44.530218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'i9d3e7a1b5f2'
+down_revision: Union[str, Sequence[str], None] = 'h8c2d6f0a4e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create account_stats.
+
+    Rows are created by the sync service; until then readers aggregate the
+    transactions table.
+    """
+    op.create_table('account_stats',
+    sa.Column('account_id', sa.String(length=255), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.Column('pending_count', sa.Integer(), nullable=False),
+    sa.Column('missing_receipt_count', sa.Integer(), nullable=False),
+    sa.Column('first_transaction_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_transaction_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('inflow_30d', sa.Float(), nullable=False),
+    sa.Column('outflow_30d', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_synced_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('account_id')
+    )
+
+
+def downgrade() -> None:
+    """Drop account_stats."""
+    op.drop_table('account_stats')
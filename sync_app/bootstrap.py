@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Bootstrap the database before the sync service starts.
+
+Runs every startup step in one process over one database connection: waiting
+for the database, migrations, system roles and the super admin check. Steps
+that only need to run when their inputs change record a marker in
+system_settings and are skipped while the marker matches, so repeat boots
+only pay for a few queries. Each step's duration is printed at the end.
+
+    python bootstrap.py            # run the startup steps
+    python bootstrap.py --force    # ignore markers and run every step
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+
+import models  # noqa: F401 - registers every table on Base.metadata
+from ensure_super_admin import ensure_super_admin
+from initialize_roles import STANDARD_ROLES, initialize_system_roles
+from models.base import Base, get_database_url
+from models.system_setting import SystemSetting
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATIONS_DIR = os.path.join(APP_DIR, "alembic", "versions")
+
+# How long to wait for the database container to accept connections
+DB_WAIT_ATTEMPTS = 30
+DB_WAIT_DELAY_SECONDS = 2
+
+
+def create_bootstrap_engine():
+    """
+    Create an engine with a single pooled connection, shared by every step.
+
+    Returns:
+        Engine: SQLAlchemy engine for DATABASE_URL
+    """
+    database_url = get_database_url()
+    connect_args = {}
+    if database_url.startswith("mysql"):
+        connect_args = {"charset": "utf8mb4", "connect_timeout": 5}
+    # max_overflow=0 makes a step that checks out a second connection fail
+    # instead of silently opening one
+    return create_engine(
+        database_url,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=5,
+        connect_args=connect_args,
+    )
+
+
+def wait_for_database(engine):
+    """Wait until the database accepts connections."""
+    for attempt in range(1, DB_WAIT_ATTEMPTS + 1):
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            print("✅ Database is ready!")
+            return True
+        except OperationalError as e:
+            print(f"🔄 Database not ready, attempt {attempt}/{DB_WAIT_ATTEMPTS}: {e}")
+            if attempt < DB_WAIT_ATTEMPTS:
+                time.sleep(DB_WAIT_DELAY_SECONDS)
+    print(f"❌ Database connection failed after {DB_WAIT_ATTEMPTS} attempts")
+    return False
+
+
+def schema_hash():
+    """
+    Hash the models and migration scripts the database schema is built from.
+
+    Returns:
+        str: Hex digest that changes whenever a table, column or migration changes
+    """
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(table.name.encode())
+        for column in table.columns:
+            digest.update(f"{column.name}:{column.type!r}".encode())
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if name.endswith(".py"):
+            digest.update(name.encode())
+            with open(os.path.join(MIGRATIONS_DIR, name), "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def roles_version():
+    """Hash the standard roles created by initialize_system_roles."""
+    return hashlib.sha256(json.dumps(STANDARD_ROLES, sort_keys=True).encode()).hexdigest()
+
+
+def run_migrations(engine):
+    """
+    Upgrade the database to the latest migrations.
+
+    A database without an alembic_version table is a fresh install: the schema
+    is created from the models and stamped with the latest migrations instead.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(APP_DIR, "alembic.ini"))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        if inspect(connection).has_table("alembic_version"):
+            print("🔄 Running database migrations...")
+            command.upgrade(config, "heads")
+        else:
+            print("🆕 First run detected, creating schema and stamping with latest migration...")
+            Base.metadata.create_all(connection)
+            command.stamp(config, "heads")
+    print("✅ Database schema is up to date")
+    return True
+
+
+class BootstrapRunner:
+    """
+    Run startup steps in order, timing each and skipping those already done.
+
+    Attributes:
+        engine: Engine whose single connection every step uses
+        force (bool): Run steps even when their marker matches
+        results (list): (step name, status, seconds) of each step run so far
+    """
+
+    def __init__(self, engine, force=False):
+        self.engine = engine
+        self.Session = sessionmaker(bind=engine, autoflush=False)
+        self.force = force
+        self.results = []
+
+    def read_marker(self, key):
+        """Get a marker value, or None if it (or system_settings) doesn't exist yet."""
+        session = self.Session()
+        try:
+            return SystemSetting.get_value(session, key)
+        except SQLAlchemyError:
+            return None
+        finally:
+            session.close()
+
+    def write_marker(self, key, value, description):
+        """Record that a step finished with the given inputs."""
+        session = self.Session()
+        try:
+            SystemSetting.set_value(session, key, value, description=description, is_editable=False)
+        finally:
+            session.close()
+
+    def with_session(self, func):
+        """Wrap a step that takes a session, so it runs with a session of its own."""
+
+        def step():
+            session = self.Session()
+            try:
+                return func(session)
+            finally:
+                session.close()
+
+        return step
+
+    def run(self, name, step, marker=None, required=True):
+        """
+        Run a step unless its marker shows it already ran with the same inputs.
+
+        Args:
+            name (str): Step name shown in the summary
+            step (callable): Runs the step; returning False marks it as failed
+            marker (tuple, optional): (key, value, description) recorded in
+                system_settings once the step succeeds
+            required (bool): Whether startup must stop if the step fails
+
+        Returns:
+            bool: Whether startup can continue
+        """
+        start = time.perf_counter()
+        if marker and not self.force and self.read_marker(marker[0]) == marker[1]:
+            status = "skipped"
+        else:
+            try:
+                succeeded = step() is not False
+                if succeeded and marker:
+                    self.write_marker(*marker)
+            except Exception as e:
+                print(f"❌ {name} failed: {e}")
+                succeeded = False
+            status = "done" if succeeded else "failed"
+        self.results.append((name, status, time.perf_counter() - start))
+        return status != "failed" or not required
+
+    def print_summary(self):
+        """Print each step's status and duration."""
+        print("⏱️  Bootstrap steps:")
+        for name, status, seconds in self.results:
+            print(f"   {name:<24} {status:<8} {seconds * 1000:8.1f} ms")
+        print(f"   {'total':<24} {'':<8} {sum(r[2] for r in self.results) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare the database for the sync service")
+    parser.add_argument("--force", action="store_true", help="Run every step, ignoring markers")
+    args = parser.parse_args()
+
+    print("🚀 Bootstrapping Mercury Bank Sync Service...")
+    engine = create_bootstrap_engine()
+    runner = BootstrapRunner(engine, force=args.force)
+    try:
+        succeeded = (
+            runner.run("wait for database", lambda: wait_for_database(engine))
+            and runner.run(
+                "migrations",
+                lambda: run_migrations(engine),
+                marker=(
+                    "bootstrap_schema_hash",
+                    schema_hash(),
+                    "Hash of the models and migrations the schema was last migrated to",
+                ),
+            )
+            and runner.run(
+                "system roles",
+                runner.with_session(initialize_system_roles),
+                marker=(
+                    "bootstrap_roles_version_sync",
+                    roles_version(),
+                    "Version of the standard roles last initialized by the sync service",
+                ),
+            )
+            and runner.run("super admin", runner.with_session(ensure_super_admin), required=False)
+        )
+    finally:
+        runner.print_summary()
+        engine.dispose()
+
+    if not succeeded:
+        print("❌ Bootstrap failed")
+        sys.exit(1)
+    print("✅ Bootstrap completed")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,7 @@ from typing import Optional, List, Dict, Any
 # Add the current directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, func, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -28,7 +28,11 @@ from models.user_settings import UserSettings
 from models.mercury_account import MercuryAccount
 from models.account import Account
 from models.transaction import Transaction
+from models.receipt_evaluator import refresh_receipt_statuses
+from models.filter_catalog import rebuild_filter_catalog
+from models.account_stats import AccountStats, rebuild_account_stats
 from models.system_setting import SystemSetting
+from models.user_access_version import UserAccessVersion
 from utils.encryption import encrypt_api_key, decrypt_api_key
 
 
@@ -752,6 +756,7 @@ class MercurySyncCLI:
                     if selected_user:
                         # Add user to Mercury account
                         mercury_account.users.append(selected_user)
+                        UserAccessVersion.bump(self.session, [selected_user.id])
                         self.session.commit()
                         self._print_success(
                             f"User '{selected_user.username}' added to '{mercury_account.name}'"
@@ -805,6 +810,7 @@ class MercurySyncCLI:
 
                         # Remove user from Mercury account
                         mercury_account.users.remove(selected_user)
+                        UserAccessVersion.bump(self.session, [selected_user.id])
                         self.session.commit()
                         self._print_success(
                             f"User '{selected_user.username}' removed from '{mercury_account.name}'"
@@ -995,6 +1001,7 @@ class MercurySyncCLI:
                 role = self.session.query(Role).filter_by(name=role_name).first()
                 if role and role not in user.roles:
                     user.roles.append(role)
+                    UserAccessVersion.bump(self.session, [user.id])
                     self.session.commit()
                     self._print_success(f"Role '{role_name}' added to {user.username}")
                 else:
@@ -1005,6 +1012,7 @@ class MercurySyncCLI:
                 role = self.session.query(Role).filter_by(name=role_name).first()
                 if role and role in user.roles:
                     user.roles.remove(role)
+                    UserAccessVersion.bump(self.session, [user.id])
                     self.session.commit()
                     self._print_success(
                         f"Role '{role_name}' removed from {user.username}"
@@ -1091,6 +1099,8 @@ class MercurySyncCLI:
                 user.roles.append(locked_role)
                 action = "locked"
 
+            # The web app caches permissions per access version
+            UserAccessVersion.bump(self.session, [user.id])
             self.session.commit()
             self._print_success(f"User '{user.username}' has been {action}")
 
@@ -1188,9 +1198,11 @@ class MercurySyncCLI:
             print("2. Check database schema")
             print("3. Backup database")
             print("4. View database statistics")
-            print("5. Back to main menu")
+            print("5. Rebuild filter catalog")
+            print("6. Rebuild account statistics")
+            print("7. Back to main menu")
 
-            choice = self._get_input("\nSelect option (1-5): ")
+            choice = self._get_input("\nSelect option (1-7): ")
 
             if choice == "1":
                 self._create_schema()
@@ -1201,11 +1213,15 @@ class MercurySyncCLI:
             elif choice == "4":
                 self._database_statistics()
             elif choice == "5":
+                self._rebuild_filter_catalog()
+            elif choice == "6":
+                self._rebuild_account_stats()
+            elif choice == "7":
                 break
             else:
                 self._print_error("Invalid choice")
 
-            if choice != "5":
+            if choice != "7":
                 self._pause()
 
     def _create_schema(self):
@@ -1244,6 +1260,8 @@ class MercurySyncCLI:
                 "transactions",
                 "system_settings",
                 "receipt_policies",
+                "transaction_filter_catalog",
+                "account_stats",
             ]
 
             print(f"\n{CLIColors.BOLD}Database Schema Check:{CLIColors.ENDC}")
@@ -1264,6 +1282,28 @@ class MercurySyncCLI:
         self._print_info("Database backup functionality would be implemented here")
         self._print_info("For now, use your database's native backup tools")
 
+    def _rebuild_filter_catalog(self):
+        """Rebuild the transaction filter catalog for all accounts."""
+        self._print_info("Rebuilding filter catalog...")
+
+        try:
+            rebuilt = rebuild_filter_catalog(self.session)
+            self._print_success(f"Filter catalog rebuilt for {rebuilt} accounts")
+        except Exception as e:
+            self.session.rollback()
+            self._print_error(f"Error rebuilding filter catalog: {str(e)}")
+
+    def _rebuild_account_stats(self):
+        """Recompute the per-account summary counters for all accounts."""
+        self._print_info("Rebuilding account statistics...")
+
+        try:
+            rebuilt = rebuild_account_stats(self.session)
+            self._print_success(f"Account statistics rebuilt for {rebuilt} accounts")
+        except Exception as e:
+            self.session.rollback()
+            self._print_error(f"Error rebuilding account statistics: {str(e)}")
+
     def _database_statistics(self):
         """Show database statistics."""
         try:
@@ -1274,7 +1314,6 @@ class MercurySyncCLI:
                 "users": User,
                 "mercury_accounts": MercuryAccount,
                 "accounts": Account,
-                "transactions": Transaction,
                 "roles": Role,
             }
 
@@ -1282,22 +1321,23 @@ class MercurySyncCLI:
                 count = self.session.query(model_class).count()
                 print(f"  {table_name}: {count:,} records")
 
-            # Date ranges
-            oldest_txn = (
-                self.session.query(Transaction)
-                .order_by(Transaction.posted_at.asc())
-                .first()
-            )
-            newest_txn = (
-                self.session.query(Transaction)
-                .order_by(Transaction.posted_at.desc())
-                .first()
-            )
-
-            if oldest_txn and newest_txn:
+            # Transaction counts and date range from the per-account counters
+            # maintained by sync, instead of scanning the transactions table
+            transaction_count, pending_count, oldest, newest, last_synced = self.session.query(
+                func.coalesce(func.sum(AccountStats.transaction_count), 0),
+                func.coalesce(func.sum(AccountStats.pending_count), 0),
+                func.min(AccountStats.first_transaction_at),
+                func.max(AccountStats.last_transaction_at),
+                func.max(AccountStats.last_synced_at),
+            ).one()
+            print(f"  transactions: {transaction_count:,} records ({pending_count:,} pending)")
+
+            if oldest and newest:
                 print(f"\nTransaction date range:")
-                print(f"  Oldest: {oldest_txn.posted_at.strftime('%Y-%m-%d')}")
-                print(f"  Newest: {newest_txn.posted_at.strftime('%Y-%m-%d')}")
+                print(f"  Oldest: {oldest.strftime('%Y-%m-%d')}")
+                print(f"  Newest: {newest.strftime('%Y-%m-%d')}")
+            if last_synced:
+                print(f"  Last synced: {last_synced.strftime('%Y-%m-%d %H:%M')}")
 
         except Exception as e:
             self._print_error(f"Error getting database statistics: {str(e)}")
@@ -1480,7 +1520,10 @@ class MercurySyncCLI:
             )
             
             self.session.commit()
-            self._print_success("Receipt policy updated successfully")
+            updated = refresh_receipt_statuses(self.session, account_ids=[account.id])
+            self._print_success(
+                f"Receipt policy updated successfully ({updated} transaction receipt statuses refreshed)"
+            )
             
         except Exception as e:
             self.session.rollback()
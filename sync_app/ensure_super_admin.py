@@ -2,16 +2,7 @@
 """
 Super Admin Promotion Script
 
-This script runs on container startup            user.roles.append(admin_role)
-        
-        # Ensure user has settings
-        if not user.settings:
-            user_settings = UserSettings(user_id=user.id)
-            session.add(user_settings)
-        
-        session.commit()
-        print(f"✓ Super admin user '{super_admin_username}' promoted to super-admin!")
-        return Truehat if a SUPER_ADMIN_USERNAME
+This script runs on container startup to ensure that if a SUPER_ADMIN_USERNAME
 environment variable is set, that user is always promoted to admin status.
 This provides a reliable way to ensure admin access even if the database
 is reset or users are modified.
@@ -30,24 +21,36 @@ from models.user_settings import UserSettings
 from models.role import Role
 
 
-def ensure_super_admin():
-    """Ensure the super admin user (if specified) has admin privileges."""
+def ensure_super_admin(session=None):
+    """
+    Ensure the super admin user (if specified) has admin privileges.
+
+    Args:
+        session: SQLAlchemy session to use. Defaults to a new session that is
+            closed afterwards
+
+    Returns:
+        bool: Whether the check succeeded
+    """
     super_admin_username = os.environ.get('SUPER_ADMIN_USERNAME')
     
     if not super_admin_username:
         # No super admin specified, nothing to do
         return True
     
-    database_url = os.environ.get('DATABASE_URL')
-    if not database_url:
-        print("Warning: DATABASE_URL environment variable not found")
-        return False
-    
+    owns_session = session is None
+    if owns_session:
+        database_url = os.environ.get('DATABASE_URL')
+        if not database_url:
+            print("Warning: DATABASE_URL environment variable not found")
+            return False
+
     try:
-        # Create database engine and session
-        engine = create_engine(database_url)
-        Session = sessionmaker(bind=engine)
-        session = Session()
+        if owns_session:
+            # Create database engine and session
+            engine = create_engine(database_url)
+            Session = sessionmaker(bind=engine)
+            session = Session()
         
         print(f"Checking super admin user: {super_admin_username}")
         
@@ -114,11 +117,11 @@ def ensure_super_admin():
         
     except Exception as e:
         print(f"Error ensuring super admin: {str(e)}")
-        if 'session' in locals():
+        if session is not None:
             session.rollback()
         return False
     finally:
-        if 'session' in locals():
+        if owns_session and session is not None:
             session.close()
 
 
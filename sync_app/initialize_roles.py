@@ -12,55 +12,67 @@ from models.base import create_engine_and_session
 from models.role import Role
 
 
-def initialize_system_roles():
-    """Initialize all standard system roles."""
+# Standard roles with descriptions
+STANDARD_ROLES = [
+    {
+        "name": "user",
+        "description": "Basic user with read access to their own data",
+        "is_system_role": True
+    },
+    {
+        "name": "admin",
+        "description": "Administrator with full system access",
+        "is_system_role": True
+    },
+    {
+        "name": "super-admin",
+        "description": "Super administrator with all privileges including user management",
+        "is_system_role": True
+    },
+    {
+        "name": "reports",
+        "description": "Access to generate and view reports",
+        "is_system_role": True
+    },
+    {
+        "name": "transactions",
+        "description": "Access to view and manage transaction data",
+        "is_system_role": True
+    },
+    {
+        "name": "budgets",
+        "description": "Access to view and manage budgets and budget tracking",
+        "is_system_role": True
+    },
+    {
+        "name": "locked",
+        "description": "Locked user with no system access",
+        "is_system_role": True
+    }
+]
+
+
+def initialize_system_roles(session=None):
+    """
+    Initialize all standard system roles.
+
+    Args:
+        session: SQLAlchemy session to use. Defaults to a new session that is
+            closed afterwards
+
+    Returns:
+        bool: Whether the roles were initialized
+    """
+    owns_session = session is None
     print("🔧 Initializing system roles...")
 
-    # Define standard roles with descriptions
-    standard_roles = [
-        {
-            "name": "user",
-            "description": "Basic user with read access to their own data",
-            "is_system_role": True
-        },
-        {
-            "name": "admin",
-            "description": "Administrator with full system access",
-            "is_system_role": True
-        },
-        {
-            "name": "super-admin",
-            "description": "Super administrator with all privileges including user management",
-            "is_system_role": True
-        },
-        {
-            "name": "reports",
-            "description": "Access to generate and view reports",
-            "is_system_role": True
-        },
-        {
-            "name": "transactions",
-            "description": "Access to view and manage transaction data",
-            "is_system_role": True
-        },
-        {
-            "name": "budgets",
-            "description": "Access to view and manage budgets and budget tracking",
-            "is_system_role": True
-        },
-        {
-            "name": "locked",
-            "description": "Locked user with no system access",
-            "is_system_role": True
-        }
-    ]
-
     try:
-        engine, SessionLocal = create_engine_and_session()
-        session = SessionLocal()
+        if owns_session:
+            engine, SessionLocal = create_engine_and_session()
+            session = SessionLocal()
 
         created_count = 0
-        for role_data in standard_roles:
+        for role_data in STANDARD_ROLES:
             try:
                 # Check if role exists
                 existing_role = (
@@ -108,12 +120,12 @@ def initialize_system_roles():
 
     except Exception as e:
         print(f"❌ Error initializing roles: {e}")
-        if "session" in locals():
+        if session is not None:
             session.rollback()
         return False
 
     finally:
-        if "session" in locals():
+        if owns_session and session is not None:
             session.close()
 
 
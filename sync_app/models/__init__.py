@@ -8,5 +8,9 @@ from .mercury_account import MercuryAccount
 from .system_setting import SystemSetting
 from .user_settings import UserSettings
 from .budget import Budget, BudgetCategory
+from .user_access_version import UserAccessVersion
+from .filter_catalog import TransactionFilterCatalog
+from .data_version import DataVersion
+from .account_stats import AccountStats
 
-__all__ = ['Base', 'ReceiptPolicy', 'Account', 'Transaction', 'TransactionAttachment', 'User', 'MercuryAccount', 'SystemSetting', 'UserSettings', 'Budget', 'BudgetCategory']
+__all__ = ['Base', 'ReceiptPolicy', 'Account', 'Transaction', 'TransactionAttachment', 'User', 'MercuryAccount', 'SystemSetting', 'UserSettings', 'Budget', 'BudgetCategory', 'UserAccessVersion', 'TransactionFilterCatalog', 'DataVersion', 'AccountStats']
@@ -0,0 +1,230 @@
+"""Per-account summary counters maintained by the sync service."""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, case, func
+
+from .account import Account
+from .base import Base
+from .transaction import Transaction
+
+# Length of the rolling window covered by AccountStats.inflow_30d and outflow_30d
+FLOW_WINDOW_DAYS = 30
+
+# Statuses of transactions that never moved money and don't count towards flows
+FLOW_EXCLUDED_STATUSES = ("failed", "cancelled")
+
+# Statuses counted by AccountStats.missing_receipt_count (those /transactions shows by default)
+MISSING_RECEIPT_STATUSES = ("posted", "sent", "pending")
+
+
+class AccountStats(Base):
+    """
+    SQLAlchemy model holding summary counters for each account's transactions.
+
+    The sync service recomputes an account's row in the same transaction that writes
+    its transactions (see refresh_account_stats), so pages and tools that show
+    per-account counts, date ranges and recent flows read one row per account instead
+    of aggregating the transactions table. The 30-day flows cover the window ending at
+    computed_at, i.e. the account's last refresh.
+
+    Attributes:
+        account_id (str): Primary key - account the counters describe
+        transaction_count (int): Number of transactions
+        pending_count (int): Number of pending transactions
+        missing_receipt_count (int): Posted, sent or pending transactions missing a
+            required receipt
+        first_transaction_at (datetime, optional): Earliest effective date
+        last_transaction_at (datetime, optional): Latest effective date
+        inflow_30d (float): Sum of incoming amounts over the 30 days before computed_at
+        outflow_30d (float): Sum of outgoing amounts (positive) over the same window
+        computed_at (datetime): When the counters were last recomputed
+        last_synced_at (datetime, optional): When the sync service last synced the account
+    """
+
+    __tablename__ = "account_stats"
+
+    account_id = Column(
+        String(255), ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True
+    )
+    transaction_count = Column(Integer, nullable=False, default=0)
+    pending_count = Column(Integer, nullable=False, default=0)
+    missing_receipt_count = Column(Integer, nullable=False, default=0)
+    first_transaction_at = Column(DateTime(timezone=True), nullable=True)
+    last_transaction_at = Column(DateTime(timezone=True), nullable=True)
+    inflow_30d = Column(Float, nullable=False, default=0.0)
+    outflow_30d = Column(Float, nullable=False, default=0.0)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+    last_synced_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return (
+            f"<AccountStats(account_id='{self.account_id}', "
+            f"transactions={self.transaction_count}, pending={self.pending_count})>"
+        )
+
+
+def _aggregate_account_stats(db_session, account_ids, now):
+    """
+    Compute counters for accounts directly from the transactions table.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        account_ids (list): Accounts to aggregate
+        now (datetime): End of the 30-day flow window
+
+    Returns:
+        dict: Column values keyed by account ID, for every account in account_ids
+    """
+    effective_date = func.coalesce(Transaction.posted_at, Transaction.created_at)
+    in_window = (effective_date >= now - timedelta(days=FLOW_WINDOW_DAYS)) & (
+        Transaction.status.is_(None) | Transaction.status.notin_(FLOW_EXCLUDED_STATUSES)
+    )
+
+    stats = {
+        account_id: {
+            "transaction_count": 0,
+            "pending_count": 0,
+            "missing_receipt_count": 0,
+            "first_transaction_at": None,
+            "last_transaction_at": None,
+            "inflow_30d": 0.0,
+            "outflow_30d": 0.0,
+        }
+        for account_id in account_ids
+    }
+    if not stats:
+        return stats
+
+    for row in (
+        db_session.query(
+            Transaction.account_id,
+            func.count(Transaction.id),
+            func.sum(case((Transaction.status == "pending", 1), else_=0)),
+            func.sum(
+                case(
+                    (
+                        (Transaction.receipt_status == "required_missing")
+                        & Transaction.status.in_(MISSING_RECEIPT_STATUSES),
+                        1,
+                    ),
+                    else_=0,
+                )
+            ),
+            func.min(effective_date),
+            func.max(effective_date),
+            func.sum(case((in_window & (Transaction.amount > 0), Transaction.amount), else_=0)),
+            func.sum(case((in_window & (Transaction.amount < 0), -Transaction.amount), else_=0)),
+        )
+        .filter(Transaction.account_id.in_(list(stats)))
+        .group_by(Transaction.account_id)
+    ):
+        stats[row[0]].update(
+            transaction_count=row[1],
+            pending_count=int(row[2] or 0),
+            missing_receipt_count=int(row[3] or 0),
+            first_transaction_at=row[4],
+            last_transaction_at=row[5],
+            inflow_30d=float(row[6] or 0),
+            outflow_30d=float(row[7] or 0),
+        )
+    return stats
+
+
+def refresh_account_stats(db_session, account_ids, synced_at=None, now=None):
+    """
+    Recompute the counters of accounts in the current transaction (no commit).
+
+    Pending transaction changes are flushed first, so the counters can be committed
+    together with the changes they reflect.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        account_ids (iterable): Accounts to refresh
+        synced_at (datetime, optional): Record this as the accounts' last sync time
+        now (datetime, optional): End of the 30-day flow window. Defaults to the current UTC time
+    """
+    account_ids = list(dict.fromkeys(account_ids))
+    if not account_ids:
+        return
+    now = now or datetime.utcnow()
+
+    db_session.flush()
+    rows = {
+        row.account_id: row
+        for row in db_session.query(AccountStats).filter(AccountStats.account_id.in_(account_ids))
+    }
+    for account_id, values in _aggregate_account_stats(db_session, account_ids, now).items():
+        row = rows.get(account_id)
+        if row is None:
+            row = AccountStats(account_id=account_id)
+            db_session.add(row)
+        for name, value in values.items():
+            setattr(row, name, value)
+        row.computed_at = now
+        if synced_at is not None:
+            row.last_synced_at = synced_at
+
+
+def rebuild_account_stats(db_session, account_ids=None, only_missing=False, batch_size=50):
+    """
+    Recompute account counters from the transactions, committing after each batch.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        account_ids (list, optional): Limit the rebuild to these accounts. Defaults to all accounts
+        only_missing (bool): Only rebuild accounts that have no counters yet
+        batch_size (int): Number of accounts to rebuild per batch
+
+    Returns:
+        int: Number of accounts rebuilt
+    """
+    if account_ids is None:
+        account_ids = [row[0] for row in db_session.query(Account.id)]
+    account_ids = list(account_ids)
+
+    if only_missing and account_ids:
+        existing = {
+            row[0]
+            for row in db_session.query(AccountStats.account_id).filter(
+                AccountStats.account_id.in_(account_ids)
+            )
+        }
+        account_ids = [account_id for account_id in account_ids if account_id not in existing]
+
+    for start in range(0, len(account_ids), batch_size):
+        refresh_account_stats(db_session, account_ids[start:start + batch_size])
+        db_session.commit()
+
+    return len(account_ids)
+
+
+def load_account_stats(db_session, account_ids):
+    """
+    Get the counters of accounts with a single query.
+
+    Accounts that have no counters yet (e.g. before the sync service first ran) are
+    aggregated from the transactions table instead; their AccountStats objects are
+    not added to the session.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        account_ids (iterable): Accounts to include
+
+    Returns:
+        dict: AccountStats keyed by account ID, for every account in account_ids
+    """
+    account_ids = list(dict.fromkeys(account_ids))
+    if not account_ids:
+        return {}
+
+    stats = {
+        row.account_id: row
+        for row in db_session.query(AccountStats).filter(AccountStats.account_id.in_(account_ids))
+    }
+    missing = [account_id for account_id in account_ids if account_id not in stats]
+    if missing:
+        now = datetime.utcnow()
+        for account_id, values in _aggregate_account_stats(db_session, missing, now).items():
+            stats[account_id] = AccountStats(account_id=account_id, computed_at=now, **values)
+    return stats
@@ -0,0 +1,185 @@
+"""Per-Mercury-account data version stamps used to validate cached and conditional responses."""
+
+from sqlalchemy import Column, Integer, DateTime, event, inspect, text
+from .base import Base
+from .account import Account
+from .transaction import Transaction
+from .transaction_attachment import TransactionAttachment
+
+
+class DataVersion(Base):
+    """
+    SQLAlchemy model storing a version counter for each Mercury account group's data.
+
+    The sync service bumps the version of a group whenever it commits changes to the
+    group's accounts, transactions or attachments. Anything derived from that data
+    (HTTP ETags, cached report results) is tagged with the versions it was built from
+    and can be reused for as long as they don't change.
+
+    Attributes:
+        mercury_account_id (int): Primary key - Mercury account group identifier
+        version (int): Data version, incremented on every committed change
+        updated_at (datetime): Timestamp when the version was last bumped
+    """
+
+    __tablename__ = "data_versions"
+
+    mercury_account_id = Column(Integer, primary_key=True, autoincrement=False, nullable=False)
+    version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=text("CURRENT_TIMESTAMP"),
+        onupdate=text("CURRENT_TIMESTAMP"),
+    )
+
+    def __repr__(self):
+        return f"<DataVersion(mercury_account_id={self.mercury_account_id}, version={self.version})>"
+
+    @classmethod
+    def get_versions(cls, session, mercury_account_ids):
+        """
+        Get the current data versions of Mercury account groups.
+
+        Args:
+            session: Database session
+            mercury_account_ids (iterable): Mercury account group IDs
+
+        Returns:
+            dict: Version keyed by Mercury account group ID, 0 for groups never bumped
+        """
+        mercury_account_ids = set(mercury_account_ids)
+        versions = dict.fromkeys(mercury_account_ids, 0)
+        if mercury_account_ids:
+            versions.update(
+                session.query(cls.mercury_account_id, cls.version).filter(
+                    cls.mercury_account_id.in_(mercury_account_ids)
+                )
+            )
+        return versions
+
+    @classmethod
+    def bump(cls, session, mercury_account_ids):
+        """
+        Increment the data version of one or more Mercury account groups.
+
+        The caller is responsible for committing the session, normally together with
+        the data change itself.
+
+        Args:
+            session: Database session
+            mercury_account_ids (iterable): IDs of groups whose data changed
+        """
+        for mercury_account_id in set(mercury_account_ids):
+            if mercury_account_id is None:
+                continue
+            updated = (
+                session.query(cls)
+                .filter(cls.mercury_account_id == mercury_account_id)
+                .update({cls.version: cls.version + 1}, synchronize_session=False)
+            )
+            if not updated:
+                session.add(cls(mercury_account_id=mercury_account_id, version=1))
+
+    @classmethod
+    def bump_all(cls, session):
+        """
+        Increment the data version of every Mercury account group that has accounts.
+
+        Used after bulk updates that bypass the ORM (see DataChangeTracker).
+
+        Args:
+            session: Database session
+        """
+        cls.bump(
+            session,
+            [
+                row[0]
+                for row in session.query(Account.mercury_account_id)
+                .filter(Account.mercury_account_id.isnot(None))
+                .distinct()
+            ],
+        )
+
+
+class DataChangeTracker:
+    """
+    Collect the Mercury account groups whose data a session changes.
+
+    Listens to the session's flushes (including autoflushes) and records the accounts
+    of new, modified and deleted Account, Transaction and TransactionAttachment
+    objects. Bulk operations (bulk_update_mappings, Query.update) are not seen; bump
+    versions for those explicitly.
+
+    Usage:
+        tracker = DataChangeTracker(db)
+        ... make changes ...
+        tracker.bump_versions()
+        db.commit()
+    """
+
+    def __init__(self, session):
+        """
+        Start tracking a session.
+
+        Args:
+            session: Database session to track
+        """
+        self.session = session
+        self.mercury_account_ids = set()
+        self.account_ids = set()
+        self.transaction_ids = set()
+        event.listen(session, "after_flush", self._after_flush)
+
+    def _after_flush(self, session, flush_context):
+        for instance in list(session.new) + list(session.deleted) + [
+            instance for instance in session.dirty if session.is_modified(instance)
+        ]:
+            if isinstance(instance, Account):
+                # Both the old and new group if the account moved
+                history = inspect(instance).attrs.mercury_account_id.history
+                self.mercury_account_ids.update(history.deleted or ())
+                self.mercury_account_ids.add(instance.mercury_account_id)
+            elif isinstance(instance, Transaction):
+                self.account_ids.add(instance.account_id)
+            elif isinstance(instance, TransactionAttachment):
+                self.transaction_ids.add(instance.transaction_id)
+
+    def bump_versions(self):
+        """
+        Bump the data versions of the groups changed since the last call.
+
+        Flushes pending changes first. The caller commits.
+
+        Returns:
+            set: IDs of the Mercury account groups that were bumped
+        """
+        self.session.flush()
+        account_ids = set(self.account_ids)
+        if self.transaction_ids:
+            account_ids.update(
+                row[0]
+                for row in self.session.query(Transaction.account_id).filter(
+                    Transaction.id.in_(self.transaction_ids)
+                )
+            )
+        account_ids.discard(None)
+
+        mercury_account_ids = set(self.mercury_account_ids)
+        if account_ids:
+            mercury_account_ids.update(
+                row[0]
+                for row in self.session.query(Account.mercury_account_id)
+                .filter(Account.id.in_(account_ids))
+                .distinct()
+            )
+        mercury_account_ids.discard(None)
+        DataVersion.bump(self.session, mercury_account_ids)
+
+        self.mercury_account_ids.clear()
+        self.account_ids.clear()
+        self.transaction_ids.clear()
+        return mercury_account_ids
+
+    def stop(self):
+        """Stop listening to the session's flushes."""
+        event.remove(self.session, "after_flush", self._after_flush)
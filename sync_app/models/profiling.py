@@ -0,0 +1,407 @@
+"""
+On-demand statistical profiling of web requests and sync cycles.
+
+A StackSampler thread records the call stack of the profiled thread every few
+milliseconds; the sampled stacks are saved in the "folded" format understood by
+flamegraph.pl and speedscope to a ProfileStore, a directory that keeps only the
+most recent profiles.
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_PROFILE_DIR = os.path.join(tempfile.gettempdir(), "mercury_profiles")
+
+_PROFILE_ID = re.compile(r"^[0-9T]+-[a-z]+-[0-9a-f]+$")
+_LIBRARY_DIRS = ("site-packages" + os.sep, "dist-packages" + os.sep)
+
+
+def frame_label(code):
+    """
+    Describe a code object as "function (path:line)" for flame graphs.
+
+    Paths are shown relative to the application or to site-packages.
+
+    Args:
+        code: Code object of a sampled frame
+
+    Returns:
+        str: Frame label
+    """
+    filename = code.co_filename
+    for library_dir in _LIBRARY_DIRS:
+        if library_dir in filename:
+            filename = filename.split(library_dir, 1)[1]
+            break
+    else:
+        if filename.startswith(APP_DIR + os.sep):
+            filename = os.path.relpath(filename, APP_DIR)
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    """
+    Sample the call stack of one thread at a fixed interval.
+
+    Attributes:
+        thread_id (int): Identifier of the sampled thread
+        interval (float): Seconds between samples
+        stacks (dict): Sample counts keyed by folded stack, outermost frame first
+        samples (int): Number of samples taken
+        seconds (float): Wall time between start() and stop()
+    """
+
+    def __init__(self, thread_id=None, interval=0.005):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self.seconds = 0.0
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self):
+        """Start sampling in a background thread."""
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and wait for the sampler thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self.seconds = time.perf_counter() - self._started
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            self.record(frame)
+
+    def record(self, frame):
+        """Count the stack ending at frame as one sample."""
+        labels = []
+        while frame is not None:
+            label = self._labels.get(frame.f_code)
+            if label is None:
+                label = self._labels[frame.f_code] = frame_label(frame.f_code)
+            labels.append(label)
+            frame = frame.f_back
+        stack = ";".join(reversed(labels))
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+
+class ProfileStore:
+    """
+    Directory of saved profiles that keeps only the most recent max_profiles.
+
+    Each profile is a "<id>.folded" file of sampled stacks and a "<id>.json" file
+    with its metadata. Ids start with the UTC time, so they sort oldest first.
+
+    Attributes:
+        directory (str): Directory the profiles are saved in
+        max_profiles (int): Number of profiles kept
+    """
+
+    def __init__(self, directory=DEFAULT_PROFILE_DIR, max_profiles=50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id, extension):
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def save(self, kind, label, sampler, details=None):
+        """
+        Save the stacks of a stopped sampler, deleting the oldest profiles over the limit.
+
+        Args:
+            kind (str): What was profiled, e.g. "request" or "sync"
+            label (str): Short description shown in the list of profiles
+            sampler (StackSampler): Stopped sampler
+            details (dict, optional): Extra metadata to keep with the profile
+
+        Returns:
+            str: Id of the saved profile
+        """
+        now = datetime.utcnow()
+        profile_id = f"{now:%Y%m%dT%H%M%S%f}-{kind}-{uuid.uuid4().hex[:8]}"
+        metadata = {
+            "id": profile_id,
+            "kind": kind,
+            "label": label,
+            "created_at": now.isoformat(),
+            "seconds": sampler.seconds,
+            "samples": sampler.samples,
+            "interval": sampler.interval,
+            "pid": os.getpid(),
+            "details": details or {},
+        }
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(profile_id, "folded"), "w", encoding="utf-8") as f:
+                for stack, count in sampler.stacks.items():
+                    f.write(f"{stack} {count}\n")
+            # The metadata file is what lists a profile, so it is written last
+            temp_path = self._path(profile_id, "json.tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+            os.replace(temp_path, self._path(profile_id, "json"))
+            self._prune()
+        return profile_id
+
+    def _prune(self):
+        for profile_id in self._profile_ids()[: -self.max_profiles or None]:
+            for extension in ("json", "folded"):
+                try:
+                    os.remove(self._path(profile_id, extension))
+                except FileNotFoundError:
+                    pass
+
+    def _profile_ids(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[: -len(".json")] for name in names if name.endswith(".json"))
+
+    def list(self):
+        """Get the metadata of every saved profile, most recent first."""
+        profiles = []
+        for profile_id in reversed(self._profile_ids()):
+            metadata = self.load_metadata(profile_id)
+            if metadata is not None:
+                profiles.append(metadata)
+        return profiles
+
+    def load_metadata(self, profile_id):
+        """Get a profile's metadata, or None if it doesn't exist."""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id, "json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def folded_path(self, profile_id):
+        """Get the path of a profile's folded stacks, or None if it doesn't exist."""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = self._path(profile_id, "folded")
+        return path if os.path.exists(path) else None
+
+    def load_stacks(self, profile_id):
+        """
+        Read a profile's folded stacks.
+
+        Args:
+            profile_id (str): Profile id
+
+        Returns:
+            dict: Sample counts keyed by folded stack, or None if the profile doesn't exist
+        """
+        path = self.folded_path(profile_id)
+        if path is None:
+            return None
+        stacks = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack:
+                    stacks[stack] = stacks.get(stack, 0) + int(count)
+        return stacks
+
+    def clear(self):
+        """Delete every saved profile."""
+        with self._lock:
+            for profile_id in self._profile_ids():
+                for extension in ("json", "folded"):
+                    try:
+                        os.remove(self._path(profile_id, extension))
+                    except FileNotFoundError:
+                        pass
+
+
+def build_flame_tree(stacks, min_fraction=0.005):
+    """
+    Merge folded stacks into a tree for rendering as a flame graph.
+
+    Args:
+        stacks (dict): Sample counts keyed by folded stack
+        min_fraction (float): Frames with a smaller share of all samples are dropped
+
+    Returns:
+        dict: Root node; every node has a name, its sample count ("value"), its
+            share of all samples and of its parent's samples ("percent",
+            "parent_percent") and its children, largest first
+    """
+    root = {"name": "all", "value": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["value"] += count
+        node = root
+        for name in stack.split(";"):
+            child = node["children"].get(name)
+            if child is None:
+                child = node["children"][name] = {"name": name, "value": 0, "children": {}}
+            child["value"] += count
+            node = child
+
+    total = root["value"] or 1
+    minimum = total * min_fraction
+
+    def finish(node, parent_value):
+        children = sorted(
+            (child for child in node["children"].values() if child["value"] >= minimum),
+            key=lambda child: -child["value"],
+        )
+        node["percent"] = 100.0 * node["value"] / total
+        node["parent_percent"] = 100.0 * node["value"] / (parent_value or 1)
+        node["children"] = [finish(child, node["value"]) for child in children]
+        return node
+
+    return finish(root, root["value"])
+
+
+def top_frames(stacks, limit=20):
+    """
+    Get the frames seen in the most samples.
+
+    Args:
+        stacks (dict): Sample counts keyed by folded stack
+        limit (int): Number of frames to return
+
+    Returns:
+        list: (frame, self samples, total samples) tuples, most self samples first;
+            "self" counts samples where the frame was running, "total" samples
+            where it was anywhere on the stack
+    """
+    self_samples = {}
+    total_samples = {}
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_samples[frames[-1]] = self_samples.get(frames[-1], 0) + count
+        for name in set(frames):
+            total_samples[name] = total_samples.get(name, 0) + count
+    return sorted(
+        ((name, self_samples.get(name, 0), total) for name, total in total_samples.items()),
+        key=lambda item: (-item[1], -item[2]),
+    )[:limit]
+
+
+class Profiler:
+    """
+    Profile selected units of work and save their profiles to a store.
+
+    Work is profiled when the caller forces it (e.g. an admin asked for it) or,
+    with a sample_rate of N, for one unit of work in N chosen at random. At most
+    max_concurrent profiles run at once so sampling can't pile up under load.
+
+    Attributes:
+        store (ProfileStore): Where profiles are saved
+        sample_rate (int): Profile 1 in sample_rate units of work (0 disables sampling)
+        interval (float): Seconds between stack samples
+    """
+
+    def __init__(self, store, sample_rate=0, interval=0.005, max_concurrent=2):
+        self.store = store
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def should_sample(self):
+        """Decide whether to profile the next unit of work at random."""
+        return self.sample_rate > 0 and random.randrange(self.sample_rate) == 0
+
+    def start(self):
+        """
+        Start sampling the current thread.
+
+        Returns:
+            StackSampler: Running sampler, or None if too many profiles are running
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            return StackSampler(interval=self.interval).start()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def finish(self, sampler, kind=None, label=None, details=None, save=True):
+        """
+        Stop a sampler from start() and optionally save its profile.
+
+        Returns:
+            str: Id of the saved profile, or None if it wasn't saved
+        """
+        try:
+            sampler.stop()
+        finally:
+            self._slots.release()
+        if not save:
+            return None
+        return self.store.save(kind, label, sampler, details)
+
+    @contextmanager
+    def profile(self, kind, label, force=False, details=None):
+        """
+        Profile the enclosed block when forced or sampled.
+
+        Sampled blocks that finish before the first stack sample aren't saved.
+
+        Yields:
+            StackSampler: Running sampler, or None when the block isn't profiled
+        """
+        sampler = self.start() if force or self.should_sample() else None
+        try:
+            yield sampler
+        finally:
+            if sampler is not None:
+                self.finish(sampler, kind, label, details, save=force or sampler.samples > 0)
+
+
+def create_profiler(sample_rate_variable="PROFILE_SAMPLE_RATE"):
+    """
+    Build a profiler from environment settings.
+
+    PROFILE_DIR and PROFILE_MAX_FILES configure the store (share PROFILE_DIR
+    between services to see every profile in the web app), PROFILE_INTERVAL_MS
+    the sampling interval, and sample_rate_variable names the variable holding
+    the 1-in-N sampling rate.
+
+    Args:
+        sample_rate_variable (str): Environment variable with the sampling rate
+
+    Returns:
+        Profiler: Configured profiler
+    """
+    store = ProfileStore(
+        directory=os.environ.get("PROFILE_DIR", DEFAULT_PROFILE_DIR),
+        max_profiles=int(os.environ.get("PROFILE_MAX_FILES", "50")),
+    )
+    return Profiler(
+        store,
+        sample_rate=int(os.environ.get(sample_rate_variable, "0")),
+        interval=int(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000,
+    )
@@ -0,0 +1,91 @@
+"""Per-user access version stamps used to invalidate cached permissions."""
+
+from sqlalchemy import Column, Integer, DateTime, text
+from .base import Base, user_mercury_account_association
+
+
+class UserAccessVersion(Base):
+    """
+    SQLAlchemy model storing a version counter for each user's access rights.
+
+    Cached permission data (roles and accessible accounts) is tagged with the version
+    it was built from. Anything that changes a user's roles, Mercury account groups or
+    account restrictions bumps the version, so stale cache entries are ignored on the
+    user's next request.
+
+    A separate table is used instead of a column on users because the users table
+    may be a view when users are externally managed.
+
+    Attributes:
+        user_id (int): Primary key - user identifier (no foreign key, users may be a view)
+        version (int): Access version, incremented on every access change
+        updated_at (datetime): Timestamp when the version was last bumped
+    """
+
+    __tablename__ = "user_access_versions"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False, nullable=False)
+    version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=text("CURRENT_TIMESTAMP"),
+        onupdate=text("CURRENT_TIMESTAMP"),
+    )
+
+    def __repr__(self):
+        return f"<UserAccessVersion(user_id={self.user_id}, version={self.version})>"
+
+    @classmethod
+    def get_version(cls, session, user_id):
+        """
+        Get the current access version for a user.
+
+        Args:
+            session: Database session
+            user_id (int): User ID
+
+        Returns:
+            int: Current version, 0 if the user's access has never changed
+        """
+        version = session.query(cls.version).filter(cls.user_id == user_id).scalar()
+        return version or 0
+
+    @classmethod
+    def bump(cls, session, user_ids):
+        """
+        Increment the access version for one or more users.
+
+        The caller is responsible for committing the session, normally together with
+        the access change itself.
+
+        Args:
+            session: Database session
+            user_ids (iterable): IDs of users whose access changed
+        """
+        for user_id in set(user_ids):
+            updated = (
+                session.query(cls)
+                .filter(cls.user_id == user_id)
+                .update({cls.version: cls.version + 1}, synchronize_session=False)
+            )
+            if not updated:
+                session.add(cls(user_id=user_id, version=1))
+
+    @classmethod
+    def bump_mercury_account_members(cls, session, mercury_account_id):
+        """
+        Increment the access version for every user in a Mercury account group.
+
+        Used when the group's accounts change (added, removed or excluded from reports).
+
+        Args:
+            session: Database session
+            mercury_account_id (int): Mercury account group ID
+        """
+        member_ids = [
+            row[0]
+            for row in session.query(user_mercury_account_association.c.user_id).filter(
+                user_mercury_account_association.c.mercury_account_id == mercury_account_id
+            )
+        ]
+        cls.bump(session, member_ids)
@@ -19,13 +19,24 @@ from sqlalchemy.exc import SQLAlchemyError
 # Import all models to ensure they're available for SQLAlchemy relationship resolution
 import models  # This imports all models through __init__.py
 from models.account import Account
-from models.transaction import Transaction
+from models.transaction import Transaction, refresh_derived_columns
 from models.transaction_attachment import TransactionAttachment
 from models.mercury_account import MercuryAccount
 from models.user import User
+from models.user_access_version import UserAccessVersion
+from models.data_version import DataChangeTracker, DataVersion
 from models.user_settings import UserSettings
 from models.system_setting import SystemSetting
+from models.receipt_policy import ReceiptPolicy
+from models.receipt_evaluator import ReceiptPolicyIndex, refresh_receipt_statuses
+from models.filter_catalog import (
+    apply_filter_catalog_changes,
+    catalog_key,
+    rebuild_filter_catalog,
+)
+from models.account_stats import rebuild_account_stats, refresh_account_stats
 from models.base import create_engine_and_session
+from models.profiling import create_profiler
 
 # Configure logging
 logging.basicConfig(
@@ -39,6 +50,9 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# system_settings key holding when receipt policies were last swept
+POLICY_SWEEP_SETTING = "receipt_policy_sweep"
+
 
 class MercuryBankSyncer:
     """
@@ -52,6 +66,7 @@ class MercuryBankSyncer:
     Attributes:
         engine: SQLAlchemy database engine
         session_local: SQLAlchemy session factory
+        profiler (Profiler): Profiles 1 in SYNC_PROFILE_SAMPLE_RATE sync cycles
     """
 
     def __init__(self):
@@ -64,6 +79,7 @@ class MercuryBankSyncer:
         """
         # Initialize database connection
         self.engine, self.session_local = create_engine_and_session()
+        self.profiler = create_profiler("SYNC_PROFILE_SAMPLE_RATE")
 
         logger.info("Mercury Bank Syncer initialized")
 
@@ -117,6 +133,7 @@ class MercuryBankSyncer:
         )
 
         db = self.get_db_session()
+        data_changes = DataChangeTracker(db)
         total_synced_count = 0
 
         try:
@@ -237,6 +254,10 @@ class MercuryBankSyncer:
                                 ),
                             )
                             db.add(new_account)
+                            # Group members gain access to the new account
+                            UserAccessVersion.bump_mercury_account_members(
+                                db, mercury_account.id
+                            )
 
                             # Create initial receipt policy for the new account
                             try:
@@ -271,6 +292,8 @@ class MercuryBankSyncer:
                     )
                     continue  # Continue with next Mercury account group
 
+            # Groups whose accounts changed get a new data version
+            data_changes.bump_versions()
             db.commit()
             logger.info(
                 "Total accounts synced across all groups: %d", total_synced_count
@@ -319,6 +342,7 @@ class MercuryBankSyncer:
 
             # Get all accounts from database
             db = self.get_db_session()
+            data_changes = DataChangeTracker(db)
             accounts = db.query(Account).all()
             total_synced = 0
 
@@ -389,6 +413,9 @@ class MercuryBankSyncer:
                             continue
 
                         account_synced = 0
+                        synced_transactions = []
+                        # Filter catalog values of each transaction before this sync
+                        catalog_old_keys = {}
 
                         # Process each transaction
                         # pylint: disable=not-an-iterable
@@ -407,6 +434,12 @@ class MercuryBankSyncer:
                                 .filter(Transaction.id == transaction_id)
                                 .first()
                             )
+                            if transaction_id not in catalog_old_keys:
+                                catalog_old_keys[transaction_id] = (
+                                    catalog_key(existing_transaction)
+                                    if existing_transaction
+                                    else None
+                                )
 
                             # Parse dates - using correct camelCase field names from Mercury API
                             posted_at = None
@@ -600,6 +633,7 @@ class MercuryBankSyncer:
                                 if created_at:
                                     existing_transaction.created_at = created_at  # type: ignore[assignment]
 
+                                synced_transactions.append(existing_transaction)
                                 logger.debug("Updated transaction: %s", transaction_id)
                             else:
                                 # Create new transaction
@@ -667,6 +701,7 @@ class MercuryBankSyncer:
                                     created_at=created_at,
                                 )
                                 db.add(new_transaction)
+                                synced_transactions.append(new_transaction)
                                 logger.debug(
                                     "Created new transaction: %s", transaction_id
                                 )
@@ -746,6 +781,34 @@ class MercuryBankSyncer:
 
                             account_synced += 1
 
+                        # Derive normalized category columns and effective date
+                        unique_synced = {t.id: t for t in synced_transactions}
+                        for synced_transaction in unique_synced.values():
+                            synced_transaction.update_derived_columns()
+
+                        # Update the filter catalog; flush first so server defaults
+                        # (e.g. created_at) are available on new transactions
+                        db.flush()
+                        apply_filter_catalog_changes(
+                            db,
+                            account.id,
+                            [
+                                (catalog_old_keys.get(t.id), catalog_key(t))
+                                for t in unique_synced.values()
+                            ],
+                        )
+
+                        # Re-evaluate receipt compliance now that amounts, dates and
+                        # attachment counts are up to date
+                        receipt_index = ReceiptPolicyIndex.load(db, [account])
+                        for synced_transaction in synced_transactions:
+                            synced_transaction.receipt_status = receipt_index.status_for(
+                                synced_transaction
+                            )
+
+                        # Summary counters are committed together with the transactions
+                        refresh_account_stats(db, [account.id], synced_at=end_date, now=end_date)
+
                         logger.info(
                             "Synced %d transactions for account %s",
                             account_synced,
@@ -761,6 +824,8 @@ class MercuryBankSyncer:
                         )
                         continue
 
+                # Groups whose transactions or attachments changed get a new data version
+                data_changes.bump_versions()
                 db.commit()
                 logger.info("Successfully synced %d transactions total", total_synced)
                 return total_synced
@@ -1022,23 +1087,167 @@ class MercuryBankSyncer:
             )
             raise
 
-    def run_sync(self, days_back: int = 30):
+    def refresh_receipt_statuses(self) -> int:
+        """
+        Bring materialized receipt statuses up to date outside the sync window.
+
+        Backfills transactions that have never been evaluated (e.g. right after the
+        receipt_status migration) and fully re-evaluates accounts whose receipt policies
+        took effect since the previous sweep, so future-dated policies are applied once
+        their start date passes. The sweep time is kept in system_settings, so policies
+        that took effect while the service was down are applied after a restart; the
+        first sweep ever re-evaluates every account with a policy in effect.
+
+        Returns:
+            int: Number of transactions whose receipt status changed
+        """
+        now = datetime.utcnow()
+        db = self.get_db_session()
+        try:
+            changed_account_ids = set()
+            updated = refresh_receipt_statuses(db, only_missing=True, changed_account_ids=changed_account_ids)
+
+            due_policies = db.query(ReceiptPolicy.account_id).filter(ReceiptPolicy.start_date <= now)
+            last_sweep = SystemSetting.get_value(db, POLICY_SWEEP_SETTING)
+            if last_sweep:
+                due_policies = due_policies.filter(ReceiptPolicy.start_date > datetime.fromisoformat(last_sweep))
+            due_account_ids = [row.account_id for row in due_policies.distinct()]
+            if due_account_ids:
+                updated += refresh_receipt_statuses(
+                    db, account_ids=due_account_ids, changed_account_ids=changed_account_ids
+                )
+            if changed_account_ids:
+                # Missing-receipt counters depend on the statuses
+                refresh_account_stats(db, list(changed_account_ids), now=now)
+                # Bulk updates bypass DataChangeTracker
+                DataVersion.bump(
+                    db,
+                    [
+                        row[0]
+                        for row in db.query(Account.mercury_account_id)
+                        .filter(Account.id.in_(list(changed_account_ids)))
+                        .distinct()
+                    ],
+                )
+            # Commits the refreshed statuses together with the sweep time
+            SystemSetting.set_value(
+                db,
+                POLICY_SWEEP_SETTING,
+                now.isoformat(),
+                description="When receipt policies were last checked for newly effective changes",
+                is_editable=False,
+            )
+            logger.info("Refreshed receipt status for %d transactions", updated)
+            return updated
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error("Failed to refresh receipt statuses: %s", e)
+            return 0
+        finally:
+            db.close()
+
+    def refresh_derived_columns(self) -> int:
+        """
+        Backfill normalized category columns and effective dates in batches.
+
+        Covers transactions written before the columns existed, and new transactions
+        whose created_at was only filled in by the database.
+
+        Returns:
+            int: Number of transactions updated
+        """
+        db = self.get_db_session()
+        try:
+            updated = refresh_derived_columns(db, only_missing=True)
+            if updated:
+                # Bulk updates bypass DataChangeTracker
+                DataVersion.bump_all(db)
+                db.commit()
+                logger.info("Backfilled category columns for %d transactions", updated)
+            return updated
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error("Failed to backfill category columns: %s", e)
+            return 0
+        finally:
+            db.close()
+
+    def refresh_filter_catalog(self) -> int:
+        """
+        Build the filter catalog for accounts that don't have one yet.
+
+        Covers accounts with transactions from before the catalog existed; accounts
+        touched by a sync are kept up to date incrementally in sync_transactions.
+
+        Returns:
+            int: Number of accounts whose catalog was built
+        """
+        db = self.get_db_session()
+        try:
+            rebuilt = rebuild_filter_catalog(db, only_missing=True)
+            if rebuilt:
+                logger.info("Built filter catalog for %d accounts", rebuilt)
+            return rebuilt
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error("Failed to refresh filter catalog: %s", e)
+            return 0
+        finally:
+            db.close()
+
+    def refresh_account_stats(self) -> int:
+        """
+        Build summary counters for accounts that don't have them yet.
+
+        Covers accounts that sync_transactions skipped (e.g. inactive groups) and
+        accounts from before the counters existed; synced accounts are refreshed in
+        sync_transactions.
+
+        Returns:
+            int: Number of accounts whose counters were built
+        """
+        db = self.get_db_session()
+        try:
+            rebuilt = rebuild_account_stats(db, only_missing=True)
+            if rebuilt:
+                logger.info("Built summary counters for %d accounts", rebuilt)
+            return rebuilt
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error("Failed to refresh account counters: %s", e)
+            return 0
+        finally:
+            db.close()
+
+    def run_sync(self, days_back: int = 30, profile: bool = False):
         """
         Run complete synchronization process.
 
         Executes a full synchronization cycle by first syncing accounts, then syncing
-        transactions for the specified number of days back. This is the main method
+        transactions for the specified number of days back, then refreshing category
+        columns, receipt statuses, filter catalogs and account counters for data outside that window. This is the main method
         to perform a complete data synchronization.
 
         Args:
             days_back (int, optional): Number of days back from today to sync transactions.
                 Defaults to 30.
+            profile (bool, optional): Save a stack profile of this cycle even if it
+                isn't sampled. Defaults to False.
 
         Raises:
             Exception: If either account or transaction synchronization fails
         """
         logger.info("Starting complete Mercury Bank synchronization...")
 
+        with self.profiler.profile(
+            "sync", f"run_sync(days_back={days_back})", force=profile
+        ) as sampler:
+            if sampler is not None:
+                logger.info("Profiling this sync cycle to %s", self.profiler.store.directory)
+            self._run_sync(days_back)
+
+    def _run_sync(self, days_back):
+        """Run the synchronization steps of run_sync."""
         try:
             # Sync accounts first
             accounts_synced = self.sync_accounts()
@@ -1046,6 +1255,12 @@ class MercuryBankSyncer:
             # Then sync transactions
             transactions_synced = self.sync_transactions(days_back=days_back)
 
+            # Catch up derived data that sync itself didn't touch
+            self.refresh_derived_columns()
+            self.refresh_receipt_statuses()
+            self.refresh_filter_catalog()
+            self.refresh_account_stats()
+
             logger.info(
                 "Synchronization completed successfully. "
                 "Accounts: %d, Transactions: %d",
@@ -1070,6 +1285,8 @@ def main():
         SYNC_DAYS_BACK (str): Number of days back to sync transactions (default: 30)
         SYNC_INTERVAL_MINUTES (str): Interval between sync runs in minutes (default: 60)
         RUN_ONCE (str): If 'true', runs sync once and exits (default: false)
+        SYNC_PROFILE_SAMPLE_RATE (str): Save a stack profile of 1 in N sync cycles
+            to PROFILE_DIR; 1 profiles every cycle (default: 0, disabled)
 
     Raises:
         SystemExit: Exits with code 1 if syncer initialization fails
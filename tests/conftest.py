@@ -3,7 +3,10 @@ Test configuration for Mercury Bank Integration Platform tests.
 """
 
 import os
+import sys
 import tempfile
+from datetime import datetime, timedelta
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -14,6 +17,8 @@ os.environ.setdefault(
 )
 os.environ.setdefault("USERS_EXTERNALLY_MANAGED", "false")
 
+WEB_APP_DIR = os.path.join(os.path.dirname(__file__), "..", "web_app")
+
 # Test database configuration
 TEST_DATABASE_URL = os.environ.get(
     "TEST_DATABASE_URL", "sqlite:///:memory:"  # Default to in-memory SQLite for tests
@@ -382,3 +387,66 @@ def init_system_settings(test_db):
 
     test_db.commit()
     return settings
+
+
+@pytest.fixture(scope="session")
+def web_app(tmp_path_factory):
+    """
+    Import the real web application with a seeded SQLite database.
+
+    The app can only be imported once per test run, so every test module
+    using it shares this database: an admin user with two accounts and ten
+    transactions under one Mercury account.
+    """
+    if "database_config" in sys.modules:
+        pytest.skip("database_config was already imported with another database")
+
+    data_dir = tmp_path_factory.mktemp("web_app")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{data_dir / 'app.db'}")
+        monkeypatch.setenv("PROFILE_DIR", str(data_dir / "profiles"))
+        monkeypatch.syspath_prepend(WEB_APP_DIR)
+        import app as web_app_module
+
+        import models
+        from models.account import Account
+        from models.mercury_account import MercuryAccount
+        from models.role import Role
+        from models.transaction import Transaction
+        from models.user import User
+
+        models.Base.metadata.create_all(web_app_module.engine)
+        web_app_module.create_app()
+
+        session = sessionmaker(bind=web_app_module.engine)()
+        roles = [
+            Role(name=name)
+            for name in ("user", "admin", "super-admin", "reports", "transactions", "budgets")
+        ]
+        user = User(username="admin", email="admin@example.com")
+        user.set_password("password")
+        user.roles.extend(roles)
+        mercury_account = MercuryAccount(name="Company", api_key="key")
+        user.mercury_accounts.append(mercury_account)
+        session.add(user)
+        session.flush()
+        for index in range(2):
+            session.add(
+                Account(id=f"acct_{index}", mercury_account_id=mercury_account.id, name=f"Account {index}")
+            )
+        now = datetime.now()
+        for index in range(10):
+            session.add(
+                Transaction(
+                    id=f"txn_{index}",
+                    account_id=f"acct_{index % 2}",
+                    amount=-10.0 * (index + 1),
+                    status="sent",
+                    note="Office/Supplies",
+                    posted_at=now - timedelta(days=index),
+                )
+            )
+        session.commit()
+        session.close()
+
+        yield web_app_module
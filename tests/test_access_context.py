@@ -0,0 +1,206 @@
+"""
+Test the per-request access context and its cross-request cache.
+
+These tests verify that AccessContext resolves the same roles and
+accessible accounts as the User model helpers, and that cached contexts
+are invalidated by access version bumps.
+"""
+
+from web_app.models.user import User
+from web_app.models.role import Role
+from web_app.models.mercury_account import MercuryAccount
+from web_app.models.account import Account
+from web_app.models.access_context import AccessContext, AccessContextCache
+from web_app.models.user_access_version import UserAccessVersion
+
+
+def _create_user_with_accounts(test_db):
+    """Create a user in one Mercury account group with two accounts, plus an unrelated group."""
+    user = User(username="testuser", email="test@example.com")
+    user.set_password("password123")
+    test_db.add(user)
+
+    own_group = MercuryAccount(name="Own Company", api_key="key_own", is_active=True)
+    other_group = MercuryAccount(name="Other Company", api_key="key_other", is_active=True)
+    test_db.add_all([own_group, other_group])
+    test_db.flush()
+
+    test_db.add_all(
+        [
+            Account(id="acc_checking", mercury_account_id=own_group.id, name="Checking"),
+            Account(
+                id="acc_savings",
+                mercury_account_id=own_group.id,
+                name="Savings",
+                exclude_from_reports=True,
+            ),
+            Account(id="acc_other", mercury_account_id=other_group.id, name="Other"),
+        ]
+    )
+    user.mercury_accounts.append(own_group)
+    test_db.commit()
+    return user, own_group
+
+
+class TestAccessContext:
+    """Test the AccessContext class."""
+
+    def test_roles_and_permissions(self, test_db, init_roles):
+        """Role checks should match the User model helpers."""
+        user, _ = _create_user_with_accounts(test_db)
+        user.roles.extend(
+            [
+                test_db.query(Role).filter_by(name="user").first(),
+                test_db.query(Role).filter_by(name="reports").first(),
+            ]
+        )
+        test_db.commit()
+
+        access = AccessContext.load(test_db, user.id)
+        assert access.role_names == {"user", "reports"}
+        assert access.can_access_reports() == user.can_access_reports()
+        assert access.can_access_transactions() == user.can_access_transactions()
+        assert access.is_admin == user.is_admin
+        assert access.is_super_admin == user.is_super_admin
+
+    def test_group_membership_grants_all_group_accounts(self, test_db):
+        """Without restrictions every account in the user's groups is accessible."""
+        user, own_group = _create_user_with_accounts(test_db)
+
+        access = AccessContext.load(test_db, user.id)
+        assert access.mercury_account_ids == {own_group.id}
+        assert access.accessible_account_ids == ("acc_checking", "acc_savings")
+        assert access.report_account_ids == ("acc_checking",)
+        assert access.account_ids_for(own_group.id, reports=True) == ["acc_checking"]
+        assert not access.can_access_account("acc_other")
+        assert set(access.accessible_account_ids) == {
+            account.id for account in user.get_accessible_accounts(test_db)
+        }
+
+    def test_restrictions_take_precedence(self, test_db):
+        """Restricted accounts limit access to exactly those accounts."""
+        user, _ = _create_user_with_accounts(test_db)
+        user.restricted_accounts.append(test_db.get(Account, "acc_savings"))
+        test_db.commit()
+
+        access = AccessContext.load(test_db, user.id)
+        assert access.accessible_account_ids == ("acc_savings",)
+        assert access.report_account_ids == ()
+        assert access.can_access_account("acc_savings")
+        assert not access.can_access_account("acc_checking")
+
+
+class _DictBackend:
+    """Minimal stand-in for a shared cache backend."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class TestAccessContextCache:
+    """Test the AccessContextCache class."""
+
+    def test_version_mismatch_is_a_miss(self):
+        """A bumped access version should make the cached context unusable."""
+        cache = AccessContextCache()
+        access = AccessContext(1, ["user"], [], [])
+        cache.set(1, 0, access)
+
+        assert cache.get(1, 0) is access
+        assert cache.get(1, 1) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_lru_eviction_and_ttl(self, monkeypatch):
+        """The least recently used entry is evicted, and entries expire after the TTL."""
+        now = [1000.0]
+        monkeypatch.setattr("web_app.models.access_context.time.monotonic", lambda: now[0])
+        cache = AccessContextCache(max_entries=2, ttl_seconds=60)
+        for user_id in (1, 2):
+            cache.set(user_id, 0, AccessContext(user_id, [], [], []))
+        cache.get(1, 0)
+        cache.set(3, 0, AccessContext(3, [], [], []))
+
+        assert cache.get(2, 0) is None
+        assert cache.get(1, 0) is not None
+
+        now[0] += 61
+        assert cache.get(1, 0) is None
+
+    def test_shared_backend_is_consulted_on_local_miss(self):
+        """Entries written by another worker should be reused if the version matches."""
+        backend = _DictBackend()
+        AccessContextCache(shared_backend=backend).set(1, 2, AccessContext(1, ["user"], [], []))
+
+        cache = AccessContextCache(shared_backend=backend)
+        assert cache.get(1, 1) is None
+        assert cache.get(1, 2).role_names == {"user"}
+
+        cache.invalidate(1)
+        assert cache.get(1, 2) is None
+
+
+class TestUserAccessVersion:
+    """Test the UserAccessVersion model."""
+
+    def test_bump_creates_and_increments(self, test_db):
+        """Bumping should start at 1 and increment on later bumps."""
+        user, _ = _create_user_with_accounts(test_db)
+        assert UserAccessVersion.get_version(test_db, user.id) == 0
+
+        UserAccessVersion.bump(test_db, [user.id])
+        test_db.commit()
+        assert UserAccessVersion.get_version(test_db, user.id) == 1
+
+        UserAccessVersion.bump(test_db, [user.id, user.id])
+        test_db.commit()
+        assert UserAccessVersion.get_version(test_db, user.id) == 2
+
+    def test_bump_mercury_account_members(self, test_db):
+        """Only members of the Mercury account group should be bumped."""
+        user, own_group = _create_user_with_accounts(test_db)
+        outsider = User(username="outsider", email="outsider@example.com")
+        outsider.set_password("password123")
+        test_db.add(outsider)
+        test_db.commit()
+
+        UserAccessVersion.bump_mercury_account_members(test_db, own_group.id)
+        test_db.commit()
+        assert UserAccessVersion.get_version(test_db, user.id) == 1
+        assert UserAccessVersion.get_version(test_db, outsider.id) == 0
+
+
+class TestAppAccessInvalidation:
+    """Test that the app's cached access contexts follow access changes."""
+
+    def test_created_group_is_accessible_right_away(self, web_app):
+        """The admin who adds a Mercury account group should see and open it immediately."""
+        from models.mercury_account import MercuryAccount
+
+        client = web_app.app.test_client()
+        response = client.post("/login", data={"username": "admin", "password": "password"})
+        assert response.status_code == 302
+        # Cache the access context before the group exists
+        assert client.get("/accounts").status_code == 200
+
+        response = client.post(
+            "/add_mercury_account",
+            data={"name": "Created Group", "api_key": "created-key", "environment": "sandbox"},
+        )
+        assert response.status_code == 302
+
+        session = web_app.Session()
+        try:
+            group_id = session.query(MercuryAccount.id).filter_by(name="Created Group").scalar()
+        finally:
+            web_app.db_config.close_session()
+        assert b"Created Group" in client.get("/accounts").data
+        assert client.get(f"/edit_mercury_account/{group_id}").status_code == 200
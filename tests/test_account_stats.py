@@ -0,0 +1,92 @@
+"""
+Test the per-account summary counters.
+
+These tests verify that counters match the transactions they summarize, are
+refreshed in place, and are aggregated on the fly for accounts without a row.
+"""
+
+from datetime import datetime
+
+from web_app.models.account import Account
+from web_app.models.account_stats import (
+    AccountStats,
+    load_account_stats,
+    rebuild_account_stats,
+    refresh_account_stats,
+)
+from web_app.models.transaction import Transaction
+
+NOW = datetime(2025, 3, 1)
+
+
+def _create_transactions(test_db):
+    test_db.add_all([Account(id="acct_1", name="Operating"), Account(id="acct_2", name="Savings")])
+    for txn_id, amount, status, receipt_status, posted_at in [
+        ("txn_1", -40.0, "sent", "required_missing", datetime(2025, 2, 20)),
+        ("txn_2", 100.0, "pending", None, None),
+        ("txn_3", -25.0, "failed", "required_missing", datetime(2025, 2, 25)),
+        ("txn_4", -60.0, "sent", "required_present", datetime(2024, 12, 1)),
+    ]:
+        test_db.add(
+            Transaction(
+                id=txn_id,
+                account_id="acct_1",
+                amount=amount,
+                status=status,
+                receipt_status=receipt_status,
+                posted_at=posted_at,
+                created_at=datetime(2025, 2, 27),
+            )
+        )
+    test_db.commit()
+
+
+class TestAccountStats:
+    """Test computing and loading account counters."""
+
+    def test_refresh_counts_transactions(self, test_db):
+        """Counters should reflect counts, date range, flows and missing receipts."""
+        _create_transactions(test_db)
+        refresh_account_stats(test_db, ["acct_1", "acct_2"], synced_at=NOW, now=NOW)
+        test_db.commit()
+
+        stats = test_db.get(AccountStats, "acct_1")
+        assert (stats.transaction_count, stats.pending_count, stats.missing_receipt_count) == (
+            4,
+            1,
+            1,
+        )
+        assert stats.first_transaction_at == datetime(2024, 12, 1)
+        assert stats.last_transaction_at == datetime(2025, 2, 27)
+        assert (stats.inflow_30d, stats.outflow_30d) == (100.0, 40.0)
+        assert stats.last_synced_at == NOW
+
+        empty = test_db.get(AccountStats, "acct_2")
+        assert (empty.transaction_count, empty.first_transaction_at) == (0, None)
+
+    def test_refresh_updates_existing_rows(self, test_db):
+        """Refreshing again should update the row in place, keeping the sync time."""
+        _create_transactions(test_db)
+        refresh_account_stats(test_db, ["acct_1"], synced_at=NOW, now=NOW)
+        test_db.commit()
+
+        test_db.get(Transaction, "txn_2").status = "sent"
+        refresh_account_stats(test_db, ["acct_1"], now=NOW)
+        test_db.commit()
+
+        assert test_db.query(AccountStats).count() == 1
+        stats = test_db.get(AccountStats, "acct_1")
+        assert stats.pending_count == 0
+        assert stats.last_synced_at == NOW
+
+    def test_load_falls_back_to_aggregation(self, test_db):
+        """Accounts without a row should be aggregated without creating one."""
+        _create_transactions(test_db)
+        stats = load_account_stats(test_db, ["acct_1", "acct_2"])
+        assert stats["acct_1"].transaction_count == 4
+        assert stats["acct_2"].transaction_count == 0
+        assert test_db.query(AccountStats).count() == 0
+
+        assert rebuild_account_stats(test_db, only_missing=True) == 2
+        assert rebuild_account_stats(test_db, only_missing=True) == 0
+        assert load_account_stats(test_db, ["acct_1"])["acct_1"].transaction_count == 4
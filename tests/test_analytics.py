@@ -0,0 +1,174 @@
+"""
+Test the columnar analytics engine used by the chart endpoints.
+
+These tests verify that snapshot aggregation matches the transactions, that
+snapshots follow sync changes incrementally, and that snapshots saved to disk
+can be shared between engines.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from web_app.models.account import Account
+from web_app.models.analytics import AnalyticsEngine, TransactionSnapshot, day_number
+from web_app.models.data_version import DataVersion
+from web_app.models.mercury_account import MercuryAccount
+from web_app.models.transaction import Transaction
+
+
+def _add_transaction(test_db, txn_id, account_id, amount, note, status, posted_at, updated_at):
+    transaction = Transaction(
+        id=txn_id,
+        account_id=account_id,
+        amount=amount,
+        note=note,
+        status=status,
+        posted_at=posted_at,
+        updated_at=updated_at,
+    )
+    transaction.update_derived_columns()
+    test_db.add(transaction)
+    return transaction
+
+
+def _create_group(test_db):
+    mercury_account = MercuryAccount(name="Group", api_key="key")
+    test_db.add(mercury_account)
+    test_db.flush()
+    test_db.add_all(
+        [
+            Account(id="acc_1", name="Checking", mercury_account_id=mercury_account.id),
+            Account(id="acc_2", name="Savings", mercury_account_id=mercury_account.id),
+        ]
+    )
+    synced = datetime(2025, 3, 1, 12, 0, 0)
+    for row in [
+        ("t1", "acc_1", -20.25, "Office/Supplies", "sent", datetime(2025, 1, 5)),
+        ("t2", "acc_1", -10.0, "office", "pending", datetime(2025, 1, 20)),
+        ("t3", "acc_2", -5.5, "Travel/Flights", "sent", datetime(2025, 2, 2)),
+        ("t4", "acc_1", 100.0, "Office", "sent", datetime(2025, 2, 3)),
+        ("t5", "acc_1", -7.0, None, "failed", datetime(2025, 2, 4)),
+        ("t6", "acc_2", -3.0, None, "sent", datetime(2025, 2, 5)),
+    ]:
+        _add_transaction(test_db, *row, updated_at=synced)
+    test_db.commit()
+    return mercury_account.id
+
+
+def _spending(engine, test_db, group_id, **kwargs):
+    return engine.spending(
+        test_db,
+        [group_id],
+        kwargs.pop("account_ids", ["acc_1", "acc_2"]),
+        datetime(2025, 1, 1),
+        datetime(2025, 2, 28),
+        kwargs.pop("statuses", ["sent", "pending", "posted"]),
+        **kwargs,
+    )
+
+
+class TestTransactionSnapshot:
+    """Test building and querying snapshots."""
+
+    def test_spending_groups(self, test_db):
+        """Expenses should be summed per month and category with filters applied."""
+        group_id = _create_group(test_db)
+        engine = AnalyticsEngine()
+
+        assert _spending(engine, test_db, group_id, by_month=True) == {
+            ("2025-01", "office", None): 30.25,
+            ("2025-02", "travel", None): 5.5,
+            ("2025-02", None, None): 3.0,
+        }
+        assert _spending(engine, test_db, group_id, show_subcategories=True) == {
+            (None, "office", "supplies"): 20.25,
+            (None, "office", None): 10.0,
+            (None, "travel", "flights"): 5.5,
+            (None, None, None): 3.0,
+        }
+        assert _spending(
+            engine, test_db, group_id, account_ids=["acc_1"], statuses=["sent", "posted"]
+        ) == {(None, "office", None): 20.25}
+        assert engine.builds == 1
+
+    def test_day_numbers(self):
+        """Day numbers should count days since the epoch for dates and datetimes."""
+        assert day_number(datetime(1970, 1, 2, 23, 59)) == 1
+        assert day_number(datetime(2025, 1, 1).date()) == 20089
+
+
+class TestAnalyticsEngine:
+    """Test snapshot refreshes and sharing."""
+
+    def test_incremental_refresh(self, test_db):
+        """Changed and new transactions should be applied without a rebuild."""
+        group_id = _create_group(test_db)
+        engine = AnalyticsEngine()
+        _spending(engine, test_db, group_id)
+
+        changed = test_db.get(Transaction, "t3")
+        changed.amount = -8.0
+        changed.updated_at = datetime(2025, 3, 2)
+        _add_transaction(
+            test_db, "t7", "acc_2", -1.0, "Travel", "sent", datetime(2025, 2, 6), datetime(2025, 3, 2)
+        )
+        DataVersion.bump(test_db, [group_id])
+        test_db.commit()
+
+        assert _spending(engine, test_db, group_id)[(None, "travel", None)] == 9.0
+        assert (engine.builds, engine.refreshes) == (1, 1)
+
+        test_db.delete(test_db.get(Transaction, "t7"))
+        DataVersion.bump(test_db, [group_id])
+        test_db.commit()
+        assert _spending(engine, test_db, group_id)[(None, "travel", None)] == 8.0
+        assert engine.builds == 2
+
+    def test_changes_apply_as_soon_as_the_data_version_changes(self, test_db):
+        """Snapshots should be reused until the group's data version is bumped."""
+        group_id = _create_group(test_db)
+        engine = AnalyticsEngine()
+        _spending(engine, test_db, group_id)
+
+        changed = test_db.get(Transaction, "t3")
+        changed.amount = -8.0
+        changed.updated_at = datetime(2025, 3, 2)
+        test_db.commit()
+        assert _spending(engine, test_db, group_id)[(None, "travel", None)] == 5.5
+
+        DataVersion.bump(test_db, [group_id])
+        test_db.commit()
+        assert _spending(engine, test_db, group_id)[(None, "travel", None)] == 8.0
+
+    def test_deletion_offset_by_an_insertion_rebuilds(self, test_db):
+        """A deleted row should leave the totals even when the row count is unchanged."""
+        group_id = _create_group(test_db)
+        engine = AnalyticsEngine()
+        _spending(engine, test_db, group_id)
+
+        test_db.delete(test_db.get(Transaction, "t3"))
+        _add_transaction(
+            test_db, "t7", "acc_2", -1.0, "Travel", "sent", datetime(2025, 2, 6), datetime(2025, 3, 2)
+        )
+        DataVersion.bump(test_db, [group_id])
+        test_db.commit()
+
+        assert _spending(engine, test_db, group_id)[(None, "travel", None)] == 1.0
+        assert engine.builds == 2
+
+    def test_snapshots_shared_through_directory(self, test_db, tmp_path):
+        """A second engine should load the saved snapshot memory-mapped instead of building."""
+        group_id = _create_group(test_db)
+        writer = AnalyticsEngine(snapshot_dir=str(tmp_path))
+        expected = _spending(writer, test_db, group_id, by_month=True)
+
+        reader = AnalyticsEngine(snapshot_dir=str(tmp_path))
+        assert _spending(reader, test_db, group_id, by_month=True) == expected
+        assert (reader.builds, reader.refreshes) == (0, 0)
+        snapshot = reader.snapshot(test_db, group_id)
+        assert isinstance(snapshot.columns["cents"], np.memmap)
+
+        loaded = TransactionSnapshot.load(str(tmp_path), group_id)
+        assert loaded.watermark == writer.snapshot(test_db, group_id).watermark
+        assert len(loaded) == 6
@@ -0,0 +1,103 @@
+"""
+Test per-Mercury-account data versions.
+
+These tests verify that versions are bumped for exactly the groups whose
+accounts, transactions or attachments changed in a session.
+"""
+
+from datetime import datetime
+
+from web_app.models.account import Account
+from web_app.models.data_version import DataChangeTracker, DataVersion
+from web_app.models.mercury_account import MercuryAccount
+from web_app.models.transaction import Transaction
+from web_app.models.transaction_attachment import TransactionAttachment
+
+
+def _create_groups(test_db):
+    groups = [MercuryAccount(name=name, api_key="key") for name in ("Group A", "Group B")]
+    test_db.add_all(groups)
+    test_db.flush()
+    test_db.add_all(
+        [
+            Account(id="acct_a", name="A", mercury_account_id=groups[0].id),
+            Account(id="acct_b", name="B", mercury_account_id=groups[1].id),
+            Transaction(
+                id="txn_a",
+                account_id="acct_a",
+                amount=-10.0,
+                status="sent",
+                posted_at=datetime(2025, 1, 5),
+            ),
+        ]
+    )
+    test_db.commit()
+    return [group.id for group in groups]
+
+
+class TestDataVersion:
+    """Test reading and bumping versions."""
+
+    def test_bump_and_get_versions(self, test_db):
+        """Groups never bumped should be at version 0."""
+        DataVersion.bump(test_db, [1, 1, 2])
+        DataVersion.bump(test_db, [2, None])
+        test_db.commit()
+        assert DataVersion.get_versions(test_db, [1, 2, 3]) == {1: 1, 2: 2, 3: 0}
+        assert DataVersion.get_versions(test_db, []) == {}
+
+
+class TestDataChangeTracker:
+    """Test collecting changed groups from session flushes."""
+
+    def test_changed_transactions_bump_their_group(self, test_db):
+        """Only the group of a modified or added transaction should be bumped."""
+        group_a, group_b = _create_groups(test_db)
+        tracker = DataChangeTracker(test_db)
+
+        test_db.get(Transaction, "txn_a").amount = -12.0
+        test_db.query(Account).all()  # autoflush
+        assert tracker.bump_versions() == {group_a}
+        test_db.commit()
+
+        test_db.add(
+            Transaction(id="txn_b", account_id="acct_b", amount=-1.0, status="sent")
+        )
+        assert tracker.bump_versions() == {group_b}
+        test_db.commit()
+        assert DataVersion.get_versions(test_db, [group_a, group_b]) == {
+            group_a: 1,
+            group_b: 1,
+        }
+
+    def test_unchanged_values_do_not_bump(self, test_db):
+        """Assigning the same values should not count as a change."""
+        group_a, _ = _create_groups(test_db)
+        tracker = DataChangeTracker(test_db)
+
+        transaction = test_db.get(Transaction, "txn_a")
+        transaction.amount = transaction.amount
+        transaction.status = "sent"
+        assert tracker.bump_versions() == set()
+        test_db.commit()
+        assert DataVersion.get_versions(test_db, [group_a]) == {group_a: 0}
+
+    def test_attachments_and_account_moves(self, test_db):
+        """Attachments should bump their transaction's group; moved accounts both groups."""
+        group_a, group_b = _create_groups(test_db)
+        tracker = DataChangeTracker(test_db)
+
+        test_db.add(
+            TransactionAttachment(
+                id="att_1",
+                transaction_id="txn_a",
+                filename="receipt.pdf",
+            )
+        )
+        assert tracker.bump_versions() == {group_a}
+        test_db.commit()
+
+        test_db.get(Account, "acct_b").mercury_account_id = group_a
+        assert tracker.bump_versions() == {group_a, group_b}
+        tracker.stop()
+        test_db.commit()
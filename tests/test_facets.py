@@ -0,0 +1,107 @@
+"""
+Test faceted filter counts for the transactions page.
+
+These tests verify that each dimension is counted under the selection of the
+other dimensions, and that cached counts are tied to the data version.
+"""
+
+from datetime import datetime
+
+from web_app.models.account import Account
+from web_app.models.facets import FacetCountCache, facet_count_for, facet_counts
+from web_app.models.transaction import Transaction
+
+
+def _create_transactions(test_db):
+    test_db.add_all([Account(id="acct_1", name="Operating"), Account(id="acct_2", name="Savings")])
+    for txn_id, account_id, note, status, posted_at in [
+        ("txn_1", "acct_1", "Office/Supplies", "sent", datetime(2025, 1, 5)),
+        ("txn_2", "acct_1", "office", "pending", datetime(2025, 1, 20)),
+        ("txn_3", "acct_1", "Travel/Flights", "sent", datetime(2025, 2, 3)),
+        ("txn_4", "acct_2", "Office/Furniture", "sent", datetime(2025, 2, 10)),
+        ("txn_5", "acct_2", None, "failed", datetime(2025, 2, 11)),
+    ]:
+        transaction = Transaction(
+            id=txn_id,
+            account_id=account_id,
+            amount=-10.0,
+            note=note,
+            status=status,
+            posted_at=posted_at,
+        )
+        transaction.update_derived_columns()
+        test_db.add(transaction)
+    test_db.commit()
+
+
+class TestFacetCounts:
+    """Test counting filter values in one grouped query."""
+
+    def test_counts_without_selection(self, test_db):
+        """Every value should be counted over all transactions."""
+        _create_transactions(test_db)
+        counts = facet_counts(test_db.query(Transaction), {})
+        assert counts["account"] == {"acct_1": 3, "acct_2": 2}
+        assert counts["status"] == {"sent": 3, "pending": 1, "failed": 1}
+        assert counts["month"] == {"2025-01": 2, "2025-02": 3}
+        assert counts["category"] == {
+            "office": 3,
+            "office/supplies": 1,
+            "office/furniture": 1,
+            "travel": 1,
+            "travel/flights": 1,
+        }
+
+    def test_selection_applies_to_other_dimensions(self, test_db):
+        """A dimension's own selection should not narrow its counts."""
+        _create_transactions(test_db)
+        counts = facet_counts(
+            test_db.query(Transaction),
+            {"category": ["Office"], "status": ["sent", "posted"]},
+        )
+        assert counts["account"] == {"acct_1": 1, "acct_2": 1}
+        assert counts["month"] == {"2025-01": 1, "2025-02": 1}
+        assert counts["status"] == {"sent": 2, "pending": 1}
+        assert counts["category"]["travel"] == 1
+        assert facet_count_for(counts, "category", "Office/Supplies") == 1
+        assert facet_count_for(counts, "category", "Meals") == 0
+        assert facet_count_for(None, "category", "Office") is None
+
+    def test_base_query_filters(self, test_db):
+        """Filters already on the query should apply to every dimension."""
+        _create_transactions(test_db)
+        query = test_db.query(Transaction).filter(Transaction.account_id == "acct_2")
+        counts = facet_counts(query, {"month": ["2025-02"]})
+        assert counts["account"] == {"acct_2": 2}
+        assert counts["status"] == {"sent": 1, "failed": 1}
+
+
+class TestFacetCountCache:
+    """Test caching counts per access set, filters and data version."""
+
+    def test_key_ignores_ordering(self):
+        """Keys should not depend on the order of accounts or selected values."""
+        assert FacetCountCache.make_key(["b", "a"], {"status": ["sent", "pending"], "q": ""}) == (
+            FacetCountCache.make_key(["a", "b"], {"q": "", "status": ("pending", "sent")})
+        )
+
+    def test_version_mismatch_is_a_miss(self):
+        """Counts computed from an older data version should not be returned."""
+        cache = FacetCountCache()
+        key = FacetCountCache.make_key(["a"], {})
+        cache.set(key, (datetime(2025, 1, 1), 5), {"status": {"sent": 5}})
+
+        assert cache.get(key, (datetime(2025, 1, 1), 5)) == {"status": {"sent": 5}}
+        assert cache.get(key, (datetime(2025, 1, 2), 6)) is None
+        assert cache.get(key, (datetime(2025, 1, 1), 5)) is None
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_lru_eviction(self):
+        """The least recently used entry should be evicted first."""
+        cache = FacetCountCache(max_entries=2)
+        for name in ("a", "b"):
+            cache.set((name,), 1, {})
+        cache.get(("a",), 1)
+        cache.set(("c",), 1, {})
+        assert cache.get(("b",), 1) is None
+        assert cache.get(("a",), 1) == {}
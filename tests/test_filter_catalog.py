@@ -0,0 +1,132 @@
+"""
+Test the transaction filter catalog.
+
+These tests verify that the catalog built from transactions, and the catalog
+maintained incrementally, offer the same dropdown values as scanning the
+transactions table.
+"""
+
+from datetime import datetime
+
+from web_app.models.account import Account
+from web_app.models.transaction import Transaction
+from web_app.models.filter_catalog import (
+    TransactionFilterCatalog,
+    apply_filter_catalog_changes,
+    catalog_key,
+    load_filter_options,
+    rebuild_filter_catalog,
+)
+
+
+def _create_transactions(test_db):
+    test_db.add(Account(id="acct_1", name="Operating"))
+    test_db.add_all(
+        [
+            Transaction(
+                id="txn_1",
+                account_id="acct_1",
+                amount=-20.0,
+                note="Office/Supplies",
+                status="sent",
+                posted_at=datetime(2025, 1, 5),
+            ),
+            Transaction(
+                id="txn_2",
+                account_id="acct_1",
+                amount=-40.0,
+                note="Office",
+                status="pending",
+                created_at=datetime(2025, 2, 10),
+            ),
+            Transaction(
+                id="txn_3",
+                account_id="acct_1",
+                amount=-15.0,
+                note="Travel/Flights",
+                status="sent",
+                posted_at=datetime(2025, 2, 11),
+            ),
+            Transaction(
+                id="txn_4",
+                account_id="acct_1",
+                amount=100.0,
+                note=None,
+                status="sent",
+                posted_at=datetime(2025, 2, 12),
+            ),
+        ]
+    )
+    test_db.commit()
+
+
+class TestFilterCatalog:
+    """Test building, reading and maintaining the filter catalog."""
+
+    def test_uncataloged_accounts_fall_back_to_transactions(self, test_db):
+        """Options should be available before the catalog has been built."""
+        _create_transactions(test_db)
+
+        options = load_filter_options(test_db, ["acct_1"])
+        assert options["months"] == [("2025-02", 3), ("2025-01", 1)]
+        assert options["all_combinations"] == [
+            "Office",
+            "Office/Supplies",
+            "Travel",
+            "Travel/Flights",
+        ]
+        assert options["subcategories"] == {"Office": ["Supplies"], "Travel": ["Flights"]}
+        assert options["statuses"] == {"sent": 3, "pending": 1}
+
+    def test_categories_are_listed_once_however_they_are_spaced(self, test_db):
+        """Notes that differ only in spacing around the slash should give one option."""
+        _create_transactions(test_db)
+        test_db.add(Transaction(id="txn_5", account_id="acct_1", amount=-5.0, note="Office / Supplies"))
+        test_db.commit()
+
+        options = load_filter_options(test_db, ["acct_1"])
+        assert options["all_combinations"].count("Office/Supplies") == 1
+        assert "Office / Supplies" not in options["all_combinations"]
+
+    def test_rebuild_matches_fallback(self, test_db):
+        """Reading the rebuilt catalog should give the same options."""
+        _create_transactions(test_db)
+        expected = load_filter_options(test_db, ["acct_1"])
+
+        assert rebuild_filter_catalog(test_db, only_missing=True) == 1
+        assert rebuild_filter_catalog(test_db, only_missing=True) == 0
+        assert test_db.query(TransactionFilterCatalog).count() > 0
+        assert load_filter_options(test_db, ["acct_1"]) == expected
+
+    def test_incremental_changes_match_rebuild(self, test_db):
+        """Applying sync deltas should leave the catalog as a full rebuild would."""
+        _create_transactions(test_db)
+        rebuild_filter_catalog(test_db)
+
+        changed = test_db.get(Transaction, "txn_2")
+        old_key = catalog_key(changed)
+        changed.status = "sent"
+        changed.posted_at = datetime(2025, 3, 1)
+        changed.note = "Travel/Hotels"
+        added = Transaction(
+            id="txn_5",
+            account_id="acct_1",
+            amount=-5.0,
+            note="Office/Supplies",
+            status="sent",
+            posted_at=datetime(2025, 3, 2),
+        )
+        test_db.add(added)
+        test_db.flush()
+        apply_filter_catalog_changes(
+            test_db,
+            "acct_1",
+            [(old_key, catalog_key(changed)), (None, catalog_key(added))],
+        )
+        test_db.commit()
+        incremental = load_filter_options(test_db, ["acct_1"])
+
+        rebuild_filter_catalog(test_db)
+        assert incremental == load_filter_options(test_db, ["acct_1"])
+        assert "pending" not in incremental["statuses"]
+        assert incremental["months"][0] == ("2025-03", 2)
@@ -13,7 +13,14 @@ from web_app.models.user_settings import UserSettings
 from web_app.models.system_setting import SystemSetting
 from web_app.models.mercury_account import MercuryAccount
 from web_app.models.account import Account
-from web_app.models.transaction import Transaction
+from web_app.models.transaction import Transaction, refresh_derived_columns
+from web_app.models.budget import (
+    Budget,
+    BudgetCategory,
+    calculate_budgets_progress,
+    get_budget_report_data,
+    get_budget_report_transactions,
+)
 
 
 class TestUserModel:
@@ -386,3 +393,237 @@ class TestAccountModel:
         # Test relationship
         assert account.mercury_account.id == mercury_account.id
         assert mercury_account.accounts[0].id == account.id
+
+
+class TestTransactionModel:
+    """Test Transaction model derived category columns."""
+
+    def test_update_derived_columns(self):
+        """Category columns should be parsed from the note and lower-cased."""
+        transaction = Transaction(
+            id="txn_1",
+            account_id="acc_1",
+            amount=-10.0,
+            note=" Office / Supplies ",
+            created_at=datetime(2025, 1, 2),
+        )
+        transaction.update_derived_columns()
+
+        assert transaction.main_category == "office"
+        assert transaction.sub_category == "supplies"
+        assert transaction.effective_date == datetime(2025, 1, 2)
+
+    def test_category_condition_is_exact_match(self, test_db):
+        """Main categories match their sub-categories but not other categories containing the name."""
+        test_db.add(Account(id="acc_1", name="Checking"))
+        for txn_id, note in [("t1", "Office"), ("t2", "office/Supplies"), ("t3", "Home Office")]:
+            transaction = Transaction(id=txn_id, account_id="acc_1", amount=-1.0, note=note)
+            transaction.update_derived_columns()
+            test_db.add(transaction)
+        test_db.commit()
+
+        def matching(category):
+            return sorted(
+                t.id
+                for t in test_db.query(Transaction).filter(Transaction.category_condition(category))
+            )
+
+        assert matching("Office") == ["t1", "t2"]
+        assert matching("Office/Supplies") == ["t2"]
+
+    def test_refresh_derived_columns_backfills(self, test_db):
+        """Rows written without derived columns should be backfilled once."""
+        test_db.add(Account(id="acc_1", name="Checking"))
+        test_db.add(
+            Transaction(
+                id="t1",
+                account_id="acc_1",
+                amount=-1.0,
+                note="Travel/Flights",
+                posted_at=datetime(2025, 3, 4),
+            )
+        )
+        test_db.commit()
+
+        assert refresh_derived_columns(test_db, batch_size=1) == 1
+        assert refresh_derived_columns(test_db) == 0
+        transaction = test_db.get(Transaction, "t1")
+        test_db.refresh(transaction)
+        assert (transaction.main_category, transaction.sub_category) == ("travel", "flights")
+        assert transaction.effective_date == datetime(2025, 3, 4)
+
+
+class TestBudgetProgress:
+    """Test batched budget progress calculation."""
+
+    def test_progress_for_several_budgets(self, test_db):
+        """Each budget should only count expenses in its own month and accounts."""
+        user = User(username="owner", email="owner@example.com")
+        user.set_password("password123")
+        mercury_account = MercuryAccount(name="Group", api_key="key")
+        test_db.add_all([user, mercury_account])
+        test_db.flush()
+        checking = Account(id="acc_1", name="Checking", mercury_account_id=mercury_account.id)
+        savings = Account(id="acc_2", name="Savings", mercury_account_id=mercury_account.id)
+        test_db.add_all([checking, savings])
+
+        january = Budget(
+            name="January",
+            mercury_account_id=mercury_account.id,
+            budget_month=datetime(2025, 1, 1).date(),
+            created_by_user_id=user.id,
+            accounts=[checking],
+        )
+        february = Budget(
+            name="February",
+            mercury_account_id=mercury_account.id,
+            budget_month=datetime(2025, 2, 1).date(),
+            created_by_user_id=user.id,
+            accounts=[checking, savings],
+        )
+        empty = Budget(
+            name="No accounts",
+            mercury_account_id=mercury_account.id,
+            budget_month=datetime(2025, 1, 1).date(),
+            created_by_user_id=user.id,
+        )
+        test_db.add_all([january, february, empty])
+        test_db.flush()
+        test_db.add_all(
+            [
+                BudgetCategory(budget_id=january.id, category_name="Office", budgeted_amount=100.0),
+                BudgetCategory(budget_id=january.id, category_name="Travel", budgeted_amount=50.0),
+                BudgetCategory(
+                    budget_id=january.id, category_name="Meals", budgeted_amount=25.0, is_active=False
+                ),
+                BudgetCategory(budget_id=february.id, category_name="office", budgeted_amount=80.0),
+                BudgetCategory(budget_id=empty.id, category_name="Office", budgeted_amount=10.0),
+            ]
+        )
+        for txn_id, account_id, amount, note, status, posted_at in [
+            ("t1", "acc_1", -20.0, "Office/Supplies", "sent", datetime(2025, 1, 5)),
+            ("t2", "acc_1", -30.0, "office", "sent", datetime(2025, 1, 31, 23)),
+            ("t3", "acc_1", -99.0, "Office", "failed", datetime(2025, 1, 6)),
+            ("t4", "acc_1", 500.0, "Income", "sent", datetime(2025, 1, 7)),
+            ("t5", "acc_1", -7.0, None, "sent", datetime(2025, 1, 8)),
+            ("t6", "acc_1", -40.0, "Office", "sent", datetime(2025, 2, 1)),
+            ("t7", "acc_2", -15.0, "Office/Printing", "sent", datetime(2025, 2, 2)),
+            ("t8", "acc_2", -60.0, "Office", "sent", datetime(2025, 1, 9)),
+        ]:
+            transaction = Transaction(
+                id=txn_id,
+                account_id=account_id,
+                amount=amount,
+                note=note,
+                status=status,
+                posted_at=posted_at,
+            )
+            transaction.update_derived_columns()
+            test_db.add(transaction)
+        test_db.commit()
+
+        progress = calculate_budgets_progress(test_db, [january, february, empty])
+
+        assert progress[january.id]["total_budgeted"] == 150.0
+        assert progress[january.id]["total_spent"] == 57.0
+        assert set(progress[january.id]["categories"]) == {"Office", "Travel"}
+        assert progress[january.id]["categories"]["Office"]["spent"] == 50.0
+        assert progress[january.id]["categories"]["Office"]["percentage"] == 50.0
+        assert progress[january.id]["categories"]["Travel"]["spent"] == 0
+        assert progress[february.id]["total_spent"] == 55.0
+        assert progress[february.id]["categories"]["office"]["remaining"] == 25.0
+        assert progress[empty.id] == {"total_budgeted": 0, "total_spent": 0, "categories": {}}
+        assert calculate_budgets_progress(test_db, []) == {}
+
+
+class TestBudgetReport:
+    """Test the aggregated budget report and its transaction drill-down."""
+
+    def _create_budget(self, test_db):
+        user = User(username="owner", email="owner@example.com")
+        user.set_password("password123")
+        mercury_account = MercuryAccount(name="Group", api_key="key")
+        test_db.add_all([user, mercury_account])
+        test_db.flush()
+        account = Account(
+            id="acc_1", name="Checking", nickname="Main", mercury_account_id=mercury_account.id
+        )
+        budget = Budget(
+            name="January",
+            mercury_account_id=mercury_account.id,
+            budget_month=datetime(2025, 1, 1).date(),
+            created_by_user_id=user.id,
+            accounts=[account],
+        )
+        test_db.add(budget)
+        test_db.flush()
+        test_db.add_all(
+            [
+                BudgetCategory(budget_id=budget.id, category_name="Office", budgeted_amount=100.0),
+                BudgetCategory(budget_id=budget.id, category_name="Rent", budgeted_amount=900.0),
+            ]
+        )
+        for txn_id, amount, note, day in [
+            ("t1", -20.0, "Office/Supplies", 5),
+            ("t2", -30.0, "office/supplies", 6),
+            ("t3", 5.0, "Office/Supplies", 7),  # Refund
+            ("t4", -10.0, "Office", 8),
+            ("t5", 2000.0, None, 9),  # Large deposit counts as income
+            ("t6", 50.0, None, 10),  # Small credit reduces uncategorized spending
+            ("t7", -80.0, None, 11),
+            ("t8", 300.0, "Income/Interest", 12),
+        ]:
+            transaction = Transaction(
+                id=txn_id,
+                account_id="acc_1",
+                amount=amount,
+                note=note,
+                status="sent",
+                posted_at=datetime(2025, 1, day),
+            )
+            transaction.update_derived_columns()
+            test_db.add(transaction)
+        test_db.commit()
+        return budget
+
+    def test_report_summary(self, test_db):
+        """Rows should hold net totals per category without transaction details."""
+        budget = self._create_budget(test_db)
+
+        report = {row["main_category"]: row for row in get_budget_report_data(test_db, budget)}
+
+        assert list(report)[0] == "Income"
+        assert report["Income"]["total_amount"] == 2300.0
+        assert [s["subcategory"] for s in report["Income"]["subcategories"]] == [
+            "Uncategorized Income",
+            "Interest",
+        ]
+        assert report["Office"]["total_amount"] == 55.0
+        assert report["Office"]["transaction_count"] == 4
+        assert report["Office"]["remaining_budget"] == 45.0
+        assert report["Office"]["subcategories"][0]["total_amount"] == 45.0
+        assert "transactions" not in report["Office"]["subcategories"][0]
+        assert report["Uncategorized"]["total_amount"] == 30.0
+        assert report["Rent"]["transaction_count"] == 0
+
+    def test_drill_down_matches_summary(self, test_db):
+        """Paging through a row's transactions should return exactly the counted ones."""
+        budget = self._create_budget(test_db)
+
+        first_page, total = get_budget_report_transactions(
+            test_db, budget, "Office", "Supplies", page=1, per_page=2
+        )
+        second_page, _ = get_budget_report_transactions(
+            test_db, budget, "Office", "Supplies", page=2, per_page=2
+        )
+        assert total == 3
+        assert [t["id"] for t in first_page + second_page] == ["t3", "t2", "t1"]
+        assert first_page[0]["account_name"] == "Main"
+        assert first_page[0]["amount"] == 5.0
+
+        income, total = get_budget_report_transactions(
+            test_db, budget, "Income", "Uncategorized Income"
+        )
+        assert total == 1 and income[0]["id"] == "t5"
+        _, total = get_budget_report_transactions(test_db, budget, "Uncategorized")
+        assert total == 2
@@ -0,0 +1,121 @@
+"""
+Test the on-demand stack profiler.
+
+These tests verify stack sampling, the bounded profile store, flame graph
+trees and the profiler's sampling decisions.
+"""
+
+import time
+
+from web_app.models.profiling import (
+    ProfileStore,
+    Profiler,
+    StackSampler,
+    build_flame_tree,
+    top_frames,
+)
+
+
+def busy_wait(seconds):
+    """Keep the current thread running Python code for a while."""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(100))
+
+
+class TestStackSampler:
+    """Test sampling the current thread."""
+
+    def test_samples_running_functions(self):
+        """Sampled stacks should end in the functions that were running."""
+        sampler = StackSampler(interval=0.001).start()
+        busy_wait(0.1)
+        sampler.stop()
+
+        assert sampler.samples > 0 and sampler.seconds >= 0.1
+        assert any("busy_wait (" in stack.split(";")[-1] for stack in sampler.stacks)
+        assert sum(sampler.stacks.values()) == sampler.samples
+
+
+def make_sampler(stacks):
+    """Build a stopped sampler holding the given stacks."""
+    sampler = StackSampler()
+    sampler.stacks = dict(stacks)
+    sampler.samples = sum(stacks.values())
+    return sampler
+
+
+class TestProfileStore:
+    """Test saving profiles to a bounded directory."""
+
+    def test_round_trip_and_eviction(self, tmp_path):
+        """The store should keep only the newest profiles."""
+        store = ProfileStore(str(tmp_path), max_profiles=2)
+        ids = [
+            store.save("request", f"GET /page/{index}", make_sampler({"main;view": index + 1}))
+            for index in range(3)
+        ]
+
+        assert [profile["id"] for profile in store.list()] == [ids[2], ids[1]]
+        assert store.load_metadata(ids[0]) is None
+        assert store.load_stacks(ids[2]) == {"main;view": 3}
+        assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+            f"{profile_id}.{extension}" for profile_id in ids[1:] for extension in ("json", "folded")
+        )
+
+        store.clear()
+        assert store.list() == []
+
+    def test_ids_cannot_escape_the_directory(self, tmp_path):
+        """Ids that aren't profile ids should never be turned into paths."""
+        store = ProfileStore(str(tmp_path / "profiles"))
+        (tmp_path / "secret.folded").write_text("main 1\n")
+        assert store.folded_path("../secret") is None
+        assert store.load_stacks("../secret") is None
+        assert store.load_metadata("../secret") is None
+
+
+class TestFlameGraph:
+    """Test summarizing folded stacks."""
+
+    def test_tree_and_top_frames(self):
+        """Stacks should merge into a tree, dropping frames below the threshold."""
+        stacks = {"main;view;query": 6, "main;view": 2, "main;render": 1, "main;tiny": 1}
+        tree = build_flame_tree(stacks, min_fraction=0.1)
+
+        assert tree["value"] == 10
+        main = tree["children"][0]
+        assert [(child["name"], child["value"]) for child in main["children"]] == [
+            ("view", 8),
+            ("render", 1),
+            ("tiny", 1),
+        ]
+        assert main["children"][0]["children"][0]["parent_percent"] == 75.0
+        assert build_flame_tree(stacks, min_fraction=0.2)["children"][0]["children"][1:] == []
+
+        assert top_frames(stacks, limit=2) == [("query", 6, 6), ("view", 2, 8)]
+
+
+class TestProfiler:
+    """Test choosing what to profile."""
+
+    def test_profiles_forced_blocks_only_without_sampling(self, tmp_path):
+        """With sampling disabled only forced blocks should be profiled."""
+        profiler = Profiler(ProfileStore(str(tmp_path)), sample_rate=0, interval=0.001)
+        with profiler.profile("sync", "skipped") as sampler:
+            assert sampler is None
+        with profiler.profile("sync", "run_sync", force=True) as sampler:
+            busy_wait(0.05)
+        assert [profile["label"] for profile in profiler.store.list()] == ["run_sync"]
+
+        assert Profiler(profiler.store, sample_rate=1).should_sample()
+
+    def test_concurrent_profiles_are_limited(self, tmp_path):
+        """Profiles beyond max_concurrent should be skipped, not queued."""
+        profiler = Profiler(ProfileStore(str(tmp_path)), max_concurrent=1)
+        first = profiler.start()
+        assert profiler.start() is None
+        assert profiler.finish(first, save=False) is None
+        second = profiler.start()
+        assert second is not None
+        profiler.finish(second, save=False)
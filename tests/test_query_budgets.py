@@ -0,0 +1,302 @@
+"""
+Guard the number of SQL statements and ORM rows each route needs.
+
+These tests seed the real web application with a small dataset, request every
+GET route and JSON API with cold caches, then grow the dataset to four times
+its size and request them again. The statement count and ORM rows hydrated at
+both sizes are compared with the budgets checked in to query_budgets.json, and
+a route whose statement count grows with the data (an N+1 pattern) fails
+whatever its budget.
+
+After an intended change, rewrite the budgets and review the diff:
+
+    UPDATE_QUERY_BUDGETS=1 pytest tests/test_query_budgets.py
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), "query_budgets.json")
+
+# Accounts seeded for the small and large datasets; each account comes with a
+# receipt policy, a budget, TRANSACTIONS_PER_ACCOUNT transactions and a user
+# sharing the Mercury account
+SCALES = {"small": 2, "large": 8}
+TRANSACTIONS_PER_ACCOUNT = 12
+CATEGORIES = ["Office/Supplies", "Office/Rent", "Travel/Flights", "Travel/Hotels", "Software", "Meals"]
+
+# Requests measured; placeholders are filled with ids from the seeded dataset
+ROUTES = [
+    "/",
+    "/login",
+    "/register",
+    "/health",
+    "/dashboard",
+    "/accounts",
+    "/edit_account/{account_id}",
+    "/add_mercury_account",
+    "/edit_mercury_account/{mercury_account_id}",
+    "/transactions",
+    "/transactions?q=vendor",
+    "/transactions?receipt_status=required_missing",
+    "/transactions?category=Office&month={month}",
+    "/api/transaction/{transaction_id}/attachments",
+    "/reports",
+    "/reports?view=monthly",
+    "/api/expense_breakdown",
+    "/budgets",
+    "/budgets/create",
+    "/budgets/{budget_id}/edit",
+    "/budgets/reports",
+    "/api/budget_data",
+    "/api/budget_accounts/{mercury_account_id}",
+    "/api/budgets/{budget_id}/transactions?category=Office",
+    "/settings",
+    "/admin/users",
+    "/admin/users/add",
+    "/admin/users/{user_id}/roles",
+    "/admin/users/{user_id}/settings",
+    "/admin/mercury_access/{mercury_account_id}",
+    "/admin/settings",
+    "/admin/cache_stats",
+    "/admin/performance",
+    "/admin/profiles",
+]
+
+# GET endpoints that aren't measured, with the reason
+UNMEASURED_ENDPOINTS = {
+    "static": "serves files",
+    "static_files": "serves files",
+    "logout": "ends the measuring session",
+    "admin_profile": "reads a profile from disk",
+    "download_profile": "reads a profile from disk",
+}
+
+
+def seed_accounts(session, mercury_account, user, start, stop):
+    """
+    Add accounts start..stop-1 with their policies, budgets, transactions and a
+    viewer user each.
+
+    Derived data is then built the way the sync service builds it, and the data
+    and access versions are bumped so cached results are recomputed.
+    """
+    from models.account import Account
+    from models.account_stats import rebuild_account_stats
+    from models.budget import Budget, BudgetCategory
+    from models.data_version import DataVersion
+    from models.filter_catalog import rebuild_filter_catalog
+    from models.receipt_evaluator import refresh_receipt_statuses
+    from models.receipt_policy import ReceiptPolicy
+    from models.transaction import Transaction, refresh_derived_columns
+    from models.role import Role
+    from models.transaction_attachment import TransactionAttachment
+    from models.user import User
+    from models.user_access_version import UserAccessVersion
+
+    now = datetime.now()
+    user_role = session.query(Role).filter_by(name="user").one()
+    account_ids = []
+    for index in range(start, stop):
+        viewer = User(username=f"viewer_{index}", email=f"viewer_{index}@example.com")
+        viewer.set_password("password")
+        viewer.roles.append(user_role)
+        viewer.mercury_accounts.append(mercury_account)
+        session.add(viewer)
+
+        account = Account(
+            id=f"budget_acct_{index}",
+            mercury_account_id=mercury_account.id,
+            name=f"Operating {index}",
+            account_type="checking",
+            balance=10000.0 + index,
+            receipt_required_charges="threshold",
+            receipt_threshold_charges=100.0,
+        )
+        session.add(account)
+        account_ids.append(account.id)
+        session.add(
+            ReceiptPolicy(
+                account_id=account.id,
+                start_date=now - timedelta(days=365),
+                receipt_required_charges="always",
+            )
+        )
+        for number in range(TRANSACTIONS_PER_ACCOUNT):
+            transaction = Transaction(
+                id=f"budget_txn_{index}_{number}",
+                account_id=account.id,
+                amount=2500.0 if number % 6 == 0 else -12.5 * (number + 1),
+                status="sent",
+                kind="debitCardTransaction",
+                counterparty_name=f"Vendor {number % 5}",
+                note=CATEGORIES[number % len(CATEGORIES)],
+                posted_at=now - timedelta(days=5 * number),
+                number_of_attachments=1 if number % 3 == 0 else 0,
+            )
+            session.add(transaction)
+            if number % 3 == 0:
+                session.add(
+                    TransactionAttachment(
+                        id=f"budget_att_{index}_{number}",
+                        transaction_id=transaction.id,
+                        filename="receipt.pdf",
+                    )
+                )
+        budget = Budget(
+            name=f"Budget {index}",
+            mercury_account_id=mercury_account.id,
+            budget_month=date(now.year, now.month, 1),
+            created_by_user_id=user.id,
+        )
+        budget.budget_categories.extend(
+            BudgetCategory(category_name=name, budgeted_amount=500.0)
+            for name in ("Office", "Travel", "Software")
+        )
+        budget.accounts.append(account)
+        session.add(budget)
+    session.commit()
+
+    refresh_derived_columns(session, account_ids)
+    refresh_receipt_statuses(session, account_ids)
+    rebuild_filter_catalog(session, account_ids)
+    rebuild_account_stats(session, account_ids)
+    DataVersion.bump(session, [mercury_account.id])
+    UserAccessVersion.bump_mercury_account_members(session, mercury_account.id)
+    session.commit()
+
+
+def measure(web_app, client, path, user_id):
+    """
+    Request a path with cold caches.
+
+    Returns:
+        dict: Statements executed and ORM rows hydrated by the request thread
+    """
+    web_app.report_cache.clear()
+    web_app.fragment_cache.clear()
+    web_app.facet_count_cache.clear()
+    web_app.access_context_cache.invalidate(user_id)
+    # Chart snapshots and branding are otherwise only re-read after a while
+    web_app.analytics_engine = None
+    web_app.analytics_engine_created = False
+    with client.session_transaction() as flask_session:
+        flask_session.pop("branding_settings", None)
+
+    # Background refreshes run in their own threads and aren't part of the request
+    request_thread = threading.get_ident()
+    counts = {"queries": 0, "rows": 0}
+
+    def on_execute(*args):
+        if threading.get_ident() == request_thread:
+            counts["queries"] += 1
+
+    def on_load(*args):
+        if threading.get_ident() == request_thread:
+            counts["rows"] += 1
+
+    event.listen(web_app.engine, "before_cursor_execute", on_execute)
+    event.listen(web_app.Base, "load", on_load, propagate=True)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(web_app.engine, "before_cursor_execute", on_execute)
+        event.remove(web_app.Base, "load", on_load)
+    assert response.status_code < 400, f"{path} returned {response.status_code}"
+    return counts
+
+
+@pytest.fixture(scope="module")
+def measurements(web_app):
+    """Measure every route against the small dataset, then against the large one."""
+    from models.budget import Budget
+    from models.mercury_account import MercuryAccount
+    from models.role import Role
+    from models.user import User
+
+    session = sessionmaker(bind=web_app.engine, expire_on_commit=False)()
+    user = User(username="budgets", email="budgets@example.com")
+    user.set_password("password")
+    # Every role, so every route renders its full page
+    user.roles.extend(session.query(Role).all())
+    mercury_account = MercuryAccount(name="Budgets Inc", api_key="key")
+    user.mercury_accounts.append(mercury_account)
+    session.add(user)
+    session.commit()
+
+    client = web_app.app.test_client()
+    response = client.post("/login", data={"username": "budgets", "password": "password"})
+    assert response.status_code == 302
+    # The first visit creates the user's settings
+    client.get("/dashboard")
+
+    results = {route: {} for route in ROUTES}
+    seeded = 0
+    for size, accounts in SCALES.items():
+        seed_accounts(session, mercury_account, user, seeded, accounts)
+        seeded = accounts
+        ids = {
+            "account_id": "budget_acct_0",
+            "transaction_id": "budget_txn_0_0",
+            "mercury_account_id": mercury_account.id,
+            "user_id": user.id,
+            "budget_id": session.query(Budget.id).filter_by(name="Budget 0").scalar(),
+            "month": datetime.now().strftime("%Y-%m"),
+        }
+        for route in ROUTES:
+            results[route][size] = measure(web_app, client, route.format(**ids), user.id)
+    session.close()
+
+    if os.environ.get("UPDATE_QUERY_BUDGETS"):
+        with open(BUDGETS_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    return results
+
+
+@pytest.fixture(scope="module")
+def budgets():
+    """Load the checked-in budgets."""
+    with open(BUDGETS_PATH) as f:
+        return json.load(f)
+
+
+class TestQueryBudgets:
+    """Test statement counts and hydrated rows per route."""
+
+    def test_every_get_route_is_measured(self, web_app):
+        """New GET routes should be added to ROUTES (or UNMEASURED_ENDPOINTS)."""
+        adapter = web_app.app.url_map.bind("localhost")
+        ids = dict(account_id="a", transaction_id="t", mercury_account_id=1, user_id=1, budget_id=1, month="m")
+        measured = {adapter.match(route.format(**ids).split("?")[0])[0] for route in ROUTES}
+        endpoints = {
+            rule.endpoint for rule in web_app.app.url_map.iter_rules() if "GET" in rule.methods
+        }
+        assert endpoints - measured - set(UNMEASURED_ENDPOINTS) == set()
+
+    @pytest.mark.parametrize("route", ROUTES)
+    def test_statements_do_not_grow_with_data(self, measurements, route):
+        """A route should run as many statements on the large dataset as on the small one."""
+        small, large = measurements[route]["small"], measurements[route]["large"]
+        assert large["queries"] <= small["queries"], (
+            f"{route} ran {small['queries']} statements with {SCALES['small']} accounts and "
+            f"{large['queries']} with {SCALES['large']}: look for a query run per row (N+1)"
+        )
+
+    @pytest.mark.parametrize("route", ROUTES)
+    def test_route_stays_within_budget(self, measurements, budgets, route):
+        """Statements and hydrated rows should stay within the checked-in budget."""
+        assert route in budgets, f"No budget for {route}; run with UPDATE_QUERY_BUDGETS=1"
+        for size in SCALES:
+            measured, budget = measurements[route][size], budgets[route][size]
+            for metric in ("queries", "rows"):
+                assert measured[metric] <= budget[metric], (
+                    f"{route} on the {size} dataset: {measured[metric]} {metric}, "
+                    f"budget {budget[metric]}; if intended, run with UPDATE_QUERY_BUDGETS=1"
+                )
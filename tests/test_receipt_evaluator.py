@@ -0,0 +1,164 @@
+"""
+Test the batched receipt status evaluator.
+
+These tests verify that ReceiptPolicyIndex resolves the same receipt
+requirements as Account.is_receipt_required_for_amount while loading
+all policies up front.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+from web_app.models.account import Account
+from web_app.models.receipt_policy import ReceiptPolicy
+from web_app.models.transaction import Transaction
+from web_app.models.receipt_evaluator import (
+    ReceiptPolicyIndex,
+    refresh_receipt_statuses,
+    resolve_receipt_statuses,
+)
+
+
+def _create_account(test_db, account_id="acct_1"):
+    account = Account(
+        id=account_id,
+        name="Operating",
+        receipt_required_deposits="none",
+        receipt_required_charges="threshold",
+        receipt_threshold_charges=25.0,
+    )
+    test_db.add(account)
+    test_db.commit()
+    return account
+
+
+class TestReceiptPolicyIndex:
+    """Test the ReceiptPolicyIndex class."""
+
+    def test_matches_account_policy_lookup(self, test_db):
+        """Index resolution should agree with the per-transaction query."""
+        account = _create_account(test_db)
+        now = datetime.now()
+        test_db.add_all(
+            [
+                ReceiptPolicy(
+                    account_id=account.id,
+                    start_date=now - timedelta(days=60),
+                    end_date=now - timedelta(days=30),
+                    receipt_required_deposits="always",
+                    receipt_required_charges="none",
+                ),
+                ReceiptPolicy(
+                    account_id=account.id,
+                    start_date=now - timedelta(days=30),
+                    end_date=None,
+                    receipt_required_deposits="none",
+                    receipt_required_charges="threshold",
+                    receipt_threshold_charges=100.0,
+                ),
+            ]
+        )
+        test_db.commit()
+
+        index = ReceiptPolicyIndex.load(test_db, [account])
+        dates = [None, now - timedelta(days=90), now - timedelta(days=45), now - timedelta(days=5)]
+        for when in dates:
+            for amount in (-150.0, -50.0, 10.0, 500.0):
+                assert index.is_receipt_required(account.id, amount, when) == (
+                    account.is_receipt_required_for_amount(amount, when)
+                )
+
+    def test_statuses_for_batch_uses_single_query(self, test_db):
+        """A whole batch of transactions should cost one policy query."""
+        account = _create_account(test_db)
+        test_db.add(
+            ReceiptPolicy(
+                account_id=account.id,
+                start_date=datetime.now() - timedelta(days=10),
+                receipt_required_deposits="none",
+                receipt_required_charges="always",
+            )
+        )
+        transactions = [
+            Transaction(
+                id=f"txn_{i}",
+                account_id=account.id,
+                amount=-10.0 * (i + 1),
+                posted_at=datetime.now() - timedelta(days=1),
+                number_of_attachments=i % 2,
+            )
+            for i in range(20)
+        ]
+        test_db.add_all(transactions)
+        test_db.commit()
+        # Reload expired attributes so only the evaluator's queries are counted
+        for obj in [account] + transactions:
+            test_db.refresh(obj)
+
+        statements = []
+        engine = test_db.get_bind()
+
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            statuses = ReceiptPolicyIndex.load(test_db, [account]).statuses_for(transactions)
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+
+        assert len(statements) == 1
+        assert statuses["txn_0"] == "required_missing"
+        assert statuses["txn_1"] == "required_present"
+
+    def test_unknown_account_has_no_status(self, test_db):
+        """Transactions for accounts outside the index resolve to None."""
+        index = ReceiptPolicyIndex([], [])
+        transaction = Transaction(id="txn_x", account_id="missing", amount=-5.0)
+        assert index.status_for(transaction) is None
+
+
+class TestMaterializedReceiptStatus:
+    """Test maintenance of the materialized Transaction.receipt_status column."""
+
+    def test_refresh_backfills_and_tracks_policy_changes(self, test_db):
+        """Refresh should fill missing statuses and pick up new account settings."""
+        account = _create_account(test_db)
+        test_db.add_all(
+            [
+                Transaction(id="txn_small", account_id=account.id, amount=-10.0),
+                Transaction(id="txn_large", account_id=account.id, amount=-50.0),
+            ]
+        )
+        test_db.commit()
+
+        assert refresh_receipt_statuses(test_db, batch_size=1) == 2
+        assert test_db.get(Transaction, "txn_small").receipt_status == "optional_missing"
+        assert test_db.get(Transaction, "txn_large").receipt_status == "required_missing"
+
+        # Nothing changed, so nothing is rewritten
+        changed_account_ids = set()
+        assert refresh_receipt_statuses(test_db, changed_account_ids=changed_account_ids) == 0
+        assert not changed_account_ids
+
+        account.receipt_required_charges = "always"
+        test_db.commit()
+        assert (
+            refresh_receipt_statuses(test_db, account_ids=[account.id], changed_account_ids=changed_account_ids)
+            == 1
+        )
+        assert test_db.get(Transaction, "txn_small").receipt_status == "required_missing"
+        assert changed_account_ids == {account.id}
+
+    def test_resolve_prefers_materialized_status(self, test_db):
+        """Stored statuses are used as-is; unevaluated rows fall back to the index."""
+        account = _create_account(test_db)
+        stored = Transaction(
+            id="txn_stored", account_id=account.id, amount=-5.0, receipt_status="required_present"
+        )
+        pending = Transaction(id="txn_pending", account_id=account.id, amount=-100.0)
+        test_db.add_all([stored, pending])
+        test_db.commit()
+
+        statuses = resolve_receipt_statuses(test_db, [account], [stored, pending])
+        assert statuses == {"txn_stored": "required_present", "txn_pending": "required_missing"}
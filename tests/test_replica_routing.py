@@ -0,0 +1,223 @@
+"""
+Test routing reads to the read replica.
+
+These tests build database configurations over two SQLite files standing in for
+the primary and the replica, holding different values for the same setting, and
+check where reads and writes go, the fallback to the primary when the replica
+lags or is down, and the app's routing of read-only views with read-your-writes
+pinning after a user's own POST and access checks that stay on the primary.
+"""
+
+import sqlite3
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+
+
+@pytest.fixture
+def databases(web_app, tmp_path, monkeypatch):
+    """
+    Provide a DatabaseConfig whose primary and replica hold different "source" settings.
+
+    Returns:
+        function: Builds the configuration, optionally with another replica URL
+    """
+    import database_config
+    from models.base import Base
+    from models.system_setting import SystemSetting
+
+    urls = {}
+    for name in ("primary", "replica"):
+        urls[name] = f"sqlite:///{tmp_path / f'{name}.db'}"
+        engine = create_engine(urls[name])
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(SystemSetting.__table__.insert(), {"key": "source", "value": name})
+        engine.dispose()
+
+    configs = []
+
+    def build(replica_url=urls["replica"]):
+        monkeypatch.setenv("DATABASE_URL", urls["primary"])
+        monkeypatch.setenv("DATABASE_REPLICA_URL", replica_url)
+        config = database_config.DatabaseConfig()
+        configs.append(config)
+        return config
+
+    yield build
+    for config in configs:
+        config.end_replica_reads()
+        config.close_session()
+
+
+def read_source(config):
+    """Read the "source" setting in a new unit of work."""
+    from models.system_setting import SystemSetting
+
+    try:
+        return SystemSetting.get_value(config.Session(), "source")
+    finally:
+        config.close_session()
+
+
+class TestReplicaRouting:
+    """Test where a configuration sends reads and writes."""
+
+    def test_reads_go_to_the_replica_only_while_enabled(self, databases):
+        """Reads should use the replica between start_replica_reads and end_replica_reads."""
+        config = databases()
+        assert read_source(config) == "primary"
+        assert config.start_replica_reads() is True
+        assert read_source(config) == "replica"
+        config.end_replica_reads()
+        assert read_source(config) == "primary"
+
+    def test_writes_go_to_the_primary(self, databases):
+        """Flushes during replica reads should be written to the primary."""
+        from models.system_setting import SystemSetting
+
+        config = databases()
+        config.start_replica_reads()
+        SystemSetting.set_value(config.Session(), "written", "yes")
+        config.close_session()
+        config.end_replica_reads()
+
+        with config.engine.connect() as connection:
+            assert connection.execute(SystemSetting.__table__.select().where(SystemSetting.key == "written")).first()
+        with config.replica_engine.connect() as connection:
+            assert not connection.execute(
+                SystemSetting.__table__.select().where(SystemSetting.key == "written")
+            ).first()
+
+    @pytest.mark.parametrize("lag, error", [(120.0, "lagging 120s"), (None, "replication stopped")])
+    def test_lagging_replica_falls_back_to_the_primary(self, databases, monkeypatch, lag, error):
+        """A replica too far behind, or not replicating, should not be used."""
+        config = databases()
+        monkeypatch.setattr(config.replica_monitor, "measure_lag", lambda: lag)
+        assert config.start_replica_reads() is False
+        assert read_source(config) == "primary"
+        assert config.replica_monitor.error == error
+
+    def test_unreachable_replica_falls_back_to_the_primary(self, databases, tmp_path):
+        """A replica that can't be connected to should not be used."""
+        config = databases(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+        assert config.start_replica_reads() is False
+        assert config.replica_monitor.error.startswith("unreachable")
+        assert read_source(config) == "primary"
+
+    def test_replica_is_checked_again_after_the_interval(self, databases, monkeypatch):
+        """The last check should be reused until check_seconds have passed."""
+        config = databases()
+        monitor = config.replica_monitor
+        assert monitor.available()
+        monkeypatch.setattr(monitor, "measure_lag", lambda: 120.0)
+        assert monitor.available()
+        monitor.checked_at = time.time() - monitor.check_seconds
+        assert not monitor.available()
+        monkeypatch.setattr(monitor, "measure_lag", lambda: 1.0)
+        monitor.checked_at = 0.0
+        assert monitor.available()
+        assert monitor.lag_seconds == 1.0
+
+
+class TestAppReplicaRouting:
+    """Test which requests the app serves from the replica."""
+
+    @pytest.fixture
+    def replica_statements(self, web_app, monkeypatch):
+        """Configure the app with a replica of its database and count the replica's statements."""
+        import database_config
+
+        replica_engine = create_engine(web_app.engine.url)
+        monitor = database_config.ReplicaMonitor(replica_engine)
+        monkeypatch.setattr(web_app.db_config, "replica_engine", replica_engine)
+        monkeypatch.setattr(web_app.db_config, "replica_monitor", monitor)
+        counts = {"statements": 0}
+
+        def on_execute(*args):
+            counts["statements"] += 1
+
+        event.listen(replica_engine, "before_cursor_execute", on_execute)
+        yield counts
+        replica_engine.dispose()
+
+    @pytest.fixture
+    def client(self, web_app, replica_statements):
+        """Provide a test client logged in as the seeded admin user, past the pinning period."""
+        client = web_app.app.test_client()
+        response = client.post("/login", data={"username": "admin", "password": "password"})
+        assert response.status_code == 302
+        client.get("/dashboard")
+        with client.session_transaction() as flask_session:
+            assert flask_session["primary_until"] > time.time()
+            flask_session["primary_until"] = 0
+        return client
+
+    @pytest.mark.parametrize("path", ["/transactions", "/reports", "/api/budget_data", "/budgets/reports"])
+    def test_read_only_views_use_the_replica(self, client, replica_statements, path):
+        """Read-only views should run their queries on the replica."""
+        replica_statements["statements"] = 0
+        assert client.get(path).status_code == 200
+        assert replica_statements["statements"] > 0
+
+    def test_other_views_use_the_primary(self, client, replica_statements):
+        """Views not marked as read-only should only query the primary."""
+        replica_statements["statements"] = 0
+        assert client.get("/dashboard").status_code == 200
+        assert client.get("/settings").status_code == 200
+        assert replica_statements["statements"] == 0
+
+    def test_reads_are_pinned_to_the_primary_after_a_post(self, client, replica_statements):
+        """After a user's own POST, their read-only views should read from the primary."""
+        assert client.post("/admin/performance/reset").status_code == 302
+        replica_statements["statements"] = 0
+        assert client.get("/reports").status_code == 200
+        assert replica_statements["statements"] == 0
+
+        with client.session_transaction() as flask_session:
+            flask_session["primary_until"] = time.time() - 1
+        assert client.get("/reports").status_code == 200
+        assert replica_statements["statements"] > 0
+
+    def test_locked_user_is_refused_while_the_replica_is_behind(self, web_app, tmp_path, monkeypatch):
+        """A lock should apply at once even when the replica still has the user unlocked."""
+        import database_config
+        from models.mercury_account import MercuryAccount
+        from models.role import Role
+        from models.user import User
+
+        session = web_app.Session()
+        try:
+            viewer = User(username="stale_viewer", email="stale_viewer@example.com")
+            viewer.set_password("password")
+            viewer.roles.extend(session.query(Role).filter(Role.name.in_(["user", "reports"])).all())
+            viewer.mercury_accounts.append(session.query(MercuryAccount).filter_by(name="Company").one())
+            session.add(viewer)
+            session.commit()
+            viewer_id = viewer.id
+        finally:
+            web_app.db_config.close_session()
+
+        client = web_app.app.test_client()
+        assert client.post("/login", data={"username": "stale_viewer", "password": "password"}).status_code == 302
+        with client.session_transaction() as flask_session:
+            flask_session["primary_until"] = 0
+        assert client.get("/reports").status_code == 200
+
+        # The replica stops replicating here: it keeps the user unlocked
+        replica_path = tmp_path / "stale.db"
+        with sqlite3.connect(web_app.engine.url.database) as primary, sqlite3.connect(replica_path) as replica:
+            primary.backup(replica)
+        replica_engine = create_engine(f"sqlite:///{replica_path}")
+        monkeypatch.setattr(web_app.db_config, "replica_engine", replica_engine)
+        monkeypatch.setattr(web_app.db_config, "replica_monitor", database_config.ReplicaMonitor(replica_engine))
+
+        admin = web_app.app.test_client()
+        assert admin.post("/login", data={"username": "admin", "password": "password"}).status_code == 302
+        assert admin.post(f"/admin/users/{viewer_id}/lock").status_code == 302
+
+        response = client.get("/reports")
+        replica_engine.dispose()
+        assert response.status_code == 302
+        assert "/login" in response.headers["Location"]
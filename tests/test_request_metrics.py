@@ -0,0 +1,121 @@
+"""
+Test the per-request SQL instrumentation.
+
+These tests verify statement fingerprints, N+1 detection, the Server-Timing
+value, endpoint percentiles and the ring buffer of slow requests.
+"""
+
+from web_app.models.request_metrics import (
+    RequestMetrics,
+    RequestProfile,
+    end_request_profile,
+    fingerprint_statement,
+    percentile,
+    record_pool_wait,
+    record_statement,
+    start_request_profile,
+)
+
+
+class TestFingerprint:
+    """Test normalizing statements."""
+
+    def test_values_and_parameters_are_normalized(self):
+        """Statements differing only in values should share a fingerprint."""
+        first = fingerprint_statement(
+            "SELECT * FROM transactions\n WHERE account_id = 'acct_1' AND amount > 10.5 LIMIT 20"
+        )
+        second = fingerprint_statement(
+            "SELECT * FROM transactions WHERE account_id = 'o''brien' AND amount > 3 LIMIT 50"
+        )
+        assert first == second == "SELECT * FROM transactions WHERE account_id = ? AND amount > ? LIMIT ?"
+
+    def test_parameter_lists_are_collapsed(self):
+        """IN lists of any length and any parameter style should compare equal."""
+        assert (
+            fingerprint_statement("SELECT id FROM accounts WHERE id IN (?, ?, ?)")
+            == fingerprint_statement("SELECT id FROM accounts WHERE id IN (%(id_1_1)s, %(id_1_2)s)")
+            == "SELECT id FROM accounts WHERE id IN (?+)"
+        )
+
+
+class TestRequestProfile:
+    """Test recording the statements of a request."""
+
+    def test_repeated_statements_and_server_timing(self):
+        """Statements run threshold times or more should be reported as repeated."""
+        profile = RequestProfile()
+        for policy_id in range(6):
+            profile.record(f"SELECT * FROM receipt_policies WHERE id = {policy_id}", 0.001)
+        profile.record("SELECT * FROM accounts", 0.004)
+
+        assert profile.query_count == 7
+        assert [item[:2] for item in profile.repeated_statements(5)] == [
+            ("SELECT * FROM receipt_policies WHERE id = ?", 6)
+        ]
+        assert profile.repeated_statements(7) == []
+        assert profile.server_timing(0.05) == 'db;dur=10.0;desc="7 queries", pool;dur=0.0, app;dur=50.0'
+
+    def test_statements_outside_a_request_are_ignored(self):
+        """Only statements executed while a profile is active should be counted."""
+        record_statement("SELECT 1", 0.001)
+        profile = start_request_profile()
+        record_statement("SELECT 1", 0.001)
+        assert end_request_profile() is profile
+        record_statement("SELECT 1", 0.001)
+        assert profile.query_count == 1
+        assert end_request_profile() is None
+
+    def test_pool_wait_is_reported(self):
+        """Time spent waiting for pooled connections should add up in Server-Timing."""
+        record_pool_wait(0.5)
+        profile = start_request_profile()
+        record_pool_wait(0.002)
+        record_pool_wait(0.0005)
+        end_request_profile()
+        assert profile.pool_wait_seconds == 0.0025
+        assert "pool;dur=2.5," in profile.server_timing(0.01)
+
+
+class TestRequestMetrics:
+    """Test endpoint statistics."""
+
+    def test_percentiles(self):
+        """Percentiles should use the nearest-rank method."""
+        values = list(range(1, 101))
+        assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50, 95, 99)
+        assert percentile([], 50) == 0.0
+
+    def test_endpoint_stats_and_slow_requests(self):
+        """Requests should be summarized per endpoint and slow ones kept in a ring buffer."""
+        metrics = RequestMetrics(max_samples=3, max_slow_requests=2, slow_request_seconds=0.5)
+        fast = RequestProfile()
+        fast.record("SELECT 1", 0.001)
+        for seconds in (0.1, 0.2, 0.6, 0.7):
+            metrics.record("dashboard", "GET", "/dashboard", seconds, fast)
+        metrics.record("accounts", "GET", "/accounts", 0.05, fast)
+
+        stats = {item["endpoint"]: item for item in metrics.endpoint_stats()}
+        assert stats["dashboard"]["requests"] == 4
+        assert stats["dashboard"]["samples"] == 3
+        assert (stats["dashboard"]["p50"], stats["dashboard"]["p99"]) == (0.6, 0.7)
+        assert stats["dashboard"]["avg_queries"] == 1
+        assert metrics.endpoint_stats()[0]["endpoint"] == "dashboard"
+
+        n_plus_one = RequestProfile()
+        for account_id in range(5):
+            n_plus_one.record(f"SELECT * FROM accounts WHERE id = {account_id}", 0.001)
+        assert metrics.record("accounts", "GET", "/accounts", 0.01, n_plus_one)
+
+        slow = metrics.slow_requests()
+        assert [(item["endpoint"], item["seconds"]) for item in slow] == [
+            ("accounts", 0.01),
+            ("dashboard", 0.7),
+        ]
+        assert slow[0]["repeated"][0][:2] == ("SELECT * FROM accounts WHERE id = ?", 5)
+        assert {item["endpoint"]: item for item in metrics.endpoint_stats()}["accounts"][
+            "repeated_requests"
+        ] == 1
+
+        metrics.reset()
+        assert metrics.endpoint_stats() == [] and metrics.slow_requests() == []
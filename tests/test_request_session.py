@@ -0,0 +1,110 @@
+"""
+Test that each request uses a single database session and connection.
+
+These tests import the real web application against a temporary SQLite database
+and count the connections each view checks out of the pool: the login loader,
+decorators, context processors and the view itself should share one.
+"""
+
+import pytest
+from sqlalchemy import event
+
+READ_VIEWS = [
+    "/dashboard",
+    "/accounts",
+    "/transactions",
+    "/reports",
+    "/budgets",
+    "/budgets/reports",
+    "/api/budget_data",
+    "/api/expense_breakdown",
+    "/admin/users",
+    "/admin/settings",
+    "/settings",
+    "/register",
+    "/health",
+]
+
+
+@pytest.fixture
+def checkouts(web_app):
+    """Record pool checkouts and the most connections held at once."""
+    counts = {"checkouts": 0, "held": 0, "max_held": 0}
+
+    def on_checkout(*args):
+        counts["checkouts"] += 1
+        counts["held"] += 1
+        counts["max_held"] = max(counts["max_held"], counts["held"])
+
+    def on_checkin(*args):
+        counts["held"] -= 1
+
+    event.listen(web_app.engine, "checkout", on_checkout)
+    event.listen(web_app.engine, "checkin", on_checkin)
+    yield counts
+    event.remove(web_app.engine, "checkout", on_checkout)
+    event.remove(web_app.engine, "checkin", on_checkin)
+
+
+@pytest.fixture
+def client(web_app):
+    """Provide a test client logged in as the seeded admin user."""
+    client = web_app.app.test_client()
+    response = client.post("/login", data={"username": "admin", "password": "password"})
+    assert response.status_code == 302
+    # The first dashboard visit creates the user's settings
+    client.get("/dashboard")
+    return client
+
+
+class TestRequestSession:
+    """Test connection use per request."""
+
+    @pytest.mark.parametrize("path", READ_VIEWS)
+    def test_view_borrows_one_connection_at_most(self, client, checkouts, path):
+        """Read views should check out at most one connection for the whole request."""
+        checkouts.update(checkouts=0, max_held=0)
+        response = client.get(path)
+        assert response.status_code == 200
+        assert checkouts["checkouts"] <= 1
+        assert checkouts["held"] == 0
+
+    def test_server_timing_reports_queries(self, client, web_app):
+        """Responses should carry the request's query count and DB time."""
+        response = client.get("/accounts")
+        assert 'desc="' in response.headers["Server-Timing"]
+        assert any(
+            stats["endpoint"] == "accounts" for stats in web_app.request_metrics.endpoint_stats()
+        )
+        assert client.get("/admin/performance").status_code == 200
+
+    def test_requested_profile_is_saved_for_super_admins(self, client, web_app):
+        """A request asking for a profile should save one and link to it."""
+        response = client.get("/accounts?_profile=1")
+        profile_id = response.headers["X-Profile-Id"]
+        assert web_app.profiler.store.load_metadata(profile_id)["label"] == "GET /accounts"
+
+        assert client.get("/admin/profiles").status_code == 200
+        assert client.get(f"/admin/profiles/{profile_id}").status_code == 200
+        download = client.get(f"/admin/profiles/{profile_id}/download")
+        assert download.status_code == 200
+        assert f'filename="{profile_id}.folded"' in download.headers["Content-Disposition"]
+
+    def test_profile_requests_from_anonymous_users_are_ignored(self, web_app, monkeypatch):
+        """Only super admins should be able to start profiles on demand."""
+        started = []
+        monkeypatch.setattr(web_app.profiler, "should_sample", lambda: False)
+        monkeypatch.setattr(web_app.profiler, "start", lambda: started.append(True))
+
+        response = web_app.app.test_client().get("/login", headers={"X-Profile": "1"})
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+        assert not started
+
+    def test_writes_hold_one_connection_at_a_time(self, client, checkouts):
+        """Views that commit should never hold more than one connection at once."""
+        checkouts.update(checkouts=0, max_held=0)
+        response = client.post("/login", data={"username": "admin", "password": "password"})
+        assert response.status_code == 302
+        assert checkouts["max_held"] == 1
+        assert checkouts["held"] == 0
@@ -0,0 +1,103 @@
+"""
+Test the result cache used by the report helpers.
+
+These tests verify LRU eviction, expiry, data-version invalidation, the
+memoize counters and sharing results through the SQLite backend.
+"""
+
+from web_app.models.result_cache import ResultCache, SQLiteCacheBackend
+
+
+class TestResultCache:
+    """Test storing and invalidating results."""
+
+    def test_version_mismatch_is_a_miss(self):
+        """Results computed from another data version should not be returned."""
+        cache = ResultCache()
+        cache.set(("report", 1), ((1, 5),), {"total": 10})
+
+        assert cache.get(("report", 1), ((1, 5),)) == (True, {"total": 10})
+        assert cache.get(("report", 1), ((1, 6),)) == (False, None)
+        assert cache.get(("report", 1), ((1, 5),)) == (False, None)
+
+    def test_expired_results_are_misses(self):
+        """Results older than the TTL should not be returned."""
+        cache = ResultCache(ttl_seconds=0)
+        cache.set(("report",), None, [])
+        assert cache.get(("report",), None) == (False, None)
+
+    def test_lru_eviction(self):
+        """The least recently used result should be evicted first."""
+        cache = ResultCache(max_entries=2)
+        for name in ("a", "b"):
+            cache.set((name,), None, name)
+        cache.get(("a",), None)
+        cache.set(("c",), None, "c")
+        assert cache.get(("b",), None) == (False, None)
+        assert cache.get(("a",), None) == (True, "a")
+        assert cache.stats()["entries"] == 2
+
+    def test_hits_return_copies(self):
+        """Modifying a returned result should not change the cached one."""
+        cache = ResultCache()
+        cache.set(("report",), None, {"rows": [1, 2]})
+        _, value = cache.get(("report",), None)
+        value["rows"].append(3)
+        assert cache.get(("report",), None) == (True, {"rows": [1, 2]})
+
+
+class TestMemoize:
+    """Test the memoize decorator."""
+
+    def test_key_version_and_counters(self):
+        """Calls should be cached per normalized key and version, and counted."""
+        cache = ResultCache()
+        calls = []
+        versions = {"current": 1}
+
+        @cache.memoize(
+            lambda statuses: tuple(sorted(statuses)),
+            lambda statuses: versions["current"],
+        )
+        def count_statuses(statuses):
+            calls.append(statuses)
+            return len(statuses)
+
+        assert count_statuses(["sent", "pending"]) == 2
+        assert count_statuses(["pending", "sent"]) == 2
+        versions["current"] = 2
+        assert count_statuses(["sent", "pending"]) == 2
+        assert len(calls) == 2
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+        assert stats["functions"][count_statuses.__qualname__] == {"hits": 1, "misses": 2}
+        assert count_statuses.uncached(["sent"]) == 1
+
+
+class TestSQLiteCacheBackend:
+    """Test sharing results between caches through a SQLite file."""
+
+    def test_results_shared_between_caches(self, tmp_path):
+        """A result set by one cache should be found by another with the same file."""
+        path = str(tmp_path / "reports.sqlite")
+        first = ResultCache(shared_backend=SQLiteCacheBackend(path))
+        second = ResultCache(shared_backend=SQLiteCacheBackend(path))
+
+        first.set(("report", 1), 3, {"total": 10})
+        assert second.get(("report", 1), 3) == (True, {"total": 10})
+        assert second.get(("report", 1), 4) == (False, None)
+        assert second.get(("report", 2), 3) == (False, None)
+
+    def test_expiry_and_max_entries(self, tmp_path):
+        """Expired rows should not be returned and old rows beyond the limit evicted."""
+        backend = SQLiteCacheBackend(str(tmp_path / "reports.sqlite"), max_entries=2)
+        backend.set("expired", 1, timeout=-1)
+        assert backend.get("expired") is None
+
+        for index, key in enumerate(("a", "b", "c")):
+            backend.set(key, key, timeout=100 + index)
+        assert backend.get("a") is None
+        assert backend.get("c") == "c"
+        backend.delete("c")
+        assert backend.get("c") is None
@@ -0,0 +1,127 @@
+"""
+Test full-text transaction search.
+
+These tests verify the search syntax parser and that searches against the
+SQLite FTS5 index filter, rank and stay in sync with the transactions table.
+"""
+
+from datetime import date, datetime
+
+from web_app.models.account import Account
+from web_app.models.transaction import Transaction
+from web_app.models.transaction_search import SearchQuery, apply_transaction_search
+
+
+def _create_transactions(test_db):
+    test_db.add(Account(id="acct_1", name="Operating"))
+    for txn_id, amount, description, counterparty, note, posted_at in [
+        ("txn_1", -12.5, "Blue Bottle Coffee", "Blue Bottle", "Meals", datetime(2025, 1, 5)),
+        ("txn_2", -240.0, "Coffee beans wholesale", "Roasters Inc", "Office/Kitchen", datetime(2025, 1, 20)),
+        ("txn_3", -89.99, "Flight to Denver", "United Airlines", "Travel/Flights", datetime(2025, 2, 3)),
+        ("txn_4", 15.0, "Refund coffee order", "Blue Bottle", "Meals", datetime(2025, 2, 10)),
+        ("txn_5", -45.0, "Café supplies", "Corner Café", None, datetime(2025, 3, 1)),
+    ]:
+        transaction = Transaction(
+            id=txn_id,
+            account_id="acct_1",
+            amount=amount,
+            description=description,
+            counterparty_name=counterparty,
+            note=note,
+            status="sent",
+            posted_at=posted_at,
+        )
+        transaction.update_derived_columns()
+        test_db.add(transaction)
+    test_db.commit()
+
+
+def _search(test_db, search_text):
+    query, ordering = apply_transaction_search(
+        test_db.query(Transaction), SearchQuery.parse(search_text), "sqlite"
+    )
+    if ordering is not None:
+        query = query.order_by(ordering, Transaction.id)
+    else:
+        query = query.order_by(Transaction.id)
+    return [transaction.id for transaction in query]
+
+
+class TestSearchQuery:
+    """Test parsing the search syntax."""
+
+    def test_terms_phrases_and_exclusions(self):
+        """Words, quoted phrases and negated terms should be separated."""
+        search = SearchQuery.parse('Coffee "blue  bottle" -refund -"gift card" vendor:acme')
+        assert search.terms == ["coffee", "vendor", "acme"]
+        assert search.phrases == [["blue", "bottle"]]
+        assert search.excluded == [["refund"], ["gift", "card"]]
+        assert search.has_text
+
+    def test_amount_filters(self):
+        """Amounts should be parsed as absolute bounds."""
+        search = SearchQuery.parse("amount:$1,200")
+        assert (search.amount_min, search.amount_max) == (1200.0, 1200.0)
+        search = SearchQuery.parse("amount:10..50.5")
+        assert (search.amount_min, search.amount_max) == (10.0, 50.5)
+        search = SearchQuery.parse("amount:>100")
+        assert (search.amount_min, search.amount_max) == (100.01, None)
+        search = SearchQuery.parse("amount:<=20")
+        assert (search.amount_min, search.amount_max) == (None, 20.0)
+        assert not search.has_text
+
+    def test_date_filters(self):
+        """Dates should be parsed into a half-open effective date range."""
+        search = SearchQuery.parse("date:2025-01")
+        assert (search.date_from, search.date_to) == (date(2025, 1, 1), date(2025, 2, 1))
+        search = SearchQuery.parse("date:2024-12-15..2025-02")
+        assert (search.date_from, search.date_to) == (date(2024, 12, 15), date(2025, 3, 1))
+        search = SearchQuery.parse("date:>2025-01-31")
+        assert (search.date_from, search.date_to) == (date(2025, 2, 1), None)
+        search = SearchQuery.parse("date:<2025-02")
+        assert (search.date_from, search.date_to) == (None, date(2025, 2, 1))
+
+    def test_invalid_filters_are_searched_as_text(self):
+        """Filters that can't be parsed should fall back to text terms."""
+        search = SearchQuery.parse("amount:lots date:yesterday")
+        assert search.terms == ["amount", "lots", "date", "yesterday"]
+        assert search.amount_min is None and search.date_from is None
+
+
+class TestTransactionSearch:
+    """Test searching transactions through the SQLite FTS5 index."""
+
+    def test_prefix_phrase_and_exclusion(self, test_db):
+        """Terms should match word prefixes across columns, phrases exactly."""
+        _create_transactions(test_db)
+        assert set(_search(test_db, "coff")) == {"txn_1", "txn_2", "txn_4"}
+        assert _search(test_db, '"blue bottle" -refund') == ["txn_1"]
+        assert _search(test_db, "flights") == ["txn_3"]
+        assert _search(test_db, "cafe") == ["txn_5"]
+        assert _search(test_db, "coffee denver") == []
+
+    def test_amount_and_date_filters(self, test_db):
+        """Amount and date filters should combine with text terms."""
+        _create_transactions(test_db)
+        assert _search(test_db, "amount:>=45") == ["txn_2", "txn_3", "txn_5"]
+        assert _search(test_db, "coffee amount:10..20") == ["txn_1", "txn_4"]
+        assert _search(test_db, "coffee date:2025-01") == ["txn_1", "txn_2"]
+        assert _search(test_db, "date:2025-02-10..") == ["txn_4", "txn_5"]
+
+    def test_ranking(self, test_db):
+        """Transactions matching a term in more places should rank first."""
+        _create_transactions(test_db)
+        assert _search(test_db, "blue")[0] in ("txn_1", "txn_4")
+        assert _search(test_db, "blue bottle coffee")[0] == "txn_1"
+
+    def test_index_follows_changes(self, test_db):
+        """Updates and deletes should be reflected in search results."""
+        _create_transactions(test_db)
+        transaction = test_db.get(Transaction, "txn_3")
+        transaction.description = "Train to Boston"
+        test_db.delete(test_db.get(Transaction, "txn_1"))
+        test_db.commit()
+
+        assert _search(test_db, "denver") == []
+        assert _search(test_db, "boston") == ["txn_3"]
+        assert _search(test_db, "bottle") == ["txn_4"]
@@ -0,0 +1,35 @@
+"""Add materialized receipt_status column to transactions
+
+Revision ID: c3d1e7a9f2b4
+Revises: b5ed68a6aa24
+Create Date: 2025-07-12 10:14:03.418265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d1e7a9f2b4'
+down_revision: Union[str, Sequence[str], None] = 'b5ed68a6aa24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add receipt_status and an index for compliance filtering.
+
+    Existing rows are left NULL and backfilled in batches by the sync service
+    (see MercuryBankSyncer.refresh_receipt_statuses).
+    """
+    op.add_column('transactions', sa.Column('receipt_status', sa.String(length=20), nullable=True))
+    op.create_index('idx_transactions_account_receipt_status', 'transactions',
+                    ['account_id', 'receipt_status'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop receipt_status and its index."""
+    op.drop_index('idx_transactions_account_receipt_status', table_name='transactions')
+    op.drop_column('transactions', 'receipt_status')
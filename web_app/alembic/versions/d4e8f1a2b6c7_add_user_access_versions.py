@@ -0,0 +1,36 @@
+"""Add user_access_versions table for permission cache invalidation
+
+Revision ID: d4e8f1a2b6c7
+Revises: c3d1e7a9f2b4
+Create Date: 2025-07-13 09:02:41.557120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e8f1a2b6c7'
+down_revision: Union[str, Sequence[str], None] = 'c3d1e7a9f2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create user_access_versions.
+
+    user_id has no foreign key because the users table may be a view.
+    """
+    op.create_table('user_access_versions',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    """Drop user_access_versions."""
+    op.drop_table('user_access_versions')
@@ -0,0 +1,42 @@
+"""Add transaction_filter_catalog table for filter dropdown values
+
+Revision ID: e5f9a3c7d1b8
+Revises: d4e8f1a2b6c7
+Create Date: 2025-07-14 10:21:05.318442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f9a3c7d1b8'
+down_revision: Union[str, Sequence[str], None] = 'd4e8f1a2b6c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create transaction_filter_catalog.
+
+    The catalog is populated by the sync service, which rebuilds accounts that
+    have transactions but no catalog rows yet.
+    """
+    op.create_table('transaction_filter_catalog',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('account_id', sa.String(length=255), nullable=False),
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.Text(), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_filter_catalog_account_dimension', 'transaction_filter_catalog', ['account_id', 'dimension'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop transaction_filter_catalog."""
+    op.drop_index('idx_filter_catalog_account_dimension', table_name='transaction_filter_catalog')
+    op.drop_table('transaction_filter_catalog')
@@ -0,0 +1,38 @@
+"""Add normalized category and effective date columns to transactions
+
+Revision ID: f6a0b4d8e2c9
+Revises: e5f9a3c7d1b8
+Create Date: 2025-07-15 08:47:19.904213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a0b4d8e2c9'
+down_revision: Union[str, Sequence[str], None] = 'e5f9a3c7d1b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add main_category, sub_category and effective_date to transactions.
+
+    Existing rows are backfilled in batches by the sync service
+    (see models.transaction.refresh_derived_columns).
+    """
+    op.add_column('transactions', sa.Column('main_category', sa.String(length=255), nullable=True))
+    op.add_column('transactions', sa.Column('sub_category', sa.String(length=255), nullable=True))
+    op.add_column('transactions', sa.Column('effective_date', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('idx_transactions_account_main_category_date', 'transactions', ['account_id', 'main_category', 'effective_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Remove the derived category columns."""
+    op.drop_index('idx_transactions_account_main_category_date', table_name='transactions')
+    op.drop_column('transactions', 'effective_date')
+    op.drop_column('transactions', 'sub_category')
+    op.drop_column('transactions', 'main_category')
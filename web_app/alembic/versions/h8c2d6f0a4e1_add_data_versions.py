@@ -0,0 +1,37 @@
+"""Add data_versions table for per-Mercury-account data change stamps
+
+Revision ID: h8c2d6f0a4e1
+Revises: g7b1c5e9f3d0
+Create Date: 2025-07-24 14:31:08.216947
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'h8c2d6f0a4e1'
+down_revision: Union[str, Sequence[str], None] = 'g7b1c5e9f3d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create data_versions.
+
+    Groups without a row are at version 0; the sync service creates rows as it
+    commits changes.
+    """
+    op.create_table('data_versions',
+    sa.Column('mercury_account_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.PrimaryKeyConstraint('mercury_account_id')
+    )
+
+
+def downgrade() -> None:
+    """Drop data_versions."""
+    op.drop_table('data_versions')
@@ -23,16 +23,19 @@ from flask_login import (
     current_user,
 )
 from werkzeug.security import check_password_hash, generate_password_hash
+from markupsafe import Markup
 from sqlalchemy import create_engine, func, extract, text
-from sqlalchemy.orm import sessionmaker, joinedload
+from sqlalchemy.orm import sessionmaker, joinedload, selectinload
 from datetime import datetime, timedelta
-from functools import wraps
+from functools import partial, wraps
 import os
 import json
 import csv
 import io
 import logging
 import hashlib
+import time
+import threading
 from collections import defaultdict
 from functools import wraps
 
@@ -44,90 +47,56 @@ from models.account import Account
 from models.transaction import Transaction
 from models.transaction_attachment import TransactionAttachment
 from models.system_setting import SystemSetting
-from models.budget import Budget, BudgetCategory
+from models.budget import (
+    Budget,
+    BudgetCategory,
+    calculate_budgets_progress,
+    get_budget_report_data,
+    get_budget_report_transactions,
+)
 from models.role import Role
 from models.base import Base
+from models.access_context import AccessContext, AccessContextCache
+from models.facets import FacetCountCache, facet_count_for, facet_counts
+from models.result_cache import ResultCache, SQLiteCacheBackend
+from models.filter_catalog import load_filter_options
+from models.transaction import parse_category
+from models.transaction_search import SearchQuery, apply_transaction_search
+from models.user_access_version import UserAccessVersion
+from models.data_version import DataVersion
+from models.account_stats import load_account_stats, refresh_account_stats
+from models.request_metrics import RequestMetrics, end_request_profile, start_request_profile
+from models.profiling import build_flame_tree, create_profiler, top_frames
+from models.receipt_evaluator import (
+    RECEIPT_STATUSES,
+    refresh_receipt_statuses,
+    resolve_receipt_statuses,
+)
 
 # Import performance configuration
 from performance_config import apply_performance_optimizations
 
 # Import optimized database configuration  
-from database_config import engine, Session, get_db_session, db_config
+from database_config import engine, Session, get_db_session, db_config, advisory_lock
 
 # Sub-category helper functions
-def parse_category(category_string):
+def format_normalized_category(main_category, sub_category=None):
     """
-    Parse a category string into main category and sub-category.
-    
+    Format the normalized (lower-case) category columns of a transaction for display.
+
     Args:
-        category_string (str): Category string, potentially with sub-category (e.g., "Office/Supplies")
-    
-    Returns:
-        tuple: (main_category, sub_category) or (category, None) if no sub-category
-    """
-    if not category_string:
-        return (None, None)
-    
-    if '/' in category_string:
-        parts = category_string.split('/', 1)  # Split on first '/' only
-        return (parts[0].strip(), parts[1].strip())
-    else:
-        return (category_string.strip(), None)
+        main_category (str): Transaction.main_category value
+        sub_category (str, optional): Transaction.sub_category value
 
-def get_unique_categories_and_subcategories(db_session, account_ids):
-    """
-    Get all unique categories and sub-categories from transactions.
-    
     Returns:
-        dict: {
-            'categories': ['Office', 'Travel', ...],
-            'subcategories': {
-                'Office': ['Supplies', 'Equipment'],
-                'Travel': ['Flights', 'Hotels']
-            },
-            'all_combinations': ['Office', 'Office/Supplies', 'Travel', ...]
-        }
+        str: Title-cased display string, e.g. "Office → Supplies"
     """
-    if not account_ids:
-        return {'categories': [], 'subcategories': {}, 'all_combinations': []}
-    
-    # Get all category strings from transactions
-    category_results = (
-        db_session.query(Transaction.note)
-        .filter(Transaction.account_id.in_(account_ids))
-        .filter(Transaction.note.isnot(None))
-        .distinct()
-        .all()
-    )
-    
-    category_strings = [cat[0] for cat in category_results if cat[0]]
-    
-    categories = set()
-    subcategories = defaultdict(set)
-    all_combinations = set()
-    
-    for category_string in category_strings:
-        main_cat, sub_cat = parse_category(category_string)
-        if main_cat:
-            categories.add(main_cat)
-            all_combinations.add(main_cat)
-            
-            if sub_cat:
-                subcategories[main_cat].add(sub_cat)
-                all_combinations.add(category_string)
-    
-    # Convert to sorted lists
-    sorted_categories = sorted(categories)
-    sorted_subcategories = {
-        cat: sorted(list(subs)) for cat, subs in subcategories.items()
-    }
-    sorted_all_combinations = sorted(all_combinations)
-    
-    return {
-        'categories': sorted_categories,
-        'subcategories': sorted_subcategories,
-        'all_combinations': sorted_all_combinations
-    }
+    if not main_category:
+        return "Uncategorized"
+    if sub_category:
+        return f"{main_category.title()} → {sub_category.title()}"
+    return main_category.title()
+
 
 def format_category_display(category_string):
     """
@@ -178,10 +147,230 @@ logger = logging.getLogger(__name__)
 # Database configuration now handled by database_config.py
 
 
-# Define system settings initialization function
-def initialize_system_settings():
-    """Initialize default system settings if they don't exist."""
-    db_session = Session()
+def create_access_context_cache():
+    """
+    Build the cross-request permission cache from environment settings.
+
+    ACCESS_CACHE_MAX_ENTRIES and ACCESS_CACHE_TTL_SECONDS size the in-process cache.
+    When ACCESS_CACHE_TYPE is set (e.g. RedisCache), a flask-caching backend is used
+    to share entries between worker processes; ACCESS_CACHE_REDIS_URL and
+    ACCESS_CACHE_DIR are passed through to it.
+
+    Returns:
+        AccessContextCache: Configured cache
+    """
+    ttl_seconds = int(os.environ.get("ACCESS_CACHE_TTL_SECONDS", "300"))
+    shared_backend = None
+    cache_type = os.environ.get("ACCESS_CACHE_TYPE")
+    if cache_type:
+        try:
+            from flask_caching import Cache
+
+            cache_config = {
+                "CACHE_TYPE": cache_type,
+                "CACHE_DEFAULT_TIMEOUT": ttl_seconds,
+                "CACHE_KEY_PREFIX": "mercury_access:",
+            }
+            if os.environ.get("ACCESS_CACHE_REDIS_URL"):
+                cache_config["CACHE_REDIS_URL"] = os.environ["ACCESS_CACHE_REDIS_URL"]
+            if os.environ.get("ACCESS_CACHE_DIR"):
+                cache_config["CACHE_DIR"] = os.environ["ACCESS_CACHE_DIR"]
+            shared_backend = Cache(app, config=cache_config)
+            logger.info(f"Shared access cache enabled ({cache_type})")
+        except Exception as e:
+            logger.warning(f"Shared access cache unavailable, using in-process cache only: {e}")
+
+    return AccessContextCache(
+        max_entries=int(os.environ.get("ACCESS_CACHE_MAX_ENTRIES", "1024")),
+        ttl_seconds=ttl_seconds,
+        shared_backend=shared_backend,
+    )
+
+
+access_context_cache = create_access_context_cache()
+
+
+def create_analytics_engine():
+    """
+    Build the in-memory analytics engine used by the chart endpoints.
+
+    Disabled (charts query the database directly) when ANALYTICS_ENGINE_ENABLED is
+    false. ANALYTICS_SNAPSHOT_DIR enables memory-mapped snapshots shared by worker
+    processes.
+
+    Returns:
+        AnalyticsEngine: Configured engine, or None when disabled
+    """
+    if os.environ.get("ANALYTICS_ENGINE_ENABLED", "true").lower() != "true":
+        return None
+    # Imports NumPy; only loaded once a chart is requested
+    from models.analytics import AnalyticsEngine
+
+    return AnalyticsEngine(snapshot_dir=os.environ.get("ANALYTICS_SNAPSHOT_DIR") or None)
+
+
+# Created on first use by get_analytics_engine
+analytics_engine = None
+analytics_engine_created = False
+analytics_engine_lock = threading.Lock()
+
+
+def get_analytics_engine():
+    """
+    Get the analytics engine, creating it on first use.
+
+    Returns:
+        AnalyticsEngine: The process's engine, or None when disabled
+    """
+    global analytics_engine, analytics_engine_created
+    if not analytics_engine_created:
+        with analytics_engine_lock:
+            if not analytics_engine_created:
+                analytics_engine = create_analytics_engine()
+                analytics_engine_created = True
+    return analytics_engine
+
+# Filter bar counts on /transactions, keyed by access set and filters
+facet_count_cache = FacetCountCache(
+    max_entries=int(os.environ.get("FACET_CACHE_MAX_ENTRIES", "512")),
+    ttl_seconds=int(os.environ.get("FACET_CACHE_TTL_SECONDS", "300")),
+)
+
+
+def create_report_cache():
+    """
+    Build the result cache for report helpers from environment settings.
+
+    REPORT_CACHE_MAX_ENTRIES and REPORT_CACHE_TTL_SECONDS size the in-process cache.
+    Results are shared between worker processes through a flask-caching backend when
+    REPORT_CACHE_TYPE is set (e.g. RedisCache, with REPORT_CACHE_REDIS_URL), or
+    through a local SQLite file when REPORT_CACHE_SQLITE_PATH is set.
+
+    Returns:
+        ResultCache: Configured cache
+    """
+    ttl_seconds = int(os.environ.get("REPORT_CACHE_TTL_SECONDS", "300"))
+    shared_backend = None
+    cache_type = os.environ.get("REPORT_CACHE_TYPE")
+    sqlite_path = os.environ.get("REPORT_CACHE_SQLITE_PATH")
+    try:
+        if cache_type:
+            from flask_caching import Cache
+
+            cache_config = {
+                "CACHE_TYPE": cache_type,
+                "CACHE_DEFAULT_TIMEOUT": ttl_seconds,
+                "CACHE_KEY_PREFIX": "mercury_reports:",
+            }
+            if os.environ.get("REPORT_CACHE_REDIS_URL"):
+                cache_config["CACHE_REDIS_URL"] = os.environ["REPORT_CACHE_REDIS_URL"]
+            shared_backend = Cache(app, config=cache_config)
+            logger.info(f"Shared report cache enabled ({cache_type})")
+        elif sqlite_path:
+            shared_backend = SQLiteCacheBackend(sqlite_path)
+            logger.info(f"Shared report cache enabled (SQLite at {sqlite_path})")
+    except Exception as e:
+        logger.warning(f"Shared report cache unavailable, using in-process cache only: {e}")
+
+    return ResultCache(
+        max_entries=int(os.environ.get("REPORT_CACHE_MAX_ENTRIES", "1024")),
+        ttl_seconds=ttl_seconds,
+        shared_backend=shared_backend,
+    )
+
+
+report_cache = create_report_cache()
+
+# Rendered page fragments (dashboard summary, accounts list), shared like report results
+fragment_cache = ResultCache(
+    max_entries=int(os.environ.get("FRAGMENT_CACHE_MAX_ENTRIES", "512")),
+    ttl_seconds=int(os.environ.get("FRAGMENT_CACHE_TTL_SECONDS", "300")),
+    shared_backend=report_cache.shared_backend,
+    key_prefix="fragment_cache:",
+)
+
+# Latency and query statistics per endpoint for /admin/performance (per worker process)
+request_metrics = RequestMetrics(
+    max_samples=int(os.environ.get("REQUEST_METRICS_SAMPLES", "500")),
+    max_slow_requests=int(os.environ.get("REQUEST_METRICS_SLOW_REQUESTS", "50")),
+    slow_request_seconds=int(os.environ.get("REQUEST_METRICS_SLOW_MS", "500")) / 1000,
+    repeat_threshold=int(os.environ.get("REQUEST_METRICS_REPEAT_THRESHOLD", "5")),
+)
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "true").lower() == "true"
+
+# Stack profiles of requests sampled 1 in PROFILE_SAMPLE_RATE or requested with
+# "X-Profile: 1" / "?_profile=1", listed on /admin/profiles
+profiler = create_profiler("PROFILE_SAMPLE_RATE")
+
+# Read-only views whose queries are served by the read replica (DATABASE_REPLICA_URL)
+# while it's available. The dashboard isn't one: a user's first visit creates their
+# settings, which mustn't be decided on data that may be behind.
+REPLICA_ENDPOINTS = {
+    "transactions",
+    "reports",
+    "budget_data",
+    "expense_breakdown",
+    "budgets",
+    "budget_reports",
+    "get_budget_report_row_transactions",
+}
+# A user's requests read from the primary for this long after they changed
+# something, so they see their own changes while the replica catches up
+REPLICA_PIN_SECONDS = int(os.environ.get("DATABASE_REPLICA_PIN_SECONDS", "60"))
+
+
+def schedule_receipt_status_refresh(account_id):
+    """
+    Recompute materialized receipt statuses for an account in a background thread.
+
+    Receipt policy changes can affect every transaction on the account (the account's
+    current settings are the fallback for dates without a policy), so the whole account
+    is re-evaluated without blocking the request. Policies with a future start date are
+    picked up again by the sync service once they take effect.
+
+    Args:
+        account_id (str): Account whose receipt policy changed
+    """
+    def _refresh():
+        db_session = Session()
+        try:
+            updated = refresh_receipt_statuses(db_session, account_ids=[account_id])
+            if updated:
+                refresh_account_stats(db_session, [account_id])
+                DataVersion.bump(
+                    db_session,
+                    [
+                        row[0]
+                        for row in db_session.query(Account.mercury_account_id).filter(
+                            Account.id == account_id
+                        )
+                    ],
+                )
+                db_session.commit()
+            logger.info("Refreshed receipt status for %d transactions on account %s", updated, account_id)
+        except Exception as e:
+            db_session.rollback()
+            logger.error("Failed to refresh receipt statuses for account %s: %s", account_id, e)
+        finally:
+            db_session.close()
+
+    threading.Thread(target=_refresh, name=f"receipt-refresh-{account_id}", daemon=True).start()
+
+
+# Bump when initialize_system_settings changes so deployments re-run it
+SETTINGS_BOOTSTRAP_VERSION = "1"
+
+
+def initialize_system_settings(db_session):
+    """
+    Initialize default system settings if they don't exist.
+
+    Args:
+        db_session: SQLAlchemy session to use (committed on success)
+
+    Returns:
+        bool: True if the settings were initialized
+    """
     try:
         # Check if users are externally managed
         users_externally_managed = (
@@ -310,65 +499,212 @@ def initialize_system_settings():
             print(f"ℹ️  Found {admin_count} admin user(s) - no fallback needed")
 
         db_session.commit()
+        return True
     except Exception as e:
         print(f"Warning: Could not initialize system settings: {e}")
         db_session.rollback()
+        return False
+
+
+def bootstrap_system_settings():
+    """
+    Run initialize_system_settings once per deployment.
+
+    A marker setting records the SETTINGS_BOOTSTRAP_VERSION and USERS_EXTERNALLY_MANAGED
+    value settings were last initialized with; while it matches, startup costs a single
+    query. Otherwise settings are initialized under a database advisory lock, so workers
+    and containers starting together don't all do it.
+
+    Returns:
+        bool: True if settings were initialized by this call
+    """
+    users_externally_managed = os.environ.get("USERS_EXTERNALLY_MANAGED", "false").lower() == "true"
+    marker = f"{SETTINGS_BOOTSTRAP_VERSION}:{str(users_externally_managed).lower()}"
+
+    db_session = Session()
+    try:
+        if SystemSetting.get_value(db_session, "settings_bootstrap", None) == marker:
+            return False
+        db_session.rollback()
+
+        with advisory_lock("mercury_settings_bootstrap") as acquired:
+            if not acquired:
+                logger.warning("Settings bootstrap is locked by another process; skipping")
+                return False
+            # Another process may have finished while we waited for the lock
+            if SystemSetting.get_value(db_session, "settings_bootstrap", None) == marker:
+                return False
+
+            if not initialize_system_settings(db_session):
+                return False
+            SystemSetting.set_value(
+                db_session,
+                "settings_bootstrap",
+                marker,
+                description="Version of the default settings last initialized at startup",
+                is_editable=False,
+            )
+            print("✅ System settings verified")
+            return True
+    except Exception as e:
+        db_session.rollback()
+        print(f"⚠️  Warning: Could not verify system settings: {e}")
+        return False
     finally:
         db_session.close()
 
 
-# Database initialization is handled by initial_setup.py during container startup
-# This ensures the schema is ready before the Flask app starts
-print("ℹ️  Database initialization is handled by initial_setup.py during startup")
+def create_app():
+    """
+    Finish initializing the application and return it.
+
+    Importing this module only defines the app, its routes and in-process caches; work
+    that touches the database runs here, once per process (gunicorn calls it in the
+    master with preload_app). Calling it again is a no-op.
 
-# Initialize system settings in case they weren't created during setup
-try:
-    initialize_system_settings()
-    print("✅ System settings verified")
-except Exception as e:
-    print(f"⚠️  Warning: Could not verify system settings: {e}")
+    Returns:
+        Flask: The application
+    """
+    if not app.config.get("BOOTSTRAPPED"):
+        app.config["BOOTSTRAPPED"] = True
+        # Database schema is managed by the sync service (see initial_setup.py)
+        bootstrap_system_settings()
+    return app
 
 # Flask-Login setup
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = "login"
 
-# Database session management
+# Database session management: Session is scoped to the request's thread, so the
+# login loader, decorators, context processors and routes share one session (and
+# at most one pooled connection, checked out on first use) until teardown.
 @app.teardown_appcontext
 def close_db_session(error):
     """Close database session at the end of each request."""
     db_config.close_session()
 
+
+# Registered before the other request hooks, so the profile covers the login
+# loader and permission checks too
+@app.before_request
+def start_request_metrics():
+    """Start counting the statements executed by this request."""
+    if request.endpoint != "static":
+        start_request_profile()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Record the request's latency and queries, and report them in Server-Timing."""
+    profile = end_request_profile()
+    if profile is None:
+        return response
+
+    elapsed = profile.elapsed()
+    repeated = request_metrics.record(
+        request.endpoint or "unknown", request.method, request.path, elapsed, profile
+    )
+    for fingerprint, count, seconds in repeated:
+        logger.warning(
+            "Repeated statement on %s (%d times, %.1f ms): %s",
+            request.endpoint,
+            count,
+            seconds * 1000,
+            fingerprint,
+        )
+    if SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = profile.server_timing(elapsed)
+    return response
+
+
+@app.teardown_request
+def discard_request_metrics(error):
+    """Drop the profile of a request that failed before after_request ran."""
+    end_request_profile()
+
+
 @app.before_request
-def before_request():
-    """Set up database session for each request."""
-    g.db_session = Session()
+def start_request_profiling():
+    """
+    Sample the call stack of requests that ask for a profile or are picked at random.
+
+    Only super admins can ask for a profile with the X-Profile header or _profile
+    query flag; other requests are only sampled at random.
+    """
+    if request.endpoint == "static":
+        return
+    requested = request.headers.get("X-Profile") == "1" or request.args.get("_profile") == "1"
+    if requested:
+        access = get_access_context()
+        requested = access is not None and access.is_super_admin
+    if requested or profiler.should_sample():
+        sampler = profiler.start()
+        if sampler is not None:
+            g.profile_sampler = sampler
+            g.profile_requested = requested
+
+
+@app.after_request
+def save_request_profile(response):
+    """
+    Save the request's stack profile.
+
+    Profiles asked for by super admins are always kept and their id is returned
+    in the X-Profile-Id header. Sampled requests that finished before the first
+    stack sample aren't kept.
+    """
+    sampler = g.pop("profile_sampler", None)
+    if sampler is None:
+        return response
+
+    requested = g.pop("profile_requested", False)
+    save = requested or sampler.samples > 0
+    profile_id = profiler.finish(
+        sampler,
+        "request",
+        f"{request.method} {request.path}",
+        details={"endpoint": request.endpoint, "status": response.status_code, "requested": requested},
+        save=save,
+    )
+    if profile_id and requested:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+@app.teardown_request
+def stop_request_profiling(error):
+    """Stop the sampler of a request that failed before after_request ran."""
+    sampler = g.pop("profile_sampler", None)
+    if sampler is not None:
+        profiler.finish(sampler, save=False)
 
 
 @login_manager.user_loader
 def load_user(user_id):
+    # The request's session stays open, so the user remains attached to it and
+    # the rest of the request reuses its connection
     db_session = Session()
     try:
-        # Eagerly load the user with all necessary relationships to minimize queries
-        user = (
-            db_session.query(User)
-            .options(
-                joinedload(User.roles),
-                joinedload(User.mercury_accounts),
-                joinedload(User.restricted_accounts)
-            )
+        # Eagerly load roles for template checks; account access lives in the
+        # request's AccessContext (see get_access_context). The access version
+        # comes back in the same query so the cached context can be validated.
+        row = (
+            db_session.query(User, func.coalesce(UserAccessVersion.version, 0))
+            .outerjoin(UserAccessVersion, UserAccessVersion.user_id == User.id)
+            .options(joinedload(User.roles))
             .filter(User.id == int(user_id))
             .first()
         )
-        if user:
-            # Make the user object detached from this session to avoid conflicts
-            db_session.expunge(user)
+        if not row:
+            return None
+        user, access_version = row
+        g.access_version = access_version
         return user
     except Exception as e:
         print(f"Error loading user {user_id}: {e}")
+        db_session.rollback()
         return None
-    finally:
-        db_session.close()
 
 
 @app.before_request
@@ -386,48 +722,200 @@ def check_user_permissions():
 
     # Only check permissions if user is logged in
     if current_user.is_authenticated:
-        # Use session counters to reduce frequency of DB checks
-        session_check_count = session.get('permission_check_count', 0)
-        is_sensitive_route = request.endpoint in ['admin_users', 'admin_settings', 'accounts', 'delete_account']
-        
-        # Check permissions every 10th request or on sensitive routes
-        if session_check_count % 10 == 0 or is_sensitive_route:
-            db_session = Session()
-            try:
-                # Efficient query to check if user has locked or user roles
-                user_roles = db_session.query(Role.name).join(User.roles).filter(
-                    User.id == current_user.id,
-                    Role.name.in_(['locked', 'user'])
-                ).all()
+        try:
+            # The access context is loaded once per request and reused by the
+            # route decorators, so this check doesn't cost extra queries
+            access = get_access_context()
+
+            if access.has_role('locked'):
+                logger.info(f"User {current_user.username} has been locked - logging out")
+                logout_user()
+                session.clear()
+                flash("Your account has been locked. Please contact an administrator.", "error")
+                return redirect(url_for("login"))
 
-                role_names = [role.name for role in user_roles]
-                
-                if 'locked' in role_names:
-                    logger.info(f"User {current_user.username} has been locked - logging out")
-                    logout_user()
-                    session.clear()
-                    flash("Your account has been locked. Please contact an administrator.", "error")
-                    return redirect(url_for("login"))
-
-                if 'user' not in role_names:
-                    logger.info(f"User {current_user.username} no longer has 'user' role - logging out")
-                    logout_user()
-                    session.clear()
-                    flash("Your account no longer has the required permissions. Please contact an administrator.", "error")
-                    return redirect(url_for("login"))
+            if not access.has_role('user'):
+                logger.info(f"User {current_user.username} no longer has 'user' role - logging out")
+                logout_user()
+                session.clear()
+                flash("Your account no longer has the required permissions. Please contact an administrator.", "error")
+                return redirect(url_for("login"))
 
-            except Exception as e:
-                logger.error(f"Error checking user permissions: {e}")
-                # In case of database errors, don't log out the user unless it's critical
-                pass
-            finally:
-                db_session.close()
-        
-        # Update check counter
-        session['permission_check_count'] = session_check_count + 1
+        except Exception as e:
+            logger.error(f"Error checking user permissions: {e}")
+            # In case of database errors, don't log out the user unless it's critical
+            pass
 
 
 # Helper functions for account access control
+def get_access_context():
+    """
+    Get the current user's AccessContext, loading it at most once per request.
+
+    The context holds the user's role names, Mercury account IDs and accessible
+    account IDs, and is stored on flask.g so decorators, routes and helpers share it.
+    Across requests it is served from access_context_cache as long as the user's
+    access version (loaded alongside the user) hasn't changed.
+
+    Returns:
+        AccessContext: Access context for the current user, or None if not logged in
+    """
+    if not current_user.is_authenticated:
+        return None
+
+    access = g.get("access_context")
+    if access is None or access.user_id != current_user.id:
+        # Don't close the session here: Session is scoped, so this is the same
+        # session the calling route uses, and it's removed at teardown
+        db_session = Session()
+        version = g.get("access_version")
+        if version is None:
+            version = UserAccessVersion.get_version(db_session, current_user.id)
+        access = access_context_cache.get(current_user.id, version)
+        if access is None:
+            access = AccessContext.load(db_session, current_user.id)
+            access_context_cache.set(current_user.id, version, access)
+        g.access_context = access
+    return access
+
+
+# Registered after check_user_permissions: the user, their access version and
+# access context are always read from the primary, so a lagging replica can't
+# hide a lock or a revoked group, and only the view's own reads are routed
+@app.before_request
+def route_reads_to_replica():
+    """Serve the reads of read-only views from the replica, unless the user just wrote something."""
+    if (
+        db_config.replica_engine is not None
+        and request.method in ("GET", "HEAD")
+        and request.endpoint in REPLICA_ENDPOINTS
+        and session.get("primary_until", 0) <= time.time()
+    ):
+        get_access_context()
+        g.replica_reads = db_config.start_replica_reads()
+
+
+@app.after_request
+def pin_reads_to_primary(response):
+    """Read from the primary for a while after a request that may have written."""
+    if db_config.replica_engine is not None and request.method not in ("GET", "HEAD", "OPTIONS"):
+        session["primary_until"] = time.time() + REPLICA_PIN_SECONDS
+    return response
+
+
+@app.teardown_request
+def end_replica_reads(error):
+    """Send the thread's reads to the primary again."""
+    db_config.end_replica_reads()
+
+
+def get_current_data_versions(db_session, *args, **kwargs):
+    """
+    Get the data versions of the current user's Mercury account groups.
+
+    Loaded at most once per request and used as the version of cached report
+    results (see report_cache). Extra arguments are accepted and ignored so this
+    can be passed as a memoize version_func.
+
+    Args:
+        db_session: SQLAlchemy session
+
+    Returns:
+        tuple: Sorted (mercury_account_id, version) pairs
+    """
+    versions = g.get("data_versions")
+    if versions is None:
+        versions = tuple(
+            sorted(DataVersion.get_versions(db_session, get_access_context().mercury_account_ids).items())
+        )
+        g.data_versions = versions
+    return versions
+
+
+def report_filters_key(
+    db_session,
+    mercury_account_id=None,
+    month_filter=None,
+    account_id=None,
+    category=None,
+    expanded_status_filter=None,
+):
+    """
+    Normalize report filters and the user's report account set into a cache key.
+
+    Args:
+        db_session: SQLAlchemy session (not part of the key)
+        mercury_account_id, month_filter, account_id, category, expanded_status_filter:
+            Filters as passed to the report helpers
+
+    Returns:
+        tuple: Hashable key
+    """
+    access = get_access_context()
+    return (
+        mercury_account_id or None,
+        month_filter or None,
+        account_id or None,
+        category or None,
+        tuple(sorted(set(expanded_status_filter or ()))),
+        tuple(sorted(access.mercury_account_ids)),
+        access.report_account_ids,
+    )
+
+
+def budget_key(db_session, budget):
+    """Cache key for results computed per budget (budget edits bump the data version)."""
+    return budget.id
+
+
+def render_cached_fragment(db_session, name, key, render):
+    """
+    Render a template fragment, reusing the HTML cached for the same key and data.
+
+    Cached fragments are tagged with the data versions of the user's Mercury account
+    groups (see get_current_data_versions), so they are re-rendered after a sync or
+    an account edit commits. The key must cover everything else the fragment depends
+    on, such as the user's access set and display settings.
+
+    Args:
+        db_session: SQLAlchemy session
+        name (str): Fragment name, reported in /admin/cache_stats
+        key (tuple): Hashable key
+        render (callable): Runs the queries and returns the rendered HTML
+
+    Returns:
+        Markup: Rendered HTML
+    """
+    version = get_current_data_versions(db_session)
+    found, html = fragment_cache.get((name, key), version)
+    fragment_cache.record(name, found)
+    if not found:
+        html = render()
+        fragment_cache.set((name, key), version, html)
+    return Markup(html)
+
+
+def get_user_mercury_accounts(db_session):
+    """
+    Get the Mercury account groups the current user belongs to.
+
+    Args:
+        db_session: SQLAlchemy session
+
+    Returns:
+        list: List of MercuryAccount objects
+    """
+    mercury_account_ids = get_access_context().mercury_account_ids
+    if not mercury_account_ids:
+        return []
+    return (
+        db_session.query(MercuryAccount)
+        .filter(MercuryAccount.id.in_(mercury_account_ids))
+        .order_by(MercuryAccount.id)
+        .all()
+    )
+
+
 def get_user_accessible_accounts(user_in_session, db_session, mercury_account_id=None):
     """
     Get all accounts that a user has access to, respecting account-level restrictions.
@@ -440,18 +928,22 @@ def get_user_accessible_accounts(user_in_session, db_session, mercury_account_id
     Returns:
         list: List of Account objects the user can access
     """
-    # Use the user model's helper method
-    accessible_accounts = user_in_session.get_accessible_accounts(db_session)
+    if current_user.is_authenticated and user_in_session.id == current_user.id:
+        access = get_access_context()
+    else:
+        access = AccessContext.load(db_session, user_in_session.id)
 
-    # Filter by mercury account if specified
-    if mercury_account_id:
-        accessible_accounts = [
-            account
-            for account in accessible_accounts
-            if account.mercury_account_id == mercury_account_id
-        ]
+    account_ids = access.account_ids_for(mercury_account_id)
+    if not account_ids:
+        return []
 
-    return accessible_accounts
+    return (
+        db_session.query(Account)
+        .options(joinedload(Account.mercury_account))
+        .filter(Account.id.in_(account_ids))
+        .order_by(Account.id)
+        .all()
+    )
 
 
 def get_user_accessible_accounts_for_reports(
@@ -522,8 +1014,6 @@ def is_signup_enabled():
     except Exception:
         # Default to enabled if we can't check (for backwards compatibility)
         return True
-    finally:
-        db_session.close()
 
 
 def get_gravatar_url(email, size=40, default="identicon"):
@@ -543,48 +1033,13 @@ def get_gravatar_url(email, size=40, default="identicon"):
 # Template context processor to avoid DetachedInstanceError
 @app.context_processor
 def inject_user():
-    """Inject a session-bound user object for template use with caching."""
+    """Inject the current user for template use.
+
+    load_user runs once per request and eagerly loads roles, so the detached
+    current_user is already fresh enough for the template's role checks.
+    """
     if current_user.is_authenticated:
-        # Use session-based caching to reduce DB queries
-        cache_key = f"template_user_{current_user.id}"
-        cache_count = session.get('template_cache_count', 0)
-        
-        # Only refresh user from DB every 20 requests to reduce remote DB load
-        if cache_count % 20 == 0 or cache_key not in session:
-            db_session = Session()
-            try:
-                # Get a fresh copy of the user with all relationships eagerly loaded
-                from sqlalchemy.orm import joinedload
-                user = db_session.query(User).options(
-                    joinedload(User.roles),  # Eagerly load roles to avoid lazy loading issues
-                    joinedload(User.mercury_accounts)  # Also load mercury accounts if needed
-                ).filter_by(id=current_user.id).first()
-                
-                if user:
-                    # Cache essential user data in session to avoid repeated DB hits
-                    session[cache_key] = {
-                        'id': user.id,
-                        'username': user.username,
-                        'email': user.email,
-                        'roles': [role.name for role in user.roles],
-                        'mercury_account_ids': [ma.id for ma in user.mercury_accounts]
-                    }
-                    # Store the session in Flask's g object for cleanup
-                    g.template_db_session = db_session
-                    session['template_cache_count'] = cache_count + 1
-                    return dict(template_user=user)
-                else:
-                    db_session.close()
-                    return dict(template_user=current_user)
-            except Exception as e:
-                print(f"Error in context processor: {e}")
-                db_session.close()
-                return dict(template_user=current_user)
-        else:
-            # Use cached data, increment counter
-            session['template_cache_count'] = cache_count + 1
-            return dict(template_user=current_user)
-        
+        return dict(template_user=current_user)
     return dict(template_user=None)
 
 
@@ -608,7 +1063,6 @@ def inject_branding():
                 "Mercury Bank data synchronization and management platform",
             )
             logo_url = SystemSetting.get_value(db_session, "logo_url", "")
-            db_session.close()
 
             # Cache in session
             session[branding_cache_key] = {
@@ -649,19 +1103,17 @@ def gravatar_filter(email, size=40):
     return get_gravatar_url(email, size)
 
 
-@app.teardown_appcontext
-def close_template_db_session(error):
-    """Close any database sessions opened by the context processor."""
-    db_session = getattr(g, "template_db_session", None)
-    if db_session:
-        db_session.close()
-
-
 # Export helper functions
-def export_transactions(transactions, format_type, accounts):
+def export_transactions(transactions, format_type, accounts, receipt_statuses):
     """Export transactions to CSV or Excel format"""
     # Create account lookup for faster access
     account_lookup = {acc.id: acc for acc in accounts}
+    receipt_status_map = {
+        "required_present": "Required (Present)",
+        "required_missing": "Required (Missing)",
+        "optional_present": "Optional (Present)",
+        "optional_missing": "Optional (Not Present)",
+    }
 
     # Prepare data
     data = []
@@ -669,19 +1121,12 @@ def export_transactions(transactions, format_type, accounts):
         account = account_lookup.get(transaction.account_id)
         effective_date = transaction.posted_at or transaction.created_at
 
-        # Get receipt status if account is available
+        # Receipt statuses are resolved up front for the whole export
         receipt_status = ""
         if account:
-            status = account.get_receipt_status_for_transaction(
-                transaction.amount, transaction.number_of_attachments > 0, transaction.posted_at
+            receipt_status = receipt_status_map.get(
+                receipt_statuses.get(transaction.id), "Unknown"
             )
-            receipt_status_map = {
-                "required_present": "Required (Present)",
-                "required_missing": "Required (Missing)",
-                "optional_present": "Optional (Present)",
-                "optional_missing": "Optional (Not Present)",
-            }
-            receipt_status = receipt_status_map.get(status, "Unknown")
 
         data.append(
             {
@@ -772,6 +1217,31 @@ def export_excel(data, filename):
         return export_csv(data, filename)
 
 
+def effective_month_condition(month_filter):
+    """
+    Build a filter matching transactions whose effective date is in a month.
+
+    Compares Transaction.effective_date with a half-open range, so the column's
+    index can be used.
+
+    Args:
+        month_filter (str): Month as "YYYY-MM"
+
+    Returns:
+        Filter condition, or None if month_filter is not a valid month
+    """
+    try:
+        year, month = map(int, month_filter.split("-"))
+        first_of_month = datetime(year, month, 1)
+    except (ValueError, AttributeError):
+        return None
+    first_of_next_month = datetime(year + month // 12, month % 12 + 1, 1)
+    return (Transaction.effective_date >= first_of_month) & (
+        Transaction.effective_date < first_of_next_month
+    )
+
+
+@report_cache.memoize(report_filters_key, get_current_data_versions)
 def get_reports_table_data(
     db_session,
     mercury_account_id=None,
@@ -782,11 +1252,7 @@ def get_reports_table_data(
 ):
     """Get aggregated category data for reports table view"""
     # Get user's accessible Mercury accounts
-    mercury_accounts = (
-        db_session.query(MercuryAccount)
-        .filter(MercuryAccount.users.contains(current_user))
-        .all()
-    )
+    mercury_accounts = get_user_mercury_accounts(db_session)
 
     # Filter by specific Mercury account if selected
     if mercury_account_id:
@@ -794,20 +1260,11 @@ def get_reports_table_data(
             ma for ma in mercury_accounts if ma.id == mercury_account_id
         ]
 
+    # Accessible accounts not marked as exclude_from_reports
+    access = get_access_context()
     account_ids = []
-    account_lookup = {}
     for mercury_account in mercury_accounts:
-        accounts = (
-            db_session.query(Account)
-            .filter_by(mercury_account_id=mercury_account.id)
-            .filter_by(
-                exclude_from_reports=False
-            )  # Exclude accounts marked as exclude_from_reports
-            .all()
-        )
-        for account in accounts:
-            account_ids.append(account.id)
-            account_lookup[account.id] = account
+        account_ids.extend(access.account_ids_for(mercury_account.id, reports=True))
 
     # Build query for aggregation
     category_field = func.coalesce(Transaction.note, "Uncategorized")
@@ -821,31 +1278,18 @@ def get_reports_table_data(
     if account_id:
         query = query.filter_by(account_id=account_id)
 
-    # Add category filter
+    # Add category filter (exact match on the normalized category columns)
     if category:
-        query = query.filter(Transaction.note.ilike(f"%{category}%"))
+        query = query.filter(Transaction.category_condition(category))
 
     # Add status filter
     if expanded_status_filter:
         query = query.filter(Transaction.status.in_(expanded_status_filter))
 
     # Add month filter
-    if month_filter:
-        try:
-            year, month = map(int, month_filter.split("-"))
-            from sqlalchemy import and_, extract
-
-            effective_date = func.coalesce(
-                Transaction.posted_at, Transaction.created_at
-            )
-            query = query.filter(
-                and_(
-                    extract("year", effective_date) == year,
-                    extract("month", effective_date) == month,
-                )
-            )
-        except (ValueError, AttributeError):
-            pass
+    month_condition = effective_month_condition(month_filter) if month_filter else None
+    if month_condition is not None:
+        query = query.filter(month_condition)
 
     # Group by category and order by total amount (highest first)
     category_totals = (
@@ -904,18 +1348,13 @@ def transactions_required(f):
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Get user from database to avoid DetachedInstanceError
-        db_session = Session()
-        try:
-            user = db_session.query(User).get(current_user.id)
-            if not user or not user.can_access_transactions():
-                flash(
-                    "Access denied. You don't have permission to view transactions.",
-                    "error",
-                )
-                return redirect(url_for("dashboard"))
-        finally:
-            db_session.close()
+        access = get_access_context()
+        if not access or not access.can_access_transactions():
+            flash(
+                "Access denied. You don't have permission to view transactions.",
+                "error",
+            )
+            return redirect(url_for("dashboard"))
         return f(*args, **kwargs)
 
     return decorated_function
@@ -926,17 +1365,12 @@ def reports_required(f):
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Get user from database to avoid DetachedInstanceError
-        db_session = Session()
-        try:
-            user = db_session.query(User).get(current_user.id)
-            if not user or not user.can_access_reports():
-                flash(
-                    "Access denied. You don't have permission to view reports.", "error"
-                )
-                return redirect(url_for("dashboard"))
-        finally:
-            db_session.close()
+        access = get_access_context()
+        if not access or not access.can_access_reports():
+            flash(
+                "Access denied. You don't have permission to view reports.", "error"
+            )
+            return redirect(url_for("dashboard"))
         return f(*args, **kwargs)
 
     return decorated_function
@@ -947,17 +1381,10 @@ def admin_required(f):
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Get user from database to avoid DetachedInstanceError
-        db_session = Session()
-        try:
-            user = db_session.query(User).get(current_user.id)
-            if not user or (
-                not user.has_role("admin") and not user.has_role("super-admin")
-            ):
-                flash("Access denied. Admin privileges required.", "error")
-                return redirect(url_for("dashboard"))
-        finally:
-            db_session.close()
+        access = get_access_context()
+        if not access or not access.is_admin:
+            flash("Access denied. Admin privileges required.", "error")
+            return redirect(url_for("dashboard"))
         return f(*args, **kwargs)
 
     return decorated_function
@@ -968,20 +1395,81 @@ def super_admin_required(f):
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Get user from database to avoid DetachedInstanceError
-        db_session = Session()
-        try:
-            user = db_session.query(User).get(current_user.id)
-            if not user or not user.is_super_admin:
-                flash("Access denied. Super admin privileges required.", "error")
-                return redirect(url_for("dashboard"))
-        finally:
-            db_session.close()
+        access = get_access_context()
+        if not access or not access.is_super_admin:
+            flash("Access denied. Super admin privileges required.", "error")
+            return redirect(url_for("dashboard"))
         return f(*args, **kwargs)
 
     return decorated_function
 
 
+def get_data_version_etag(access, time_bucket_seconds=None):
+    """
+    Build a strong ETag for the current request from the data it can depend on.
+
+    Combines the data versions of the user's Mercury account groups (bumped by the
+    sync service on every committed change), the user's access set, the request path
+    and its normalized query arguments. Responses that also depend on the clock (e.g.
+    rolling date windows) pass time_bucket_seconds to change the tag periodically.
+
+    Args:
+        access (AccessContext): Current user's access context
+        time_bucket_seconds (int, optional): Length of the time window the tag is valid for
+
+    Returns:
+        str: ETag value (without quotes)
+    """
+    components = [
+        # Also the versions chart snapshots are brought up to (see get_expense_totals)
+        list(get_current_data_versions(Session())),
+        sorted(access.role_names),
+        access.accessible_account_ids,
+        access.report_account_ids,
+        request.path,
+        sorted(request.args.items(multi=True)),
+    ]
+    if time_bucket_seconds:
+        components.append(int(time.time() // time_bucket_seconds))
+    return hashlib.sha256(json.dumps(components, default=str).encode()).hexdigest()[:32]
+
+
+def data_version_etag(time_bucket_seconds=None):
+    """
+    Decorator answering conditional GETs of a JSON API from data versions.
+
+    The ETag is computed before the route runs (see get_data_version_etag); a
+    matching If-None-Match is answered with 304 Not Modified without calling the
+    route. Successful responses carry the ETag and must be revalidated before reuse.
+
+    Args:
+        time_bucket_seconds (int, optional): Also change the ETag this often, for
+            responses that depend on the current time
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            access = get_access_context()
+            if not access:
+                return f(*args, **kwargs)
+
+            etag = get_data_version_etag(access, time_bucket_seconds)
+            if request.if_none_match.contains(etag):
+                response = app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return decorated_function
+
+    return decorator
+
+
 # Routes
 @app.route("/")
 def index():
@@ -997,63 +1485,58 @@ def login():
         password = request.form["password"]
 
         db_session = Session()
-        try:
-            # Optimized query: get user with roles in single query
-            user = db_session.query(User).options(
-                joinedload(User.roles)  # Eager load roles to avoid additional queries
-            ).filter_by(username=username).first()
-
-            if user and user.check_password(password):
-                # Check roles efficiently (already loaded)
-                user_roles = [role.name for role in user.roles]
+        # Optimized query: get user with roles in single query
+        user = db_session.query(User).options(
+            joinedload(User.roles)  # Eager load roles to avoid additional queries
+        ).filter_by(username=username).first()
+
+        if user and user.check_password(password):
+            # Check roles efficiently (already loaded)
+            user_roles = [role.name for role in user.roles]
                 
-                if "locked" in user_roles:
-                    flash(
-                        "Your account has been locked. Please contact an administrator.",
-                        "error",
-                    )
-                    return render_template(
-                        "login.html",
-                        signup_enabled=is_signup_enabled(),
-                        users_externally_managed=os.environ.get(
-                            "USERS_EXTERNALLY_MANAGED", "false"
-                        ).lower()
-                        == "true",
-                    )
+            if "locked" in user_roles:
+                flash(
+                    "Your account has been locked. Please contact an administrator.",
+                    "error",
+                )
+                return render_template(
+                    "login.html",
+                    signup_enabled=is_signup_enabled(),
+                    users_externally_managed=os.environ.get(
+                        "USERS_EXTERNALLY_MANAGED", "false"
+                    ).lower()
+                    == "true",
+                )
 
-                # Check if user has the user role (required for basic access)
-                if "user" not in user_roles:
-                    flash(
-                        "Your account does not have the required permissions. Please contact an administrator.",
-                        "error",
-                    )
-                    return render_template(
-                        "login.html",
-                        signup_enabled=is_signup_enabled(),
-                        users_externally_managed=os.environ.get(
-                            "USERS_EXTERNALLY_MANAGED", "false"
-                        ).lower()
-                        == "true",
-                    )
+            # Check if user has the user role (required for basic access)
+            if "user" not in user_roles:
+                flash(
+                    "Your account does not have the required permissions. Please contact an administrator.",
+                    "error",
+                )
+                return render_template(
+                    "login.html",
+                    signup_enabled=is_signup_enabled(),
+                    users_externally_managed=os.environ.get(
+                        "USERS_EXTERNALLY_MANAGED", "false"
+                    ).lower()
+                    == "true",
+                )
 
-                # Initialize session counters for performance optimization
-                session['permission_check_count'] = 0
-                session['template_cache_count'] = 0
-                session['branding_cache_count'] = 0
+            # Initialize session counters for performance optimization
+            session['branding_cache_count'] = 0
                 
-                login_user(user)
-                flash("Logged in successfully!", "success")
-                return redirect(url_for("dashboard"))
+            login_user(user)
+            flash("Logged in successfully!", "success")
+            return redirect(url_for("dashboard"))
+        else:
+            if user and not user.has_valid_password():
+                flash(
+                    "Account needs password reset. Please contact administrator.",
+                    "error",
+                )
             else:
-                if user and not user.has_valid_password():
-                    flash(
-                        "Account needs password reset. Please contact administrator.",
-                        "error",
-                    )
-                else:
-                    flash("Invalid username or password", "error")
-        finally:
-            db_session.close()
+                flash("Invalid username or password", "error")
 
     # Check if users are externally managed (directly from env var)
     users_externally_managed = (
@@ -1087,17 +1570,14 @@ def register():
 
     # Double-check if users are externally managed (for security)
     db_session = Session()
-    try:
-        if SystemSetting.get_bool_value(
-            db_session, "users_externally_managed", default=False
-        ):
-            flash(
-                "User registration is disabled because users are externally managed.",
-                "error",
-            )
-            return redirect(url_for("login"))
-    finally:
-        db_session.close()
+    if SystemSetting.get_bool_value(
+        db_session, "users_externally_managed", default=False
+    ):
+        flash(
+            "User registration is disabled because users are externally managed.",
+            "error",
+        )
+        return redirect(url_for("login"))
 
     if request.method == "POST":
         username = request.form["username"]
@@ -1105,89 +1585,86 @@ def register():
         password = request.form["password"]
 
         db_session = Session()
+        # Check if user already exists
+        existing_user = db_session.query(User).filter_by(username=username).first()
+        if existing_user:
+            flash("Username already exists", "error")
+            return render_template("register.html")
+
+        # Check if this is the first user (should be admin)
+        user_count = db_session.query(User).count()
+        is_first_user = user_count == 0
+
+        # Create new user
+        new_user = User(username=username, email=email)
+        new_user.set_password(password)
+        db_session.add(new_user)
+        db_session.flush()  # Flush to get the user ID
+
+        # Assign roles to the new user
         try:
-            # Check if user already exists
-            existing_user = db_session.query(User).filter_by(username=username).first()
-            if existing_user:
-                flash("Username already exists", "error")
-                return render_template("register.html")
-
-            # Check if this is the first user (should be admin)
-            user_count = db_session.query(User).count()
-            is_first_user = user_count == 0
-
-            # Create new user
-            new_user = User(username=username, email=email)
-            new_user.set_password(password)
-            db_session.add(new_user)
-            db_session.flush()  # Flush to get the user ID
-
-            # Assign roles to the new user
-            try:
-                from models.role import Role
+            from models.role import Role
+
+            # All users get the basic "user" role
+            user_role = Role.get_or_create(
+                db_session,
+                "user",
+                "Basic user with read access to their own data",
+                is_system_role=True,
+            )
+            new_user.roles.append(user_role)
 
-                # All users get the basic "user" role
-                user_role = Role.get_or_create(
+            # If this is the first user, also grant admin and super-admin roles
+            if is_first_user:
+                admin_role = Role.get_or_create(
                     db_session,
-                    "user",
-                    "Basic user with read access to their own data",
+                    "admin",
+                    "Administrator with full system access",
                     is_system_role=True,
                 )
-                new_user.roles.append(user_role)
-
-                # If this is the first user, also grant admin and super-admin roles
-                if is_first_user:
-                    admin_role = Role.get_or_create(
-                        db_session,
-                        "admin",
-                        "Administrator with full system access",
-                        is_system_role=True,
-                    )
-                    super_admin_role = Role.get_or_create(
-                        db_session,
-                        "super-admin",
-                        "Super administrator with all privileges including user management",
-                        is_system_role=True,
-                    )
-                    new_user.roles.append(admin_role)
-                    new_user.roles.append(super_admin_role)
+                super_admin_role = Role.get_or_create(
+                    db_session,
+                    "super-admin",
+                    "Super administrator with all privileges including user management",
+                    is_system_role=True,
+                )
+                new_user.roles.append(admin_role)
+                new_user.roles.append(super_admin_role)
 
-            except Exception as role_error:
-                print(f"🚨 ERROR during role assignment: {role_error}")
-                import traceback
+        except Exception as role_error:
+            print(f"🚨 ERROR during role assignment: {role_error}")
+            import traceback
 
-                print(f"🚨 Full traceback: {traceback.format_exc()}")
-                # Continue with user creation but without roles
-                flash(
-                    f"User created but role assignment failed: {role_error}", "warning"
-                )
+            print(f"🚨 Full traceback: {traceback.format_exc()}")
+            # Continue with user creation but without roles
+            flash(
+                f"User created but role assignment failed: {role_error}", "warning"
+            )
 
-            # Create user settings
-            try:
-                from models.user_settings import UserSettings
+        # Create user settings
+        try:
+            from models.user_settings import UserSettings
 
-                user_settings = UserSettings(user_id=new_user.id)
-                db_session.add(user_settings)
-                db_session.commit()
-            except Exception as settings_error:
-                print(f"🚨 ERROR during user settings creation: {settings_error}")
-                import traceback
+            user_settings = UserSettings(user_id=new_user.id)
+            db_session.add(user_settings)
+            db_session.commit()
+        except Exception as settings_error:
+            print(f"🚨 ERROR during user settings creation: {settings_error}")
+            import traceback
 
-                print(f"🚨 Full traceback: {traceback.format_exc()}")
-                db_session.rollback()
-                flash(f"User creation failed: {settings_error}", "error")
-                return render_template("register.html")
+            print(f"🚨 Full traceback: {traceback.format_exc()}")
+            db_session.rollback()
+            flash(f"User creation failed: {settings_error}", "error")
+            return render_template("register.html")
 
-            if is_first_user:
-                flash(
-                    "Registration successful! You have been granted admin privileges as the first user. Please log in.",
-                    "success",
-                )
-            else:
-                flash("Registration successful! Please log in.", "success")
-            return redirect(url_for("login"))
-        finally:
-            db_session.close()
+        if is_first_user:
+            flash(
+                "Registration successful! You have been granted admin privileges as the first user. Please log in.",
+                "success",
+            )
+        else:
+            flash("Registration successful! Please log in.", "success")
+        return redirect(url_for("login"))
 
     return render_template("register.html")
 
@@ -1200,172 +1677,208 @@ def logout():
     return redirect(url_for("index"))
 
 
-@app.route("/dashboard")
-@login_required
-def dashboard():
-    db_session = Session()
-    try:
-        # Get current user from this session with all needed relationships in one query
-        current_user_id = current_user.id
-        user = db_session.query(User).options(
-            joinedload(User.mercury_accounts),  # Eager load mercury accounts
-            joinedload(User.restricted_accounts)  # Eager load account restrictions
-        ).get(current_user_id)
-        
-        if not user:
-            flash("User not found", "error")
-            return redirect(url_for("login"))
-
-        # Get or create user settings
-        user_settings = (
-            db_session.query(UserSettings).filter_by(user_id=current_user_id).first()
-        )
-        if not user_settings:
-            user_settings = UserSettings(user_id=current_user_id)
-            db_session.add(user_settings)
-            db_session.commit()
+def render_dashboard_summary(db_session, user_settings, show_all):
+    """
+    Render the dashboard's summary cards, recent transactions and Mercury accounts.
 
-        # Get all mercury accounts (already loaded via joinedload)
-        all_mercury_accounts = user.mercury_accounts
+    Args:
+        db_session: SQLAlchemy session
+        user_settings (UserSettings): Current user's settings (primary accounts)
+        show_all (bool): Ignore the primary account settings
 
-        # If user has a primary Mercury account, filter to that account by default
-        # unless they specifically request to see all accounts
-        show_all = request.args.get("show_all", "0") == "1"
+    Returns:
+        str: Rendered fragments/dashboard_summary.html
+    """
+    # Get all mercury accounts the user belongs to
+    all_mercury_accounts = get_user_mercury_accounts(db_session)
 
-        if user_settings.primary_mercury_account_id and not show_all:
-            mercury_accounts = [
-                ma
-                for ma in all_mercury_accounts
-                if ma.id == user_settings.primary_mercury_account_id
-            ]
-            # Fallback to all accounts if primary account is not accessible
-            if not mercury_accounts:
-                mercury_accounts = all_mercury_accounts
-        else:
+    # Limit to the primary Mercury account unless showing all
+    if user_settings.primary_mercury_account_id and not show_all:
+        mercury_accounts = [
+            ma
+            for ma in all_mercury_accounts
+            if ma.id == user_settings.primary_mercury_account_id
+        ]
+        # Fallback to all accounts if primary account is not accessible
+        if not mercury_accounts:
             mercury_accounts = all_mercury_accounts
+    else:
+        mercury_accounts = all_mercury_accounts
 
-        # Get accessible accounts for this user in one optimized query (respects account restrictions)
-        accessible_accounts = get_user_accessible_accounts(user, db_session)
+    # Get accessible accounts for this user in one optimized query (respects account restrictions)
+    accessible_accounts = get_user_accessible_accounts(current_user, db_session)
 
-        # If user has a primary account set, filter to just that account (unless showing all)
-        if user_settings.primary_account_id and not show_all:
-            primary_account = next(
-                (
-                    acc
-                    for acc in accessible_accounts
-                    if acc.id == user_settings.primary_account_id
-                ),
-                None,
-            )
-            if primary_account:
-                accessible_accounts = [primary_account]
-
-        # Calculate summary statistics efficiently
-        total_accounts = 0
-        total_balance = 0
-        account_ids_for_transactions = []
-
-        # Filter accessible accounts to match the selected mercury account(s)
-        for mercury_account in mercury_accounts:
-            mercury_account_accessible_accounts = [
-                account
-                for account in accessible_accounts
-                if account.mercury_account_id == mercury_account.id
-            ]
-            total_accounts += len(mercury_account_accessible_accounts)
+    # If user has a primary account set, filter to just that account (unless showing all)
+    if user_settings.primary_account_id and not show_all:
+        primary_account = next(
+            (
+                acc
+                for acc in accessible_accounts
+                if acc.id == user_settings.primary_account_id
+            ),
+            None,
+        )
+        if primary_account:
+            accessible_accounts = [primary_account]
 
-            for account in mercury_account_accessible_accounts:
-                if account.balance:
-                    total_balance += account.balance
-                account_ids_for_transactions.append(account.id)
+    # Calculate summary statistics efficiently
+    total_accounts = 0
+    total_balance = 0
+    account_ids_for_transactions = []
 
-        # Get recent transactions in a single optimized query
-        recent_transactions = []
-        if account_ids_for_transactions:
-            from sqlalchemy import case, desc, asc
-            
-            effective_date = case(
-                (Transaction.posted_at.isnot(None), Transaction.posted_at),
-                else_=Transaction.created_at,
-            )
-            recent_transactions = (
-                db_session.query(Transaction)
-                .options(joinedload(Transaction.account))  # Eagerly load account relationship
-                .filter(Transaction.account_id.in_(account_ids_for_transactions))
-                .order_by(
-                    # Pending transactions first, then by effective date
-                    asc(Transaction.posted_at.isnot(None)),
-                    desc(effective_date),
-                )
-                .limit(10)  # Get top 10 directly instead of processing more
-                .all()
+    # Filter accessible accounts to match the selected mercury account(s)
+    for mercury_account in mercury_accounts:
+        mercury_account_accessible_accounts = [
+            account
+            for account in accessible_accounts
+            if account.mercury_account_id == mercury_account.id
+        ]
+        total_accounts += len(mercury_account_accessible_accounts)
+
+        for account in mercury_account_accessible_accounts:
+            if account.balance:
+                total_balance += account.balance
+            account_ids_for_transactions.append(account.id)
+
+    # Get recent transactions in a single optimized query
+    recent_transactions = []
+    missing_receipts_count = 0
+    if account_ids_for_transactions:
+        from sqlalchemy import case, desc, asc
+        
+        effective_date = case(
+            (Transaction.posted_at.isnot(None), Transaction.posted_at),
+            else_=Transaction.created_at,
+        )
+        recent_transactions = (
+            db_session.query(Transaction)
+            .options(joinedload(Transaction.account))  # Eagerly load account relationship
+            .filter(Transaction.account_id.in_(account_ids_for_transactions))
+            .order_by(
+                # Pending transactions first, then by effective date
+                asc(Transaction.posted_at.isnot(None)),
+                desc(effective_date),
             )
+            .limit(10)  # Get top 10 directly instead of processing more
+            .all()
+        )
 
-        return render_template(
-            "dashboard.html",
-            mercury_accounts=mercury_accounts,
-            all_mercury_accounts=all_mercury_accounts,
-            show_all=show_all,
-            has_primary_account=user_settings.primary_mercury_account_id is not None,
-            has_primary_specific_account=user_settings.primary_account_id is not None,
-            total_accounts=total_accounts,
-            total_balance=total_balance,
-            recent_transactions=recent_transactions,
+        # Missing required receipts (in the statuses /transactions shows by default)
+        # from the per-account counters maintained by sync
+        missing_receipts_count = sum(
+            stats.missing_receipt_count
+            for stats in load_account_stats(db_session, account_ids_for_transactions).values()
         )
-    finally:
-        db_session.close()
+
+    return render_template(
+        "fragments/dashboard_summary.html",
+        mercury_accounts=mercury_accounts,
+        total_accounts=total_accounts,
+        total_balance=total_balance,
+        recent_transactions=recent_transactions,
+        missing_receipts_count=missing_receipts_count,
+    )
 
 
-@app.route("/accounts")
+@app.route("/dashboard")
 @login_required
-def accounts():
+def dashboard():
     db_session = Session()
-    try:
-        user = get_current_user_in_session(db_session)
-        if not user:
-            flash("User not found", "error")
-            return redirect(url_for("login"))
-
-        mercury_accounts = (
-            db_session.query(MercuryAccount)
-            .filter(MercuryAccount.users.contains(user))
-            .all()
-        )
+    current_user_id = current_user.id
 
-        accounts_data = []
+    # Get or create user settings
+    user_settings = (
+        db_session.query(UserSettings).filter_by(user_id=current_user_id).first()
+    )
+    if not user_settings:
+        user_settings = UserSettings(user_id=current_user_id)
+        db_session.add(user_settings)
+        db_session.commit()
 
-        # Get accessible accounts for this user (respects account restrictions)
-        accessible_accounts = get_user_accessible_accounts(user, db_session)
+    # If user has a primary Mercury account, filter to that account by default
+    # unless they specifically request to see all accounts
+    show_all = request.args.get("show_all", "0") == "1"
+    access = get_access_context()
+    summary_key = (
+        tuple(sorted(access.mercury_account_ids)),
+        access.accessible_account_ids,
+        user_settings.primary_mercury_account_id,
+        user_settings.primary_account_id,
+        show_all,
+    )
+    summary_html = render_cached_fragment(
+        db_session,
+        "dashboard_summary",
+        summary_key,
+        partial(render_dashboard_summary, db_session, user_settings, show_all),
+    )
 
-        for mercury_account in mercury_accounts:
-            # Filter accessible accounts for this mercury account
-            mercury_account_accessible_accounts = [
-                account
-                for account in accessible_accounts
-                if account.mercury_account_id == mercury_account.id
-            ]
+    return render_template(
+        "dashboard.html",
+        show_all=show_all,
+        has_primary_account=user_settings.primary_mercury_account_id is not None,
+        has_primary_specific_account=user_settings.primary_account_id is not None,
+        summary_html=summary_html,
+    )
 
-            for account in mercury_account_accessible_accounts:
-                transaction_count = (
-                    db_session.query(Transaction)
-                    .filter_by(account_id=account.id)
-                    .count()
-                )
+
+def render_accounts_list(db_session, user):
+    """
+    Render the Mercury connections and account cards of the accounts page.
+
+    Args:
+        db_session: SQLAlchemy session
+        user: Current user bound to db_session
+
+    Returns:
+        str: Rendered fragments/accounts_list.html
+    """
+    mercury_accounts = get_user_mercury_accounts(db_session)
+
+    # Get accessible accounts for this user (respects account restrictions)
+    accessible_accounts = get_user_accessible_accounts(user, db_session)
+
+    # Transaction counts from the per-account counters maintained by sync
+    account_stats = load_account_stats(db_session, [account.id for account in accessible_accounts])
+
+    accounts_data = []
+    for mercury_account in mercury_accounts:
+        # Filter accessible accounts for this mercury account
+        for account in accessible_accounts:
+            if account.mercury_account_id == mercury_account.id:
                 accounts_data.append(
                     {
                         "account": account,
                         "mercury_account": mercury_account,
-                        "transaction_count": transaction_count,
+                        "transaction_count": account_stats[account.id].transaction_count,
                     }
                 )
 
-        return render_template(
-            "accounts.html",
-            accounts_data=accounts_data,
-            mercury_accounts=mercury_accounts,
-        )
-    finally:
-        db_session.close()
+    return render_template(
+        "fragments/accounts_list.html",
+        accounts_data=accounts_data,
+        mercury_accounts=mercury_accounts,
+    )
+
+
+@app.route("/accounts")
+@login_required
+def accounts():
+    db_session = Session()
+    user = get_current_user_in_session(db_session)
+    if not user:
+        flash("User not found", "error")
+        return redirect(url_for("login"))
+
+    access = get_access_context()
+    accounts_html = render_cached_fragment(
+        db_session,
+        "accounts_list",
+        (tuple(sorted(access.mercury_account_ids)), access.accessible_account_ids),
+        partial(render_accounts_list, db_session, user),
+    )
+
+    return render_template("accounts.html", accounts_html=accounts_html)
 
 
 @app.route("/add_mercury_account", methods=["GET", "POST"])
@@ -1378,25 +1891,24 @@ def add_mercury_account():
         environment = request.form.get("environment", "sandbox")
 
         db_session = Session()
-        try:
-            user = get_current_user_in_session(db_session)
-            if not user:
-                flash("User not found", "error")
-                return redirect(url_for("login"))
+        user = get_current_user_in_session(db_session)
+        if not user:
+            flash("User not found", "error")
+            return redirect(url_for("login"))
 
-            # Create new Mercury account
-            mercury_account = MercuryAccount(
-                name=name, api_key=api_key, sandbox_mode=(environment == "sandbox")
-            )
-            mercury_account.users.append(user)
+        # Create new Mercury account
+        mercury_account = MercuryAccount(
+            name=name, api_key=api_key, sandbox_mode=(environment == "sandbox")
+        )
+        mercury_account.users.append(user)
 
-            db_session.add(mercury_account)
-            db_session.commit()
+        db_session.add(mercury_account)
+        # The creator's cached access context must pick up the new group
+        UserAccessVersion.bump(db_session, [user.id])
+        db_session.commit()
 
-            flash("Mercury account added successfully!", "success")
-            return redirect(url_for("accounts"))
-        finally:
-            db_session.close()
+        flash("Mercury account added successfully!", "success")
+        return redirect(url_for("accounts"))
 
     return render_template("add_mercury_account.html")
 
@@ -1406,47 +1918,46 @@ def add_mercury_account():
 @admin_required
 def edit_mercury_account(account_id):
     db_session = Session()
-    try:
-        user = get_current_user_in_session(db_session)
-        if not user:
-            flash("User not found", "error")
-            return redirect(url_for("login"))
+    user = get_current_user_in_session(db_session)
+    if not user:
+        flash("User not found", "error")
+        return redirect(url_for("login"))
 
-        # Get the Mercury account and ensure user has access
-        mercury_account = (
-            db_session.query(MercuryAccount)
-            .filter(
-                MercuryAccount.id == account_id,
-                MercuryAccount.users.contains(user),
-            )
-            .first()
+    # Get the Mercury account and ensure user has access
+    mercury_account = (
+        db_session.query(MercuryAccount)
+        .filter(
+            MercuryAccount.id == account_id,
+            MercuryAccount.id.in_(get_access_context().mercury_account_ids),
         )
+        .first()
+    )
 
-        if not mercury_account:
-            flash("Mercury account not found or access denied.", "error")
-            return redirect(url_for("accounts"))
+    if not mercury_account:
+        flash("Mercury account not found or access denied.", "error")
+        return redirect(url_for("accounts"))
 
-        if request.method == "POST":
-            # Update Mercury account
-            mercury_account.name = request.form["name"]
-            mercury_account.api_key = request.form["api_key"]
-            environment = request.form.get("environment", "sandbox")
-            mercury_account.sandbox_mode = environment == "sandbox"
-            mercury_account.description = (
-                request.form.get("description", "").strip() or None
-            )
-            mercury_account.is_active = "is_active" in request.form
-            mercury_account.sync_enabled = "sync_enabled" in request.form
+    if request.method == "POST":
+        # Update Mercury account
+        mercury_account.name = request.form["name"]
+        mercury_account.api_key = request.form["api_key"]
+        environment = request.form.get("environment", "sandbox")
+        mercury_account.sandbox_mode = environment == "sandbox"
+        mercury_account.description = (
+            request.form.get("description", "").strip() or None
+        )
+        mercury_account.is_active = "is_active" in request.form
+        mercury_account.sync_enabled = "sync_enabled" in request.form
 
-            db_session.commit()
-            flash("Mercury account updated successfully!", "success")
-            return redirect(url_for("accounts"))
+        # Cached dashboard and accounts fragments show the connection details
+        DataVersion.bump(db_session, [mercury_account.id])
+        db_session.commit()
+        flash("Mercury account updated successfully!", "success")
+        return redirect(url_for("accounts"))
 
-        return render_template(
-            "edit_mercury_account.html", mercury_account=mercury_account
-        )
-    finally:
-        db_session.close()
+    return render_template(
+        "edit_mercury_account.html", mercury_account=mercury_account
+    )
 
 
 @app.route("/delete_mercury_account/<int:account_id>", methods=["POST"])
@@ -1454,33 +1965,31 @@ def edit_mercury_account(account_id):
 @admin_required
 def delete_mercury_account(account_id):
     db_session = Session()
-    try:
-        user = get_current_user_in_session(db_session)
-        if not user:
-            flash("User not found", "error")
-            return redirect(url_for("login"))
+    user = get_current_user_in_session(db_session)
+    if not user:
+        flash("User not found", "error")
+        return redirect(url_for("login"))
 
-        # Get the Mercury account and ensure user has access
-        mercury_account = (
-            db_session.query(MercuryAccount)
-            .filter(
-                MercuryAccount.id == account_id,
-                MercuryAccount.users.contains(user),
-            )
-            .first()
+    # Get the Mercury account and ensure user has access
+    mercury_account = (
+        db_session.query(MercuryAccount)
+        .filter(
+            MercuryAccount.id == account_id,
+            MercuryAccount.id.in_(get_access_context().mercury_account_ids),
         )
+        .first()
+    )
 
-        if not mercury_account:
-            flash("Mercury account not found or access denied.", "error")
-            return redirect(url_for("accounts"))
-
-        # Delete the Mercury account
-        db_session.delete(mercury_account)
-        db_session.commit()
-        flash("Mercury account deleted successfully!", "success")
+    if not mercury_account:
+        flash("Mercury account not found or access denied.", "error")
         return redirect(url_for("accounts"))
-    finally:
-        db_session.close()
+
+    # Delete the Mercury account; its members lose access to its accounts
+    UserAccessVersion.bump_mercury_account_members(db_session, mercury_account.id)
+    db_session.delete(mercury_account)
+    db_session.commit()
+    flash("Mercury account deleted successfully!", "success")
+    return redirect(url_for("accounts"))
 
 
 @app.route("/transactions")
@@ -1494,6 +2003,17 @@ def transactions():
     status_filter = request.args.getlist("status")  # Get list of statuses
     month_filter = request.args.get("month")  # Format: YYYY-MM
     export_format = request.args.get("export")  # csv or excel
+    receipt_status_filter = request.args.get("receipt_status")
+    sort = request.args.get("sort")  # "date", "relevance" or "receipt" (receipt compliance)
+    search_text = request.args.get("q", "").strip()
+    search = SearchQuery.parse(search_text)
+
+    # Text searches are ranked by relevance unless another order was chosen
+    if not sort and search.has_text:
+        sort = "relevance"
+
+    if receipt_status_filter not in RECEIPT_STATUSES:
+        receipt_status_filter = None
 
     # Default to sent and pending if no status filter specified
     if not status_filter:
@@ -1510,186 +2030,196 @@ def transactions():
     expanded_status_filter = list(set(expanded_status_filter))
 
     db_session = Session()
-    try:
-        # Get current user in session to avoid DetachedInstanceError
-        user_in_session = get_current_user_in_session(db_session)
-        if not user_in_session:
-            flash("User session expired. Please log in again.", "error")
-            return redirect(url_for("login"))
+    # Get user's accessible Mercury accounts
+    all_mercury_accounts = get_user_mercury_accounts(db_session)
 
-        # Get user's accessible Mercury accounts
-        all_mercury_accounts = (
-            db_session.query(MercuryAccount)
-            .filter(MercuryAccount.users.contains(user_in_session))
-            .all()
-        )
+    # Get user settings
+    user_settings = (
+        db_session.query(UserSettings).filter_by(user_id=current_user.id).first()
+    )
 
-        # Get user settings
-        user_settings = (
-            db_session.query(UserSettings).filter_by(user_id=user_in_session.id).first()
+    # If no specific Mercury account is selected but user has a primary account, use that as default
+    if (
+        not mercury_account_id
+        and user_settings
+        and user_settings.primary_mercury_account_id
+    ):
+        # Check if primary account is accessible to user
+        primary_accessible = any(
+            ma.id == user_settings.primary_mercury_account_id
+            for ma in all_mercury_accounts
         )
+        if primary_accessible:
+            mercury_account_id = user_settings.primary_mercury_account_id
 
-        # If no specific Mercury account is selected but user has a primary account, use that as default
-        if (
-            not mercury_account_id
-            and user_settings
-            and user_settings.primary_mercury_account_id
-        ):
-            # Check if primary account is accessible to user
-            primary_accessible = any(
-                ma.id == user_settings.primary_mercury_account_id
-                for ma in all_mercury_accounts
-            )
-            if primary_accessible:
-                mercury_account_id = user_settings.primary_mercury_account_id
+    # Filter by specific Mercury account if selected
+    if mercury_account_id:
+        mercury_accounts = [
+            ma for ma in all_mercury_accounts if ma.id == mercury_account_id
+        ]
+        if not mercury_accounts:
+            flash("Mercury account not found or access denied.", "error")
+            return redirect(url_for("transactions"))
+    else:
+        mercury_accounts = all_mercury_accounts
 
-        # Filter by specific Mercury account if selected
-        if mercury_account_id:
-            mercury_accounts = [
-                ma for ma in all_mercury_accounts if ma.id == mercury_account_id
-            ]
-            if not mercury_accounts:
-                flash("Mercury account not found or access denied.", "error")
-                return redirect(url_for("transactions"))
-        else:
-            mercury_accounts = all_mercury_accounts
+    # Get accessible accounts for this user (respects account restrictions)
+    all_accessible_accounts = get_user_accessible_accounts(
+        current_user, db_session
+    )
 
-        # Get accessible accounts for this user (respects account restrictions)
-        all_accessible_accounts = get_user_accessible_accounts(
-            user_in_session, db_session
+    # If no specific account is selected but user has a primary account, use that as default
+    if not account_id and user_settings and user_settings.primary_account_id:
+        # Check if primary account is accessible to user
+        primary_account_accessible = any(
+            acc.id == user_settings.primary_account_id
+            for acc in all_accessible_accounts
         )
+        if primary_account_accessible:
+            account_id = user_settings.primary_account_id
 
-        # If no specific account is selected but user has a primary account, use that as default
-        if not account_id and user_settings and user_settings.primary_account_id:
-            # Check if primary account is accessible to user
-            primary_account_accessible = any(
-                acc.id == user_settings.primary_account_id
-                for acc in all_accessible_accounts
-            )
-            if primary_account_accessible:
-                account_id = user_settings.primary_account_id
-
-        account_ids = []
-        for mercury_account in mercury_accounts:
-            mercury_account_accessible_accounts = [
-                account
-                for account in all_accessible_accounts
-                if account.mercury_account_id == mercury_account.id
-            ]
-            account_ids.extend([acc.id for acc in mercury_account_accessible_accounts])
+    account_ids = []
+    for mercury_account in mercury_accounts:
+        mercury_account_accessible_accounts = [
+            account
+            for account in all_accessible_accounts
+            if account.mercury_account_id == mercury_account.id
+        ]
+        account_ids.extend([acc.id for acc in mercury_account_accessible_accounts])
 
-        # Get available months for dropdown
-        available_months = (
-            get_available_months(db_session, account_ids) if account_ids else []
-        )
+    # Get dropdown values (months, categories) from the filter catalog
+    filter_options = get_filter_options(db_session, account_ids)
+    available_months = get_available_months(filter_options)
 
-        # Build query with eager loading to avoid DetachedInstanceError
-        query = db_session.query(Transaction).options(
-            joinedload(Transaction.account)  # Eagerly load account relationship
-        ).filter(
-            Transaction.account_id.in_(account_ids)
-        )
+    # Filters that are not facets of the filter bar: access, receipts and search
+    query = db_session.query(Transaction).filter(
+        Transaction.account_id.in_(account_ids)
+    )
 
-        if account_id:
-            query = query.filter_by(account_id=account_id)
+    # Add receipt compliance filter (uses the materialized receipt_status column)
+    if receipt_status_filter:
+        query = query.filter(Transaction.receipt_status == receipt_status_filter)
 
-        if category:
-            query = query.filter(Transaction.note.ilike(f"%{category}%"))
+    # Add full-text search (words, phrases, amount and date filters)
+    query, search_ordering = apply_transaction_search(
+        query, search, db_session.get_bind().dialect.name
+    )
 
-        # Add status filter
-        if expanded_status_filter:
-            query = query.filter(Transaction.status.in_(expanded_status_filter))
+    # Counts shown next to each filter value under the current selection
+    filter_counts = get_transaction_facet_counts(
+        db_session,
+        query,
+        account_ids,
+        {"receipt_status": receipt_status_filter, "q": search_text},
+        {
+            "account": [account_id] if account_id else [],
+            "status": expanded_status_filter,
+            "month": [month_filter] if month_filter else [],
+            "category": [category] if category else [],
+        },
+    )
 
-        # Add month filter
-        if month_filter:
-            try:
-                year, month = map(int, month_filter.split("-"))
-                from sqlalchemy import and_, extract
+    # Eagerly load the account relationship to avoid DetachedInstanceError
+    query = query.options(joinedload(Transaction.account))
 
-                # Use effective date (posted_at or created_at) for month filtering
-                effective_date = func.coalesce(
-                    Transaction.posted_at, Transaction.created_at
-                )
-                query = query.filter(
-                    and_(
-                        extract("year", effective_date) == year,
-                        extract("month", effective_date) == month,
-                    )
-                )
-            except (ValueError, AttributeError):
-                pass  # Invalid month format, ignore filter
-
-        # Pagination
-        per_page = 50
-        offset = (page - 1) * per_page
-        # Order by effective date (posted_at for completed transactions, created_at for pending)
-        # Put pending transactions first (they have NULL posted_at), then completed transactions
-        from sqlalchemy import case, desc, asc
+    if account_id:
+        query = query.filter_by(account_id=account_id)
 
-        effective_date = case(
-            (Transaction.posted_at.isnot(None), Transaction.posted_at),
-            else_=Transaction.created_at,
-        )
-        transactions = (
-            query.order_by(
-                # First sort: pending transactions first (posted_at is NULL)
-                asc(Transaction.posted_at.isnot(None)),
-                # Second sort: by effective date descending
-                desc(effective_date),
-            )
-            .offset(offset)
-            .limit(per_page)
-            .all()
-        )
+    if category:
+        query = query.filter(Transaction.category_condition(category))
+
+    # Add status filter
+    if expanded_status_filter:
+        query = query.filter(Transaction.status.in_(expanded_status_filter))
 
-        # Get all accounts for filter dropdown
-        all_accounts = (
-            db_session.query(Account).filter(Account.id.in_(account_ids)).all()
+    # Add month filter
+    # Invalid months are ignored
+    month_condition = effective_month_condition(month_filter) if month_filter else None
+    if month_condition is not None:
+        query = query.filter(month_condition)
+
+    # Pagination
+    per_page = 50
+    offset = (page - 1) * per_page
+    # Order by effective date (posted_at for completed transactions, created_at for pending)
+    # Put pending transactions first (they have NULL posted_at), then completed transactions
+    from sqlalchemy import case, desc, asc
+
+    effective_date = case(
+        (Transaction.posted_at.isnot(None), Transaction.posted_at),
+        else_=Transaction.created_at,
+    )
+    ordering = [
+        # First sort: pending transactions first (posted_at is NULL)
+        asc(Transaction.posted_at.isnot(None)),
+        # Second sort: by effective date descending
+        desc(effective_date),
+    ]
+    if sort == "receipt":
+        # Missing required receipts first, then the rest in RECEIPT_STATUSES order
+        compliance_rank = case(
+            {status: rank for rank, status in enumerate(RECEIPT_STATUSES)},
+            value=Transaction.receipt_status,
+            else_=len(RECEIPT_STATUSES),
         )
+        ordering.insert(0, asc(compliance_rank))
+    elif sort == "relevance" and search_ordering is not None:
+        ordering.insert(0, search_ordering)
+
+    transactions = (
+        query.order_by(*ordering)
+        .offset(offset)
+        .limit(per_page)
+        .all()
+    )
 
-        # Get available categories and sub-categories
-        category_data = get_unique_categories_and_subcategories(db_session, account_ids)
-        categories = category_data['all_combinations']
+    # Get all accounts for filter dropdown (already loaded with the accessible accounts)
+    selected_account_ids = set(account_ids)
+    all_accounts = [
+        acc for acc in all_accessible_accounts if acc.id in selected_account_ids
+    ]
 
-        # Available statuses
-        available_statuses = ["pending", "sent", "cancelled", "failed"]
+    # Available categories and sub-categories
+    categories = filter_options['all_combinations']
 
-        # Get all Mercury accounts for filter dropdown
-        all_mercury_accounts = (
-            db_session.query(MercuryAccount)
-            .filter(MercuryAccount.users.contains(current_user))
-            .all()
-        )
+    # Available statuses
+    available_statuses = ["pending", "sent", "cancelled", "failed"]
 
-        # Handle export requests
-        if export_format in ["csv", "excel"]:
-            # Get all transactions for export (without pagination)
-            all_transactions = query.order_by(
-                # First sort: pending transactions first (posted_at is NULL)
-                asc(Transaction.posted_at.isnot(None)),
-                # Second sort: by effective date descending
-                desc(effective_date),
-            ).all()
+    # Handle export requests
+    if export_format in ["csv", "excel"]:
+        # Get all transactions for export (without pagination)
+        all_transactions = query.order_by(*ordering).all()
 
-            return export_transactions(all_transactions, export_format, all_accounts)
-
-        return render_template(
-            "transactions.html",
-            transactions=transactions,
-            accounts=all_accounts,
-            categories=categories,
-            available_statuses=available_statuses,
-            mercury_accounts=all_mercury_accounts,
-            available_months=available_months,
-            current_account_id=account_id,
-            current_category=category,
-            current_status=status_filter,
-            current_mercury_account_id=mercury_account_id,
-            current_month=month_filter,
-            page=page,
+        receipt_statuses = resolve_receipt_statuses(
+            db_session, all_accounts, all_transactions
+        )
+        return export_transactions(
+            all_transactions, export_format, all_accounts, receipt_statuses
         )
-    finally:
-        db_session.close()
+
+    # Use materialized receipt statuses, evaluating any not yet backfilled
+    receipt_statuses = resolve_receipt_statuses(db_session, all_accounts, transactions)
+
+    return render_template(
+        "transactions.html",
+        transactions=transactions,
+        receipt_statuses=receipt_statuses,
+        accounts=all_accounts,
+        categories=categories,
+        available_statuses=available_statuses,
+        mercury_accounts=all_mercury_accounts,
+        available_months=available_months,
+        current_account_id=account_id,
+        current_category=category,
+        current_status=status_filter,
+        current_mercury_account_id=mercury_account_id,
+        current_month=month_filter,
+        current_receipt_status=receipt_status_filter,
+        current_sort=sort,
+        current_search=search_text,
+        filter_count=partial(facet_count_for, filter_counts),
+        page=page,
+    )
 
 
 @app.route("/reports")
@@ -1718,165 +2248,231 @@ def reports():
     expanded_status_filter = list(set(expanded_status_filter))
 
     db_session = Session()
-    try:
-        # Get current user in session to avoid DetachedInstanceError
-        user_in_session = get_current_user_in_session(db_session)
-        if not user_in_session:
-            flash("User session expired. Please log in again.", "error")
-            return redirect(url_for("login"))
+    # Get current user in session to avoid DetachedInstanceError
+    user_in_session = get_current_user_in_session(db_session)
+    if not user_in_session:
+        flash("User session expired. Please log in again.", "error")
+        return redirect(url_for("login"))
 
-        # Get all Mercury accounts for filter dropdown
-        mercury_accounts = (
-            db_session.query(MercuryAccount)
-            .filter(MercuryAccount.users.contains(user_in_session))
-            .all()
-        )
+    # Get all Mercury accounts for filter dropdown
+    mercury_accounts = get_user_mercury_accounts(db_session)
+
+    # Get user settings
+    user_settings = (
+        db_session.query(UserSettings).filter_by(user_id=user_in_session.id).first()
+    )
 
-        # Get user settings
-        user_settings = (
-            db_session.query(UserSettings).filter_by(user_id=user_in_session.id).first()
+    # Get view type, using user's preference as default if not specified in URL
+    view_type = request.args.get("view")
+    if view_type is None and user_settings:
+        view_type = user_settings.get_report_preference("default_view", "charts")
+    elif view_type is None:
+        view_type = "charts"
+
+    # If no specific Mercury account is selected but user has a primary account, use that as default
+    if (
+        not mercury_account_id
+        and user_settings
+        and user_settings.primary_mercury_account_id
+    ):
+        # Check if primary account is accessible to user
+        primary_accessible = any(
+            ma.id == user_settings.primary_mercury_account_id
+            for ma in mercury_accounts
         )
+        if primary_accessible:
+            mercury_account_id = user_settings.primary_mercury_account_id
 
-        # Get view type, using user's preference as default if not specified in URL
-        view_type = request.args.get("view")
-        if view_type is None and user_settings:
-            view_type = user_settings.get_report_preference("default_view", "charts")
-        elif view_type is None:
-            view_type = "charts"
-
-        # If no specific Mercury account is selected but user has a primary account, use that as default
-        if (
-            not mercury_account_id
-            and user_settings
-            and user_settings.primary_mercury_account_id
-        ):
-            # Check if primary account is accessible to user
-            primary_accessible = any(
-                ma.id == user_settings.primary_mercury_account_id
-                for ma in mercury_accounts
-            )
-            if primary_accessible:
-                mercury_account_id = user_settings.primary_mercury_account_id
+    # Filter by specific Mercury account if selected
+    if mercury_account_id:
+        accessible_mercury_accounts = [
+            ma for ma in mercury_accounts if ma.id == mercury_account_id
+        ]
+        if not accessible_mercury_accounts:
+            flash("Mercury account not found or access denied.", "error")
+            return redirect(url_for("reports"))
+    else:
+        accessible_mercury_accounts = mercury_accounts
 
-        # Filter by specific Mercury account if selected
-        if mercury_account_id:
-            accessible_mercury_accounts = [
-                ma for ma in mercury_accounts if ma.id == mercury_account_id
-            ]
-            if not accessible_mercury_accounts:
-                flash("Mercury account not found or access denied.", "error")
-                return redirect(url_for("reports"))
-        else:
-            accessible_mercury_accounts = mercury_accounts
+    # Get accessible accounts for this user (respects account restrictions and excludes accounts marked as exclude_from_reports)
+    all_accessible_accounts = get_user_accessible_accounts_for_reports(
+        user_in_session, db_session
+    )
 
-        # Get accessible accounts for this user (respects account restrictions and excludes accounts marked as exclude_from_reports)
-        all_accessible_accounts = get_user_accessible_accounts_for_reports(
-            user_in_session, db_session
+    # If no specific account is selected but user has a primary account, use that as default
+    if not account_id and user_settings and user_settings.primary_account_id:
+        # Check if primary account is accessible to user
+        primary_account_accessible = any(
+            acc.id == user_settings.primary_account_id
+            for acc in all_accessible_accounts
         )
+        if primary_account_accessible:
+            account_id = user_settings.primary_account_id
 
-        # If no specific account is selected but user has a primary account, use that as default
-        if not account_id and user_settings and user_settings.primary_account_id:
-            # Check if primary account is accessible to user
-            primary_account_accessible = any(
-                acc.id == user_settings.primary_account_id
-                for acc in all_accessible_accounts
+    # Filter accessible accounts by selected mercury account(s)
+    accounts = []
+    account_ids = []
+    for mercury_account in accessible_mercury_accounts:
+        mercury_account_accessible_accounts = [
+            account
+            for account in all_accessible_accounts
+            if account.mercury_account_id == mercury_account.id
+        ]
+        accounts.extend(mercury_account_accessible_accounts)
+        account_ids.extend([acc.id for acc in mercury_account_accessible_accounts])
+
+    # Get dropdown values (months, category tree, statuses) from the filter catalog
+    filter_options = get_filter_options(db_session, account_ids)
+    available_months = get_available_months(filter_options)
+    categories = filter_options['all_combinations']
+    category_structure = filter_options['subcategories']
+
+    # Consolidate sent and posted statuses (they are equivalent)
+    consolidated_statuses = set()
+    for status in filter_options['statuses']:
+        if status in ['sent', 'posted']:
+            consolidated_statuses.add('posted')  # Use 'posted' as the canonical form
+        else:
+            consolidated_statuses.add(status)
+
+    available_statuses = sorted(consolidated_statuses)
+
+    # If table view or export is requested, get transaction data
+    table_data = None
+    hierarchical_data = None
+    if view_type == "table" or export_format:
+        # For export, use the flat table data
+        if export_format:
+            table_data = get_reports_table_data(
+                db_session,
+                mercury_account_id,
+                month_filter,
+                account_id,
+                category,
+                expanded_status_filter,
+            )
+            return export_reports_data(table_data, export_format)
+        else:
+            # For table view, use hierarchical data
+            hierarchical_data = get_hierarchical_reports_data(
+                db_session,
+                mercury_account_id,
+                month_filter,
+                account_id,
+                category,
+                expanded_status_filter,
             )
-            if primary_account_accessible:
-                account_id = user_settings.primary_account_id
-
-        # Filter accessible accounts by selected mercury account(s)
-        accounts = []
-        account_ids = []
-        for mercury_account in accessible_mercury_accounts:
-            mercury_account_accessible_accounts = [
-                account
-                for account in all_accessible_accounts
-                if account.mercury_account_id == mercury_account.id
-            ]
-            accounts.extend(mercury_account_accessible_accounts)
-            account_ids.extend([acc.id for acc in mercury_account_accessible_accounts])
 
-        # Get available months for dropdown
-        available_months = (
-            get_available_months(db_session, account_ids) if account_ids else []
-        )
+    return render_template(
+        "reports.html",
+        mercury_accounts=mercury_accounts,
+        accounts=accounts,
+        available_months=available_months,
+        categories=categories,
+        category_structure=category_structure,
+        available_statuses=available_statuses,
+        view_type=view_type,
+        current_month=month_filter,
+        current_mercury_account_id=mercury_account_id,
+        current_account_id=account_id,
+        current_category=category,
+        current_status=status_filter,
+        table_data=table_data,
+        hierarchical_data=hierarchical_data,
+    )
 
-        # Get available categories and sub-categories
-        category_data = get_unique_categories_and_subcategories(db_session, account_ids)
-        categories = category_data['all_combinations']
-        category_structure = category_data['subcategories']
 
-        # Get available statuses
-        available_statuses = []
-        if account_ids:
-            status_results = (
-                db_session.query(Transaction.status)
-                .filter(Transaction.account_id.in_(account_ids))
-                .filter(Transaction.status.isnot(None))
-                .distinct()
-                .all()
-            )
-            raw_statuses = [status[0] for status in status_results if status[0]]
-            
-            # Consolidate sent and posted statuses (they are equivalent)
-            consolidated_statuses = set()
-            for status in raw_statuses:
-                if status in ['sent', 'posted']:
-                    consolidated_statuses.add('posted')  # Use 'posted' as the canonical form
-                else:
-                    consolidated_statuses.add(status)
-            
-            available_statuses = sorted(list(consolidated_statuses))
-
-        # If table view or export is requested, get transaction data
-        table_data = None
-        hierarchical_data = None
-        if view_type == "table" or export_format:
-            # For export, use the flat table data
-            if export_format:
-                table_data = get_reports_table_data(
-                    db_session,
-                    mercury_account_id,
-                    month_filter,
-                    account_id,
-                    category,
-                    expanded_status_filter,
-                )
-                return export_reports_data(table_data, export_format)
-            else:
-                # For table view, use hierarchical data
-                hierarchical_data = get_hierarchical_reports_data(
-                    db_session,
-                    mercury_account_id,
-                    month_filter,
-                    account_id,
-                    category,
-                    expanded_status_filter,
-                )
+def get_expense_totals(
+    db_session,
+    mercury_account_ids,
+    account_ids,
+    start_date,
+    end_date,
+    include_pending,
+    by_month=False,
+    show_subcategories=False,
+):
+    """
+    Sum expenses for the chart endpoints by category, and optionally by month.
 
-        return render_template(
-            "reports.html",
-            mercury_accounts=mercury_accounts,
-            accounts=accounts,
-            available_months=available_months,
-            categories=categories,
-            category_structure=category_structure,
-            available_statuses=available_statuses,
-            view_type=view_type,
-            current_month=month_filter,
-            current_mercury_account_id=mercury_account_id,
-            current_account_id=account_id,
-            current_category=category,
-            current_status=status_filter,
-            table_data=table_data,
-            hierarchical_data=hierarchical_data,
+    Served from the analytics engine's snapshots when it is enabled (the date range
+    is then applied by whole days), otherwise aggregated in the database.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        mercury_account_ids (list): Mercury account groups the accounts belong to
+        account_ids (list): Accounts to include
+        start_date (datetime): Start of the date range
+        end_date (datetime): End of the date range
+        include_pending (bool): Include pending transactions
+        by_month (bool): Also group by effective month
+        show_subcategories (bool): Group by main and sub-category
+
+    Returns:
+        dict: Positive spending totals keyed by (month, main_category, sub_category),
+            where month is "YYYY-MM" (None unless by_month) and sub_category is None
+            unless show_subcategories
+    """
+    # Always exclude failed transactions from expense calculations
+    statuses = ["sent", "pending", "posted"] if include_pending else ["sent", "posted"]
+    if not account_ids:
+        return {}
+
+    analytics = get_analytics_engine()
+    if analytics is not None:
+        try:
+            return analytics.spending(
+                db_session,
+                mercury_account_ids,
+                account_ids,
+                start_date,
+                end_date,
+                statuses,
+                by_month=by_month,
+                show_subcategories=show_subcategories,
+                # The versions the response's ETag is built from
+                data_versions=dict(get_current_data_versions(db_session)),
+            )
+        except Exception as e:
+            logger.warning(f"Analytics engine failed, aggregating in the database: {e}")
+
+    # effective_date is posted_at, or created_at for pending transactions
+    date_field = Transaction.effective_date
+    year = extract("year", date_field)
+    month = extract("month", date_field)
+    group_columns = [year, month] if by_month else []
+    group_columns.append(Transaction.main_category)
+    if show_subcategories:
+        group_columns.append(Transaction.sub_category)
+
+    rows = (
+        db_session.query(*group_columns, func.sum(Transaction.amount))
+        .filter(
+            Transaction.account_id.in_(account_ids),
+            date_field >= start_date,
+            date_field <= end_date,
+            Transaction.amount < 0,  # Only expenses (negative amounts)
+            Transaction.status.in_(statuses),
         )
-    finally:
-        db_session.close()
+        .group_by(*group_columns)
+        .all()
+    )
+
+    totals = {}
+    for row in rows:
+        values = list(row)
+        month_key = None
+        if by_month:
+            month_key = f"{int(values.pop(0))}-{int(values.pop(0)):02d}"
+        main_category = values.pop(0)
+        sub_category = values.pop(0) if show_subcategories else None
+        totals[(month_key, main_category, sub_category)] = abs(values[0])
+    return totals
 
 
 @app.route("/api/budget_data")
 @login_required
+@data_version_etag(time_bucket_seconds=3600)
 def budget_data():
     """API endpoint for budget chart data"""
     months = request.args.get("months", 12, type=int)
@@ -1886,167 +2482,117 @@ def budget_data():
     month_filter = request.args.get("month")  # Format: YYYY-MM
 
     db_session = Session()
-    try:
-        # Get user's accessible Mercury accounts
-        mercury_accounts = (
-            db_session.query(MercuryAccount)
-            .filter(MercuryAccount.users.contains(current_user))
-            .all()
-        )
-
-        # Filter by specific Mercury account if selected
-        if mercury_account_id:
-            mercury_accounts = [
-                ma for ma in mercury_accounts if ma.id == mercury_account_id
-            ]
-            if not mercury_accounts:
-                return (
-                    jsonify({"error": "Mercury account not found or access denied"}),
-                    403,
-                )
+    # Get user's accessible Mercury accounts
+    mercury_accounts = get_user_mercury_accounts(db_session)
 
-        account_ids = []
-        for mercury_account in mercury_accounts:
-            accounts = (
-                db_session.query(Account)
-                .filter_by(mercury_account_id=mercury_account.id)
-                .filter_by(
-                    exclude_from_reports=False
-                )  # Exclude accounts marked as exclude_from_reports
-                .all()
+    # Filter by specific Mercury account if selected
+    if mercury_account_id:
+        mercury_accounts = [
+            ma for ma in mercury_accounts if ma.id == mercury_account_id
+        ]
+        if not mercury_accounts:
+            return (
+                jsonify({"error": "Mercury account not found or access denied"}),
+                403,
             )
-            account_ids.extend([acc.id for acc in accounts])
 
-        # Calculate date range
-        if month_filter:
-            try:
-                year, month = map(int, month_filter.split("-"))
-                start_date = datetime(year, month, 1)
-                if month == 12:
-                    end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-                else:
-                    end_date = datetime(year, month + 1, 1) - timedelta(days=1)
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-            except (ValueError, AttributeError):
-                # Invalid month format, use default range
-                end_date = datetime.now()
-                start_date = end_date - timedelta(days=months * 30)
-        else:
+    # Accessible accounts not marked as exclude_from_reports
+    access = get_access_context()
+    account_ids = []
+    for mercury_account in mercury_accounts:
+        account_ids.extend(access.account_ids_for(mercury_account.id, reports=True))
+
+    # Calculate date range
+    if month_filter:
+        try:
+            year, month = map(int, month_filter.split("-"))
+            start_date = datetime(year, month, 1)
+            if month == 12:
+                end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
+            else:
+                end_date = datetime(year, month + 1, 1) - timedelta(days=1)
+            end_date = end_date.replace(hour=23, minute=59, second=59)
+        except (ValueError, AttributeError):
+            # Invalid month format, use default range
             end_date = datetime.now()
             start_date = end_date - timedelta(days=months * 30)
+    else:
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=months * 30)
+
+    # Spending by month and normalized (lower-case) category, down to
+    # sub-categories only when they are shown
+    spending = get_expense_totals(
+        db_session,
+        [ma.id for ma in mercury_accounts],
+        account_ids,
+        start_date,
+        end_date,
+        include_pending,
+        by_month=True,
+        show_subcategories=show_subcategories,
+    )
 
-        # Build query filters - use created_at for pending transactions, posted_at for completed
-        date_field = func.coalesce(Transaction.posted_at, Transaction.created_at)
-        filters = [
-            Transaction.account_id.in_(account_ids),
-            date_field >= start_date,
-            date_field <= end_date,
-            # Transaction.note.isnot(None),
-            Transaction.amount < 0,  # Only expenses (negative amounts)
-        ]
+    # Organize data for chart
+    budget_data = defaultdict(lambda: defaultdict(float))
+    categories = set()
 
-        # Add status filter if not including pending
-        # Always exclude failed transactions from budget calculations
-        if not include_pending:
-            filters.append(Transaction.status.in_(["sent", "posted"]))
+    for (month_key, main_category, sub_category), amount in spending.items():
+        formatted_category = format_normalized_category(main_category, sub_category)
+        budget_data[month_key][formatted_category] += amount
+        categories.add(formatted_category)
+
+    # Format for Chart.js
+    months_list = []
+    datasets = []
+
+    # Generate month labels
+    current_date = start_date
+    while current_date <= end_date:
+        month_key = f"{current_date.year}-{current_date.month:02d}"
+        months_list.append(month_key)
+        current_date = current_date.replace(day=1)
+        if current_date.month == 12:
+            current_date = current_date.replace(year=current_date.year + 1, month=1)
         else:
-            filters.append(Transaction.status.in_(["sent", "pending", "posted"]))
-
-        # Query transactions grouped by month and category (note field)
-        # Use created_at for pending transactions (where posted_at is null), posted_at for completed
-        date_for_grouping = func.coalesce(Transaction.posted_at, Transaction.created_at)
-        transactions = (
-            db_session.query(
-                extract("year", date_for_grouping).label("year"),
-                extract("month", date_for_grouping).label("month"),
-                func.lower(Transaction.note).label("category"),  # Make case-insensitive
-                func.sum(Transaction.amount).label("total_amount"),
-            )
-            .filter(*filters)
-            .group_by(
-                extract("year", date_for_grouping),
-                extract("month", date_for_grouping),
-                func.lower(Transaction.note),  # Group by lowercase category
-            )
-            .all()
-        )
+            current_date = current_date.replace(month=current_date.month + 1)
+
+    # Create datasets for each category
+    colors = [
+        "#FF6384",
+        "#36A2EB",
+        "#FFCE56",
+        "#4BC0C0",
+        "#9966FF",
+        "#FF9F40",
+        "#FF6384",
+        "#C9CBCF",
+        "#4BC0C0",
+        "#FF6384",
+    ]
 
-        # Organize data for chart
-        budget_data = defaultdict(lambda: defaultdict(float))
-        categories = set()
+    for i, category in enumerate(sorted(categories)):
+        data = []
+        for month in months_list:
+            data.append(budget_data[month].get(category, 0))
 
-        for transaction in transactions:
-            month_key = f"{int(transaction.year)}-{int(transaction.month):02d}"
-            category = (
-                transaction.category or "uncategorized"
-            )  # Already lowercase from query
-            category = category.title()  # Convert to title case for display
-            
-            # Format category for display based on show_subcategories setting
-            if show_subcategories:
-                formatted_category = format_category_display(category)
-            else:
-                # Extract main category only
-                main_cat, _ = parse_category(category)
-                formatted_category = main_cat if main_cat else "Uncategorized"
-            
-            amount = abs(transaction.total_amount)  # Convert to positive for display
-
-            budget_data[month_key][formatted_category] += amount
-            categories.add(formatted_category)
-
-        # Format for Chart.js
-        months_list = []
-        datasets = []
-
-        # Generate month labels
-        current_date = start_date
-        while current_date <= end_date:
-            month_key = f"{current_date.year}-{current_date.month:02d}"
-            months_list.append(month_key)
-            current_date = current_date.replace(day=1)
-            if current_date.month == 12:
-                current_date = current_date.replace(year=current_date.year + 1, month=1)
-            else:
-                current_date = current_date.replace(month=current_date.month + 1)
-
-        # Create datasets for each category
-        colors = [
-            "#FF6384",
-            "#36A2EB",
-            "#FFCE56",
-            "#4BC0C0",
-            "#9966FF",
-            "#FF9F40",
-            "#FF6384",
-            "#C9CBCF",
-            "#4BC0C0",
-            "#FF6384",
-        ]
+        datasets.append(
+            {
+                "label": category,
+                "data": data,
+                "backgroundColor": colors[i % len(colors)],
+                "borderColor": colors[i % len(colors)],
+                "borderWidth": 1,
+            }
+        )
 
-        for i, category in enumerate(sorted(categories)):
-            data = []
-            for month in months_list:
-                data.append(budget_data[month].get(category, 0))
+    return jsonify({"labels": months_list, "datasets": datasets})
 
-            datasets.append(
-                {
-                    "label": category,
-                    "data": data,
-                    "backgroundColor": colors[i % len(colors)],
-                    "borderColor": colors[i % len(colors)],
-                    "borderWidth": 1,
-                }
-            )
-
-        return jsonify({"labels": months_list, "datasets": datasets})
-
-    finally:
-        db_session.close()
 
 
 @app.route("/api/expense_breakdown")
 @login_required
+@data_version_etag(time_bucket_seconds=3600)
 def expense_breakdown():
     """API endpoint for expense breakdown pie chart"""
     months = request.args.get("months", 3, type=int)
@@ -2056,134 +2602,198 @@ def expense_breakdown():
     month_filter = request.args.get("month")  # Format: YYYY-MM
 
     db_session = Session()
-    try:
-        # Get user's accessible Mercury accounts
-        mercury_accounts = (
-            db_session.query(MercuryAccount)
-            .filter(MercuryAccount.users.contains(current_user))
-            .all()
-        )
-
-        # Filter by specific Mercury account if selected
-        if mercury_account_id:
-            mercury_accounts = [
-                ma for ma in mercury_accounts if ma.id == mercury_account_id
-            ]
-            if not mercury_accounts:
-                return (
-                    jsonify({"error": "Mercury account not found or access denied"}),
-                    403,
-                )
+    # Get user's accessible Mercury accounts
+    mercury_accounts = get_user_mercury_accounts(db_session)
 
-        account_ids = []
-        for mercury_account in mercury_accounts:
-            accounts = (
-                db_session.query(Account)
-                .filter_by(mercury_account_id=mercury_account.id)
-                .filter_by(
-                    exclude_from_reports=False
-                )  # Exclude accounts marked as exclude_from_reports
-                .all()
+    # Filter by specific Mercury account if selected
+    if mercury_account_id:
+        mercury_accounts = [
+            ma for ma in mercury_accounts if ma.id == mercury_account_id
+        ]
+        if not mercury_accounts:
+            return (
+                jsonify({"error": "Mercury account not found or access denied"}),
+                403,
             )
-            account_ids.extend([acc.id for acc in accounts])
 
-        # Calculate date range
-        if month_filter:
-            try:
-                year, month = map(int, month_filter.split("-"))
-                start_date = datetime(year, month, 1)
-                if month == 12:
-                    end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-                else:
-                    end_date = datetime(year, month + 1, 1) - timedelta(days=1)
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-            except (ValueError, AttributeError):
-                # Invalid month format, use default range
-                end_date = datetime.now()
-                start_date = end_date - timedelta(days=months * 30)
-        else:
+    # Accessible accounts not marked as exclude_from_reports
+    access = get_access_context()
+    account_ids = []
+    for mercury_account in mercury_accounts:
+        account_ids.extend(access.account_ids_for(mercury_account.id, reports=True))
+
+    # Calculate date range
+    if month_filter:
+        try:
+            year, month = map(int, month_filter.split("-"))
+            start_date = datetime(year, month, 1)
+            if month == 12:
+                end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
+            else:
+                end_date = datetime(year, month + 1, 1) - timedelta(days=1)
+            end_date = end_date.replace(hour=23, minute=59, second=59)
+        except (ValueError, AttributeError):
+            # Invalid month format, use default range
             end_date = datetime.now()
             start_date = end_date - timedelta(days=months * 30)
+    else:
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=months * 30)
+
+    # Expenses by the normalized (lower-case) category columns
+    expenses = get_expense_totals(
+        db_session,
+        [ma.id for ma in mercury_accounts],
+        account_ids,
+        start_date,
+        end_date,
+        include_pending,
+        show_subcategories=show_subcategories,
+    )
 
-        # Build query filters - use created_at for pending transactions, posted_at for completed
-        date_field = func.coalesce(Transaction.posted_at, Transaction.created_at)
-        filters = [
-            Transaction.account_id.in_(account_ids),
-            date_field >= start_date,
-            date_field <= end_date,
-            Transaction.amount < 0,  # Only expenses (negative amounts)
-        ]
+    # Format for pie chart - aggregate by main category or subcategory
+    category_data = defaultdict(float)
+
+    for (_, main_category, sub_category), amount in expenses.items():
+        formatted_category = format_normalized_category(main_category, sub_category)
+        category_data[formatted_category] += amount
+
+    # Convert to lists for chart
+    labels = list(category_data.keys())
+    data = list(category_data.values())
+    colors = [
+        "#FF6384",
+        "#36A2EB",
+        "#FFCE56",
+        "#4BC0C0",
+        "#9966FF",
+        "#FF9F40",
+        "#FF6384",
+        "#C9CBCF",
+        "#4BC0C0",
+        "#FF6384",
+    ]
 
-        # Add status filter if not including pending
-        # Always exclude failed transactions from expense calculations
-        if not include_pending:
-            filters.append(Transaction.status.in_(["sent", "posted"]))
-        else:
-            filters.append(Transaction.status.in_(["sent", "pending", "posted"]))
+    return jsonify(
+        {
+            "labels": labels,
+            "datasets": [
+                {
+                    "data": data,
+                    "backgroundColor": colors[: len(data)],
+                    "borderColor": "#fff",
+                    "borderWidth": 2,
+                }
+            ],
+        }
+    )
 
-        # Query expenses by category
-        expenses = (
-            db_session.query(
-                func.lower(Transaction.note).label("category"),  # Make case-insensitive
-                func.sum(Transaction.amount).label("total_amount"),
-            )
-            .filter(*filters)
-            .group_by(func.lower(Transaction.note))
-            .all()
-        )  # Group by lowercase category
 
-        # Format for pie chart - aggregate by main category or subcategory
-        category_data = defaultdict(float)
 
-        for expense in expenses:
-            category = (
-                expense.category or "uncategorized"
-            )  # Already lowercase from query
-            category = category.title()  # Convert to title case for display
-            
-            # Format category for display based on show_subcategories setting
-            if show_subcategories:
-                formatted_category = format_category_display(category)
-            else:
-                # Extract main category only
-                main_cat, _ = parse_category(category)
-                formatted_category = main_cat if main_cat else "Uncategorized"
-            
-            amount = abs(expense.total_amount)
-            category_data[formatted_category] += amount
-
-        # Convert to lists for chart
-        labels = list(category_data.keys())
-        data = list(category_data.values())
-        colors = [
-            "#FF6384",
-            "#36A2EB",
-            "#FFCE56",
-            "#4BC0C0",
-            "#9966FF",
-            "#FF9F40",
-            "#FF6384",
-            "#C9CBCF",
-            "#4BC0C0",
-            "#FF6384",
-        ]
+@app.route("/admin/cache_stats")
+@login_required
+@super_admin_required
+def admin_cache_stats():
+    """Report hit/miss counters of this worker process's caches as JSON."""
+    stats = {
+        "reports": report_cache.stats(),
+        "access": {
+            "hits": access_context_cache.hits,
+            "misses": access_context_cache.misses,
+        },
+        "facets": {
+            "hits": facet_count_cache.hits,
+            "misses": facet_count_cache.misses,
+        },
+        "analytics": None,
+    }
+    if analytics_engine is not None:
+        stats["analytics"] = {
+            "builds": analytics_engine.builds,
+            "refreshes": analytics_engine.refreshes,
+        }
+    return jsonify(stats)
+
+
+@app.route("/admin/performance")
+@login_required
+@super_admin_required
+def admin_performance():
+    """Show latency percentiles, query counts and slow requests of this worker process."""
+    return render_template(
+        "admin_performance.html",
+        endpoints=request_metrics.endpoint_stats(),
+        slow_requests=request_metrics.slow_requests(),
+        metrics=request_metrics,
+        replica=db_config.replica_monitor,
+        worker_pid=os.getpid(),
+    )
+
+
+@app.route("/admin/performance/reset", methods=["POST"])
+@login_required
+@super_admin_required
+def reset_admin_performance():
+    """Discard the request statistics of this worker process."""
+    request_metrics.reset()
+    flash("Performance statistics reset for this worker.", "success")
+    return redirect(url_for("admin_performance"))
+
+
+@app.route("/admin/profiles")
+@login_required
+@super_admin_required
+def admin_profiles():
+    """List the saved stack profiles of requests and sync cycles."""
+    return render_template(
+        "admin_profiles.html",
+        profiles=profiler.store.list(),
+        profiler=profiler,
+    )
+
+
+@app.route("/admin/profiles/<profile_id>")
+@login_required
+@super_admin_required
+def admin_profile(profile_id):
+    """Show a stack profile as a flame graph."""
+    metadata = profiler.store.load_metadata(profile_id)
+    stacks = profiler.store.load_stacks(profile_id)
+    if metadata is None or stacks is None:
+        flash("Profile not found. It may have been replaced by newer profiles.", "error")
+        return redirect(url_for("admin_profiles"))
+    return render_template(
+        "admin_profile.html",
+        profile=metadata,
+        tree=build_flame_tree(stacks),
+        top_frames=top_frames(stacks),
+    )
+
+
+@app.route("/admin/profiles/<profile_id>/download")
+@login_required
+@super_admin_required
+def download_profile(profile_id):
+    """Download a stack profile in the folded format of flamegraph.pl and speedscope."""
+    path = profiler.store.folded_path(profile_id)
+    if path is None:
+        flash("Profile not found. It may have been replaced by newer profiles.", "error")
+        return redirect(url_for("admin_profiles"))
+    with open(path, encoding="utf-8") as f:
+        response = make_response(f.read())
+    response.headers["Content-Type"] = "text/plain; charset=utf-8"
+    response.headers["Content-Disposition"] = f'attachment; filename="{profile_id}.folded"'
+    return response
 
-        return jsonify(
-            {
-                "labels": labels,
-                "datasets": [
-                    {
-                        "data": data,
-                        "backgroundColor": colors[: len(data)],
-                        "borderColor": "#fff",
-                        "borderWidth": 2,
-                    }
-                ],
-            }
-        )
 
-    finally:
-        db_session.close()
+@app.route("/admin/profiles/clear", methods=["POST"])
+@login_required
+@super_admin_required
+def clear_admin_profiles():
+    """Delete every saved stack profile."""
+    profiler.store.clear()
+    flash("Saved profiles deleted.", "success")
+    return redirect(url_for("admin_profiles"))
 
 
 @app.route("/admin/settings", methods=["GET", "POST"])
@@ -2192,72 +2802,69 @@ def expense_breakdown():
 def admin_settings():
     """Admin page for managing system settings."""
     db_session = Session()
-    try:
-        # Get current user in session to avoid DetachedInstanceError
-        user_in_session = get_current_user_in_session(db_session)
-        if not user_in_session:
-            flash("User session expired. Please log in again.", "error")
-            return redirect(url_for("login"))
+    # Get current user in session to avoid DetachedInstanceError
+    user_in_session = get_current_user_in_session(db_session)
+    if not user_in_session:
+        flash("User session expired. Please log in again.", "error")
+        return redirect(url_for("login"))
 
-        # Check if user is admin
-        if not (
-            user_in_session.has_role("admin") or user_in_session.has_role("super-admin")
-        ):
-            flash("Access denied. Admin privileges required.", "error")
-            return redirect(url_for("dashboard"))
+    # Check if user is admin
+    if not (
+        user_in_session.has_role("admin") or user_in_session.has_role("super-admin")
+    ):
+        flash("Access denied. Admin privileges required.", "error")
+        return redirect(url_for("dashboard"))
 
-        # Check if users are externally managed
-        users_externally_managed = SystemSetting.get_bool_value(
-            db_session, "users_externally_managed", default=False
-        )
+    # Check if users are externally managed
+    users_externally_managed = SystemSetting.get_bool_value(
+        db_session, "users_externally_managed", default=False
+    )
 
-        if request.method == "POST":
-            # Define branding settings that are always editable
-            branding_settings = ["app_name", "app_description", "logo_url"]
-
-            # Update settings
-            updated_count = 0
-            for key, value in request.form.items():
-                if key.startswith("setting_"):
-                    setting_key = key.replace("setting_", "")
-                    setting = (
-                        db_session.query(SystemSetting)
-                        .filter_by(key=setting_key)
-                        .first()
-                    )
-                    if setting and setting.is_editable:
-                        # Allow branding settings to be changed even when users are externally managed
-                        is_branding_setting = setting_key in branding_settings
+    if request.method == "POST":
+        # Define branding settings that are always editable
+        branding_settings = ["app_name", "app_description", "logo_url"]
+
+        # Update settings
+        updated_count = 0
+        for key, value in request.form.items():
+            if key.startswith("setting_"):
+                setting_key = key.replace("setting_", "")
+                setting = (
+                    db_session.query(SystemSetting)
+                    .filter_by(key=setting_key)
+                    .first()
+                )
+                if setting and setting.is_editable:
+                    # Allow branding settings to be changed even when users are externally managed
+                    is_branding_setting = setting_key in branding_settings
 
-                        # Block user management settings if users are externally managed
-                        if users_externally_managed and not is_branding_setting:
-                            continue  # Skip user management settings
+                    # Block user management settings if users are externally managed
+                    if users_externally_managed and not is_branding_setting:
+                        continue  # Skip user management settings
 
-                        setting.value = value
-                        updated_count += 1
+                    setting.value = value
+                    updated_count += 1
 
-            if updated_count > 0:
-                db_session.commit()
-                flash("Settings updated successfully!", "success")
-            elif users_externally_managed:
-                flash(
-                    "Only branding settings can be changed when users are externally managed.",
-                    "warning",
-                )
-            else:
-                flash("No settings were updated.", "info")
-            return redirect(url_for("admin_settings"))
+        if updated_count > 0:
+            db_session.commit()
+            flash("Settings updated successfully!", "success")
+        elif users_externally_managed:
+            flash(
+                "Only branding settings can be changed when users are externally managed.",
+                "warning",
+            )
+        else:
+            flash("No settings were updated.", "info")
+        return redirect(url_for("admin_settings"))
 
-        # Get all editable settings
-        settings = db_session.query(SystemSetting).filter_by(is_editable=True).all()
+    # Get all editable settings
+    settings = db_session.query(SystemSetting).filter_by(is_editable=True).all()
 
-        return render_template(
-            "admin_settings.html",
-            settings=settings,
-            users_externally_managed=users_externally_managed,
-        )
-    finally:
-        db_session.close()
+    return render_template(
+        "admin_settings.html",
+        settings=settings,
+        users_externally_managed=users_externally_managed,
+    )
 
 
 @app.route("/admin/mercury_access/<int:mercury_account_id>", methods=["GET", "POST"])
@@ -2266,149 +2873,157 @@ def admin_settings():
 def manage_mercury_access(mercury_account_id):
     """Admin page for managing user access to Mercury accounts and specific accounts within them."""
     db_session = Session()
-    try:
-        # Get current user in session to avoid DetachedInstanceError
-        user_in_session = get_current_user_in_session(db_session)
-        if not user_in_session:
-            flash("User session expired. Please log in again.", "error")
-            return redirect(url_for("login"))
+    # Get current user in session to avoid DetachedInstanceError
+    user_in_session = get_current_user_in_session(db_session)
+    if not user_in_session:
+        flash("User session expired. Please log in again.", "error")
+        return redirect(url_for("login"))
 
-        # Check if user is admin
-        if not (
-            user_in_session.has_role("admin") or user_in_session.has_role("super-admin")
-        ):
-            flash("Access denied. Admin privileges required.", "error")
-            return redirect(url_for("dashboard"))
+    # Check if user is admin
+    if not (
+        user_in_session.has_role("admin") or user_in_session.has_role("super-admin")
+    ):
+        flash("Access denied. Admin privileges required.", "error")
+        return redirect(url_for("dashboard"))
 
-        # Get the Mercury account
-        mercury_account = db_session.query(MercuryAccount).get(mercury_account_id)
-        if not mercury_account:
-            flash("Mercury account not found.", "error")
-            return redirect(url_for("accounts"))
-
-        # Get all users and accounts for this Mercury account
-        all_users = db_session.query(User).all()
-        all_accounts = (
-            db_session.query(Account)
-            .filter_by(mercury_account_id=mercury_account_id)
-            .all()
-        )
+    # Get the Mercury account
+    mercury_account = db_session.query(MercuryAccount).get(mercury_account_id)
+    if not mercury_account:
+        flash("Mercury account not found.", "error")
+        return redirect(url_for("accounts"))
 
-        if request.method == "POST":
-            # Handle Mercury account access updates
-            if "mercury_access" in request.form:
-                # Get selected users for Mercury account access
-                selected_user_ids = request.form.getlist("mercury_users")
-                selected_user_ids = [
-                    int(uid) for uid in selected_user_ids if uid.isdigit()
-                ]
-
-                # Update Mercury account user associations
-                mercury_account.users.clear()
-                for user_id in selected_user_ids:
-                    user = db_session.query(User).get(user_id)
-                    if user:
-                        mercury_account.users.append(user)
+    # Get all users (with their account restrictions) and accounts for this Mercury account
+    all_users = db_session.query(User).options(selectinload(User.restricted_accounts)).all()
+    all_accounts = (
+        db_session.query(Account)
+        .filter_by(mercury_account_id=mercury_account_id)
+        .all()
+    )
 
-                db_session.commit()
-                flash("Mercury account access updated successfully!", "success")
+    if request.method == "POST":
+        # Handle Mercury account access updates
+        if "mercury_access" in request.form:
+            # Get selected users for Mercury account access
+            selected_user_ids = request.form.getlist("mercury_users")
+            selected_user_ids = [
+                int(uid) for uid in selected_user_ids if uid.isdigit()
+            ]
 
-            # Handle account-level restrictions
-            elif "account_restrictions" in request.form:
-                print(
-                    f"DEBUG: Processing account restrictions for mercury_account_id={mercury_account_id}"
-                )
-                print(f"DEBUG: Form data: {dict(request.form)}")
-
-                # Clear all existing account restrictions for users of this Mercury account
-                # Get all accounts belonging to this Mercury account
-                mercury_accounts = (
-                    db_session.query(Account)
-                    .filter_by(mercury_account_id=mercury_account_id)
-                    .all()
-                )
+            # Both removed and added members need fresh permissions
+            changed_user_ids = {u.id for u in mercury_account.users}
+
+            # Update Mercury account user associations
+            mercury_account.users.clear()
+            for user_id in selected_user_ids:
+                user = db_session.query(User).get(user_id)
+                if user:
+                    mercury_account.users.append(user)
+                    changed_user_ids.add(user.id)
+
+            UserAccessVersion.bump(db_session, changed_user_ids)
+            db_session.commit()
+            flash("Mercury account access updated successfully!", "success")
+
+        # Handle account-level restrictions
+        elif "account_restrictions" in request.form:
+            print(
+                f"DEBUG: Processing account restrictions for mercury_account_id={mercury_account_id}"
+            )
+            print(f"DEBUG: Form data: {dict(request.form)}")
+
+            # Clear all existing account restrictions for users of this Mercury account
+            # Get all accounts belonging to this Mercury account
+            mercury_accounts = (
+                db_session.query(Account)
+                .filter_by(mercury_account_id=mercury_account_id)
+                .all()
+            )
+            print(
+                f"DEBUG: Found {len(mercury_accounts)} accounts for mercury account {mercury_account_id}"
+            )
+
+            # Anyone previously restricted to these accounts, and every group
+            # member, may have had their access changed
+            changed_user_ids = {u.id for u in mercury_account.users}
+
+            for account in mercury_accounts:
+                # Clear existing restrictions for this account
                 print(
-                    f"DEBUG: Found {len(mercury_accounts)} accounts for mercury account {mercury_account_id}"
+                    f"DEBUG: Clearing restrictions for account {account.id}, had {len(account.authorized_users)} users"
                 )
-
-                for account in mercury_accounts:
-                    # Clear existing restrictions for this account
+                changed_user_ids.update(u.id for u in account.authorized_users)
+                account.authorized_users.clear()
+
+            # Process account-level restrictions
+            for user in all_users:
+                if (
+                    user in mercury_account.users
+                ):  # Only process users who have Mercury account access
+                    user_account_access = request.form.getlist(
+                        f"user_{user.id}_accounts"
+                    )
+                    user_account_access = [
+                        aid for aid in user_account_access if aid
+                    ]
                     print(
-                        f"DEBUG: Clearing restrictions for account {account.id}, had {len(account.authorized_users)} users"
+                        f"DEBUG: User {user.username} (id={user.id}) selected accounts: {user_account_access}"
                     )
-                    account.authorized_users.clear()
-
-                # Process account-level restrictions
-                for user in all_users:
-                    if (
-                        user in mercury_account.users
-                    ):  # Only process users who have Mercury account access
-                        user_account_access = request.form.getlist(
-                            f"user_{user.id}_accounts"
-                        )
-                        user_account_access = [
-                            aid for aid in user_account_access if aid
-                        ]
-                        print(
-                            f"DEBUG: User {user.username} (id={user.id}) selected accounts: {user_account_access}"
-                        )
 
-                        # If specific accounts are selected, restrict to those accounts
-                        if user_account_access:
-                            for account_id in user_account_access:
-                                # Verify account exists and belongs to this Mercury account
-                                account = (
-                                    db_session.query(Account)
-                                    .filter_by(
-                                        id=account_id,
-                                        mercury_account_id=mercury_account_id,
-                                    )
-                                    .first()
+                    # If specific accounts are selected, restrict to those accounts
+                    if user_account_access:
+                        for account_id in user_account_access:
+                            # Verify account exists and belongs to this Mercury account
+                            account = (
+                                db_session.query(Account)
+                                .filter_by(
+                                    id=account_id,
+                                    mercury_account_id=mercury_account_id,
                                 )
-                                if account:
-                                    if user not in account.authorized_users:
-                                        print(
-                                            f"DEBUG: Adding user {user.username} to account {account.id} authorized users"
-                                        )
-                                        account.authorized_users.append(user)
-                                    else:
-                                        print(
-                                            f"DEBUG: User {user.username} already in account {account.id} authorized users"
-                                        )
+                                .first()
+                            )
+                            if account:
+                                if user not in account.authorized_users:
+                                    print(
+                                        f"DEBUG: Adding user {user.username} to account {account.id} authorized users"
+                                    )
+                                    account.authorized_users.append(user)
                                 else:
                                     print(
-                                        f"DEBUG: Account {account_id} not found or doesn't belong to mercury account {mercury_account_id}"
+                                        f"DEBUG: User {user.username} already in account {account.id} authorized users"
                                     )
-                        else:
-                            print(
-                                f"DEBUG: User {user.username} has no account restrictions (full access)"
-                            )
-                        # If no accounts selected, user has access to all accounts (default behavior)
-                        # We don't need to do anything in this case since empty authorized_users means full access
-
-                try:
-                    db_session.commit()
-                    print("DEBUG: Successfully committed account restrictions changes")
-                    flash(
-                        "Account access restrictions updated successfully!", "success"
-                    )
-                except Exception as e:
-                    print(f"DEBUG: Error committing changes: {e}")
-                    db_session.rollback()
-                    flash(f"Error updating account restrictions: {e}", "error")
+                            else:
+                                print(
+                                    f"DEBUG: Account {account_id} not found or doesn't belong to mercury account {mercury_account_id}"
+                                )
+                    else:
+                        print(
+                            f"DEBUG: User {user.username} has no account restrictions (full access)"
+                        )
+                    # If no accounts selected, user has access to all accounts (default behavior)
+                    # We don't need to do anything in this case since empty authorized_users means full access
 
-            return redirect(
-                url_for("manage_mercury_access", mercury_account_id=mercury_account_id)
-            )
+            try:
+                UserAccessVersion.bump(db_session, changed_user_ids)
+                db_session.commit()
+                print("DEBUG: Successfully committed account restrictions changes")
+                flash(
+                    "Account access restrictions updated successfully!", "success"
+                )
+            except Exception as e:
+                print(f"DEBUG: Error committing changes: {e}")
+                db_session.rollback()
+                flash(f"Error updating account restrictions: {e}", "error")
 
-        return render_template(
-            "manage_mercury_access.html",
-            mercury_account=mercury_account,
-            all_users=all_users,
-            all_accounts=all_accounts,
+        return redirect(
+            url_for("manage_mercury_access", mercury_account_id=mercury_account_id)
         )
-    finally:
-        db_session.close()
+
+    return render_template(
+        "manage_mercury_access.html",
+        mercury_account=mercury_account,
+        all_users=all_users,
+        all_accounts=all_accounts,
+    )
 
 
 @app.route("/admin/users", methods=["GET"])
@@ -2417,50 +3032,47 @@ def manage_mercury_access(mercury_account_id):
 def admin_users():
     """Admin page for managing users."""
     db_session = Session()
-    try:
-        # Get current user in session to avoid DetachedInstanceError
-        user_in_session = get_current_user_in_session(db_session)
-        if not user_in_session:
-            flash("User session expired. Please log in again.", "error")
-            return redirect(url_for("login"))
+    # Get current user in session to avoid DetachedInstanceError
+    user_in_session = get_current_user_in_session(db_session)
+    if not user_in_session:
+        flash("User session expired. Please log in again.", "error")
+        return redirect(url_for("login"))
 
-        # Check if user is admin
-        if not (
-            user_in_session.has_role("admin") or user_in_session.has_role("super-admin")
-        ):
-            flash("Access denied. Admin privileges required.", "error")
-            return redirect(url_for("dashboard"))
+    # Check if user is admin
+    if not (
+        user_in_session.has_role("admin") or user_in_session.has_role("super-admin")
+    ):
+        flash("Access denied. Admin privileges required.", "error")
+        return redirect(url_for("dashboard"))
 
-        # Get all users
-        all_users = db_session.query(User).all()
+    # Get all users, with the roles the page lists in one more query
+    all_users = db_session.query(User).options(selectinload(User.roles)).all()
 
-        # Get admin users (using role-based system)
-        admin_users = [
-            user
-            for user in all_users
-            if user.has_role("admin") or user.has_role("super-admin")
-        ]
+    # Get admin users (using role-based system)
+    admin_users = [
+        user
+        for user in all_users
+        if user.has_role("admin") or user.has_role("super-admin")
+    ]
 
-        # Get user deletion prevention setting
-        prevent_user_deletion = SystemSetting.get_bool_value(
-            db_session, "prevent_user_deletion", default=False
-        )
+    # Get user deletion prevention setting
+    prevent_user_deletion = SystemSetting.get_bool_value(
+        db_session, "prevent_user_deletion", default=False
+    )
 
-        # Check if users are externally managed
-        users_externally_managed = SystemSetting.get_bool_value(
-            db_session, "users_externally_managed", default=False
-        )
+    # Check if users are externally managed
+    users_externally_managed = SystemSetting.get_bool_value(
+        db_session, "users_externally_managed", default=False
+    )
 
-        return render_template(
-            "admin_users.html",
-            all_users=all_users,
-            admin_users=admin_users,
-            prevent_user_deletion=prevent_user_deletion,
-            users_externally_managed=users_externally_managed,
-            current_user=user_in_session,
-        )
-    finally:
-        db_session.close()
+    return render_template(
+        "admin_users.html",
+        all_users=all_users,
+        admin_users=admin_users,
+        prevent_user_deletion=prevent_user_deletion,
+        users_externally_managed=users_externally_managed,
+        current_user=user_in_session,
+    )
 
 
 @app.route("/admin/users/add", methods=["GET"])
@@ -2469,39 +3081,36 @@ def admin_users():
 def add_user_form():
     """Display form to add a new user."""
     db_session = Session()
-    try:
-        # Get current user in session to avoid DetachedInstanceError
-        user_in_session = get_current_user_in_session(db_session)
-        if not user_in_session:
-            flash("User session expired. Please log in again.", "error")
-            return redirect(url_for("login"))
+    # Get current user in session to avoid DetachedInstanceError
+    user_in_session = get_current_user_in_session(db_session)
+    if not user_in_session:
+        flash("User session expired. Please log in again.", "error")
+        return redirect(url_for("login"))
 
-        # Check if user is admin
-        if not (
-            user_in_session.has_role("admin") or user_in_session.has_role("super-admin")
-        ):
-            flash("Access denied. Admin privileges required.", "error")
-            return redirect(url_for("dashboard"))
+    # Check if user is admin
+    if not (
+        user_in_session.has_role("admin") or user_in_session.has_role("super-admin")
+    ):
+        flash("Access denied. Admin privileges required.", "error")
+        return redirect(url_for("dashboard"))
 
-        # Check if users are externally managed
-        users_externally_managed = SystemSetting.get_bool_value(
-            db_session, "users_externally_managed", default=False
+    # Check if users are externally managed
+    users_externally_managed = SystemSetting.get_bool_value(
+        db_session, "users_externally_managed", default=False
+    )
+    if users_externally_managed:
+        flash(
+            "User creation is not allowed when users are externally managed.",
+            "error",
         )
-        if users_externally_managed:
-            flash(
-                "User creation is not allowed when users are externally managed.",
-                "error",
-            )
-            return redirect(url_for("admin_users"))
+        return redirect(url_for("admin_users"))
 
-        # Get available roles
-        from models.role import Role
+    # Get available roles
+    from models.role import Role
 
-        available_roles = db_session.query(Role).order_by(Role.name).all()
+    available_roles = db_session.query(Role).order_by(Role.name).all()
 
-        return render_template("add_user.html", available_roles=available_roles)
-    finally:
-        db_session.close()
+    return render_template("add_user.html", available_roles=available_roles)
 
 
 @app.route("/admin/users/add", methods=["POST"])
@@ -2600,8 +3209,6 @@ def add_user_submit():
         db_session.rollback()
         flash(f"Error creating user: {str(e)}", "error")
         return redirect(url_for("add_user_form"))
-    finally:
-        db_session.close()
 
 
 @app.route("/admin/users/<int:user_id>/lock", methods=["POST"])
@@ -2636,6 +3243,8 @@ def lock_user(user_id):
         # Add the locked role
         if not user.has_role("locked"):
             user.add_role("locked", db_session)
+            # Invalidate cached permissions so the lockout applies on the next request
+            UserAccessVersion.bump(db_session, [user.id])
             db_session.commit()
             flash(f"User '{user.username}' has been locked.", "success")
         else:
@@ -2669,6 +3278,7 @@ def unlock_user(user_id):
         # Remove the locked role
         if user.has_role("locked"):
             user.remove_role("locked", db_session)
+            UserAccessVersion.bump(db_session, [user.id])
             db_session.commit()
             flash(f"User '{user.username}' has been unlocked.", "success")
         else:
@@ -2738,7 +3348,8 @@ def delete_user_by_id(user_id):
         # Remember username for the success message
         username = user.username
 
-        # Delete the user
+        # Delete the user; bumping keeps a live session from using cached access
+        UserAccessVersion.bump(db_session, [user.id])
         db_session.delete(user)
         db_session.commit()
         flash(f"User '{username}' deleted successfully.", "success")
@@ -2800,6 +3411,7 @@ def edit_user_roles(user_id):
                 if role:
                     user.roles.append(role)
 
+            UserAccessVersion.bump(db_session, [user.id])
             db_session.commit()
             flash(
                 f"Roles updated successfully for user '{user.username}'. Current roles: {', '.join(selected_roles)}",
@@ -2815,8 +3427,6 @@ def edit_user_roles(user_id):
         db_session.rollback()
         flash(f"Error updating user roles: {str(e)}", "error")
         return redirect(url_for("admin_users"))
-    finally:
-        db_session.close()
 
 
 @app.route("/admin/users/<int:user_id>/settings", methods=["GET", "POST"])
@@ -2917,8 +3527,6 @@ def edit_user_settings(user_id):
         db_session.rollback()
         flash(f"Error managing user settings: {str(e)}", "error")
         return redirect(url_for("admin_users"))
-    finally:
-        db_session.close()
 
 
 @app.route("/health")
@@ -2928,7 +3536,6 @@ def health_check():
         # Test database connection
         db_session = Session()
         db_session.execute(text("SELECT 1"))
-        db_session.close()
         return (
             jsonify({"status": "healthy", "timestamp": datetime.utcnow().isoformat()}),
             200,
@@ -2946,40 +3553,83 @@ def health_check():
         )
 
 
-def get_available_months(db_session, account_ids):
-    """Get available months from transactions data"""
-    from sqlalchemy import distinct, extract, func
-    from datetime import datetime
+def get_transaction_facet_counts(db_session, query, account_ids, filters, selection):
+    """
+    Get the filter bar counts for /transactions, cached per access set and filters.
 
-    # Use effective date (posted_at or created_at) for month extraction
-    effective_date = func.coalesce(Transaction.posted_at, Transaction.created_at)
+    Counts are recomputed when the user's Mercury account groups' data versions
+    change (see get_current_data_versions).
 
-    # Query distinct year-month combinations
-    months_data = (
-        db_session.query(
-            extract("year", effective_date).label("year"),
-            extract("month", effective_date).label("month"),
-        )
-        .filter(Transaction.account_id.in_(account_ids))
-        .distinct()
-        .order_by(
-            extract("year", effective_date).desc(),
-            extract("month", effective_date).desc(),
-        )
-        .all()
-    )
+    Args:
+        db_session: SQLAlchemy session to use
+        query: Transaction query with the non-facet filters applied
+        account_ids (list): Accounts the user can see under the current selection
+        filters (dict): Non-facet filter values applied to query (part of the cache key)
+        selection (dict): Selected values per facet dimension (see facet_counts)
+
+    Returns:
+        dict: {dimension: {value: count}} with "posted" folded into "sent", or None
+            if the counts could not be computed
+    """
+    if not account_ids:
+        return {}
+
+    key = FacetCountCache.make_key(account_ids, dict(filters, **selection))
+    try:
+        version = get_current_data_versions(db_session)
+        counts = facet_count_cache.get(key, version)
+        if counts is None:
+            counts = facet_counts(query, selection)
+            statuses = counts["status"]
+            if "posted" in statuses:
+                statuses["sent"] = statuses.get("sent", 0) + statuses.pop("posted")
+            facet_count_cache.set(key, version, counts)
+    except Exception as e:
+        logger.warning(f"Facet counts unavailable: {e}")
+        return None
+    return counts
+
+
+@report_cache.memoize(
+    lambda db_session, account_ids: tuple(sorted(account_ids)), get_current_data_versions
+)
+def get_filter_options(db_session, account_ids):
+    """
+    Load the filter dropdown options of a set of accounts (see load_filter_options).
+
+    Cached until the user's Mercury account groups' data versions change.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        account_ids (list): Accounts whose options are combined
+
+    Returns:
+        dict: Result of load_filter_options
+    """
+    return load_filter_options(db_session, account_ids)
+
+
+def get_available_months(filter_options):
+    """
+    Format the months from load_filter_options for the month dropdown.
+
+    Args:
+        filter_options (dict): Result of load_filter_options
+
+    Returns:
+        list: {"value": "YYYY-MM", "label": "Month YYYY"} dicts, newest first
+    """
+    from datetime import datetime
 
-    # Format as YYYY-MM strings
     available_months = []
-    for year, month in months_data:
-        if year and month:
-            month_str = f"{int(year)}-{int(month):02d}"
-            available_months.append(
-                {
-                    "value": month_str,
-                    "label": datetime(int(year), int(month), 1).strftime("%B %Y"),
-                }
-            )
+    for month_str, _ in filter_options["months"]:
+        year, month = map(int, month_str.split("-"))
+        available_months.append(
+            {
+                "value": month_str,
+                "label": datetime(year, month, 1).strftime("%B %Y"),
+            }
+        )
 
     return available_months
 
@@ -2991,126 +3641,119 @@ def get_current_month():
     return datetime.now().strftime("%Y-%m")
 
 
-@app.route("/settings", methods=["GET", "POST"])
-@login_required
-def user_settings():
-    """User settings page for managing preferences including primary Mercury account."""
-    db_session = Session()
-    try:
-        # Get current user in session to avoid DetachedInstanceError
-        user_in_session = get_current_user_in_session(db_session)
-        if not user_in_session:
-            flash("User session expired. Please log in again.", "error")
-            return redirect(url_for("login"))
+@app.route("/settings", methods=["GET", "POST"])
+@login_required
+def user_settings():
+    """User settings page for managing preferences including primary Mercury account."""
+    db_session = Session()
+    # Get current user in session to avoid DetachedInstanceError
+    user_in_session = get_current_user_in_session(db_session)
+    if not user_in_session:
+        flash("User session expired. Please log in again.", "error")
+        return redirect(url_for("login"))
 
-        # Get or create user settings
-        settings = (
-            db_session.query(UserSettings).filter_by(user_id=user_in_session.id).first()
-        )
-        if not settings:
-            settings = UserSettings(user_id=user_in_session.id)
-            db_session.add(settings)
-            db_session.commit()
+    # Get or create user settings
+    settings = (
+        db_session.query(UserSettings).filter_by(user_id=user_in_session.id).first()
+    )
+    if not settings:
+        settings = UserSettings(user_id=user_in_session.id)
+        db_session.add(settings)
+        db_session.commit()
 
-        # Get user's accessible Mercury accounts
-        mercury_accounts = (
-            db_session.query(MercuryAccount)
-            .filter(MercuryAccount.users.contains(user_in_session))
-            .all()
-        )
+    # Get user's accessible Mercury accounts
+    mercury_accounts = get_user_mercury_accounts(db_session)
 
-        # Get user's accessible accounts for primary account selection
-        accessible_accounts = get_user_accessible_accounts(user_in_session, db_session)
+    # Get user's accessible accounts for primary account selection
+    accessible_accounts = get_user_accessible_accounts(user_in_session, db_session)
 
-        if request.method == "POST":
-            # Update primary Mercury account
-            primary_mercury_account_id = request.form.get("primary_mercury_account_id")
-            if primary_mercury_account_id == "":
-                settings.primary_mercury_account_id = None
+    if request.method == "POST":
+        # Update primary Mercury account
+        primary_mercury_account_id = request.form.get("primary_mercury_account_id")
+        if primary_mercury_account_id == "":
+            settings.primary_mercury_account_id = None
+        else:
+            primary_mercury_account_id = int(primary_mercury_account_id)
+            # Verify user has access to this Mercury account
+            accessible_account_ids = [ma.id for ma in mercury_accounts]
+            if primary_mercury_account_id in accessible_account_ids:
+                settings.primary_mercury_account_id = primary_mercury_account_id
             else:
-                primary_mercury_account_id = int(primary_mercury_account_id)
-                # Verify user has access to this Mercury account
-                accessible_account_ids = [ma.id for ma in mercury_accounts]
-                if primary_mercury_account_id in accessible_account_ids:
-                    settings.primary_mercury_account_id = primary_mercury_account_id
-                else:
-                    flash(
-                        "You don't have access to the selected Mercury account.",
-                        "error",
-                    )
-                    return redirect(url_for("user_settings"))
+                flash(
+                    "You don't have access to the selected Mercury account.",
+                    "error",
+                )
+                return redirect(url_for("user_settings"))
 
-            # Update primary account
-            primary_account_id = request.form.get("primary_account_id")
-            if primary_account_id == "":
-                settings.primary_account_id = None
+        # Update primary account
+        primary_account_id = request.form.get("primary_account_id")
+        if primary_account_id == "":
+            settings.primary_account_id = None
+        else:
+            # Verify user has access to this account
+            accessible_account_ids = [acc.id for acc in accessible_accounts]
+            if primary_account_id in accessible_account_ids:
+                settings.primary_account_id = primary_account_id
             else:
-                # Verify user has access to this account
-                accessible_account_ids = [acc.id for acc in accessible_accounts]
-                if primary_account_id in accessible_account_ids:
-                    settings.primary_account_id = primary_account_id
-                else:
-                    flash("You don't have access to the selected account.", "error")
-                    return redirect(url_for("user_settings"))
+                flash("You don't have access to the selected account.", "error")
+                return redirect(url_for("user_settings"))
 
-            # Update other preferences
-            dashboard_prefs = {}
-            report_prefs = {}
-            transaction_prefs = {}
+        # Update other preferences
+        dashboard_prefs = {}
+        report_prefs = {}
+        transaction_prefs = {}
 
-            # Dashboard preferences
-            if request.form.get("dashboard_show_pending") == "on":
-                dashboard_prefs["show_pending"] = True
-            else:
-                dashboard_prefs["show_pending"] = False
+        # Dashboard preferences
+        if request.form.get("dashboard_show_pending") == "on":
+            dashboard_prefs["show_pending"] = True
+        else:
+            dashboard_prefs["show_pending"] = False
 
-            # Report preferences
-            report_prefs["default_view"] = request.form.get(
-                "report_default_view", "charts"
-            )
-            report_prefs["default_period"] = request.form.get(
-                "report_default_period", "12"
-            )
+        # Report preferences
+        report_prefs["default_view"] = request.form.get(
+            "report_default_view", "charts"
+        )
+        report_prefs["default_period"] = request.form.get(
+            "report_default_period", "12"
+        )
 
-            # Transaction preferences
-            transaction_prefs["default_page_size"] = int(
-                request.form.get("transaction_page_size", "50")
-            )
-            transaction_prefs["default_status_filter"] = request.form.getlist(
-                "transaction_default_status"
-            )
+        # Transaction preferences
+        transaction_prefs["default_page_size"] = int(
+            request.form.get("transaction_page_size", "50")
+        )
+        transaction_prefs["default_status_filter"] = request.form.getlist(
+            "transaction_default_status"
+        )
 
-            # Update settings
-            settings.dashboard_preferences = json.dumps(dashboard_prefs)
-            settings.report_preferences = json.dumps(report_prefs)
-            settings.transaction_preferences = json.dumps(transaction_prefs)
+        # Update settings
+        settings.dashboard_preferences = json.dumps(dashboard_prefs)
+        settings.report_preferences = json.dumps(report_prefs)
+        settings.transaction_preferences = json.dumps(transaction_prefs)
 
-            # Update primary account
-            primary_account_id = request.form.get("primary_account_id")
-            if primary_account_id == "":
-                settings.primary_account_id = None
+        # Update primary account
+        primary_account_id = request.form.get("primary_account_id")
+        if primary_account_id == "":
+            settings.primary_account_id = None
+        else:
+            # Verify user has access to this account
+            accessible_account_ids = [acc.id for acc in accessible_accounts]
+            if primary_account_id in accessible_account_ids:
+                settings.primary_account_id = primary_account_id
             else:
-                # Verify user has access to this account
-                accessible_account_ids = [acc.id for acc in accessible_accounts]
-                if primary_account_id in accessible_account_ids:
-                    settings.primary_account_id = primary_account_id
-                else:
-                    flash("You don't have access to the selected account.", "error")
-                    return redirect(url_for("user_settings"))
+                flash("You don't have access to the selected account.", "error")
+                return redirect(url_for("user_settings"))
 
-            # Commit settings
-            db_session.commit()
-            flash("Settings updated successfully!", "success")
-            return redirect(url_for("user_settings"))
+        # Commit settings
+        db_session.commit()
+        flash("Settings updated successfully!", "success")
+        return redirect(url_for("user_settings"))
 
-        return render_template(
-            "user_settings.html",
-            settings=settings,
-            accessible_mercury_accounts=mercury_accounts,
-            accessible_accounts=accessible_accounts,
-        )
-    finally:
-        db_session.close()
+    return render_template(
+        "user_settings.html",
+        settings=settings,
+        accessible_mercury_accounts=mercury_accounts,
+        accessible_accounts=accessible_accounts,
+    )
 
 
 def get_current_user_in_session(db_session):
@@ -3125,143 +3768,144 @@ def get_current_user_in_session(db_session):
 @admin_required
 def edit_account(account_id):
     db_session = Session()
-    try:
-        user = get_current_user_in_session(db_session)
-        if not user:
-            flash("User not found", "error")
-            return redirect(url_for("login"))
+    user = get_current_user_in_session(db_session)
+    if not user:
+        flash("User not found", "error")
+        return redirect(url_for("login"))
 
-        # Get accessible accounts for this user (respects account restrictions)
-        accessible_accounts = get_user_accessible_accounts(user, db_session)
+    # Get accessible accounts for this user (respects account restrictions)
+    accessible_accounts = get_user_accessible_accounts(user, db_session)
 
-        # Find the specific account
-        account = None
-        for acc in accessible_accounts:
-            if acc.id == account_id:
-                account = acc
-                break
+    # Find the specific account
+    account = None
+    for acc in accessible_accounts:
+        if acc.id == account_id:
+            account = acc
+            break
 
-        if not account:
-            flash("Account not found or access denied.", "error")
-            return redirect(url_for("accounts"))
+    if not account:
+        flash("Account not found or access denied.", "error")
+        return redirect(url_for("accounts"))
 
-        # Get the mercury account for display
-        mercury_account = (
-            db_session.query(MercuryAccount)
-            .filter_by(id=account.mercury_account_id)
-            .first()
-        )
+    # Get the mercury account for display
+    mercury_account = (
+        db_session.query(MercuryAccount)
+        .filter_by(id=account.mercury_account_id)
+        .first()
+    )
 
-        if request.method == "POST":
-            # Get receipt requirement settings from form
-            receipt_required_deposits = request.form.get("receipt_required_deposits", "none")
-            receipt_required_charges = request.form.get("receipt_required_charges", "none")
+    if request.method == "POST":
+        # Get receipt requirement settings from form
+        receipt_required_deposits = request.form.get("receipt_required_deposits", "none")
+        receipt_required_charges = request.form.get("receipt_required_charges", "none")
             
-            # Check if this is a future-dated policy change
-            use_future_date = "use_future_date" in request.form
-            start_date = None
+        # Check if this is a future-dated policy change
+        use_future_date = "use_future_date" in request.form
+        start_date = None
             
-            if use_future_date:
-                future_start_date_str = request.form.get("future_start_date", "")
-                if future_start_date_str:
-                    try:
-                        # Parse the date string from the form
-                        start_date = datetime.strptime(future_start_date_str, "%Y-%m-%d")
+        if use_future_date:
+            future_start_date_str = request.form.get("future_start_date", "")
+            if future_start_date_str:
+                try:
+                    # Parse the date string from the form
+                    start_date = datetime.strptime(future_start_date_str, "%Y-%m-%d")
                         
-                        # Set the time to beginning of day to ensure consistent behavior
-                        start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+                    # Set the time to beginning of day to ensure consistent behavior
+                    start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
                         
-                        # Ensure the date is not in the past
-                        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                        if start_date < today:
-                            flash("Start date cannot be in the past.", "error")
-                            return render_template(
-                                "edit_account.html",
-                                account=account,
-                                mercury_account=mercury_account,
-                                today_date=datetime.now().strftime('%Y-%m-%d')
-                            )
-                    except ValueError:
-                        flash("Invalid start date format.", "error")
+                    # Ensure the date is not in the past
+                    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+                    if start_date < today:
+                        flash("Start date cannot be in the past.", "error")
                         return render_template(
                             "edit_account.html",
                             account=account,
                             mercury_account=mercury_account,
                             today_date=datetime.now().strftime('%Y-%m-%d')
                         )
-            
-            # Parse threshold values
-            threshold_deposits_str = request.form.get("receipt_threshold_deposits", "").strip()
-            threshold_deposits = None
-            if receipt_required_deposits == "threshold" and threshold_deposits_str:
-                try:
-                    threshold_deposits = float(threshold_deposits_str)
                 except ValueError:
-                    flash("Invalid deposit receipt threshold amount.", "error")
+                    flash("Invalid start date format.", "error")
                     return render_template(
                         "edit_account.html",
                         account=account,
                         mercury_account=mercury_account,
+                        today_date=datetime.now().strftime('%Y-%m-%d')
                     )
+            
+        # Parse threshold values
+        threshold_deposits_str = request.form.get("receipt_threshold_deposits", "").strip()
+        threshold_deposits = None
+        if receipt_required_deposits == "threshold" and threshold_deposits_str:
+            try:
+                threshold_deposits = float(threshold_deposits_str)
+            except ValueError:
+                flash("Invalid deposit receipt threshold amount.", "error")
+                return render_template(
+                    "edit_account.html",
+                    account=account,
+                    mercury_account=mercury_account,
+                )
 
-            threshold_charges_str = request.form.get("receipt_threshold_charges", "").strip()
-            threshold_charges = None
-            if receipt_required_charges == "threshold" and threshold_charges_str:
-                try:
-                    threshold_charges = float(threshold_charges_str)
-                except ValueError:
-                    flash("Invalid charge receipt threshold amount.", "error")
-                    return render_template(
-                        "edit_account.html",
-                        account=account,
-                        mercury_account=mercury_account,
-                    )
+        threshold_charges_str = request.form.get("receipt_threshold_charges", "").strip()
+        threshold_charges = None
+        if receipt_required_charges == "threshold" and threshold_charges_str:
+            try:
+                threshold_charges = float(threshold_charges_str)
+            except ValueError:
+                flash("Invalid charge receipt threshold amount.", "error")
+                return render_template(
+                    "edit_account.html",
+                    account=account,
+                    mercury_account=mercury_account,
+                )
             
-            # Update receipt policy - this creates a historical record
-            account.update_receipt_policy(
-                receipt_required_deposits=receipt_required_deposits,
-                receipt_threshold_deposits=threshold_deposits,
-                receipt_required_charges=receipt_required_charges,
-                receipt_threshold_charges=threshold_charges,
-                start_date=start_date
-            )
+        # Update receipt policy - this creates a historical record
+        account.update_receipt_policy(
+            receipt_required_deposits=receipt_required_deposits,
+            receipt_threshold_deposits=threshold_deposits,
+            receipt_required_charges=receipt_required_charges,
+            receipt_threshold_charges=threshold_charges,
+            start_date=start_date
+        )
 
-            # Handle exclude from reports setting
-            account.exclude_from_reports = "exclude_from_reports" in request.form
+        # Handle exclude from reports setting; cached report account lists of the
+        # group's members depend on it
+        exclude_from_reports = "exclude_from_reports" in request.form
+        if bool(account.exclude_from_reports) != exclude_from_reports:
+            UserAccessVersion.bump_mercury_account_members(
+                db_session, account.mercury_account_id
+            )
+        account.exclude_from_reports = exclude_from_reports
+        DataVersion.bump(db_session, [account.mercury_account_id])
 
-            db_session.commit()
+        db_session.commit()
+        schedule_receipt_status_refresh(account.id)
             
-            # Customize success message based on whether this is a future change
-            if use_future_date and start_date:
-                formatted_date = start_date.strftime("%B %d, %Y")
-                flash(f"Account updated and receipt policy scheduled to change on {formatted_date}!", "success")
-            else:
-                flash("Account updated successfully and receipt policy updated immediately!", "success")
+        # Customize success message based on whether this is a future change
+        if use_future_date and start_date:
+            formatted_date = start_date.strftime("%B %d, %Y")
+            flash(f"Account updated and receipt policy scheduled to change on {formatted_date}!", "success")
+        else:
+            flash("Account updated successfully and receipt policy updated immediately!", "success")
                 
-            return redirect(url_for("accounts"))
+        return redirect(url_for("accounts"))
 
-        return render_template(
-            "edit_account.html", 
-            account=account, 
-            mercury_account=mercury_account,
-            today_date=datetime.now().strftime('%Y-%m-%d')
-        )
-    finally:
-        db_session.close()
+    return render_template(
+        "edit_account.html", 
+        account=account, 
+        mercury_account=mercury_account,
+        today_date=datetime.now().strftime('%Y-%m-%d')
+    )
 
 
 @app.route("/api/transaction/<string:transaction_id>/attachments")
 @login_required
+@data_version_etag(time_bucket_seconds=3600)
 def get_transaction_attachments(transaction_id):
     """Get attachments for a specific transaction."""
     try:
         db_session = Session()
 
-        # Get the current user from the session to avoid DetachedInstanceError
-        user = get_current_user_in_session(db_session)
-        if not user:
-            return jsonify({"error": "User not found"}), 401
-
         # Get the transaction first
         transaction = (
             db_session.query(Transaction)
@@ -3272,10 +3916,7 @@ def get_transaction_attachments(transaction_id):
             return jsonify({"error": "Transaction not found"}), 404
 
         # Check if user has access to this transaction's account
-        user_accounts = get_user_accessible_accounts(user, db_session)
-        account_ids = [acc.id for acc in user_accounts]
-
-        if transaction.account_id not in account_ids:
+        if not get_access_context().can_access_account(transaction.account_id):
             return jsonify({"error": "Access denied"}), 403
 
         # Get attachments for the transaction
@@ -3331,11 +3972,9 @@ def get_transaction_attachments(transaction_id):
     except Exception as e:
         logger.error("Error fetching transaction attachments: %s", e)
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        if "db_session" in locals():
-            db_session.close()
 
 
+@report_cache.memoize(report_filters_key, get_current_data_versions)
 def get_hierarchical_reports_data(
     db_session,
     mercury_account_id=None,
@@ -3346,11 +3985,7 @@ def get_hierarchical_reports_data(
 ):
     """Get aggregated category data grouped by main categories with expandable sub-categories"""
     # Get user's accessible Mercury accounts
-    mercury_accounts = (
-        db_session.query(MercuryAccount)
-        .filter(MercuryAccount.users.contains(current_user))
-        .all()
-    )
+    mercury_accounts = get_user_mercury_accounts(db_session)
 
     # Filter by specific Mercury account if selected
     if mercury_account_id:
@@ -3358,20 +3993,16 @@ def get_hierarchical_reports_data(
             ma for ma in mercury_accounts if ma.id == mercury_account_id
         ]
 
+    # Accessible accounts not marked as exclude_from_reports
+    access = get_access_context()
     account_ids = []
     for mercury_account in mercury_accounts:
-        accounts = (
-            db_session.query(Account)
-            .filter_by(mercury_account_id=mercury_account.id)
-            .filter_by(exclude_from_reports=False)
-            .all()
-        )
-        account_ids.extend([acc.id for acc in accounts])
+        account_ids.extend(access.account_ids_for(mercury_account.id, reports=True))
 
-    # Build query for aggregation
-    category_field = func.coalesce(Transaction.note, "Uncategorized")
+    # Build query for aggregation over the normalized category columns
     query = db_session.query(
-        category_field.label("category"),
+        Transaction.main_category,
+        Transaction.sub_category,
         func.sum(Transaction.amount).label("total_amount"),
         func.count(Transaction.id).label("transaction_count"),
     ).filter(Transaction.account_id.in_(account_ids))
@@ -3380,35 +4011,26 @@ def get_hierarchical_reports_data(
     if account_id:
         query = query.filter_by(account_id=account_id)
     if category:
-        query = query.filter(Transaction.note.ilike(f"%{category}%"))
+        query = query.filter(Transaction.category_condition(category))
     if expanded_status_filter:
         query = query.filter(Transaction.status.in_(expanded_status_filter))
 
     # Add month filter
-    if month_filter:
-        try:
-            year, month = map(int, month_filter.split("-"))
-            from sqlalchemy import and_, extract
-            effective_date = func.coalesce(Transaction.posted_at, Transaction.created_at)
-            query = query.filter(
-                and_(
-                    extract("year", effective_date) == year,
-                    extract("month", effective_date) == month,
-                )
-            )
-        except (ValueError, AttributeError):
-            pass
+    month_condition = effective_month_condition(month_filter) if month_filter else None
+    if month_condition is not None:
+        query = query.filter(month_condition)
 
     # Get all category data
-    category_totals = query.group_by(category_field).all()
+    category_totals = query.group_by(
+        Transaction.main_category, Transaction.sub_category
+    ).all()
 
     # Group by main categories
     main_categories = {}
     
     for category_data in category_totals:
-        main_cat, sub_cat = parse_category(category_data.category)
-        if not main_cat:
-            main_cat = "Uncategorized"
+        main_cat = format_normalized_category(category_data.main_category)
+        sub_cat = category_data.sub_category.title() if category_data.sub_category else None
         
         # Initialize main category if not exists
         if main_cat not in main_categories:
@@ -3427,7 +4049,7 @@ def get_hierarchical_reports_data(
         if sub_cat:
             main_categories[main_cat]["subcategories"].append({
                 "subcategory": sub_cat,
-                "full_category": category_data.category,
+                "full_category": f"{main_cat}/{sub_cat}",
                 "total_amount": category_data.total_amount,
                 "transaction_count": category_data.transaction_count,
                 "average_amount": (
@@ -3457,346 +4079,44 @@ def get_hierarchical_reports_data(
 
 
 def calculate_budget_progress(db_session, budget):
-    """Calculate budget progress including total and per-category spending using transaction notes."""
-    from collections import defaultdict
-    from datetime import datetime
-    from sqlalchemy import func
-    
-    # Get the budget month start and end dates
-    budget_month = budget.budget_month
-    if budget_month.month == 12:
-        next_month = budget_month.replace(year=budget_month.year + 1, month=1, day=1)
-    else:
-        next_month = budget_month.replace(month=budget_month.month + 1, day=1)
-    
-    # Get all accounts for this budget
-    account_ids = [account.id for account in budget.accounts]
-    
-    if not account_ids:
-        return {
-            'total_budgeted': 0,
-            'total_spent': 0,
-            'categories': {}
-        }
-    
-    # Query transactions for the budget period using effective date
-    # Exclude failed transactions from budget calculations
-    effective_date = func.coalesce(Transaction.posted_at, Transaction.created_at)
-    transactions = db_session.query(Transaction).filter(
-        Transaction.account_id.in_(account_ids),
-        effective_date >= budget_month,
-        effective_date < next_month,
-        Transaction.amount < 0,  # Only expenses (negative amounts)
-        Transaction.status != 'failed'  # Exclude failed transactions
-    ).all()
-    
-    # Calculate spending by category using transaction notes
-    category_spending = defaultdict(float)
-    total_spent = 0
-    
-    for transaction in transactions:
-        # Use absolute value since expenses are negative
-        amount = abs(transaction.amount)
-        
-        # Parse category from transaction note (format: Category/Sub-Category)
-        if transaction.note:
-            main_category, sub_category = parse_category(transaction.note)
-            category = main_category if main_category else "Uncategorized"
-        else:
-            category = "Uncategorized"
-            
-        category_spending[category] += amount
-        total_spent += amount
-    
-    # Calculate total budgeted amount
-    total_budgeted = sum(cat.budgeted_amount for cat in budget.budget_categories if cat.is_active)
-    
-    # Build category progress data
-    categories = {}
-    for budget_category in budget.budget_categories:
-        if budget_category.is_active:
-            spent = category_spending.get(budget_category.category_name, 0)
-            categories[budget_category.category_name] = {
-                'budgeted': budget_category.budgeted_amount,
-                'spent': spent,
-                'remaining': budget_category.budgeted_amount - spent,
-                'percentage': (spent / budget_category.budgeted_amount * 100) if budget_category.budgeted_amount > 0 else 0
-            }
-    
-    return {
-        'total_budgeted': total_budgeted,
-        'total_spent': total_spent,
-        'categories': categories
-    }
+    """Calculate budget progress including total and per-category spending by main category."""
+    return get_budgets_progress(db_session, [budget])[budget.id]
 
 
-def get_budget_report_data(db_session, budget):
-    """Get detailed budget report data including all budget categories and income."""
-    from collections import defaultdict
-    from datetime import datetime
-    from sqlalchemy import func
-    
-    # Get the budget month start and end dates
-    budget_month = budget.budget_month
-    if budget_month.month == 12:
-        next_month = budget_month.replace(year=budget_month.year + 1, month=1, day=1)
-    else:
-        next_month = budget_month.replace(month=budget_month.month + 1, day=1)
-    
-    # Get all accounts for this budget
-    account_ids = [account.id for account in budget.accounts]
-    
-    if not account_ids:
-        return []
-    
-    # Create a lookup for budgeted amounts by category
-    budgeted_amounts = {}
-    for budget_category in budget.budget_categories:
-        if budget_category.is_active:
-            budgeted_amounts[budget_category.category_name] = budget_category.budgeted_amount
-    
-    # Query ALL transactions for the budget period (expenses and income)
-    effective_date = func.coalesce(Transaction.posted_at, Transaction.created_at)
-    all_transactions = db_session.query(Transaction).filter(
-        Transaction.account_id.in_(account_ids),
-        effective_date >= budget_month,
-        effective_date < next_month,
-        Transaction.status != 'failed'  # Exclude failed transactions from budget calculations
-    ).all()
+def get_budgets_progress(db_session, budget_list):
+    """
+    Get the progress of several budgets, computing uncached ones in one batch.
 
-    # Group ALL transactions by main category (handling both positive and negative amounts)
-    main_categories = defaultdict(lambda: {
-        'main_category': '',
-        'total_amount': 0,
-        'transaction_count': 0,
-        'is_income': False,
-        'budgeted_amount': 0,
-        'remaining_budget': 0,
-        'subcategories': defaultdict(lambda: {
-            'subcategory': '',
-            'full_category': '',
-            'total_amount': 0,
-            'transaction_count': 0,
-            'transactions': []
-        })
-    })
-
-    # Process all transactions
-    for transaction in all_transactions:
-        # Parse category from transaction note (format: Category/Sub-Category)
-        if transaction.note:
-            main_category, sub_category = parse_category(transaction.note)
-            main_cat = main_category if main_category else "Uncategorized"
-            full_category = transaction.note
-        else:
-            main_cat = "Uncategorized"
-            sub_category = None
-            full_category = "Uncategorized"
-
-        # Skip processing if this is an income transaction for Income category
-        # (Income category will be handled separately)
-        if main_cat.lower() == 'income' and transaction.amount > 0:
-            continue
-
-        # Handle different transaction types based on category and amount
-        if main_cat.lower() != 'income':
-            if main_cat == "Uncategorized":
-                # For uncategorized transactions, be more careful about large positive amounts
-                if transaction.amount < 0:
-                    # Negative uncategorized = expense (use absolute value)
-                    amount = abs(transaction.amount)
-                else:
-                    # Positive uncategorized transactions
-                    if transaction.amount >= 1000:  # Large amounts ($1000+) likely income/deposits
-                        # Skip these from expense categories - they should be income
-                        continue
-                    else:
-                        # Small positive amounts (< $1000) = likely refunds/returns
-                        amount = -transaction.amount
-            else:
-                # For categorized expense categories, use net amount (negative expenses + positive refunds/deposits)
-                if transaction.amount < 0:
-                    # Regular expense - add to spending (use absolute value)
-                    amount = abs(transaction.amount)
-                else:
-                    # Refund/deposit in expense category - subtract from spending (negative amount)
-                    amount = -transaction.amount
+    Args:
+        db_session: SQLAlchemy session
+        budget_list (list): Budgets to report on
+
+    Returns:
+        dict: Progress keyed by budget ID (see calculate_budgets_progress)
+    """
+    name = "calculate_budget_progress"
+    version = get_current_data_versions(db_session)
+    progress_by_budget = {}
+    missing = []
+    for budget in budget_list:
+        found, progress = report_cache.get((name, budget.id), version)
+        report_cache.record(name, found)
+        if found:
+            progress_by_budget[budget.id] = progress
         else:
-            # This shouldn't happen due to the continue above, but safety check
-            continue
-
-        # Initialize main category if needed
-        if not main_categories[main_cat]['main_category']:
-            main_categories[main_cat]['main_category'] = main_cat
-            # Set budgeted amount if available
-            main_categories[main_cat]['budgeted_amount'] = budgeted_amounts.get(main_cat, 0)
-
-        # Add to main category totals (amount can be positive for expenses or negative for refunds)
-        main_categories[main_cat]['total_amount'] += amount
-        main_categories[main_cat]['transaction_count'] += 1
-
-        # Handle subcategories
-        if sub_category:
-            sub_cat_key = sub_category
-            sub_cat_data = main_categories[main_cat]['subcategories'][sub_cat_key]
-            if not sub_cat_data['subcategory']:
-                sub_cat_data['subcategory'] = sub_category
-                sub_cat_data['full_category'] = full_category
-
-            sub_cat_data['total_amount'] += amount
-            sub_cat_data['transaction_count'] += 1
-            sub_cat_data['transactions'].append({
-                'id': transaction.id,
-                'description': transaction.description,
-                'amount': abs(transaction.amount),  # Show absolute value in transaction details
-                'date': transaction.posted_at or transaction.created_at,
-                'account_name': (transaction.account.nickname if transaction.account and transaction.account.nickname 
-                              else transaction.account.name if transaction.account else 'Unknown')
-            })
-    
-    # Add budget categories that have no transactions
-    for budget_category in budget.budget_categories:
-        if budget_category.is_active and budget_category.category_name not in main_categories:
-            main_categories[budget_category.category_name] = {
-                'main_category': budget_category.category_name,
-                'total_amount': 0,
-                'transaction_count': 0,
-                'is_income': False,
-                'budgeted_amount': budget_category.budgeted_amount,
-                'remaining_budget': budget_category.budgeted_amount,  # Full budget remaining
-                'subcategories': []
-            }
-    
-    # Process income transactions and add to income category
-    # Include both categorized income and large uncategorized positive transactions
-    income_transactions = [t for t in all_transactions if t.amount > 0 and 
-                          (t.note and parse_category(t.note)[0] and parse_category(t.note)[0].lower() == 'income')]
-    
-    # Add large uncategorized positive transactions as income
-    large_uncategorized_income = [t for t in all_transactions if t.amount >= 1000 and 
-                                 (not t.note or t.note.strip() == '' or t.note.strip() == 'Uncategorized')]
-    
-    all_income_transactions = income_transactions + large_uncategorized_income
-    total_income = sum(t.amount for t in all_income_transactions)
-    income_budgeted = budgeted_amounts.get('Income', 0)
-    
-    if total_income > 0 or any(cat.category_name.lower() == 'income' for cat in budget.budget_categories if cat.is_active):
-        # For income: remaining = budgeted - actual (positive = short of goal, negative = exceeded goal)
-        income_remaining = income_budgeted - total_income if income_budgeted > 0 else 0
-        
-        main_categories['Income'] = {
-            'main_category': 'Income',
-            'total_amount': total_income,
-            'transaction_count': len(all_income_transactions),
-            'is_income': True,
-            'budgeted_amount': income_budgeted,
-            'remaining_budget': income_remaining,
-            'subcategories': []
-        }
-        
-        # Add income subcategories if any
-        income_subcategories = defaultdict(lambda: {
-            'subcategory': '',
-            'full_category': '',
-            'total_amount': 0,
-            'transaction_count': 0,
-            'transactions': []
-        })
-        
-        for transaction in all_income_transactions:
-            amount = transaction.amount  # Keep positive for income
-            
-            if transaction.note:
-                main_category, sub_category = parse_category(transaction.note)
-                if sub_category:
-                    sub_cat_key = sub_category
-                    sub_cat_data = income_subcategories[sub_cat_key]
-                    if not sub_cat_data['subcategory']:
-                        sub_cat_data['subcategory'] = sub_category
-                        sub_cat_data['full_category'] = transaction.note
-                    
-                    sub_cat_data['total_amount'] += amount
-                    sub_cat_data['transaction_count'] += 1
-                    sub_cat_data['transactions'].append({
-                        'id': transaction.id,
-                        'description': transaction.description,
-                        'amount': amount,
-                        'date': transaction.posted_at or transaction.created_at,
-                        'account_name': (transaction.account.nickname if transaction.account and transaction.account.nickname 
-                                      else transaction.account.name if transaction.account else 'Unknown')
-                    })
-            else:
-                # Handle large uncategorized transactions as "Uncategorized Income"
-                sub_cat_key = "Uncategorized Income"
-                sub_cat_data = income_subcategories[sub_cat_key]
-                if not sub_cat_data['subcategory']:
-                    sub_cat_data['subcategory'] = "Uncategorized Income"
-                    sub_cat_data['full_category'] = "Income/Uncategorized Income"
-                
-                sub_cat_data['total_amount'] += amount
-                sub_cat_data['transaction_count'] += 1
-                sub_cat_data['transactions'].append({
-                    'id': transaction.id,
-                    'description': transaction.description,
-                    'amount': amount,
-                    'date': transaction.posted_at or transaction.created_at,
-                    'account_name': (transaction.account.nickname if transaction.account and transaction.account.nickname 
-                                  else transaction.account.name if transaction.account else 'Unknown')
-                })
-        
-        # Convert income subcategories to list
-        if income_subcategories:
-            subcategories = []
-            for sub_cat_data in income_subcategories.values():
-                sub_cat_data['average_amount'] = (
-                    sub_cat_data['total_amount'] / sub_cat_data['transaction_count']
-                    if sub_cat_data['transaction_count'] > 0 else 0
-                )
-                subcategories.append(sub_cat_data)
-            
-            subcategories.sort(key=lambda x: x['total_amount'], reverse=True)
-            main_categories['Income']['subcategories'] = subcategories
-    
-    # Convert to list format and calculate averages
-    report_data = []
-    for main_cat_data in main_categories.values():
-        # Calculate average for main category
-        main_cat_data['average_amount'] = (
-            main_cat_data['total_amount'] / main_cat_data['transaction_count']
-            if main_cat_data['transaction_count'] > 0 else 0
-        )
-        
-        # Calculate remaining budget for ALL categories (recalculate even if already set)
-        if not main_cat_data.get('is_income', False):  # For expense categories
-            budgeted = main_cat_data.get('budgeted_amount', 0)
-            spent = main_cat_data['total_amount']
-            if budgeted > 0:
-                # Positive = money left, Negative = over budget
-                main_cat_data['remaining_budget'] = budgeted - spent
-            else:
-                # No budget set - always show negative of spending (all spending is "over")
-                main_cat_data['remaining_budget'] = -spent
-        
-        # Convert subcategories to list and calculate averages if not already done
-        if isinstance(main_cat_data['subcategories'], dict):
-            subcategories = []
-            for sub_cat_data in main_cat_data['subcategories'].values():
-                sub_cat_data['average_amount'] = (
-                    sub_cat_data['total_amount'] / sub_cat_data['transaction_count']
-                    if sub_cat_data['transaction_count'] > 0 else 0
-                )
-                subcategories.append(sub_cat_data)
-            
-            # Sort subcategories by amount
-            subcategories.sort(key=lambda x: x['total_amount'], reverse=True)
-            main_cat_data['subcategories'] = subcategories
-        
-        report_data.append(main_cat_data)
-    
-    # Sort: Income first, then expenses by amount
-    report_data.sort(key=lambda x: (not x.get('is_income', False), -x['total_amount']))
-    
-    return report_data
+            missing.append(budget)
+
+    if missing:
+        for budget_id, progress in calculate_budgets_progress(db_session, missing).items():
+            report_cache.set((name, budget_id), version, progress)
+            progress_by_budget[budget_id] = progress
+    return progress_by_budget
+
+
+@report_cache.memoize(budget_key, get_current_data_versions)
+def get_budget_report(db_session, budget):
+    """Get a budget's report summary (see models.budget.get_budget_report_data), cached."""
+    return get_budget_report_data(db_session, budget)
 
 
 # =============================================================================
@@ -3809,34 +4129,30 @@ def budgets():
     """Display budgets overview for the current user."""
     try:
         db_session = Session()
-        # Get user from database to avoid DetachedInstanceError
-        fresh_user = db_session.query(User).get(current_user.id)
+        access = get_access_context()
         
         # Check if user has budgets role
-        if not fresh_user.has_role("budgets"):
+        if not access.has_role("budgets"):
             flash("Access denied. You don't have permission to view budgets.", "error")
             return redirect(url_for("dashboard"))
         
         # Get user's accessible mercury accounts
-        mercury_account_ids = [ma.id for ma in fresh_user.mercury_accounts]
+        mercury_account_ids = list(access.mercury_account_ids)
         
         # Get budgets for accessible mercury accounts with eager loading
         budget_list = db_session.query(Budget).options(
-            joinedload(Budget.mercury_account),  # Eagerly load mercury_account relationship
-            joinedload(Budget.accounts)  # Eagerly load accounts relationship
+            joinedload(Budget.mercury_account)  # Eagerly load mercury_account relationship
         ).filter(
             Budget.mercury_account_id.in_(mercury_account_ids),
             Budget.is_active == True
         ).order_by(Budget.budget_month.desc(), Budget.name).all()
         
-        # Calculate progress for each budget (lightweight - no detailed report data)
-        budgets_with_progress = []
-        for budget in budget_list:
-            progress = calculate_budget_progress(db_session, budget)
-            budgets_with_progress.append({
-                'budget': budget,
-                'progress': progress
-            })
+        # Calculate progress for all budgets at once (lightweight - no detailed report data)
+        progress_by_budget = get_budgets_progress(db_session, budget_list)
+        budgets_with_progress = [
+            {'budget': budget, 'progress': progress_by_budget[budget.id]}
+            for budget in budget_list
+        ]
         
         return render_template("budgets/list_clean.html", budgets=budgets_with_progress)
         
@@ -3844,8 +4160,6 @@ def budgets():
         app.logger.error(f"Error loading budgets: {e}")
         flash("An error occurred while loading budgets.", "error")
         return redirect(url_for("dashboard"))
-    finally:
-        db_session.close()
 
 
 @app.route("/budgets/reports")
@@ -3854,11 +4168,10 @@ def budget_reports():
     """Display detailed budget reports with month filtering."""
     try:
         db_session = Session()
-        # Get user from database to avoid DetachedInstanceError
-        fresh_user = db_session.query(User).get(current_user.id)
+        access = get_access_context()
         
         # Check if user has budgets role
-        if not fresh_user.has_role("budgets"):
+        if not access.has_role("budgets"):
             flash("Access denied. You don't have permission to view budget reports.", "error")
             return redirect(url_for("dashboard"))
         
@@ -3881,9 +4194,7 @@ def budget_reports():
             return redirect(url_for("budget_reports"))
         
         # Get user's accessible mercury accounts
-        mercury_accounts = db_session.query(MercuryAccount).filter(
-            MercuryAccount.users.contains(fresh_user)
-        ).all()
+        mercury_accounts = get_user_mercury_accounts(db_session)
         
         # Filter by mercury account if specified
         if mercury_account_id:
@@ -3894,7 +4205,8 @@ def budget_reports():
         # Get budgets for the selected month and mercury accounts with eager loading
         budget_list = db_session.query(Budget).options(
             joinedload(Budget.mercury_account),  # Eagerly load mercury_account relationship
-            joinedload(Budget.accounts)  # Eagerly load accounts relationship
+            joinedload(Budget.accounts),  # Eagerly load accounts relationship
+            selectinload(Budget.budget_categories)  # Categories for all budgets in one query
         ).filter(
             Budget.mercury_account_id.in_(mercury_account_ids),
             Budget.budget_month == budget_month,
@@ -3905,10 +4217,11 @@ def budget_reports():
         budgets_with_reports = []
         total_income = 0
         total_expenses = 0
+        progress_by_budget = get_budgets_progress(db_session, budget_list)
         
         for budget in budget_list:
-            progress = calculate_budget_progress(db_session, budget)
-            report_data = get_budget_report_data(db_session, budget)
+            progress = progress_by_budget[budget.id]
+            report_data = get_budget_report(db_session, budget)
             
             # Calculate income vs expenses for this budget
             budget_income = 0
@@ -3958,9 +4271,7 @@ def budget_reports():
                 seen_months.add(month_str)
         
         # Get all accessible mercury accounts for filter
-        all_mercury_accounts = db_session.query(MercuryAccount).filter(
-            MercuryAccount.users.contains(fresh_user)
-        ).all()
+        all_mercury_accounts = get_user_mercury_accounts(db_session)
         
         return render_template("budgets/reports.html", 
                              budgets=budgets_with_reports,
@@ -3973,8 +4284,53 @@ def budget_reports():
         app.logger.error(f"Error loading budget reports: {e}")
         flash("An error occurred while loading budget reports.", "error")
         return redirect(url_for("budgets"))
-    finally:
-        db_session.close()
+
+
+@app.route("/api/budgets/<int:budget_id>/transactions")
+@login_required
+def get_budget_report_row_transactions(budget_id):
+    """Get a page of the transactions behind one category row of a budget report."""
+    try:
+        db_session = Session()
+        access = get_access_context()
+        if not access.has_role("budgets"):
+            return jsonify({"error": "Access denied"}), 403
+
+        budget = db_session.query(Budget).filter(Budget.id == budget_id).first()
+        if not budget or budget.mercury_account_id not in access.mercury_account_ids:
+            return jsonify({"error": "Budget not found"}), 404
+
+        category = request.args.get("category", "")
+        subcategory = request.args.get("subcategory") or None
+        page = max(request.args.get("page", 1, type=int), 1)
+        per_page = min(max(request.args.get("per_page", 25, type=int), 1), 100)
+
+        transactions, total = get_budget_report_transactions(
+            db_session, budget, category, subcategory, page=page, per_page=per_page
+        )
+
+        return jsonify(
+            {
+                "budget_id": budget_id,
+                "category": category,
+                "subcategory": subcategory,
+                "transactions": [
+                    {
+                        **transaction,
+                        "date": transaction["date"].isoformat() if transaction["date"] else None,
+                    }
+                    for transaction in transactions
+                ],
+                "page": page,
+                "per_page": per_page,
+                "total": total,
+                "has_more": page * per_page < total,
+            }
+        )
+
+    except Exception as e:
+        app.logger.error(f"Error getting budget report transactions: {e}")
+        return jsonify({"error": "Internal server error"}), 500
 
 
 @app.route("/budgets/create", methods=["GET", "POST"])
@@ -3983,17 +4339,16 @@ def create_budget():
     """Create a new budget."""
     try:
         db_session = Session()
-        # Get user from database to avoid DetachedInstanceError
-        fresh_user = db_session.query(User).get(current_user.id)
+        access = get_access_context()
         
         # Check if user has budgets role
-        if not fresh_user.has_role("budgets"):
+        if not access.has_role("budgets"):
             flash("Access denied. You don't have permission to create budgets.", "error")
             return redirect(url_for("dashboard"))
         
         if request.method == "GET":
             # Get user's accessible mercury accounts
-            mercury_accounts = fresh_user.mercury_accounts
+            mercury_accounts = get_user_mercury_accounts(db_session)
             return render_template("budgets/create.html", mercury_accounts=mercury_accounts)
         
         # Handle POST request
@@ -4005,21 +4360,21 @@ def create_budget():
         # Validation
         if not name:
             flash("Budget name is required.", "error")
-            mercury_accounts = fresh_user.mercury_accounts
+            mercury_accounts = get_user_mercury_accounts(db_session)
             return render_template("budgets/create.html", mercury_accounts=mercury_accounts)
         
         if not mercury_account_id:
             flash("Mercury account is required.", "error")
-            mercury_accounts = fresh_user.mercury_accounts
+            mercury_accounts = get_user_mercury_accounts(db_session)
             return render_template("budgets/create.html", mercury_accounts=mercury_accounts)
         
         if not budget_month:
             flash("Budget month is required.", "error")
-            mercury_accounts = fresh_user.mercury_accounts
+            mercury_accounts = get_user_mercury_accounts(db_session)
             return render_template("budgets/create.html", mercury_accounts=mercury_accounts)
         
         # Verify user has access to the mercury account
-        mercury_account_ids = [ma.id for ma in fresh_user.mercury_accounts]
+        mercury_account_ids = list(access.mercury_account_ids)
         if int(mercury_account_id) not in mercury_account_ids:
             flash("Access denied to the selected Mercury account.", "error")
             return redirect(url_for("budgets"))
@@ -4030,7 +4385,7 @@ def create_budget():
             budget_date = datetime.strptime(budget_month + "-01", "%Y-%m-%d").date()
         except ValueError:
             flash("Invalid budget month format.", "error")
-            mercury_accounts = fresh_user.mercury_accounts
+            mercury_accounts = get_user_mercury_accounts(db_session)
             return render_template("budgets/create.html", mercury_accounts=mercury_accounts)
         
         # Check for duplicate budget (same mercury account and month)
@@ -4042,7 +4397,7 @@ def create_budget():
         
         if existing:
             flash(f"A budget for {budget_month} already exists for this Mercury account.", "error")
-            mercury_accounts = fresh_user.mercury_accounts
+            mercury_accounts = get_user_mercury_accounts(db_session)
             return render_template("budgets/create.html", mercury_accounts=mercury_accounts)
         
         # Create the budget
@@ -4092,8 +4447,6 @@ def create_budget():
         app.logger.error(f"Error creating budget: {e}")
         flash("An error occurred while creating the budget.", "error")
         return redirect(url_for("budgets"))
-    finally:
-        db_session.close()
 
 
 @app.route("/budgets/<int:budget_id>/edit", methods=["GET", "POST"])
@@ -4102,11 +4455,10 @@ def edit_budget(budget_id):
     """Edit an existing budget."""
     try:
         db_session = Session()
-        # Get user from database to avoid DetachedInstanceError
-        fresh_user = db_session.query(User).get(current_user.id)
+        access = get_access_context()
         
         # Check if user has budgets role
-        if not fresh_user.has_role("budgets"):
+        if not access.has_role("budgets"):
             flash("Access denied. You don't have permission to edit budgets.", "error")
             return redirect(url_for("dashboard"))
         
@@ -4124,7 +4476,7 @@ def edit_budget(budget_id):
             return redirect(url_for("budgets"))
         
         # Check if user has access to this budget's mercury account
-        mercury_account_ids = [ma.id for ma in fresh_user.mercury_accounts]
+        mercury_account_ids = list(access.mercury_account_ids)
         if budget.mercury_account_id not in mercury_account_ids:
             flash("Access denied to this budget.", "error")
             return redirect(url_for("budgets"))
@@ -4158,6 +4510,8 @@ def edit_budget(budget_id):
                 
                 if category_to_delete:
                     db_session.delete(category_to_delete)
+                    # Cached progress and reports of the budget are stale
+                    DataVersion.bump(db_session, [budget.mercury_account_id])
                     db_session.commit()
                     flash("Category deleted successfully.", "success")
                 else:
@@ -4261,6 +4615,8 @@ def edit_budget(budget_id):
                 except ValueError:
                     continue  # Skip invalid amounts
         
+        # Cached progress and reports of the budget are stale
+        DataVersion.bump(db_session, [budget.mercury_account_id])
         db_session.commit()
         flash(f"Budget '{name}' updated successfully!", "success")
         return redirect(url_for("budgets"))
@@ -4270,8 +4626,6 @@ def edit_budget(budget_id):
         app.logger.error(f"Error updating budget: {e}")
         flash("An error occurred while updating the budget.", "error")
         return redirect(url_for("budgets"))
-    finally:
-        db_session.close()
 
 
 @app.route("/budgets/<int:budget_id>/copy", methods=["POST"])
@@ -4280,11 +4634,10 @@ def copy_budget(budget_id):
     """Copy an existing budget to a new month."""
     try:
         db_session = Session()
-        # Get user from database to avoid DetachedInstanceError
-        fresh_user = db_session.query(User).get(current_user.id)
+        access = get_access_context()
         
         # Check if user has budgets role
-        if not fresh_user.has_role("budgets"):
+        if not access.has_role("budgets"):
             flash("Access denied. You don't have permission to copy budgets.", "error")
             return redirect(url_for("dashboard"))
         
@@ -4302,7 +4655,7 @@ def copy_budget(budget_id):
             return redirect(url_for("budgets"))
         
         # Check if user has access to this budget's mercury account
-        mercury_account_ids = [ma.id for ma in fresh_user.mercury_accounts]
+        mercury_account_ids = list(access.mercury_account_ids)
         if source_budget.mercury_account_id not in mercury_account_ids:
             flash("Access denied to this budget.", "error")
             return redirect(url_for("budgets"))
@@ -4369,8 +4722,6 @@ def copy_budget(budget_id):
         app.logger.error(f"Error copying budget: {e}")
         flash("An error occurred while copying the budget.", "error")
         return redirect(url_for("budgets"))
-    finally:
-        db_session.close()
 
 
 @app.route("/budgets/<int:budget_id>/delete", methods=["POST"])
@@ -4379,11 +4730,10 @@ def delete_budget(budget_id):
     """Delete a budget (soft delete)."""
     try:
         db_session = Session()
-        # Get user from database to avoid DetachedInstanceError
-        fresh_user = db_session.query(User).get(current_user.id)
+        access = get_access_context()
         
         # Check if user has budgets role
-        if not fresh_user.has_role("budgets"):
+        if not access.has_role("budgets"):
             flash("Access denied. You don't have permission to delete budgets.", "error")
             return redirect(url_for("dashboard"))
         
@@ -4401,7 +4751,7 @@ def delete_budget(budget_id):
             return redirect(url_for("budgets"))
         
         # Check if user has access to this budget's mercury account
-        mercury_account_ids = [ma.id for ma in fresh_user.mercury_accounts]
+        mercury_account_ids = list(access.mercury_account_ids)
         if budget.mercury_account_id not in mercury_account_ids:
             flash("Access denied to this budget.", "error")
             return redirect(url_for("budgets"))
@@ -4418,24 +4768,22 @@ def delete_budget(budget_id):
         app.logger.error(f"Error deleting budget: {e}")
         flash("An error occurred while deleting the budget.", "error")
         return redirect(url_for("budgets"))
-    finally:
-        db_session.close()
 
 
 @app.route("/api/budget_accounts/<int:mercury_account_id>")
 @login_required
+@data_version_etag()
 def get_budget_accounts(mercury_account_id):
     """Get accounts for a mercury account (for budget creation/editing)."""
     try:
         db_session = Session()
         # Check if user has budgets role
-        user_in_session = db_session.query(User).filter(User.id == current_user.id).first()
-        if not user_in_session.has_role("budgets"):
+        access = get_access_context()
+        if not access.has_role("budgets"):
             return jsonify({"error": "Access denied"}), 403
         
         # Check if user has access to this mercury account
-        mercury_account_ids = [ma.id for ma in user_in_session.mercury_accounts]
-        if mercury_account_id not in mercury_account_ids:
+        if mercury_account_id not in access.mercury_account_ids:
             return jsonify({"error": "Access denied to this Mercury account"}), 403
         
         # Get accounts for this mercury account
@@ -4460,11 +4808,9 @@ def get_budget_accounts(mercury_account_id):
     except Exception as e:
         app.logger.error(f"Error getting budget accounts: {e}")
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        db_session.close()
 
 
 # Initialize settings on app startup
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    create_app().run(host="0.0.0.0", port=5000, debug=True)
@@ -49,23 +49,25 @@ def get_budget_progress(session: Session, budget: Budget) -> Dict[str, Any]:
         result['total_remaining'] = result['total_budgeted']
         return result
     
-    # Calculate progress for each category
-    for category in budget_categories:
-        # Get actual spending for this category in the budget month
-        # Exclude failed transactions from budget calculations
-        spent_amount = session.query(func.sum(Transaction.amount)).filter(
+    # Get actual spending for all budget categories in the budget month with one
+    # grouped query. Exclude failed transactions from budget calculations
+    spending_by_category = dict(
+        session.query(Transaction.mercury_category, func.sum(Transaction.amount)).filter(
             and_(
                 Transaction.account_id.in_(account_ids),
-                Transaction.mercury_category == category.category_name,
+                Transaction.mercury_category.in_([c.category_name for c in budget_categories]),
                 extract('year', Transaction.posted_at) == budget.budget_month.year,
                 extract('month', Transaction.posted_at) == budget.budget_month.month,
                 Transaction.amount < 0,  # Expenses are negative
                 Transaction.status != 'failed'  # Exclude failed transactions
             )
-        ).scalar() or 0.0
-        
+        ).group_by(Transaction.mercury_category).all()
+    )
+    
+    # Calculate progress for each category
+    for category in budget_categories:
         # Convert to positive amount for display
-        spent_amount = abs(spent_amount)
+        spent_amount = abs(spending_by_category.get(category.category_name) or 0.0)
         remaining_amount = max(0, category.budgeted_amount - spent_amount)
         percentage_used = (spent_amount / category.budgeted_amount * 100) if category.budgeted_amount > 0 else 0
         
@@ -5,14 +5,146 @@ Includes connection pooling, caching, and query optimization.
 
 import os
 import logging
+import threading
 import time
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session as BaseSession, sessionmaker, scoped_session
 from sqlalchemy.pool import QueuePool
 from contextlib import contextmanager
+from contextvars import ContextVar
+
+from models.request_metrics import fingerprint_statement, record_pool_wait, record_statement
 
 logger = logging.getLogger(__name__)
 
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that counts the time spent getting a connection towards the current request.
+
+    This includes waiting for a connection to be returned when the pool and its
+    overflow are exhausted, and opening new connections; it shows up as "pool" in
+    Server-Timing and on /admin/performance.
+    """
+
+    _timing = threading.local()
+
+    def _do_get(self):
+        # QueuePool._do_get calls itself again after losing a race for overflow
+        if getattr(self._timing, "active", False):
+            return super()._do_get()
+        self._timing.active = True
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self._timing.active = False
+            record_pool_wait(time.perf_counter() - start)
+
+
+# Replica engine the current request's reads are routed to (None: the primary)
+_replica_bind = ContextVar("replica_bind", default=None)
+
+
+class RoutingSession(BaseSession):
+    """
+    Session that sends reads to the read replica while replica reads are on.
+
+    Flushes always go to the primary, so a view that writes while routed to the
+    replica still writes to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica = _replica_bind.get()
+        if replica is not None and not self._flushing:
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+class ReplicaMonitor:
+    """
+    Track whether the read replica is reachable and close enough to the primary.
+
+    The replica is checked at most every check_seconds, by the first caller after
+    that (others keep using the last result). It is unavailable when it can't be
+    reached, replication is stopped, or it lags more than max_lag_seconds.
+
+    Attributes:
+        engine: Replica engine
+        max_lag_seconds (float): Largest replication lag the replica is used with
+        check_seconds (float): Seconds between checks
+        healthy (bool): Result of the last check
+        lag_seconds (float): Replication lag at the last check, or None if unknown
+        error (str): Why the replica is unavailable, if it is
+        checked_at (float): time.time() of the last check
+    """
+
+    def __init__(self, engine, max_lag_seconds=30.0, check_seconds=10.0):
+        self.engine = engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        self.healthy = False
+        self.lag_seconds = None
+        self.error = "not checked yet"
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def measure_lag(self):
+        """
+        Get the replica's replication lag.
+
+        Returns:
+            float: Seconds behind the primary (0 for a server that isn't replicating),
+                or None if replication is stopped
+        """
+        with self.engine.connect() as connection:
+            if self.engine.dialect.name != "mysql":
+                connection.execute(text("SELECT 1"))
+                return 0.0
+            try:
+                row = connection.execute(text("SHOW REPLICA STATUS")).mappings().first()
+                column = "Seconds_Behind_Source"
+            except Exception:
+                # MySQL before 8.0.22
+                row = connection.execute(text("SHOW SLAVE STATUS")).mappings().first()
+                column = "Seconds_Behind_Master"
+            if row is None:
+                return 0.0
+            lag = row[column]
+            return float(lag) if lag is not None else None
+
+    def check(self):
+        """Check the replica now."""
+        try:
+            lag = self.measure_lag()
+        except Exception as e:
+            self.healthy, self.lag_seconds, self.error = False, None, f"unreachable: {e.__class__.__name__}"
+        else:
+            self.lag_seconds = lag
+            if lag is None:
+                self.healthy, self.error = False, "replication stopped"
+            elif lag > self.max_lag_seconds:
+                self.healthy, self.error = False, f"lagging {lag:.0f}s"
+            else:
+                self.healthy, self.error = True, None
+        self.checked_at = time.time()
+        if not self.healthy:
+            logger.warning("Read replica unavailable (%s); reading from the primary", self.error)
+
+    def available(self):
+        """Whether reads may go to the replica, checking it again if the last check is stale."""
+        if time.time() - self.checked_at >= self.check_seconds and self._lock.acquire(blocking=False):
+            try:
+                self.check()
+            finally:
+                self._lock.release()
+        return self.healthy
+
+    def mark_down(self, error):
+        """Stop using the replica until the next check, e.g. after a connection error."""
+        self.healthy, self.error, self.checked_at = False, error, time.time()
+
+
 class DatabaseConfig:
     """Optimized database configuration for high performance."""
     
@@ -20,52 +152,110 @@ class DatabaseConfig:
         self.database_url = os.environ.get(
             "DATABASE_URL", "mysql+pymysql://user:password@db:3306/mercury_bank"
         )
+        self.engine = self._create_engine(self.database_url)
+
+        # Optional read replica for the heavy read-only views (see start_replica_reads)
+        self.replica_url = os.environ.get("DATABASE_REPLICA_URL") or None
+        self.replica_engine = None
+        self.replica_monitor = None
+        if self.replica_url:
+            self.replica_engine = self._create_engine(self.replica_url)
+            self.replica_monitor = ReplicaMonitor(
+                self.replica_engine,
+                max_lag_seconds=float(os.environ.get("DATABASE_REPLICA_MAX_LAG_SECONDS", "30")),
+                check_seconds=float(os.environ.get("DATABASE_REPLICA_CHECK_SECONDS", "10")),
+            )
+
+            @event.listens_for(self.replica_engine, "handle_error")
+            def replica_error(context):
+                if context.is_disconnect:
+                    self.replica_monitor.mark_down(f"disconnected: {context.original_exception.__class__.__name__}")
+        
+        # One session per thread, i.e. per request: the login loader, decorators,
+        # context processors and routes all share it, and it only checks out a
+        # connection when first used. The app removes it at teardown
+        # (close_session). Objects stay loaded after a commit, so a view that
+        # commits and then renders doesn't reload them.
+        self.Session = scoped_session(
+            sessionmaker(bind=self.engine, class_=RoutingSession, expire_on_commit=False)
+        )
+        
+        # Set up performance monitoring
+        for engine in (self.engine, self.replica_engine):
+            if engine is not None:
+                self._setup_performance_monitoring(engine)
+
+    def _create_engine(self, database_url):
+        """Create a pooled engine for the primary or the replica."""
+        # MySQL connection options; other databases (e.g. SQLite in tests) use defaults
+        mysql_options = {}
+        if database_url.startswith("mysql"):
+            mysql_options = {
+                # Connection optimization
+                "connect_args": {
+                    "charset": "utf8mb4",
+                    "connect_timeout": 10,
+                    "read_timeout": 30,
+                    "write_timeout": 30,
+                },
+                "isolation_level": "READ_COMMITTED",
+            }
         
         # Performance-optimized engine configuration
-        self.engine = create_engine(
-            self.database_url,
+        return create_engine(
+            database_url,
             # Connection pooling for better performance
-            poolclass=QueuePool,
-            pool_size=20,          # Number of connections to keep persistently
-            max_overflow=30,       # Additional connections that can be created on demand
+            # Pools are per process; gunicorn.conf.py sizes them per worker
+            poolclass=TimedQueuePool,
+            pool_size=int(os.environ.get("DB_POOL_SIZE", "20")),  # Connections kept persistently
+            max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", "30")),  # Extra connections on demand
             pool_pre_ping=True,    # Verify connections before use
-            pool_recycle=3600,     # Recycle connections every hour
-            
-            # Connection optimization
-            connect_args={
-                "charset": "utf8mb4",
-                "autocommit": True,
-                "connect_timeout": 10,
-                "read_timeout": 30,
-                "write_timeout": 30,
-            },
+            pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", "3600")),  # Recycle connections hourly
             
             # Query optimization
             echo=False,  # Set to True for SQL debugging
-            isolation_level="READ_COMMITTED",
             
             # Performance tuning
             query_cache_size=1200,
+            **mysql_options,
         )
-        
-        # Scoped session for thread safety and better performance
-        self.Session = scoped_session(sessionmaker(bind=self.engine))
-        
-        # Set up performance monitoring
-        self._setup_performance_monitoring()
+
+    def start_replica_reads(self):
+        """
+        Send the current thread's reads to the read replica, if one is configured and available.
+
+        Writes still go to the primary. Call end_replica_reads when the unit of work is done.
+
+        Returns:
+            bool: Whether reads go to the replica
+        """
+        if self.replica_monitor is None or not self.replica_monitor.available():
+            return False
+        _replica_bind.set(self.replica_engine)
+        return True
+
+    def end_replica_reads(self):
+        """Send the current thread's reads to the primary again."""
+        _replica_bind.set(None)
     
-    def _setup_performance_monitoring(self):
-        """Set up database performance monitoring."""
+    def _setup_performance_monitoring(self, engine):
+        """
+        Set up database performance monitoring on an engine.
+
+        Every statement is counted towards the current request's profile (see
+        models.request_metrics); slow statements are also logged by fingerprint.
+        """
         
-        @event.listens_for(self.engine, "before_cursor_execute")
+        @event.listens_for(engine, "before_cursor_execute")
         def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
-            context._query_start_time = time.time()
+            context._query_start_time = time.perf_counter()
         
-        @event.listens_for(self.engine, "after_cursor_execute")
+        @event.listens_for(engine, "after_cursor_execute")
         def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
-            total = time.time() - context._query_start_time
+            total = time.perf_counter() - context._query_start_time
+            record_statement(statement, total)
             if total > 0.1:  # Log slow queries (>100ms)
-                logger.warning(f"Slow query ({total:.3f}s): {statement[:100]}...")
+                logger.warning(f"Slow query ({total:.3f}s): {fingerprint_statement(statement)}")
     
     @contextmanager
     def get_session(self):
@@ -80,12 +270,46 @@ class DatabaseConfig:
         finally:
             session.close()
     
+    @contextmanager
+    def advisory_lock(self, name, timeout=10):
+        """
+        Hold a named database lock shared by all processes using the database.
+
+        Uses MySQL's GET_LOCK on a dedicated connection, so commits on other sessions
+        don't release it. On other databases (e.g. SQLite in tests) no lock is taken.
+
+        Args:
+            name (str): Lock name
+            timeout (int): Seconds to wait for the lock
+
+        Yields:
+            bool: Whether the lock was acquired
+        """
+        if self.engine.dialect.name != "mysql":
+            yield True
+            return
+
+        with self.engine.connect() as connection:
+            acquired = connection.execute(
+                text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout}
+            ).scalar() == 1
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
     def get_scoped_session(self):
         """Get a scoped session for the current thread."""
         return self.Session
     
     def close_session(self):
-        """Remove the scoped session for the current thread."""
+        """
+        Remove the scoped session for the current thread, ending its unit of work.
+
+        Changes that weren't committed are rolled back and the connection is
+        returned to the pool.
+        """
         self.Session.remove()
 
 # Global database configuration instance
@@ -95,3 +319,4 @@ db_config = DatabaseConfig()
 engine = db_config.engine
 Session = db_config.Session
 get_db_session = db_config.get_session
+advisory_lock = db_config.advisory_lock
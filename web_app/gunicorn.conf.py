@@ -0,0 +1,75 @@
+"""
+Gunicorn configuration for serving the web application in production.
+
+Every setting can be overridden with an environment variable:
+
+    WEB_BIND                    Address to listen on (default 0.0.0.0:5000)
+    WEB_WORKERS                 Worker processes (default: one per CPU core)
+    WEB_THREADS                 Threads per worker (default 4)
+    WEB_TIMEOUT                 Seconds before a silent worker is restarted (default 60)
+    WEB_GRACEFUL_TIMEOUT        Seconds workers get to finish requests on restart (default 30)
+    WEB_KEEPALIVE               Seconds to hold idle keep-alive connections (default 5)
+    WEB_MAX_REQUESTS            Requests after which a worker is recycled (default 1000, 0 = never)
+    WEB_MAX_REQUESTS_JITTER     Random extra requests so workers don't recycle together (default 100)
+    WEB_PRELOAD                 Import the app once in the master process (default true)
+    WEB_LOG_LEVEL               Gunicorn log level (default info)
+
+Database connection pools are per worker process. Unless DB_POOL_SIZE is set, each
+worker keeps one connection per thread, and DB_MAX_CONNECTIONS (if set) caps the
+connections of all workers together.
+"""
+
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+bind = os.environ.get("WEB_BIND", "0.0.0.0:5000")
+workers = _env_int("WEB_WORKERS", multiprocessing.cpu_count())
+threads = _env_int("WEB_THREADS", 4)
+worker_class = "gthread"
+timeout = _env_int("WEB_TIMEOUT", 60)
+graceful_timeout = _env_int("WEB_GRACEFUL_TIMEOUT", 30)
+keepalive = _env_int("WEB_KEEPALIVE", 5)
+
+# Recycle workers periodically to bound memory growth of long-lived processes
+max_requests = _env_int("WEB_MAX_REQUESTS", 1000)
+max_requests_jitter = _env_int("WEB_MAX_REQUESTS_JITTER", 100)
+
+# Import models, templates and the app once in the master; workers share the pages
+# copy-on-write and start faster
+preload_app = os.environ.get("WEB_PRELOAD", "true").lower() == "true"
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("WEB_LOG_LEVEL", "info")
+# Behind nginx (see nginx.conf); trust its X-Forwarded-* headers
+forwarded_allow_ips = os.environ.get("WEB_FORWARDED_ALLOW_IPS", "*")
+
+
+def _worker_pool_size():
+    """Size each worker's database pool from the thread count and connection budget."""
+    pool_size = threads
+    max_connections = _env_int("DB_MAX_CONNECTIONS", 0)
+    if max_connections:
+        pool_size = max(1, min(pool_size, max_connections // max(workers, 1)))
+    return pool_size
+
+
+# Read by database_config when the app is imported (in the master with preload_app)
+if not os.environ.get("DB_POOL_SIZE"):
+    os.environ["DB_POOL_SIZE"] = str(_worker_pool_size())
+    # A few extra connections for background threads (e.g. receipt status refreshes)
+    os.environ.setdefault("DB_MAX_OVERFLOW", "2")
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master process."""
+    from database_config import engine
+
+    # close=False leaves the parent's sockets alone; the worker opens its own
+    engine.dispose(close=False)
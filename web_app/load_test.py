@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Load-test the web app with concurrent virtual users.
+
+Each virtual user logs in as one of the users of the synthetic benchmark
+dataset (see benchmark.py), whose Mercury account groups and restricted
+accounts differ, and replays a weighted mix of page views: the dashboard, paged
+and filtered transactions, report charts, exports and budget reports. The mix
+runs for a fixed time at each concurrency level, and every level reports
+throughput, latency percentiles per scenario, error rates, the database pool
+wait reported in Server-Timing and the largest session cookie seen. Run from
+the web_app directory:
+
+    python load_test.py --scale 10k --concurrency 1,5,10,25,50
+    python load_test.py --base-url http://localhost:5001 --concurrency 10,50 --output load.json
+
+Without --base-url the app is served from this process by a threaded server on
+a free local port, against the dataset's database (generated if needed), and the
+pool's checked-out connections are sampled too. With --base-url the target
+server must use a database holding the same dataset.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from benchmark import SCALES, default_database_url, git_commit, prepare_database
+
+# Weighted scenarios; "{page}" is replaced by a random page of the first pages
+SCENARIOS = {
+    "dashboard": (20, "/dashboard"),
+    "transactions": (20, "/transactions?page={page}"),
+    "transactions_filtered": (8, "/transactions?category=software&receipt_status=required_missing&page={page}"),
+    "transactions_search": (5, "/transactions?q=amazon"),
+    "reports": (8, "/reports"),
+    "expense_breakdown": (8, "/api/expense_breakdown"),
+    "budget_data": (8, "/api/budget_data"),
+    "budgets": (5, "/budgets"),
+    "budget_reports": (8, "/budgets/reports"),
+    "export_csv": (2, "/transactions?export=csv"),
+}
+MAX_PAGE = 5
+
+_SERVER_TIMING = re.compile(r"(\w+);dur=([\d.]+)")
+
+
+def parse_server_timing(header):
+    """
+    Read the metrics of a Server-Timing header.
+
+    Returns:
+        dict: Durations in seconds keyed by metric name
+    """
+    return {name: float(duration) / 1000 for name, duration in _SERVER_TIMING.findall(header or "")}
+
+
+class VirtualUser:
+    """
+    One logged-in client replaying the scenario mix.
+
+    Attributes:
+        base_url (str): Server to request
+        username (str): User logged in as
+        think_seconds (float): Pause between requests
+    """
+
+    def __init__(self, base_url, username, think_seconds=0.0, timeout=60):
+        self.base_url = base_url
+        self.username = username
+        self.think_seconds = think_seconds
+        self.timeout = timeout
+        self.http = requests.Session()
+
+    def login(self):
+        """Log in with the dataset's password."""
+        response = self.http.post(
+            f"{self.base_url}/login",
+            data={"username": self.username, "password": "password"},
+            allow_redirects=False,
+            timeout=self.timeout,
+        )
+        if response.status_code != 302:
+            raise SystemExit(f"Could not log in as {self.username} (HTTP {response.status_code})")
+
+    def run(self, rng, stop, results):
+        """
+        Request scenarios picked at random until stop is set.
+
+        Args:
+            rng (random.Random): This user's random generator
+            stop (threading.Event): Set when the concurrency level is over
+            results (list): Receives one dict per request
+        """
+        names = list(SCENARIOS)
+        weights = [SCENARIOS[name][0] for name in names]
+        while not stop.is_set():
+            name = rng.choices(names, weights)[0]
+            path = SCENARIOS[name][1].format(page=rng.randint(1, MAX_PAGE))
+            start = time.perf_counter()
+            try:
+                # A redirect means the session was lost (e.g. back to the login page)
+                response = self.http.get(f"{self.base_url}{path}", allow_redirects=False, timeout=self.timeout)
+                seconds = time.perf_counter() - start
+                results.append(
+                    {
+                        "scenario": name,
+                        "seconds": seconds,
+                        "status": response.status_code,
+                        "bytes": len(response.content),
+                        "timing": parse_server_timing(response.headers.get("Server-Timing")),
+                        "cookie_bytes": len(self.http.cookies.get("session") or ""),
+                    }
+                )
+            except requests.RequestException as error:
+                results.append(
+                    {
+                        "scenario": name,
+                        "seconds": time.perf_counter() - start,
+                        "status": None,
+                        "error": type(error).__name__,
+                    }
+                )
+            if self.think_seconds:
+                stop.wait(rng.expovariate(1 / self.think_seconds))
+
+
+def summarize(samples, seconds):
+    """
+    Summarize the requests of one scenario (or all of them).
+
+    Args:
+        samples (list): Request dicts from VirtualUser.run
+        seconds (float): Duration of the concurrency level
+
+    Returns:
+        dict: Request and error counts, throughput, latency percentiles in
+            seconds and the average and p95 pool wait and DB time
+    """
+    from models.request_metrics import percentile
+
+    latencies = [sample["seconds"] for sample in samples]
+    errors = [sample for sample in samples if sample["status"] != 200]
+    pool_waits = [sample["timing"].get("pool", 0.0) for sample in samples if sample.get("timing")]
+    db_times = [sample["timing"].get("db", 0.0) for sample in samples if sample.get("timing")]
+    return {
+        "requests": len(samples),
+        "errors": len(errors),
+        "error_rate": len(errors) / len(samples) if samples else 0.0,
+        "throughput": len(samples) / seconds,
+        "seconds": {
+            "mean": statistics.fmean(latencies) if latencies else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies, default=0.0),
+        },
+        "pool_wait_seconds": {
+            "mean": statistics.fmean(pool_waits) if pool_waits else 0.0,
+            "p95": percentile(pool_waits, 95),
+            "max": max(pool_waits, default=0.0),
+        },
+        "db_seconds": {
+            "mean": statistics.fmean(db_times) if db_times else 0.0,
+            "p95": percentile(db_times, 95),
+        },
+    }
+
+
+class PoolSampler:
+    """Sample the connections checked out of an engine's pool in the background."""
+
+    def __init__(self, engine, interval=0.05):
+        self.pool = engine.pool
+        self.interval = interval
+        self.max_checked_out = 0
+        self.max_overflow = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="pool-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.max_checked_out = max(self.max_checked_out, self.pool.checkedout())
+            self.max_overflow = max(self.max_overflow, self.pool.overflow())
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return {"size": self.pool.size(), "max_checked_out": self.max_checked_out, "max_overflow": self.max_overflow}
+
+
+def run_level(users, concurrency, duration, seed, engine=None):
+    """
+    Run the scenario mix with a number of concurrent virtual users.
+
+    Args:
+        users (list): Logged-in VirtualUser objects, at least concurrency of them
+        concurrency (int): Virtual users running at once
+        duration (float): Seconds to run for
+        seed (int): Random seed of the level
+        engine: Engine of an in-process app whose pool is sampled, or None
+
+    Returns:
+        dict: Summary of all requests, per scenario and of the pool, plus the
+            error statuses and the largest session cookie seen
+    """
+    stop = threading.Event()
+    results = [[] for _ in range(concurrency)]
+    threads = [
+        threading.Thread(
+            target=users[number].run,
+            args=(random.Random(seed * 1000 + number), stop, results[number]),
+            name=f"virtual-user-{number}",
+            daemon=True,
+        )
+        for number in range(concurrency)
+    ]
+    pool_sampler = PoolSampler(engine).start() if engine is not None else None
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop.wait(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    samples = [sample for user_results in results for sample in user_results]
+    level = summarize(samples, seconds)
+    level["concurrency"] = concurrency
+    level["duration"] = seconds
+    level["error_statuses"] = {}
+    for sample in samples:
+        if sample["status"] != 200:
+            key = str(sample["status"] or sample.get("error"))
+            level["error_statuses"][key] = level["error_statuses"].get(key, 0) + 1
+    level["max_cookie_bytes"] = max((sample.get("cookie_bytes", 0) for sample in samples), default=0)
+    level["scenarios"] = {
+        name: summarize([sample for sample in samples if sample["scenario"] == name], seconds)
+        for name in SCENARIOS
+    }
+    if pool_sampler is not None:
+        level["pool"] = pool_sampler.stop()
+    return level
+
+
+def serve_in_process(app):
+    """
+    Serve the app from a threaded server on a free local port.
+
+    Returns:
+        tuple: (base URL, server); call server.shutdown() to stop it
+    """
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="load-test-server", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def print_level(level):
+    """Print the results of one concurrency level."""
+    seconds = level["seconds"]
+    pool_wait = level["pool_wait_seconds"]
+    line = (
+        f"{level['concurrency']:>5} users: {level['throughput']:>7.1f} req/s, "
+        f"p50 {seconds['p50'] * 1000:.0f} ms, p95 {seconds['p95'] * 1000:.0f} ms, "
+        f"p99 {seconds['p99'] * 1000:.0f} ms, errors {level['error_rate']:.1%}, "
+        f"pool wait p95 {pool_wait['p95'] * 1000:.1f} ms (max {pool_wait['max'] * 1000:.1f}), "
+        f"cookie {level['max_cookie_bytes']} B"
+    )
+    if "pool" in level:
+        pool = level["pool"]
+        line += f", connections {pool['max_checked_out']}/{pool['size']}+{pool['max_overflow']}"
+    print(line)
+    if level["error_statuses"]:
+        print(f"        errors: {level['error_statuses']}")
+    for name, scenario in level["scenarios"].items():
+        if scenario["requests"]:
+            print(
+                f"        {name:<24} {scenario['requests']:>6} req  p50 {scenario['seconds']['p50'] * 1000:>7.1f} ms"
+                f"  p95 {scenario['seconds']['p95'] * 1000:>7.1f} ms  errors {scenario['errors']}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="10k", help="Benchmark dataset to log in to")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the dataset and the request mix")
+    parser.add_argument("--database-url", help="Database of the in-process app (default: the benchmark's SQLite file)")
+    parser.add_argument("--base-url", help="Test a running server instead of serving the app in-process")
+    parser.add_argument(
+        "--concurrency", default="1,5,10,25", help="Comma-separated numbers of concurrent virtual users"
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per concurrency level")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between a user's requests")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+    levels = [int(value) for value in args.concurrency.split(",")]
+
+    app = server = None
+    base_url = args.base_url
+    if base_url is None:
+        os.environ["DATABASE_URL"] = args.database_url or default_database_url(args.scale)
+        os.environ.setdefault("SECRET_KEY", "load-test-secret-key")
+        import logging
+
+        import app
+
+        # Slow statement warnings and request logs would drown the results under load
+        logging.getLogger().setLevel(logging.ERROR)
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        prepare_database(app, args.scale, args.seed)
+        app.create_app()
+        base_url, server = serve_in_process(app)
+
+    # Virtual users cycle through the dataset's users: the admin sees every
+    # group, the others one or two groups and some only a few accounts
+    usernames = ["admin"] + [f"user{number}" for number in range(1, SCALES[args.scale]["users"])]
+    users = []
+    for number in range(max(levels)):
+        user = VirtualUser(base_url, usernames[number % len(usernames)], think_seconds=args.think_ms / 1000)
+        user.login()
+        users.append(user)
+
+    results = []
+    try:
+        for concurrency in levels:
+            print(f"Running {concurrency} virtual users for {args.duration:.0f}s...", file=sys.stderr)
+            level = run_level(
+                users, concurrency, args.duration, args.seed, engine=app.engine if app is not None else None
+            )
+            print_level(level)
+            results.append(level)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    if args.output:
+        commit, dirty = git_commit()
+        report = {
+            "version": 1,
+            "created_at": datetime.utcnow().isoformat(),
+            "commit": commit,
+            "dirty": dirty,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.base_url or "in-process",
+            "database": app.engine.dialect.name if app is not None else None,
+            "scale": args.scale,
+            "seed": args.seed,
+            "think_ms": args.think_ms,
+            "levels": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""Per-request snapshot of a user's roles and account access, and a cache for it."""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import literal, null, select, union_all
+
+from .account import Account
+from .base import user_account_access, user_mercury_account_association
+from .role import Role, user_role_association
+
+
+class AccessContext:
+    """
+    Resolved permissions for a single user, computed with one set-based query.
+
+    The web app builds one of these per request (see get_access_context in app.py) so
+    decorators, routes and templates can answer role and account-access questions
+    without reloading the User and walking its relationships each time.
+
+    Account access follows User.get_accessible_accounts: if the user has entries in
+    user_account_access only those accounts are accessible, otherwise every account
+    belonging to the user's Mercury account groups is.
+
+    Attributes:
+        user_id (int): ID of the user this context describes
+        role_names (frozenset): Names of the user's roles
+        mercury_account_ids (frozenset): IDs of the Mercury account groups the user belongs to
+        accessible_account_ids (tuple): IDs of the accounts the user can access
+        report_account_ids (tuple): Accessible account IDs not excluded from reports
+        account_mercury_ids (dict): Mercury account group ID keyed by accessible account ID
+    """
+
+    def __init__(self, user_id, role_names, mercury_account_ids, account_rows):
+        """
+        Build a context from already-resolved access data.
+
+        Args:
+            user_id (int): ID of the user
+            role_names (iterable): Names of the user's roles
+            mercury_account_ids (iterable): IDs of the user's Mercury account groups
+            account_rows (iterable): (account_id, mercury_account_id, exclude_from_reports)
+                tuples for every accessible account
+        """
+        self.user_id = user_id
+        self.role_names = frozenset(role_names)
+        self.mercury_account_ids = frozenset(mercury_account_ids)
+
+        account_rows = sorted(account_rows, key=lambda row: row[0])
+        self.accessible_account_ids = tuple(row[0] for row in account_rows)
+        self.report_account_ids = tuple(row[0] for row in account_rows if not row[2])
+        self.account_mercury_ids = {row[0]: row[1] for row in account_rows}
+
+    @classmethod
+    def load(cls, db_session, user_id):
+        """
+        Resolve a user's roles, Mercury account groups and accessible accounts.
+
+        Everything is fetched with a single UNION query over the role, group
+        membership and account restriction association tables.
+
+        Args:
+            db_session: SQLAlchemy session to use for the queries
+            user_id (int): ID of the user
+
+        Returns:
+            AccessContext: Access context for the user
+        """
+        # Role names ride along in the account ID column
+        role_rows = (
+            select(
+                literal("role").label("source"),
+                null().label("group_id"),
+                Role.name,
+                null(),
+                null(),
+            )
+            .select_from(user_role_association)
+            .join(Role, Role.id == user_role_association.c.role_id)
+            .where(user_role_association.c.user_id == user_id)
+        )
+
+        # Group memberships (with their accounts) and explicit account restrictions;
+        # restricted accounts take precedence when any exist
+        membership = user_mercury_account_association
+        group_rows = (
+            select(
+                literal("group").label("source"),
+                membership.c.mercury_account_id.label("group_id"),
+                Account.id,
+                Account.mercury_account_id,
+                Account.exclude_from_reports,
+            )
+            .select_from(membership)
+            .outerjoin(Account, Account.mercury_account_id == membership.c.mercury_account_id)
+            .where(membership.c.user_id == user_id)
+        )
+        restricted_rows = (
+            select(
+                literal("restricted").label("source"),
+                null().label("group_id"),
+                Account.id,
+                Account.mercury_account_id,
+                Account.exclude_from_reports,
+            )
+            .select_from(user_account_access)
+            .join(Account, Account.id == user_account_access.c.account_id)
+            .where(user_account_access.c.user_id == user_id)
+        )
+
+        role_names = []
+        mercury_account_ids = set()
+        group_accounts = []
+        restricted_accounts = []
+        for source, group_id, account_id, mercury_account_id, exclude in db_session.execute(
+            union_all(role_rows, group_rows, restricted_rows)
+        ):
+            if source == "role":
+                role_names.append(account_id)
+                continue
+            if source == "restricted":
+                restricted_accounts.append((account_id, mercury_account_id, exclude))
+                continue
+            mercury_account_ids.add(group_id)
+            if account_id is not None:
+                group_accounts.append((account_id, mercury_account_id, exclude))
+
+        account_rows = restricted_accounts or group_accounts
+
+        return cls(user_id, role_names, mercury_account_ids, account_rows)
+
+    def has_role(self, role_name):
+        """
+        Check if the user has a specific role.
+
+        Args:
+            role_name (str): The name of the role to check for
+
+        Returns:
+            bool: True if user has the role, False otherwise
+        """
+        return role_name in self.role_names
+
+    @property
+    def is_admin(self):
+        """bool: True if the user has admin or super-admin privileges."""
+        return "admin" in self.role_names or "super-admin" in self.role_names
+
+    @property
+    def is_super_admin(self):
+        """bool: True if the user has super admin privileges."""
+        return "super-admin" in self.role_names
+
+    def can_access_transactions(self):
+        """
+        Check if user has permission to access the transactions page.
+
+        Returns:
+            bool: True if user can access transactions, False otherwise
+        """
+        return self.is_admin or self.has_role("transactions")
+
+    def can_access_reports(self):
+        """
+        Check if user has permission to access the reports page.
+
+        Returns:
+            bool: True if user can access reports, False otherwise
+        """
+        return self.is_admin or self.has_role("reports")
+
+    def can_access_account(self, account_id):
+        """
+        Check if the user can access a specific account.
+
+        Args:
+            account_id (str): Account ID to check
+
+        Returns:
+            bool: True if the account is accessible, False otherwise
+        """
+        return account_id in self.account_mercury_ids
+
+    def account_ids_for(self, mercury_account_id=None, reports=False):
+        """
+        Get accessible account IDs, optionally limited to one Mercury account group.
+
+        Args:
+            mercury_account_id (int, optional): Only include accounts in this group
+            reports (bool): Exclude accounts marked as exclude_from_reports
+
+        Returns:
+            list: Account IDs in a stable order
+        """
+        account_ids = self.report_account_ids if reports else self.accessible_account_ids
+        if mercury_account_id is None:
+            return list(account_ids)
+        return [
+            account_id
+            for account_id in account_ids
+            if self.account_mercury_ids[account_id] == mercury_account_id
+        ]
+
+
+class AccessContextCache:
+    """
+    Cross-request cache of AccessContext objects with LRU eviction and a TTL.
+
+    Entries are tagged with the user's access version (see UserAccessVersion), so a
+    bumped version makes the cached context unusable immediately, without waiting
+    for the TTL. The TTL only bounds how long changes made outside the app (which
+    don't bump the version) can go unnoticed.
+
+    An optional shared backend lets several worker processes reuse each other's
+    entries. It can be any object with get(key), set(key, value, timeout=...) and
+    delete(key) methods, such as a flask_caching Cache configured for Redis or the
+    filesystem.
+
+    Attributes:
+        max_entries (int): Maximum number of contexts kept in process
+        ttl_seconds (float): Lifetime of a cached context
+        hits (int): Number of lookups served from the cache
+        misses (int): Number of lookups that required loading from the database
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=300, shared_backend=None, key_prefix="access_context:"):
+        """
+        Create an empty cache.
+
+        Args:
+            max_entries (int): Maximum number of contexts kept in process
+            ttl_seconds (float): Lifetime of a cached context
+            shared_backend (optional): Cache shared between worker processes
+            key_prefix (str): Prefix for keys stored in the shared backend
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared_backend = shared_backend
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shared_key(self, user_id):
+        return f"{self.key_prefix}{user_id}"
+
+    def get(self, user_id, version):
+        """
+        Get a cached context if it was built from the given access version.
+
+        Args:
+            user_id (int): User ID
+            version (int): The user's current access version
+
+        Returns:
+            AccessContext: Cached context, or None on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                if entry[0] == version and entry[1] > now:
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return entry[2]
+                del self._entries[user_id]
+
+        if self.shared_backend is not None:
+            try:
+                payload = self.shared_backend.get(self._shared_key(user_id))
+            except Exception:
+                payload = None
+            if payload is not None and payload[0] == version:
+                self._store(user_id, version, payload[1])
+                with self._lock:
+                    self.hits += 1
+                return payload[1]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, user_id, version, context):
+        """
+        Cache a context built from the given access version.
+
+        Args:
+            user_id (int): User ID
+            version (int): Access version the context was built from
+            context (AccessContext): Context to cache
+        """
+        self._store(user_id, version, context)
+        if self.shared_backend is not None:
+            try:
+                self.shared_backend.set(
+                    self._shared_key(user_id), (version, context), timeout=int(self.ttl_seconds)
+                )
+            except Exception:
+                pass
+
+    def invalidate(self, user_id):
+        """
+        Drop any cached context for a user.
+
+        Args:
+            user_id (int): User ID
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self.shared_backend is not None:
+            try:
+                self.shared_backend.delete(self._shared_key(user_id))
+            except Exception:
+                pass
+
+    def _store(self, user_id, version, context):
+        with self._lock:
+            self._entries[user_id] = (version, time.monotonic() + self.ttl_seconds, context)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
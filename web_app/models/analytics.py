@@ -0,0 +1,549 @@
+"""Columnar in-memory snapshots of transactions for the report chart endpoints."""
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import date, datetime
+
+import numpy as np
+
+from .account import Account
+from .data_version import DataVersion
+from .transaction import Transaction, read_watermark
+
+# Snapshot columns, one entry per transaction
+SNAPSHOT_COLUMNS = {
+    "cents": np.int64,  # Amount in cents
+    "day": np.int32,  # Effective date as days since 1970-01-01, -1 when unknown
+    "category": np.int32,  # Index into TransactionSnapshot.categories
+    "account": np.int16,  # Index into TransactionSnapshot.account_ids
+    "status": np.int8,  # Index into TransactionSnapshot.statuses
+}
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def day_number(value):
+    """
+    Convert a date or datetime to the day numbers stored in snapshots.
+
+    Args:
+        value (date or datetime): Date to convert
+
+    Returns:
+        int: Days since 1970-01-01
+    """
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+def group_account_ids(db_session, mercury_account_id):
+    """Get the IDs of all accounts in a Mercury account group."""
+    return [
+        row[0]
+        for row in db_session.query(Account.id).filter(
+            Account.mercury_account_id == mercury_account_id
+        )
+    ]
+
+
+class TransactionSnapshot:
+    """
+    Columnar copy of one Mercury account group's transactions.
+
+    Amounts, dates, categories, accounts and statuses are held as small-integer NumPy
+    arrays (see SNAPSHOT_COLUMNS); text values are stored once in the code lists.
+    Spending queries are answered with vectorized masks and bincount instead of SQL.
+
+    Attributes:
+        mercury_account_id (int): Mercury account group the snapshot covers
+        columns (dict): NumPy arrays keyed by SNAPSHOT_COLUMNS name
+        transaction_ids (numpy.ndarray): Transaction IDs in row order
+        categories (list): (main_category, sub_category) pairs indexed by category code
+        account_ids (list): Account IDs indexed by account code
+        statuses (list): Statuses indexed by status code
+        watermark (tuple): (latest updated_at, row count) the snapshot reflects
+        data_version (int): Group data version (see DataVersion) the snapshot reflects,
+            or None if unknown
+    """
+
+    def __init__(
+        self,
+        mercury_account_id,
+        columns=None,
+        transaction_ids=None,
+        categories=None,
+        account_ids=None,
+        statuses=None,
+        watermark=(None, 0),
+        data_version=None,
+    ):
+        self.mercury_account_id = mercury_account_id
+        self.columns = columns or {
+            name: np.zeros(0, dtype=dtype) for name, dtype in SNAPSHOT_COLUMNS.items()
+        }
+        self.transaction_ids = (
+            transaction_ids if transaction_ids is not None else np.zeros(0, dtype=str)
+        )
+        self.categories = [tuple(category) for category in categories or []]
+        self.account_ids = list(account_ids or [])
+        self.statuses = list(statuses or [])
+        self.watermark = watermark
+        self.data_version = data_version
+        self._codes = {
+            "categories": {value: code for code, value in enumerate(self.categories)},
+            "account_ids": {value: code for code, value in enumerate(self.account_ids)},
+            "statuses": {value: code for code, value in enumerate(self.statuses)},
+        }
+        self._row_index = None
+
+    def __len__(self):
+        return len(self.transaction_ids)
+
+    @classmethod
+    def build(cls, db_session, mercury_account_id, data_version=None):
+        """
+        Build a snapshot of a Mercury account group from the database.
+
+        Args:
+            db_session: SQLAlchemy session to use
+            mercury_account_id (int): Mercury account group ID
+            data_version (int, optional): Group data version read before building
+
+        Returns:
+            TransactionSnapshot: Snapshot of all of the group's transactions
+        """
+        account_ids = group_account_ids(db_session, mercury_account_id)
+        snapshot = cls(
+            mercury_account_id,
+            watermark=read_watermark(db_session, account_ids),
+            data_version=data_version,
+        )
+        if account_ids:
+            snapshot.apply_rows(_query_rows(db_session, account_ids))
+        return snapshot
+
+    def refresh(self, db_session, watermark):
+        """
+        Bring the snapshot up to date by re-reading transactions updated since its watermark.
+
+        Args:
+            db_session: SQLAlchemy session to use
+            watermark (tuple): The group's current watermark (see read_watermark)
+
+        Returns:
+            bool: True if the snapshot is now current, False if it has to be rebuilt
+                (rows were deleted or moved, or it was never built against data)
+        """
+        updated_since = self.watermark[0]
+        if updated_since is None:
+            return False
+        account_ids = group_account_ids(db_session, self.mercury_account_id)
+        self.apply_rows(_query_rows(db_session, account_ids, updated_since=updated_since))
+        self.watermark = watermark
+        if len(self) != watermark[1]:
+            return False
+
+        # A deletion offset by an insertion leaves the count unchanged
+        current_ids = np.array(
+            [
+                row[0]
+                for row in db_session.query(Transaction.id).filter(
+                    Transaction.account_id.in_(account_ids)
+                )
+            ],
+            dtype=str,
+        )
+        return np.array_equal(np.sort(current_ids), np.sort(self.transaction_ids))
+
+    def _code(self, dictionary, value):
+        codes = self._codes[dictionary]
+        code = codes.get(value)
+        if code is None:
+            values = getattr(self, dictionary)
+            code = len(values)
+            values.append(value)
+            codes[value] = code
+        return code
+
+    def apply_rows(self, rows):
+        """
+        Insert or update transactions in the snapshot.
+
+        Args:
+            rows (iterable): (id, account_id, amount, effective_date, main_category,
+                sub_category, status) tuples
+        """
+        if self._row_index is None:
+            self._row_index = {
+                transaction_id: position
+                for position, transaction_id in enumerate(self.transaction_ids.tolist())
+            }
+        row_index = self._row_index
+        category_codes = self._codes["categories"]
+        account_codes = self._codes["account_ids"]
+        status_codes = self._codes["statuses"]
+        code = self._code
+
+        positions = []
+        new_ids = []
+        amounts = []
+        dates = []
+        categories = []
+        accounts = []
+        statuses = []
+        for transaction_id, account_id, amount, effective_date, main, sub, status in rows:
+            position = row_index.get(transaction_id)
+            if position is None:
+                position = row_index[transaction_id] = len(self) + len(new_ids)
+                new_ids.append(transaction_id)
+            positions.append(position)
+            amounts.append(amount or 0)
+            dates.append(effective_date)
+            category = category_codes.get((main, sub))
+            categories.append(category if category is not None else code("categories", (main, sub)))
+            account = account_codes.get(account_id)
+            accounts.append(account if account is not None else code("account_ids", account_id))
+            status_code = status_codes.get(status)
+            statuses.append(status_code if status_code is not None else code("statuses", status))
+        if not positions:
+            return
+
+        days = np.array(dates, dtype="datetime64[D]")
+        values = {
+            "cents": np.rint(np.array(amounts, dtype=np.float64) * 100),
+            "day": np.where(np.isnat(days), -1, days.astype(np.int64)),
+            "category": categories,
+            "account": accounts,
+            "status": statuses,
+        }
+
+        # Write into copies: the current arrays may be read concurrently or memory-mapped
+        columns = {}
+        for name, dtype in SNAPSHOT_COLUMNS.items():
+            column = np.concatenate([self.columns[name], np.zeros(len(new_ids), dtype=dtype)])
+            column[positions] = np.asarray(values[name]).astype(dtype)
+            columns[name] = column
+
+        self.columns = columns
+        if new_ids:
+            self.transaction_ids = np.concatenate(
+                [self.transaction_ids, np.array(new_ids, dtype=str)]
+            )
+
+    def spending(
+        self, account_ids, start_day, end_day, statuses, by_month=False, show_subcategories=False
+    ):
+        """
+        Sum expenses (negative amounts) by category, and optionally by month.
+
+        Args:
+            account_ids (iterable): Only include these accounts
+            start_day (int): First day number to include
+            end_day (int): Last day number to include
+            statuses (iterable): Only include transactions with these statuses
+            by_month (bool): Also group by effective month
+            show_subcategories (bool): Group by (main, sub) category instead of main category
+
+        Returns:
+            dict: Positive spending totals keyed by (month, main_category, sub_category),
+                where month is "YYYY-MM" (None unless by_month) and sub_category is None
+                unless show_subcategories
+        """
+        columns = self.columns
+        account_codes = [
+            self._codes["account_ids"][account_id]
+            for account_id in account_ids
+            if account_id in self._codes["account_ids"]
+        ]
+        status_codes = [
+            self._codes["statuses"][status]
+            for status in statuses
+            if status in self._codes["statuses"]
+        ]
+        if not account_codes or not status_codes:
+            return {}
+
+        days = columns["day"]
+        mask = (columns["cents"] < 0) & (days >= start_day) & (days <= end_day)
+        mask &= np.isin(columns["account"], account_codes)
+        mask &= np.isin(columns["status"], status_codes)
+        if not mask.any():
+            return {}
+
+        codes = columns["category"][mask]
+        if show_subcategories:
+            labels = self.categories
+        else:
+            main_categories = sorted({main for main, _ in self.categories}, key=str)
+            main_codes = {main: code for code, main in enumerate(main_categories)}
+            codes = np.array(
+                [main_codes[main] for main, _ in self.categories], dtype=np.int64
+            )[codes]
+            labels = [(main, None) for main in main_categories]
+        group_count = len(labels)
+
+        keys = codes.astype(np.int64)
+        first_month = 0
+        if by_month:
+            months = days[mask].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+            first_month = int(months.min())
+            keys = (months - first_month) * group_count + keys
+
+        totals = np.bincount(keys, weights=columns["cents"][mask])
+
+        result = {}
+        for key in np.flatnonzero(totals):
+            month_offset, code = divmod(int(key), group_count)
+            month_key = None
+            if by_month:
+                month = first_month + month_offset
+                month_key = f"{1970 + month // 12}-{month % 12 + 1:02d}"
+            main_category, sub_category = labels[code]
+            result[(month_key, main_category, sub_category)] = -totals[key] / 100
+        return result
+
+    def save(self, snapshot_dir):
+        """
+        Write the snapshot to a directory as .npy files plus a JSON manifest.
+
+        The manifest is replaced atomically, so readers always see a complete snapshot.
+        """
+        token = uuid.uuid4().hex
+        prefix = os.path.join(snapshot_dir, f"group_{self.mercury_account_id}")
+        data_dir = f"{prefix}-{token}"
+        os.makedirs(data_dir)
+        for name, array in self.columns.items():
+            np.save(os.path.join(data_dir, f"{name}.npy"), array)
+        np.save(os.path.join(data_dir, "transaction_ids.npy"), self.transaction_ids)
+
+        previous = _read_manifest(prefix)
+        manifest = {
+            "token": token,
+            "watermark": [
+                self.watermark[0].isoformat() if self.watermark[0] else None,
+                self.watermark[1],
+            ],
+            "data_version": self.data_version,
+            "categories": self.categories,
+            "account_ids": self.account_ids,
+            "statuses": self.statuses,
+        }
+        with open(f"{data_dir}.json", "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.replace(f"{data_dir}.json", f"{prefix}.json")
+
+        # Processes still using the old files keep their mappings open
+        if previous:
+            shutil.rmtree(f"{prefix}-{previous['token']}", ignore_errors=True)
+
+    @classmethod
+    def load(cls, snapshot_dir, mercury_account_id):
+        """
+        Load a saved snapshot, memory-mapping its arrays.
+
+        Returns:
+            TransactionSnapshot: Loaded snapshot, or None if none was saved
+        """
+        prefix = os.path.join(snapshot_dir, f"group_{mercury_account_id}")
+        manifest = _read_manifest(prefix)
+        if not manifest:
+            return None
+        data_dir = f"{prefix}-{manifest['token']}"
+        try:
+            columns = {
+                name: np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode="r")
+                for name in SNAPSHOT_COLUMNS
+            }
+            transaction_ids = np.load(
+                os.path.join(data_dir, "transaction_ids.npy"), mmap_mode="r"
+            )
+        except OSError:
+            return None  # Replaced by another process in the meantime
+
+        latest, count = manifest["watermark"]
+        return cls(
+            mercury_account_id,
+            columns=columns,
+            transaction_ids=transaction_ids,
+            categories=manifest["categories"],
+            account_ids=manifest["account_ids"],
+            statuses=manifest["statuses"],
+            watermark=(datetime.fromisoformat(latest) if latest else None, count),
+            data_version=manifest.get("data_version"),
+        )
+
+
+def _query_rows(db_session, account_ids, updated_since=None):
+    query = db_session.query(
+        Transaction.id,
+        Transaction.account_id,
+        Transaction.amount,
+        Transaction.effective_date,
+        Transaction.main_category,
+        Transaction.sub_category,
+        Transaction.status,
+    ).filter(Transaction.account_id.in_(account_ids))
+    if updated_since is not None:
+        # Inclusive: timestamps are only second-precise
+        query = query.filter(Transaction.updated_at >= updated_since)
+    return query.yield_per(10000)
+
+
+def _read_manifest(prefix):
+    try:
+        with open(f"{prefix}.json") as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_current(snapshot, data_version):
+    return (
+        snapshot is not None
+        and snapshot.data_version is not None
+        and snapshot.data_version >= data_version
+    )
+
+
+class AnalyticsEngine:
+    """
+    Keeps a TransactionSnapshot per Mercury account group for the chart endpoints.
+
+    Snapshots are built on first use and kept until the group's data version (see
+    DataVersion) changes. The group's watermark (see read_watermark) is then compared
+    with the snapshot's and only transactions updated since are re-read; the snapshot
+    is rebuilt when rows were deleted or moved between groups.
+
+    A group's snapshot is built or refreshed under a lock of its own, so a slow load
+    only holds up requests for the same group.
+
+    With snapshot_dir set, snapshots are also written there and loaded memory-mapped,
+    so worker processes share the arrays through the page cache and pick up each
+    other's refreshes instead of each rebuilding from the database.
+
+    Attributes:
+        snapshot_dir (str): Directory for shared snapshots, or None for in-process only
+        builds (int): Number of full snapshot builds
+        refreshes (int): Number of incremental refreshes
+    """
+
+    def __init__(self, snapshot_dir=None):
+        self.snapshot_dir = snapshot_dir
+        self.builds = 0
+        self.refreshes = 0
+        self._snapshots = {}
+        self._group_locks = {}
+        self._lock = threading.Lock()
+        if snapshot_dir:
+            os.makedirs(snapshot_dir, exist_ok=True)
+
+    def snapshot(self, db_session, mercury_account_id, data_version=None):
+        """
+        Get an up-to-date snapshot of a Mercury account group.
+
+        Args:
+            db_session: SQLAlchemy session to use for building or refreshing
+            mercury_account_id (int): Mercury account group ID
+            data_version (int, optional): The group's current data version. Read from
+                the database when not given
+
+        Returns:
+            TransactionSnapshot: Snapshot of the group
+        """
+        if data_version is None:
+            data_version = DataVersion.get_versions(db_session, [mercury_account_id])[
+                mercury_account_id
+            ]
+
+        with self._lock:
+            snapshot = self._snapshots.get(mercury_account_id)
+            if _is_current(snapshot, data_version):
+                return snapshot
+            group_lock = self._group_locks.setdefault(mercury_account_id, threading.Lock())
+
+        with group_lock:
+            # Another request may have brought the group up to date in the meantime
+            with self._lock:
+                snapshot = self._snapshots.get(mercury_account_id)
+            if _is_current(snapshot, data_version):
+                return snapshot
+
+            snapshot = self._update(db_session, mercury_account_id, snapshot, data_version)
+            with self._lock:
+                self._snapshots[mercury_account_id] = snapshot
+            return snapshot
+
+    def _update(self, db_session, mercury_account_id, snapshot, data_version):
+        if self.snapshot_dir:
+            stored = TransactionSnapshot.load(self.snapshot_dir, mercury_account_id)
+            if _is_current(stored, data_version):
+                return stored
+            if snapshot is None:
+                snapshot = stored
+
+        watermark = read_watermark(db_session, group_account_ids(db_session, mercury_account_id))
+        if snapshot is not None and snapshot.refresh(db_session, watermark):
+            snapshot.data_version = data_version
+            self.refreshes += 1
+        else:
+            snapshot = TransactionSnapshot.build(db_session, mercury_account_id, data_version)
+            self.builds += 1
+
+        if self.snapshot_dir:
+            snapshot.save(self.snapshot_dir)
+        return snapshot
+
+    def spending(
+        self,
+        db_session,
+        mercury_account_ids,
+        account_ids,
+        start_date,
+        end_date,
+        statuses,
+        by_month=False,
+        show_subcategories=False,
+        data_versions=None,
+    ):
+        """
+        Sum expenses across Mercury account groups (see TransactionSnapshot.spending).
+
+        Args:
+            db_session: SQLAlchemy session to use for building or refreshing
+            mercury_account_ids (iterable): Mercury account groups to include
+            account_ids (iterable): Only include these accounts
+            start_date (date or datetime): First day to include
+            end_date (date or datetime): Last day to include
+            statuses (iterable): Only include transactions with these statuses
+            by_month (bool): Also group by effective month
+            show_subcategories (bool): Group by (main, sub) category
+            data_versions (dict, optional): Data versions already read for the groups,
+                keyed by Mercury account group ID. Missing groups are read from the database
+
+        Returns:
+            dict: Positive spending totals keyed by (month, main_category, sub_category)
+        """
+        account_ids = list(account_ids)
+        statuses = list(statuses)
+        versions = dict(data_versions or {})
+        missing = [group_id for group_id in mercury_account_ids if group_id not in versions]
+        if missing:
+            versions.update(DataVersion.get_versions(db_session, missing))
+
+        totals = {}
+        for mercury_account_id in mercury_account_ids:
+            snapshot = self.snapshot(db_session, mercury_account_id, versions[mercury_account_id])
+            for key, amount in snapshot.spending(
+                account_ids,
+                day_number(start_date),
+                day_number(end_date),
+                statuses,
+                by_month=by_month,
+                show_subcategories=show_subcategories,
+            ).items():
+                totals[key] = totals.get(key, 0) + amount
+        return totals
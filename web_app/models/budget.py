@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from sqlalchemy import (
     Column,
     String,
@@ -9,9 +11,16 @@ from sqlalchemy import (
     Integer,
     Date,
     Table,
+    and_,
+    case,
+    func,
+    or_,
+    select,
 )
 from sqlalchemy.orm import relationship
+from .account import Account
 from .base import Base
+from .transaction import Transaction
 
 # Association table for budget and account many-to-many relationship
 budget_account_association = Table(
@@ -91,7 +100,8 @@ class BudgetCategory(Base):
     Attributes:
         id (int): Primary key - unique budget category identifier
         budget_id (int): Foreign key to Budget
-        category_name (str): Transaction category name (matches transaction.mercury_category)
+        category_name (str): Transaction main category name (matched case-insensitively
+            against Transaction.main_category)
         budgeted_amount (float): The budgeted amount for this category
         is_active (bool): Whether this budget category is active
         created_at (datetime): Timestamp when budget category was created
@@ -124,3 +134,362 @@ class BudgetCategory(Base):
     
     def __repr__(self):
         return f"<BudgetCategory(id={self.id}, category='{self.category_name}', amount={self.budgeted_amount})>"
+
+
+# Positive uncategorized transactions of at least this amount are reported as income
+# (deposits) rather than as refunds against spending
+LARGE_DEPOSIT_THRESHOLD = 1000
+
+# Income subcategory holding large uncategorized deposits
+UNCATEGORIZED_INCOME = "Uncategorized Income"
+
+
+def _next_month(month):
+    """Return the first day of the month after the given budget month."""
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1, day=1)
+    return month.replace(month=month.month + 1, day=1)
+
+
+def calculate_budgets_progress(db_session, budgets):
+    """
+    Calculate spending progress for several budgets with one grouped query.
+
+    Spending is summed per (budget, main category) over budget_accounts joined to
+    each budget's month of transactions. Only expenses count and failed
+    transactions are excluded. Active budget categories are loaded with one more
+    query, so the cost doesn't grow with the number of budgets.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        budgets (iterable): Budget objects
+
+    Returns:
+        dict: Progress keyed by budget ID, each {
+            'total_budgeted': float,
+            'total_spent': float,
+            'categories': {category_name: {'budgeted', 'spent', 'remaining', 'percentage'}},
+        }. Budgets without accounts report zero totals and no categories.
+    """
+    budgets = list(budgets)
+    if not budgets:
+        return {}
+    budget_ids = [budget.id for budget in budgets]
+
+    categories_by_budget = defaultdict(list)
+    for budget_category in (
+        db_session.query(BudgetCategory)
+        .filter(BudgetCategory.budget_id.in_(budget_ids), BudgetCategory.is_active == True)
+        .order_by(BudgetCategory.id)
+    ):
+        categories_by_budget[budget_category.budget_id].append(budget_category)
+
+    # One window per distinct budget month; the outer join keeps budgets that have
+    # accounts but no matching transactions
+    month_windows = [
+        and_(
+            Budget.budget_month == month,
+            Transaction.effective_date >= month,
+            Transaction.effective_date < _next_month(month),
+        )
+        for month in {budget.budget_month for budget in budgets}
+    ]
+    spending_rows = (
+        db_session.query(
+            budget_account_association.c.budget_id,
+            Transaction.main_category,
+            func.sum(Transaction.amount),
+        )
+        .select_from(budget_account_association)
+        .join(Budget, Budget.id == budget_account_association.c.budget_id)
+        .outerjoin(
+            Transaction,
+            and_(
+                Transaction.account_id == budget_account_association.c.account_id,
+                or_(*month_windows),
+                Transaction.amount < 0,  # Only expenses (negative amounts)
+                Transaction.status != 'failed',  # Exclude failed transactions
+            ),
+        )
+        .filter(budget_account_association.c.budget_id.in_(budget_ids))
+        .group_by(budget_account_association.c.budget_id, Transaction.main_category)
+    )
+
+    # Spending keyed by lower-case main category, so budget category names match
+    # case-insensitively
+    spending = {}
+    for budget_id, main_category, total_amount in spending_rows:
+        category_spending = spending.setdefault(budget_id, defaultdict(float))
+        if total_amount is not None:
+            category_spending[main_category or "uncategorized"] += abs(total_amount)
+
+    progress = {}
+    for budget in budgets:
+        category_spending = spending.get(budget.id)
+        if category_spending is None:
+            progress[budget.id] = {'total_budgeted': 0, 'total_spent': 0, 'categories': {}}
+            continue
+
+        categories = {}
+        for budget_category in categories_by_budget[budget.id]:
+            spent = category_spending.get(budget_category.category_name.lower(), 0)
+            categories[budget_category.category_name] = {
+                'budgeted': budget_category.budgeted_amount,
+                'spent': spent,
+                'remaining': budget_category.budgeted_amount - spent,
+                'percentage': (spent / budget_category.budgeted_amount * 100) if budget_category.budgeted_amount > 0 else 0
+            }
+
+        progress[budget.id] = {
+            'total_budgeted': sum(c.budgeted_amount for c in categories_by_budget[budget.id]),
+            'total_spent': sum(category_spending.values()),
+            'categories': categories,
+        }
+
+    return progress
+
+
+def _average(total_amount, transaction_count):
+    return total_amount / transaction_count if transaction_count > 0 else 0
+
+
+def get_budget_report_data(db_session, budget):
+    """
+    Get the budget report summary: per-category totals, budget amounts and income.
+
+    Totals are aggregated in SQL, grouped by main category, sub-category and kind of
+    amount, so no transactions are loaded. The transactions behind a row are fetched
+    on demand with get_budget_report_transactions.
+
+    Expense categories report net spending (expenses minus refunds). Income holds
+    positive "Income" transactions and large uncategorized deposits (see
+    LARGE_DEPOSIT_THRESHOLD), which are left out of the Uncategorized expenses.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        budget (Budget): Budget to report on
+
+    Returns:
+        list: Category dicts (main_category, total_amount, transaction_count,
+            average_amount, is_income, budgeted_amount, remaining_budget and
+            subcategories), income first, then expenses by amount
+    """
+    account_ids = [account.id for account in budget.accounts]
+    if not account_ids:
+        return []
+
+    active_categories = [c for c in budget.budget_categories if c.is_active]
+    budgeted_amounts = {c.category_name: c.budgeted_amount for c in active_categories}
+
+    # Main categories are stored lower-case; show the budget's spelling where one matches
+    budget_category_names = {name.lower(): name for name in budgeted_amounts}
+
+    def main_category_label(main_category):
+        if not main_category:
+            return "Uncategorized"
+        return budget_category_names.get(main_category, main_category.title())
+
+    amount_kind = case(
+        (Transaction.amount >= LARGE_DEPOSIT_THRESHOLD, "deposit"),
+        (Transaction.amount > 0, "credit"),
+        else_="debit",
+    )
+    rows = (
+        db_session.query(
+            Transaction.main_category,
+            Transaction.sub_category,
+            amount_kind,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id),
+        )
+        .filter(
+            Transaction.account_id.in_(account_ids),
+            Transaction.effective_date >= budget.budget_month,
+            Transaction.effective_date < _next_month(budget.budget_month),
+            Transaction.status != 'failed',  # Exclude failed transactions from budget calculations
+        )
+        .group_by(Transaction.main_category, Transaction.sub_category, amount_kind)
+    )
+
+    def new_group():
+        return {'total_amount': 0, 'transaction_count': 0, 'subcategories': {}}
+
+    def add_to_group(group, subcategory, main_label, amount, transaction_count):
+        group['total_amount'] += amount
+        group['transaction_count'] += transaction_count
+        if subcategory:
+            sub_group = group['subcategories'].setdefault(subcategory, {
+                'subcategory': subcategory,
+                'full_category': f"{main_label}/{subcategory}",
+                'total_amount': 0,
+                'transaction_count': 0,
+            })
+            sub_group['total_amount'] += amount
+            sub_group['transaction_count'] += transaction_count
+
+    expense_groups = {}
+    income_group = new_group()
+    for main_category, sub_category, kind, total_amount, transaction_count in rows:
+        uncategorized = main_category in (None, 'uncategorized')
+        sub_label = sub_category.title() if sub_category else None
+
+        if main_category == 'income' or (uncategorized and kind == "deposit"):
+            # Only positive amounts count as income; debits in Income are ignored
+            if kind == "debit":
+                continue
+            if main_category is None:
+                sub_label = UNCATEGORIZED_INCOME
+            add_to_group(income_group, sub_label, "Income", total_amount, transaction_count)
+            continue
+
+        # Net spending: expenses add to the category, refunds subtract from it
+        main_label = main_category_label(main_category)
+        group = expense_groups.setdefault(main_label, new_group())
+        add_to_group(group, sub_label, main_label, -total_amount, transaction_count)
+
+    report_data = []
+    for main_label, group in expense_groups.items():
+        budgeted = budgeted_amounts.get(main_label, 0)
+        report_data.append({
+            'main_category': main_label,
+            'total_amount': group['total_amount'],
+            'transaction_count': group['transaction_count'],
+            'is_income': False,
+            'budgeted_amount': budgeted,
+            # Positive = money left, Negative = over budget (no budget: all spending is "over")
+            'remaining_budget': budgeted - group['total_amount'] if budgeted > 0 else -group['total_amount'],
+            'subcategories': group['subcategories'],
+        })
+
+    # Add budget categories that have no transactions
+    for budget_category in active_categories:
+        if budget_category.category_name not in expense_groups and budget_category.category_name.lower() != 'income':
+            report_data.append({
+                'main_category': budget_category.category_name,
+                'total_amount': 0,
+                'transaction_count': 0,
+                'is_income': False,
+                'budgeted_amount': budget_category.budgeted_amount,
+                'remaining_budget': budget_category.budgeted_amount,  # Full budget remaining
+                'subcategories': {},
+            })
+
+    income_budgeted = budgeted_amounts.get('Income', 0)
+    if income_group['total_amount'] > 0 or 'income' in budget_category_names:
+        report_data.append({
+            'main_category': 'Income',
+            'total_amount': income_group['total_amount'],
+            'transaction_count': income_group['transaction_count'],
+            'is_income': True,
+            'budgeted_amount': income_budgeted,
+            # For income: remaining = budgeted - actual (positive = short of goal, negative = exceeded goal)
+            'remaining_budget': income_budgeted - income_group['total_amount'] if income_budgeted > 0 else 0,
+            'subcategories': income_group['subcategories'],
+        })
+
+    for category_data in report_data:
+        category_data['average_amount'] = _average(
+            category_data['total_amount'], category_data['transaction_count']
+        )
+        subcategories = list(category_data['subcategories'].values())
+        for sub_data in subcategories:
+            sub_data['average_amount'] = _average(sub_data['total_amount'], sub_data['transaction_count'])
+        subcategories.sort(key=lambda x: x['total_amount'], reverse=True)
+        category_data['subcategories'] = subcategories
+
+    # Sort: Income first, then expenses by amount
+    report_data.sort(key=lambda x: (not x['is_income'], -x['total_amount']))
+
+    return report_data
+
+
+def budget_report_row_condition(category, subcategory=None):
+    """
+    Build a filter matching the transactions counted in one budget report row.
+
+    Args:
+        category (str): Main category label as shown in the report ("Income" and
+            "Uncategorized" included), matched case-insensitively
+        subcategory (str, optional): Sub-category label within the main category
+
+    Returns:
+        SQL expression mirroring the grouping rules of get_budget_report_data
+    """
+    main_key = (category or "").strip().lower() or 'uncategorized'
+    sub_key = subcategory.strip().lower()[:255] if subcategory and subcategory.strip() else None
+    uncategorized = or_(Transaction.main_category.is_(None), Transaction.main_category == 'uncategorized')
+
+    if main_key == 'income':
+        condition = or_(
+            and_(Transaction.main_category == 'income', Transaction.amount > 0),
+            and_(uncategorized, Transaction.amount >= LARGE_DEPOSIT_THRESHOLD),
+        )
+        if sub_key == UNCATEGORIZED_INCOME.lower():
+            return and_(condition, Transaction.main_category.is_(None))
+    elif main_key == 'uncategorized':
+        condition = and_(uncategorized, Transaction.amount < LARGE_DEPOSIT_THRESHOLD)
+    else:
+        condition = Transaction.main_category == main_key[:255]
+
+    if sub_key is not None:
+        condition = and_(condition, Transaction.sub_category == sub_key)
+    return condition
+
+
+def get_budget_report_transactions(db_session, budget, category, subcategory=None, page=1, per_page=25):
+    """
+    Get one page of the transactions behind a budget report row.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        budget (Budget): Budget the report belongs to
+        category (str): Main category label of the row
+        subcategory (str, optional): Sub-category label of the row
+        page (int): 1-based page number
+        per_page (int): Transactions per page
+
+    Returns:
+        tuple: (transactions, total) where transactions is a list of dicts with id,
+            description, amount (absolute), date and account_name, newest first, and
+            total is the number of matching transactions
+    """
+    account_ids = select(budget_account_association.c.account_id).where(
+        budget_account_association.c.budget_id == budget.id
+    )
+    query = (
+        db_session.query(
+            Transaction.id,
+            Transaction.description,
+            Transaction.amount,
+            Transaction.effective_date,
+            Account.name,
+            Account.nickname,
+        )
+        .outerjoin(Account, Account.id == Transaction.account_id)
+        .filter(
+            Transaction.account_id.in_(account_ids),
+            Transaction.effective_date >= budget.budget_month,
+            Transaction.effective_date < _next_month(budget.budget_month),
+            Transaction.status != 'failed',
+            budget_report_row_condition(category, subcategory),
+        )
+    )
+
+    total = query.count()
+    rows = (
+        query.order_by(Transaction.effective_date.desc(), Transaction.id)
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    transactions = [
+        {
+            'id': transaction_id,
+            'description': description,
+            'amount': abs(amount or 0),
+            'date': effective_date,
+            'account_name': nickname or name or 'Unknown',
+        }
+        for transaction_id, description, amount, effective_date, name, nickname in rows
+    ]
+    return transactions, total
@@ -0,0 +1,212 @@
+"""Faceted counts for the transaction filter bar."""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from sqlalchemy import extract, func
+
+from .transaction import Transaction, normalize_category
+
+# Filter dimensions counted by facet_counts, in selection key order
+FACET_DIMENSIONS = ("account", "status", "month", "category")
+
+
+def _category_values(main_category, sub_category):
+    """Category facet values a transaction counts towards (its main and full category)."""
+    if not main_category:
+        return ()
+    if sub_category:
+        return (main_category, f"{main_category}/{sub_category}")
+    return (main_category,)
+
+
+def _category_key(category):
+    """Normalize a category filter value to the key used by _category_values."""
+    main_cat, sub_cat = normalize_category(category)
+    if not main_cat:
+        return None
+    return f"{main_cat}/{sub_cat}" if sub_cat else main_cat
+
+
+def facet_counts(query, selection):
+    """
+    Count transactions per value of every filter dimension under a selection.
+
+    The counts of a dimension apply the selected values of all other dimensions but
+    not its own, so each dropdown shows how many transactions picking one of its
+    values would return. All dimensions are computed from a single query grouped
+    by account, status, month and category, which is then rolled up in Python.
+
+    Args:
+        query: SQLAlchemy query selecting Transaction, with any filters that are
+            not facets (accessible accounts, receipt status, search) applied
+        selection (dict): Selected values per dimension in FACET_DIMENSIONS, as
+            collections of account IDs, statuses, "YYYY-MM" months and category
+            strings. Missing or empty dimensions are unfiltered.
+
+    Returns:
+        dict: {dimension: {value: count}}, where categories are keyed by their
+            normalized (lower-case) "main" and "main/sub" forms
+    """
+    year = extract("year", Transaction.effective_date)
+    month = extract("month", Transaction.effective_date)
+    grouped = query.with_entities(
+        Transaction.account_id,
+        Transaction.status,
+        year,
+        month,
+        Transaction.main_category,
+        Transaction.sub_category,
+        func.count(Transaction.id),
+    ).group_by(
+        Transaction.account_id,
+        Transaction.status,
+        year,
+        month,
+        Transaction.main_category,
+        Transaction.sub_category,
+    )
+
+    selected = {
+        "account": set(selection.get("account") or ()),
+        "status": set(selection.get("status") or ()),
+        "month": set(selection.get("month") or ()),
+        "category": {
+            key for key in map(_category_key, selection.get("category") or ()) if key
+        },
+    }
+    counts = {dimension: Counter() for dimension in FACET_DIMENSIONS}
+
+    for account_id, status, year_value, month_value, main_cat, sub_cat, total in grouped:
+        month_key = f"{int(year_value)}-{int(month_value):02d}" if year_value and month_value else None
+        categories = _category_values(main_cat, sub_cat)
+        values = {
+            "account": (account_id,),
+            "status": (status,) if status else (),
+            "month": (month_key,) if month_key else (),
+            "category": categories,
+        }
+        matches = {
+            dimension: not selected[dimension]
+            or any(value in selected[dimension] for value in values[dimension])
+            for dimension in FACET_DIMENSIONS
+        }
+        for dimension in FACET_DIMENSIONS:
+            if all(matches[other] for other in FACET_DIMENSIONS if other != dimension):
+                for value in values[dimension]:
+                    counts[dimension][value] += total
+
+    return {dimension: dict(counter) for dimension, counter in counts.items()}
+
+
+def facet_count_for(counts, dimension, value):
+    """
+    Look up the count of a filter value, normalizing category values.
+
+    Args:
+        counts (dict): Result of facet_counts, or None if unavailable
+        dimension (str): One of FACET_DIMENSIONS
+        value (str): Filter value as offered by the dropdown
+
+    Returns:
+        int: Number of matching transactions, or None if counts are unavailable
+    """
+    if counts is None:
+        return None
+    if dimension == "category":
+        value = _category_key(value)
+    return counts.get(dimension, {}).get(value, 0)
+
+
+class FacetCountCache:
+    """
+    In-process cache of facet counts with LRU eviction and a TTL.
+
+    Entries are keyed by the accessible accounts and the filters, and tagged with
+    the data version the counts were computed from, so new or changed transactions
+    make an entry unusable immediately. The TTL bounds memory held by idle entries.
+
+    Attributes:
+        max_entries (int): Maximum number of entries kept
+        ttl_seconds (float): Lifetime of an entry
+        hits (int): Number of lookups served from the cache
+        misses (int): Number of lookups that had to be computed
+    """
+
+    def __init__(self, max_entries=512, ttl_seconds=300):
+        """
+        Create an empty cache.
+
+        Args:
+            max_entries (int): Maximum number of entries kept
+            ttl_seconds (float): Lifetime of an entry
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(account_ids, filters):
+        """
+        Build a cache key from the accessible accounts and the active filters.
+
+        Args:
+            account_ids (iterable): Accounts the counts are computed over
+            filters (dict): Filter name to value (strings or collections of strings)
+
+        Returns:
+            tuple: Hashable key independent of ordering
+        """
+        normalized = []
+        for name, value in sorted(filters.items()):
+            if isinstance(value, (list, tuple, set, frozenset)):
+                value = tuple(sorted(value))
+            normalized.append((name, value))
+        return (tuple(sorted(account_ids)), tuple(normalized))
+
+    def get(self, key, version):
+        """
+        Get cached counts if they were computed from the given data version.
+
+        Args:
+            key (tuple): Key from make_key
+            version: Current data version of the accounts
+
+        Returns:
+            dict: Cached counts, or None on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def set(self, key, version, counts):
+        """
+        Cache counts computed from the given data version.
+
+        Args:
+            key (tuple): Key from make_key
+            version: Data version the counts were computed from
+            counts (dict): Result of facet_counts
+        """
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl_seconds, counts)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached counts."""
+        with self._lock:
+            self._entries.clear()
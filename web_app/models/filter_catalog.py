@@ -0,0 +1,292 @@
+"""Per-account catalog of the values offered by the transaction filter dropdowns."""
+
+from collections import Counter, defaultdict
+
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Text, extract, func
+
+from .account import Account
+from .base import Base
+from .transaction import Transaction, parse_category
+
+# Dimensions stored in TransactionFilterCatalog.dimension, in catalog key order
+FILTER_DIMENSIONS = ("month", "category", "status")
+
+
+def catalog_key(transaction):
+    """
+    Get the catalog values a transaction contributes to.
+
+    Args:
+        transaction: Transaction (or row) with posted_at, created_at, note and status
+
+    Returns:
+        tuple: (month, category, status), where month is "YYYY-MM" based on the
+            effective date (posted_at, falling back to created_at). Missing values are None.
+    """
+    effective_date = transaction.posted_at or transaction.created_at
+    month = f"{effective_date.year}-{effective_date.month:02d}" if effective_date else None
+    return (month, transaction.note or None, transaction.status or None)
+
+
+class TransactionFilterCatalog(Base):
+    """
+    SQLAlchemy model holding the filter values present in each account's transactions.
+
+    One row per (account, dimension, value) with the number of transactions carrying
+    that value, so the months, category tree and statuses offered by the filter
+    dropdowns can be read without scanning the transactions table. The sync service
+    keeps the catalog up to date incrementally (see apply_filter_catalog_changes) and
+    it can be rebuilt from the transactions at any time (see rebuild_filter_catalog).
+
+    Attributes:
+        id (int): Primary key
+        account_id (str): Account the values belong to
+        dimension (str): One of FILTER_DIMENSIONS
+        value (str): Month as "YYYY-MM", raw category (note) string, or status
+        transaction_count (int): Number of the account's transactions with this value
+    """
+
+    __tablename__ = "transaction_filter_catalog"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    account_id = Column(
+        String(255), ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False
+    )
+    dimension = Column(String(20), nullable=False)
+    value = Column(Text, nullable=False)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("idx_filter_catalog_account_dimension", "account_id", "dimension"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<TransactionFilterCatalog(account_id='{self.account_id}', "
+            f"dimension='{self.dimension}', value='{self.value}', "
+            f"count={self.transaction_count})>"
+        )
+
+
+def _aggregate_catalog_rows(db_session, account_ids):
+    """
+    Compute catalog rows for accounts directly from the transactions table.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        account_ids (list): Accounts to aggregate
+
+    Returns:
+        list: (account_id, dimension, value, transaction_count) tuples
+    """
+    effective_date = func.coalesce(Transaction.posted_at, Transaction.created_at)
+    year = extract("year", effective_date)
+    month = extract("month", effective_date)
+    count = func.count(Transaction.id)
+
+    rows = []
+    for account_id, year_value, month_value, total in (
+        db_session.query(Transaction.account_id, year, month, count)
+        .filter(Transaction.account_id.in_(account_ids))
+        .group_by(Transaction.account_id, year, month)
+    ):
+        if year_value and month_value:
+            rows.append(
+                (account_id, "month", f"{int(year_value)}-{int(month_value):02d}", total)
+            )
+
+    for column, dimension in ((Transaction.note, "category"), (Transaction.status, "status")):
+        for account_id, value, total in (
+            db_session.query(Transaction.account_id, column, count)
+            .filter(Transaction.account_id.in_(account_ids))
+            .filter(column.isnot(None), column != "")
+            .group_by(Transaction.account_id, column)
+        ):
+            rows.append((account_id, dimension, value, total))
+
+    return rows
+
+
+def rebuild_filter_catalog(db_session, account_ids=None, only_missing=False, batch_size=50):
+    """
+    Rebuild the filter catalog for accounts from their transactions.
+
+    Accounts are processed in batches, committing after each batch.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        account_ids (list, optional): Limit the rebuild to these accounts. Defaults to all accounts
+        only_missing (bool): Only rebuild accounts that have transactions but no catalog rows
+        batch_size (int): Number of accounts to rebuild per batch
+
+    Returns:
+        int: Number of accounts rebuilt
+    """
+    if account_ids is None:
+        account_ids = [row[0] for row in db_session.query(Account.id)]
+    account_ids = list(account_ids)
+
+    if only_missing and account_ids:
+        cataloged = {
+            row[0]
+            for row in db_session.query(TransactionFilterCatalog.account_id)
+            .filter(TransactionFilterCatalog.account_id.in_(account_ids))
+            .distinct()
+        }
+        with_transactions = {
+            row[0]
+            for row in db_session.query(Transaction.account_id)
+            .filter(Transaction.account_id.in_(account_ids))
+            .distinct()
+        }
+        account_ids = [
+            account_id
+            for account_id in account_ids
+            if account_id in with_transactions and account_id not in cataloged
+        ]
+
+    for start in range(0, len(account_ids), batch_size):
+        batch = account_ids[start:start + batch_size]
+        _replace_catalog_rows(db_session, batch)
+        db_session.commit()
+
+    return len(account_ids)
+
+
+def _replace_catalog_rows(db_session, account_ids):
+    """Replace the catalog rows of accounts with freshly aggregated ones (no commit)."""
+    db_session.query(TransactionFilterCatalog).filter(
+        TransactionFilterCatalog.account_id.in_(account_ids)
+    ).delete(synchronize_session=False)
+    db_session.bulk_insert_mappings(
+        TransactionFilterCatalog,
+        [
+            {
+                "account_id": account_id,
+                "dimension": dimension,
+                "value": value,
+                "transaction_count": total,
+            }
+            for account_id, dimension, value, total in _aggregate_catalog_rows(
+                db_session, account_ids
+            )
+        ],
+    )
+
+
+def apply_filter_catalog_changes(db_session, account_id, changes):
+    """
+    Incrementally update an account's catalog after transactions were added or changed.
+
+    If the account has no catalog yet (e.g. it predates the catalog), it is rebuilt
+    from its transactions instead, so the catalog never holds partial data. The caller
+    commits; pending transaction changes must be flushed first.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        account_id (str): Account the transactions belong to
+        changes (iterable): (old_key, new_key) pairs from catalog_key, with old_key None
+            for newly created transactions
+    """
+    deltas = Counter()
+    for old_key, new_key in changes:
+        if old_key == new_key:
+            continue
+        for key, sign in ((old_key, -1), (new_key, 1)):
+            if key is None:
+                continue
+            for dimension, value in zip(FILTER_DIMENSIONS, key):
+                if value is not None:
+                    deltas[(dimension, value)] += sign
+
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    rows = {
+        (row.dimension, row.value): row
+        for row in db_session.query(TransactionFilterCatalog).filter(
+            TransactionFilterCatalog.account_id == account_id
+        )
+    }
+    if not rows:
+        _replace_catalog_rows(db_session, [account_id])
+        return
+
+    for (dimension, value), delta in deltas.items():
+        row = rows.get((dimension, value))
+        if row is None:
+            if delta > 0:
+                db_session.add(
+                    TransactionFilterCatalog(
+                        account_id=account_id,
+                        dimension=dimension,
+                        value=value,
+                        transaction_count=delta,
+                    )
+                )
+        elif row.transaction_count + delta > 0:
+            row.transaction_count += delta
+        else:
+            db_session.delete(row)
+
+
+def load_filter_options(db_session, account_ids):
+    """
+    Get the months, category tree and statuses present in accounts' transactions.
+
+    Reads the filter catalog with a single query. Accounts that have not been
+    cataloged yet are aggregated from the transactions table instead.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        account_ids (list): Accounts to include
+
+    Returns:
+        dict: {
+            'months': [('2025-01', 12), ...] newest first,
+            'categories': ['Office', 'Travel', ...],
+            'subcategories': {'Office': ['Supplies', ...], ...},
+            'all_combinations': ['Office', 'Office/Supplies', 'Travel', ...],
+            'statuses': {'pending': 2, 'sent': 40, ...},
+        }
+    """
+    totals = {dimension: Counter() for dimension in FILTER_DIMENSIONS}
+    account_ids = list(account_ids or [])
+
+    if account_ids:
+        cataloged = set()
+        for account_id, dimension, value, total in db_session.query(
+            TransactionFilterCatalog.account_id,
+            TransactionFilterCatalog.dimension,
+            TransactionFilterCatalog.value,
+            TransactionFilterCatalog.transaction_count,
+        ).filter(TransactionFilterCatalog.account_id.in_(account_ids)):
+            cataloged.add(account_id)
+            totals[dimension][value] += total
+
+        missing = [account_id for account_id in account_ids if account_id not in cataloged]
+        if missing:
+            for _, dimension, value, total in _aggregate_catalog_rows(db_session, missing):
+                totals[dimension][value] += total
+
+    categories = set()
+    subcategories = defaultdict(set)
+    all_combinations = set()
+    for category_string in totals["category"]:
+        main_cat, sub_cat = parse_category(category_string)
+        if not main_cat:
+            continue
+        categories.add(main_cat)
+        all_combinations.add(main_cat)
+        if sub_cat:
+            subcategories[main_cat].add(sub_cat)
+            all_combinations.add(f"{main_cat}/{sub_cat}")
+
+    return {
+        "months": sorted(totals["month"].items(), reverse=True),
+        "categories": sorted(categories),
+        "subcategories": {cat: sorted(subs) for cat, subs in subcategories.items()},
+        "all_combinations": sorted(all_combinations),
+        "statuses": dict(totals["status"]),
+    }
@@ -0,0 +1,295 @@
+"""Batched receipt status evaluation backed by an in-memory receipt policy index."""
+
+from bisect import bisect_right
+from collections import defaultdict
+
+from .account import Account
+from .receipt_policy import ReceiptPolicy
+from .transaction import Transaction
+
+# Values stored in Transaction.receipt_status
+RECEIPT_STATUSES = ("required_missing", "required_present", "optional_present", "optional_missing")
+
+
+def _naive(value):
+    """
+    Drop timezone information so policy and transaction dates compare consistently.
+
+    Dates read back from the database are naive, while dates produced by the sync
+    service may carry a UTC offset.
+
+    Args:
+        value (datetime, optional): Datetime to normalize
+
+    Returns:
+        datetime: The same datetime without tzinfo, or None
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.replace(tzinfo=None)
+
+
+def requirement_applies(receipt_required, receipt_threshold, amount):
+    """
+    Apply a single receipt requirement setting to a transaction amount.
+
+    Args:
+        receipt_required (str): 'none', 'always', or 'threshold'
+        receipt_threshold (float, optional): Dollar amount threshold
+        amount (float): Transaction amount
+
+    Returns:
+        bool: True if a receipt is required, False otherwise
+    """
+    if receipt_required == "always":
+        return True
+    if receipt_required == "threshold":
+        return receipt_threshold is not None and abs(amount) >= receipt_threshold
+    return False
+
+
+def receipt_status(required, has_attachments):
+    """
+    Map a requirement flag and attachment presence to a display status.
+
+    Returns:
+        str: 'required_present', 'required_missing', 'optional_present' or 'optional_missing'
+    """
+    if required:
+        return "required_present" if has_attachments else "required_missing"
+    return "optional_present" if has_attachments else "optional_missing"
+
+
+class ReceiptPolicyIndex:
+    """
+    In-memory interval index of receipt policies for a set of accounts.
+
+    All ReceiptPolicy rows for the given accounts are loaded with a single query and
+    kept as per-account lists sorted by start_date. The policy in effect at a given
+    date is then resolved with bisect instead of one query per transaction, which
+    lets a whole page or export be evaluated without extra round-trips.
+
+    Resolution matches Account.is_receipt_required_for_amount: the policy with the
+    latest start_date that covers the date wins, and the account's current settings
+    are used when no policy applies or no date is given.
+
+    Attributes:
+        accounts (dict): Account objects keyed by account ID
+    """
+
+    def __init__(self, accounts, policies):
+        """
+        Build the index from already-loaded accounts and policies.
+
+        Args:
+            accounts (list): Account objects the index should cover
+            policies (list): ReceiptPolicy objects belonging to those accounts
+        """
+        self.accounts = {account.id: account for account in accounts}
+        self._starts = {}
+        self._policies = {}
+
+        grouped = defaultdict(list)
+        for policy in policies:
+            grouped[policy.account_id].append(policy)
+
+        for account_id, account_policies in grouped.items():
+            account_policies.sort(key=lambda p: _naive(p.start_date))
+            self._policies[account_id] = account_policies
+            self._starts[account_id] = [_naive(p.start_date) for p in account_policies]
+
+    @classmethod
+    def load(cls, db_session, accounts):
+        """
+        Load every receipt policy for the given accounts in one query.
+
+        Args:
+            db_session: SQLAlchemy session to use for the query
+            accounts (list): Account objects to index
+
+        Returns:
+            ReceiptPolicyIndex: Index covering the given accounts
+        """
+        accounts = list(accounts)
+        account_ids = [account.id for account in accounts]
+        policies = []
+        if account_ids:
+            policies = (
+                db_session.query(ReceiptPolicy)
+                .filter(ReceiptPolicy.account_id.in_(account_ids))
+                .all()
+            )
+        return cls(accounts, policies)
+
+    def policy_for(self, account_id, transaction_date):
+        """
+        Find the policy in effect for an account at a given date.
+
+        Args:
+            account_id (str): Account ID
+            transaction_date (datetime): Date to resolve
+
+        Returns:
+            ReceiptPolicy: The matching policy, or None if no policy covers the date
+        """
+        starts = self._starts.get(account_id)
+        if not starts or transaction_date is None:
+            return None
+
+        transaction_date = _naive(transaction_date)
+        policies = self._policies[account_id]
+        position = bisect_right(starts, transaction_date) - 1
+        while position >= 0:
+            policy = policies[position]
+            end_date = _naive(policy.end_date)
+            if end_date is None or end_date >= transaction_date:
+                return policy
+            position -= 1
+        return None
+
+    def is_receipt_required(self, account_id, amount, transaction_date=None):
+        """
+        Check if a receipt is required for a transaction amount on an account.
+
+        Args:
+            account_id (str): Account ID
+            amount (float): Transaction amount
+            transaction_date (datetime, optional): When the transaction was posted
+
+        Returns:
+            bool: True if receipt is required, False otherwise
+        """
+        source = self.policy_for(account_id, transaction_date) or self.accounts.get(account_id)
+        if source is None:
+            return False
+
+        if amount > 0:
+            return requirement_applies(
+                source.receipt_required_deposits, source.receipt_threshold_deposits, amount
+            )
+        return requirement_applies(
+            source.receipt_required_charges, source.receipt_threshold_charges, amount
+        )
+
+    def status_for(self, transaction):
+        """
+        Get the receipt display status for a single transaction.
+
+        Args:
+            transaction (Transaction): Transaction to evaluate
+
+        Returns:
+            str: Receipt status, or None if the transaction's account is not indexed
+        """
+        if transaction.account_id not in self.accounts:
+            return None
+        required = self.is_receipt_required(
+            transaction.account_id, transaction.amount, transaction.posted_at
+        )
+        return receipt_status(required, (transaction.number_of_attachments or 0) > 0)
+
+    def statuses_for(self, transactions):
+        """
+        Resolve receipt display statuses for a batch of transactions.
+
+        Args:
+            transactions (list): Transaction objects to evaluate
+
+        Returns:
+            dict: Receipt status keyed by transaction ID
+        """
+        return {transaction.id: self.status_for(transaction) for transaction in transactions}
+
+
+def resolve_receipt_statuses(db_session, accounts, transactions):
+    """
+    Get receipt display statuses, preferring the materialized column.
+
+    Transactions that have not been evaluated yet (receipt_status is NULL) are
+    resolved through a ReceiptPolicyIndex, which is only loaded when needed.
+
+    Args:
+        db_session: SQLAlchemy session to use if the policy index must be loaded
+        accounts (list): Account objects the transactions belong to
+        transactions (list): Transaction objects to resolve
+
+    Returns:
+        dict: Receipt status keyed by transaction ID
+    """
+    statuses = {}
+    unevaluated = []
+    for transaction in transactions:
+        if transaction.receipt_status is None:
+            unevaluated.append(transaction)
+        else:
+            statuses[transaction.id] = transaction.receipt_status
+
+    if unevaluated:
+        statuses.update(ReceiptPolicyIndex.load(db_session, accounts).statuses_for(unevaluated))
+    return statuses
+
+
+def refresh_receipt_statuses(
+    db_session, account_ids=None, only_missing=False, batch_size=1000, changed_account_ids=None
+):
+    """
+    Recompute the materialized Transaction.receipt_status column in batches.
+
+    Transactions are walked in primary key order and only rows whose status actually
+    changes are written back, committing after each batch so long refreshes don't hold
+    locks on the transactions table.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        account_ids (list, optional): Limit the refresh to these accounts. Defaults to all accounts
+        only_missing (bool): Only evaluate transactions that have never been evaluated
+        batch_size (int): Number of transactions to read per batch
+        changed_account_ids (set, optional): Collects the IDs of accounts with updated statuses
+
+    Returns:
+        int: Number of transactions whose status was updated
+    """
+    account_query = db_session.query(Account)
+    if account_ids is not None:
+        account_query = account_query.filter(Account.id.in_(list(account_ids)))
+    accounts = account_query.all()
+    if not accounts:
+        return 0
+
+    index = ReceiptPolicyIndex.load(db_session, accounts)
+    updated = 0
+    last_id = None
+
+    while True:
+        query = db_session.query(
+            Transaction.id,
+            Transaction.account_id,
+            Transaction.amount,
+            Transaction.posted_at,
+            Transaction.number_of_attachments,
+            Transaction.receipt_status,
+        ).filter(Transaction.account_id.in_(list(index.accounts)))
+        if only_missing:
+            query = query.filter(Transaction.receipt_status.is_(None))
+        if last_id is not None:
+            query = query.filter(Transaction.id > last_id)
+        rows = query.order_by(Transaction.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        changes = []
+        for row in rows:
+            status = index.status_for(row)
+            if status != row.receipt_status:
+                changes.append({"id": row.id, "receipt_status": status})
+                if changed_account_ids is not None:
+                    changed_account_ids.add(row.account_id)
+
+        if changes:
+            db_session.bulk_update_mappings(Transaction, changes)
+            db_session.commit()
+            updated += len(changes)
+
+        last_id = rows[-1].id
+
+    return updated
@@ -0,0 +1,286 @@
+"""Per-request SQL instrumentation and rolling latency statistics per endpoint."""
+
+import math
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+
+# Profile of the request being handled in the current thread (None outside requests)
+_current_profile = ContextVar("request_profile", default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+")
+_PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint_statement(statement):
+    """
+    Normalize a SQL statement so executions that differ only in values compare equal.
+
+    Literals and bound parameters become "?", parameter lists such as expanded IN
+    clauses become "(?+)" whatever their length, and whitespace is collapsed.
+
+    Args:
+        statement (str): SQL statement as sent to the database
+
+    Returns:
+        str: Statement fingerprint
+    """
+    fingerprint = _STRING_LITERAL.sub("?", statement)
+    fingerprint = _PARAMETER.sub("?", fingerprint)
+    fingerprint = _NUMBER_LITERAL.sub("?", fingerprint)
+    fingerprint = _PARAMETER_LIST.sub("(?+)", fingerprint)
+    return _WHITESPACE.sub(" ", fingerprint).strip()
+
+
+class RequestProfile:
+    """
+    SQL statements executed while handling one request.
+
+    Attributes:
+        started (float): perf_counter value when the request started
+        query_count (int): Number of statements executed
+        db_seconds (float): Time spent executing them
+        pool_wait_seconds (float): Time spent waiting for (or opening) pooled connections
+        statements (dict): [count, seconds] keyed by statement fingerprint
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.statements = {}
+
+    def record(self, statement, seconds):
+        """Count one executed statement."""
+        self.query_count += 1
+        self.db_seconds += seconds
+        totals = self.statements.setdefault(fingerprint_statement(statement), [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+
+    def elapsed(self):
+        """Seconds since the request started."""
+        return time.perf_counter() - self.started
+
+    def repeated_statements(self, threshold):
+        """
+        Get statements executed at least threshold times, the signature of N+1 queries.
+
+        Args:
+            threshold (int): Minimum number of executions
+
+        Returns:
+            list: (fingerprint, count, seconds) tuples, most executed first
+        """
+        return sorted(
+            (
+                (fingerprint, count, seconds)
+                for fingerprint, (count, seconds) in self.statements.items()
+                if count >= threshold
+            ),
+            key=lambda item: -item[1],
+        )
+
+    def top_statements(self, limit=5):
+        """Get the (fingerprint, count, seconds) of the statements that took longest."""
+        return sorted(
+            ((fingerprint, count, seconds) for fingerprint, (count, seconds) in self.statements.items()),
+            key=lambda item: -item[2],
+        )[:limit]
+
+    def server_timing(self, total_seconds):
+        """
+        Build a Server-Timing header value for the request.
+
+        Args:
+            total_seconds (float): Time taken by the whole request
+
+        Returns:
+            str: Header value with "db", "pool" and "app" metrics in milliseconds
+        """
+        return (
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.query_count} queries", '
+            f"pool;dur={self.pool_wait_seconds * 1000:.1f}, "
+            f"app;dur={total_seconds * 1000:.1f}"
+        )
+
+
+def start_request_profile():
+    """Start profiling the statements executed by the current request."""
+    profile = RequestProfile()
+    _current_profile.set(profile)
+    return profile
+
+
+def current_request_profile():
+    """Get the current request's profile, or None outside a profiled request."""
+    return _current_profile.get()
+
+
+def end_request_profile():
+    """Stop profiling the current request and return its profile (or None)."""
+    profile = _current_profile.get()
+    _current_profile.set(None)
+    return profile
+
+
+def record_statement(statement, seconds):
+    """Count an executed statement towards the current request, if there is one."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, seconds)
+
+
+def record_pool_wait(seconds):
+    """Count time spent checking out a pooled connection towards the current request."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.pool_wait_seconds += seconds
+
+
+def percentile(values, pct):
+    """
+    Get a percentile of values with the nearest-rank method.
+
+    Args:
+        values (list): Numbers, in any order
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float: The percentile, or 0.0 for no values
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class RequestMetrics:
+    """
+    Rolling request statistics per endpoint for one worker process.
+
+    Each endpoint keeps its most recent max_samples requests for latency and query
+    count percentiles. Requests slower than slow_request_seconds, or that repeat a
+    statement repeat_threshold times or more (N+1 queries), are also kept in a ring
+    buffer of the last max_slow_requests such requests, with their statement
+    fingerprints.
+
+    Attributes:
+        max_samples (int): Requests kept per endpoint
+        max_slow_requests (int): Slow requests kept
+        slow_request_seconds (float): Duration from which a request counts as slow
+        repeat_threshold (int): Executions of one statement that flag a request
+    """
+
+    def __init__(self, max_samples=500, max_slow_requests=50, slow_request_seconds=0.5, repeat_threshold=5):
+        self.max_samples = max_samples
+        self.max_slow_requests = max_slow_requests
+        self.slow_request_seconds = slow_request_seconds
+        self.repeat_threshold = repeat_threshold
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Discard all recorded requests."""
+        with self._lock:
+            self._endpoints = {}
+            self._slow_requests = deque(maxlen=self.max_slow_requests)
+
+    def record(self, endpoint, method, path, seconds, profile):
+        """
+        Record a finished request.
+
+        Args:
+            endpoint (str): Flask endpoint that handled the request
+            method (str): HTTP method
+            path (str): Request path
+            seconds (float): Time taken by the request
+            profile (RequestProfile): Statements the request executed
+
+        Returns:
+            list: Repeated statements of the request (see RequestProfile.repeated_statements)
+        """
+        repeated = profile.repeated_statements(self.repeat_threshold)
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    "requests": 0,
+                    "repeated_requests": 0,
+                    "repeated_statement": None,
+                    "samples": deque(maxlen=self.max_samples),
+                }
+            stats["requests"] += 1
+            stats["samples"].append((seconds, profile.query_count, profile.db_seconds, profile.pool_wait_seconds))
+            if repeated:
+                stats["repeated_requests"] += 1
+                stats["repeated_statement"] = repeated[0][0]
+
+            if seconds >= self.slow_request_seconds or repeated:
+                self._slow_requests.append(
+                    {
+                        "at": datetime.utcnow(),
+                        "endpoint": endpoint,
+                        "method": method,
+                        "path": path,
+                        "seconds": seconds,
+                        "query_count": profile.query_count,
+                        "db_seconds": profile.db_seconds,
+                        "statements": profile.top_statements(),
+                        "repeated": repeated,
+                    }
+                )
+        return repeated
+
+    def endpoint_stats(self):
+        """
+        Summarize the recorded requests of each endpoint.
+
+        Returns:
+            list: One dict per endpoint with request counts, p50/p95/p99 latency in
+                seconds, average and p95 query counts, average DB time, average
+                and maximum pool wait and N+1 counters, slowest p95 first
+        """
+        with self._lock:
+            endpoints = [
+                (endpoint, dict(stats, samples=list(stats["samples"])))
+                for endpoint, stats in self._endpoints.items()
+            ]
+
+        summary = []
+        for endpoint, stats in endpoints:
+            samples = stats["samples"]
+            latencies = [sample[0] for sample in samples]
+            query_counts = [sample[1] for sample in samples]
+            summary.append(
+                {
+                    "endpoint": endpoint,
+                    "requests": stats["requests"],
+                    "samples": len(samples),
+                    "p50": percentile(latencies, 50),
+                    "p95": percentile(latencies, 95),
+                    "p99": percentile(latencies, 99),
+                    "avg_queries": sum(query_counts) / len(samples),
+                    "p95_queries": percentile(query_counts, 95),
+                    "max_queries": max(query_counts),
+                    "avg_db_seconds": sum(sample[2] for sample in samples) / len(samples),
+                    "avg_pool_wait_seconds": sum(sample[3] for sample in samples) / len(samples),
+                    "max_pool_wait_seconds": max(sample[3] for sample in samples),
+                    "repeated_requests": stats["repeated_requests"],
+                    "repeated_statement": stats["repeated_statement"],
+                }
+            )
+        summary.sort(key=lambda item: -item["p95"])
+        return summary
+
+    def slow_requests(self):
+        """Get the slow and N+1 requests in the ring buffer, most recent first."""
+        with self._lock:
+            return list(reversed(self._slow_requests))
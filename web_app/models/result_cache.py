@@ -0,0 +1,270 @@
+"""Memoization of report results with LRU eviction, a TTL and data-version invalidation."""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+
+class ResultCache:
+    """
+    Cross-request cache of function results with LRU eviction and a TTL.
+
+    Entries are tagged with a version, normally the data versions of the Mercury
+    account groups the result was computed from (see DataVersion), so a sync that
+    changes the data makes cached results unusable immediately. Values are stored
+    pickled, so callers always get a private copy they are free to modify.
+
+    An optional shared backend lets several worker processes reuse each other's
+    results. It can be any object with get(key), set(key, value, timeout=...) and
+    delete(key) methods, such as a flask_caching Cache or SQLiteCacheBackend.
+
+    Attributes:
+        max_entries (int): Maximum number of results kept in process
+        ttl_seconds (float): Lifetime of a cached result
+        hits (int): Number of calls served from the cache
+        misses (int): Number of calls that ran the function
+        function_stats (dict): {"hits": int, "misses": int} keyed by function name
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=300, shared_backend=None, key_prefix="result_cache:"):
+        """
+        Create an empty cache.
+
+        Args:
+            max_entries (int): Maximum number of results kept in process
+            ttl_seconds (float): Lifetime of a cached result
+            shared_backend (optional): Cache shared between worker processes
+            key_prefix (str): Prefix for keys stored in the shared backend
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared_backend = shared_backend
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.misses = 0
+        self.function_stats = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shared_key(self, key):
+        return self.key_prefix + hashlib.sha256(repr(key).encode()).hexdigest()
+
+    def get(self, key, version):
+        """
+        Get a cached result if it was computed from the given version.
+
+        Args:
+            key (tuple): Hashable key with a stable repr
+            version: Current version of the data the result depends on
+
+        Returns:
+            tuple: (found, value)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    return True, pickle.loads(entry[2])
+                del self._entries[key]
+
+        if self.shared_backend is not None:
+            try:
+                payload = self.shared_backend.get(self._shared_key(key))
+            except Exception:
+                payload = None
+            if payload is not None and payload[0] == key and payload[1] == version:
+                self._store(key, version, payload[2])
+                return True, pickle.loads(payload[2])
+
+        return False, None
+
+    def set(self, key, version, value):
+        """
+        Cache a result computed from the given version.
+
+        Args:
+            key (tuple): Hashable key with a stable repr
+            version: Version of the data the result was computed from
+            value: Picklable result
+        """
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self._store(key, version, data)
+        if self.shared_backend is not None:
+            try:
+                self.shared_backend.set(
+                    self._shared_key(key), (key, version, data), timeout=int(self.ttl_seconds)
+                )
+            except Exception:
+                pass
+
+    def clear(self):
+        """Drop all results cached in process (shared entries expire on their own)."""
+        with self._lock:
+            self._entries.clear()
+
+    def memoize(self, key_func, version_func=None):
+        """
+        Decorator caching a function's results.
+
+        Args:
+            key_func (callable): Called with the function's arguments; returns the
+                normalized, hashable part of the key (the function name is added)
+            version_func (callable, optional): Called with the function's arguments;
+                returns the version the result depends on. Results of functions
+                without one are only bounded by the TTL.
+
+        Returns:
+            callable: Decorator. The wrapped function keeps the original as .uncached
+        """
+
+        def decorator(f):
+            name = f.__qualname__
+            self.function_stats.setdefault(name, {"hits": 0, "misses": 0})
+
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                key = (name, key_func(*args, **kwargs))
+                version = version_func(*args, **kwargs) if version_func else None
+                found, value = self.get(key, version)
+                self.record(name, found)
+                if found:
+                    return value
+                value = f(*args, **kwargs)
+                self.set(key, version, value)
+                return value
+
+            wrapper.uncached = f
+            return wrapper
+
+        return decorator
+
+    def record(self, name, found):
+        """
+        Count a lookup made on behalf of a function.
+
+        memoize counts its own lookups; callers using get and set directly (e.g. to
+        batch misses) call this to keep the counters meaningful.
+
+        Args:
+            name (str): Function name reported in function_stats
+            found (bool): Whether the lookup was a hit
+        """
+        counter = "hits" if found else "misses"
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            stats = self.function_stats.setdefault(name, {"hits": 0, "misses": 0})
+            stats[counter] += 1
+
+    def stats(self):
+        """
+        Get the cache's counters.
+
+        Returns:
+            dict: entries, max_entries, ttl_seconds, shared, hits, misses and
+                per-function counters
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "shared": self.shared_backend is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "functions": {name: dict(counts) for name, counts in self.function_stats.items()},
+            }
+
+    def _store(self, key, version, data):
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl_seconds, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCacheBackend:
+    """
+    Shared cache backend storing pickled values in a local SQLite file.
+
+    A stand-in for Redis or memcached when all worker processes run on one host.
+    Implements the get/set/delete subset of the flask_caching interface used by
+    ResultCache. Expired rows are purged, and the oldest rows beyond max_entries
+    evicted, as new values are written.
+
+    Attributes:
+        path (str): SQLite database file
+        max_entries (int): Maximum number of rows kept
+    """
+
+    def __init__(self, path, max_entries=10000):
+        """
+        Open (creating if needed) a cache file.
+
+        Args:
+            path (str): SQLite database file
+            max_entries (int): Maximum number of rows kept
+        """
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_entries ("
+                    "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+                )
+        finally:
+            connection.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        """Get a value, or None if missing or expired."""
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        finally:
+            connection.close()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key, value, timeout=300):
+        """Store a value for timeout seconds."""
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now + timeout),
+                )
+                connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+                connection.execute(
+                    "DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_entries "
+                    "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        finally:
+            connection.close()
+
+    def delete(self, key):
+        """Remove a value."""
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        finally:
+            connection.close()
@@ -7,12 +7,54 @@ from sqlalchemy import (
     ForeignKey,
     Boolean,
     Integer,
+    Index,
+    DDL,
+    and_,
+    event,
+    func,
     text,
 )
 from sqlalchemy.orm import relationship
 from .base import Base
 
 
+def parse_category(category_string):
+    """
+    Parse a category string into main category and sub-category.
+
+    Args:
+        category_string (str): Category string, potentially with sub-category (e.g., "Office/Supplies")
+
+    Returns:
+        tuple: (main_category, sub_category) or (category, None) if no sub-category
+    """
+    if not category_string:
+        return (None, None)
+
+    if '/' in category_string:
+        parts = category_string.split('/', 1)  # Split on first '/' only
+        return (parts[0].strip(), parts[1].strip())
+    else:
+        return (category_string.strip(), None)
+
+
+def normalize_category(category_string):
+    """
+    Parse a category string into the case-normalized values stored on transactions.
+
+    Args:
+        category_string (str): Category string such as "Office/Supplies"
+
+    Returns:
+        tuple: (main_category, sub_category) in lower case, with empty parts as None
+    """
+    main_cat, sub_cat = parse_category(category_string)
+    return (
+        main_cat.lower()[:255] if main_cat else None,
+        sub_cat.lower()[:255] if sub_cat else None,
+    )
+
+
 class Transaction(Base):
     """
     SQLAlchemy model representing a Mercury Bank transaction.
@@ -53,10 +95,25 @@ class Transaction(Base):
         reason_for_failure (str, optional): Reason why transaction failed
         has_generated_receipt (bool): Whether a receipt has been generated
         number_of_attachments (int): Number of attachments associated with transaction
+        receipt_status (str, optional): Materialized receipt compliance status - 'required_present',
+            'required_missing', 'optional_present' or 'optional_missing'. Maintained by sync and
+            recomputed when receipt policies change; NULL until first evaluated
+        main_category (str, optional): Lower-cased main category parsed from note
+        sub_category (str, optional): Lower-cased sub-category parsed from note
+        effective_date (datetime, optional): posted_at, falling back to created_at
         
         account (Account): Related Account object
     """
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("idx_transactions_account_receipt_status", "account_id", "receipt_status"),
+        Index(
+            "idx_transactions_account_main_category_date",
+            "account_id",
+            "main_category",
+            "effective_date",
+        ),
+    )
 
     # Core transaction fields
     id = Column(String(255), primary_key=True)  # Mercury transaction ID
@@ -106,6 +163,12 @@ class Transaction(Base):
     # Additional metadata
     has_generated_receipt = Column(Boolean, default=False)
     number_of_attachments = Column(Integer, default=0)
+    receipt_status = Column(String(20), nullable=True)  # See models.receipt_evaluator
+
+    # Columns derived from note and dates at ingest time (see update_derived_columns)
+    main_category = Column(String(255), nullable=True)
+    sub_category = Column(String(255), nullable=True)
+    effective_date = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     account = relationship("Account", back_populates="transactions")
@@ -119,3 +182,164 @@ class Transaction(Base):
             str: A formatted string showing the transaction ID, amount, and description
         """
         return f"<Transaction(id='{self.id}', amount={self.amount}, description='{self.description}')>"
+
+    def update_derived_columns(self):
+        """
+        Recompute main_category, sub_category and effective_date from note and dates.
+
+        Called by the sync service whenever it writes a transaction. effective_date stays
+        NULL if neither date is known yet (created_at is filled in by the database), in
+        which case refresh_derived_columns picks the transaction up later.
+        """
+        self.main_category, self.sub_category = normalize_category(self.note)
+        self.effective_date = self.posted_at or self.created_at
+
+    @classmethod
+    def category_condition(cls, category):
+        """
+        Build an exact-match filter for a category selected as "Main" or "Main/Sub".
+
+        Args:
+            category (str): Category as offered by the filter dropdowns
+
+        Returns:
+            SQL expression matching transactions in that category (and, for a main
+            category, all of its sub-categories)
+        """
+        main_cat, sub_cat = normalize_category(category)
+        if sub_cat:
+            return and_(cls.main_category == main_cat, cls.sub_category == sub_cat)
+        return cls.main_category == main_cat
+
+
+# Text columns covered by the full-text search index (see web_app models.transaction_search)
+SEARCH_COLUMNS = ("description", "bank_description", "counterparty_name", "external_memo", "note")
+
+# SQLite FTS5 table mirroring SEARCH_COLUMNS, kept in sync with triggers
+SEARCH_FTS_TABLE = "transactions_search"
+
+_search_columns = ", ".join(SEARCH_COLUMNS)
+_new_search_values = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+_old_search_values = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+
+# MySQL: a FULLTEXT index over the searchable columns
+event.listen(
+    Transaction.__table__,
+    "after_create",
+    DDL(
+        f"CREATE FULLTEXT INDEX ft_transactions_search ON transactions ({_search_columns})"
+    ).execute_if(dialect="mysql"),
+)
+
+# SQLite: an external-content FTS5 table maintained by insert, update and delete triggers
+for _statement in (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_FTS_TABLE} USING fts5("
+    f"{_search_columns}, content='transactions', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_FTS_TABLE}_insert AFTER INSERT ON transactions BEGIN "
+    f"INSERT INTO {SEARCH_FTS_TABLE}(rowid, {_search_columns}) VALUES (new.rowid, {_new_search_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_FTS_TABLE}_delete AFTER DELETE ON transactions BEGIN "
+    f"INSERT INTO {SEARCH_FTS_TABLE}({SEARCH_FTS_TABLE}, rowid, {_search_columns}) "
+    f"VALUES ('delete', old.rowid, {_old_search_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_FTS_TABLE}_update AFTER UPDATE OF {_search_columns} "
+    f"ON transactions BEGIN "
+    f"INSERT INTO {SEARCH_FTS_TABLE}({SEARCH_FTS_TABLE}, rowid, {_search_columns}) "
+    f"VALUES ('delete', old.rowid, {_old_search_values}); "
+    f"INSERT INTO {SEARCH_FTS_TABLE}(rowid, {_search_columns}) VALUES (new.rowid, {_new_search_values}); END",
+):
+    event.listen(
+        Transaction.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite")
+    )
+event.listen(
+    Transaction.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {SEARCH_FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+
+def refresh_derived_columns(db_session, account_ids=None, only_missing=True, batch_size=1000):
+    """
+    Populate the derived category and effective date columns in batches.
+
+    Transactions are walked in primary key order and only rows whose values actually
+    change are written back, committing after each batch.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        account_ids (list, optional): Limit the refresh to these accounts. Defaults to all accounts
+        only_missing (bool): Only process transactions without an effective_date, i.e. rows
+            written before the columns existed
+        batch_size (int): Number of transactions to read per batch
+
+    Returns:
+        int: Number of transactions updated
+    """
+    updated = 0
+    last_id = None
+
+    while True:
+        query = db_session.query(
+            Transaction.id,
+            Transaction.note,
+            Transaction.posted_at,
+            Transaction.created_at,
+            Transaction.main_category,
+            Transaction.sub_category,
+            Transaction.effective_date,
+        )
+        if account_ids is not None:
+            query = query.filter(Transaction.account_id.in_(list(account_ids)))
+        if only_missing:
+            query = query.filter(Transaction.effective_date.is_(None))
+        if last_id is not None:
+            query = query.filter(Transaction.id > last_id)
+        rows = query.order_by(Transaction.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        changes = []
+        for row in rows:
+            main_cat, sub_cat = normalize_category(row.note)
+            effective_date = row.posted_at or row.created_at
+            if (main_cat, sub_cat, effective_date) != (
+                row.main_category,
+                row.sub_category,
+                row.effective_date,
+            ):
+                changes.append(
+                    {
+                        "id": row.id,
+                        "main_category": main_cat,
+                        "sub_category": sub_cat,
+                        "effective_date": effective_date,
+                    }
+                )
+
+        if changes:
+            db_session.bulk_update_mappings(Transaction, changes)
+            db_session.commit()
+            updated += len(changes)
+
+        last_id = rows[-1].id
+
+    return updated
+
+
+def read_watermark(db_session, account_ids):
+    """
+    Get the change watermark of accounts' transactions.
+
+    Args:
+        db_session: SQLAlchemy session to use
+        account_ids (list): Accounts to check
+
+    Returns:
+        tuple: (latest updated_at, number of transactions)
+    """
+    if not account_ids:
+        return (None, 0)
+    latest, count = (
+        db_session.query(func.max(Transaction.updated_at), func.count(Transaction.id))
+        .filter(Transaction.account_id.in_(account_ids))
+        .one()
+    )
+    return (latest, count)
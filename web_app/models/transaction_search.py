@@ -0,0 +1,274 @@
+"""Full-text transaction search with a small query syntax and relevance ranking."""
+
+import re
+from datetime import date, datetime
+
+from sqlalchemy import and_, asc, column, desc, func, literal_column, not_, or_, select, table
+
+from .transaction import SEARCH_COLUMNS, SEARCH_FTS_TABLE, Transaction
+
+# field:value filter, a "quoted phrase" or a bare word, optionally negated with "-"
+_TOKEN_PATTERN = re.compile(r'(-?)(?:(\w+):)?(?:"([^"]*)"?|(\S+))')
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+_COMPARISON_PATTERN = re.compile(r"^(>=|<=|>|<)(.+)$")
+
+
+class SearchQuery:
+    """
+    Parsed transaction search.
+
+    Syntax (all parts are combined with AND):
+        coffee shop          words, matched as prefixes anywhere in the searchable text
+        "blue bottle"        exact phrase
+        -refund              exclude transactions containing a word or "phrase"
+        amount:25            absolute amount equal to 25 (amount:25.50, amount:$1,200)
+        amount:>100          also >=, <, <= and ranges such as amount:10..50 or amount:..20
+        date:2025-01         effective date in a month or on a day (date:2025-01-15)
+        date:2025-01..2025-03-15   date range (inclusive, open ends allowed); also >, >=, <, <=
+
+    Values that can't be parsed as a filter are searched as text.
+
+    Attributes:
+        terms (list): Words to match as prefixes
+        phrases (list): Word sequences to match exactly
+        excluded (list): Words and phrases (as word lists) that must not match
+        amount_min (float): Smallest absolute amount, or None
+        amount_max (float): Largest absolute amount, or None
+        date_from (date): First effective date included, or None
+        date_to (date): First effective date no longer included, or None
+    """
+
+    def __init__(self):
+        self.terms = []
+        self.phrases = []
+        self.excluded = []
+        self.amount_min = None
+        self.amount_max = None
+        self.date_from = None
+        self.date_to = None
+
+    @property
+    def has_text(self):
+        """bool: True if the search contains words or phrases to rank by."""
+        return bool(self.terms or self.phrases)
+
+    @classmethod
+    def parse(cls, search_text):
+        """
+        Parse a search string.
+
+        Args:
+            search_text (str): Search as typed by the user
+
+        Returns:
+            SearchQuery: Parsed search
+        """
+        search = cls()
+        for negated, field, phrase, word in _TOKEN_PATTERN.findall(search_text or ""):
+            field = field.lower()
+            if field and not negated and word and search._apply_filter(field, word):
+                continue
+            if field and word:
+                word = f"{field} {word}"
+
+            words = _WORD_PATTERN.findall((phrase or word).lower())
+            if not words:
+                continue
+            if negated:
+                search.excluded.append(words)
+            elif phrase and len(words) > 1:
+                search.phrases.append(words)
+            else:
+                search.terms.extend(words)
+        return search
+
+    def _apply_filter(self, field, value):
+        if field == "amount":
+            bounds = _parse_range(value, _parse_amount)
+            if bounds is None:
+                return False
+            low, high = bounds
+            if low is not None:
+                self.amount_min = low[0]
+            if high is not None:
+                self.amount_max = high[1]
+            return True
+
+        if field == "date":
+            bounds = _parse_range(value, _parse_date_bounds)
+            if bounds is None:
+                return False
+            low, high = bounds
+            if low is not None:
+                self.date_from = low[0]
+            if high is not None:
+                self.date_to = high[1]
+            return True
+
+        return False
+
+
+def _parse_amount(value):
+    try:
+        amount = abs(float(value.replace("$", "").replace(",", "")))
+    except ValueError:
+        return None
+    return (amount, amount)
+
+
+def _parse_date_bounds(value):
+    """Parse YYYY-MM or YYYY-MM-DD into (first day, first day after) or None."""
+    try:
+        if len(value) == 7:
+            first = datetime.strptime(value, "%Y-%m").date()
+            if first.month == 12:
+                return (first, date(first.year + 1, 1, 1))
+            return (first, date(first.year, first.month + 1, 1))
+        day = datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    return (day, date.fromordinal(day.toordinal() + 1))
+
+
+def _parse_range(value, parse_value):
+    """
+    Parse "x", ">x", ">=x", "<x", "<=x" or "x..y" into inclusive (low, high) bounds.
+
+    parse_value returns a (low, high) pair for a single value, or None if invalid;
+    the bounds are returned as those pairs (None for an open end).
+    """
+    if ".." in value:
+        start, end = value.split("..", 1)
+        low = parse_value(start) if start else None
+        high = parse_value(end) if end else None
+        if (start and low is None) or (end and high is None) or not (start or end):
+            return None
+        return (low, high)
+
+    comparison = _COMPARISON_PATTERN.match(value)
+    if comparison:
+        operator, operand = comparison.groups()
+        bounds = parse_value(operand)
+        if bounds is None:
+            return None
+        # Strict comparisons skip the value itself: the next cent or the next day
+        if operator == ">":
+            bounds = _after(bounds)
+        elif operator == "<":
+            bounds = _before(bounds)
+        return (bounds, None) if operator.startswith(">") else (None, bounds)
+
+    bounds = parse_value(value)
+    if bounds is None:
+        return None
+    return (bounds, bounds)
+
+
+def _after(bounds):
+    high = bounds[1]
+    if isinstance(high, date):
+        return (high, high)
+    return (round(high + 0.01, 2), round(high + 0.01, 2))
+
+
+def _before(bounds):
+    low = bounds[0]
+    if isinstance(low, date):
+        return (low, low)
+    return (round(low - 0.01, 2), round(low - 0.01, 2))
+
+
+def _fts5_match(term_lists, prefix=False):
+    """Build an FTS5 MATCH string from word lists (implicit AND between them)."""
+    parts = []
+    for words in term_lists:
+        part = '"' + " ".join(words) + '"'
+        if prefix and len(words) == 1:
+            part += "*"
+        parts.append(part)
+    return " ".join(parts)
+
+
+def _mysql_boolean(term_lists, prefix=False, required=True):
+    """Build a MySQL boolean-mode AGAINST string from word lists."""
+    parts = []
+    for words in term_lists:
+        if len(words) > 1:
+            part = '"' + " ".join(words) + '"'
+        else:
+            part = words[0] + ("*" if prefix else "")
+        parts.append(("+" if required else "") + part)
+    return " ".join(parts)
+
+
+def apply_transaction_search(query, search, dialect_name):
+    """
+    Restrict a Transaction query to a search and get its relevance ordering.
+
+    On MySQL the FULLTEXT index is queried in boolean mode and ranked by MATCH
+    relevance; on SQLite the FTS5 table is queried and ranked by bm25. Other
+    databases fall back to unranked substring matching. Amount and date filters use
+    the regular columns, so the search combines with any other filters on the query.
+
+    Args:
+        query: SQLAlchemy query selecting Transaction
+        search (SearchQuery): Parsed search
+        dialect_name (str): Database dialect name (e.g. "mysql", "sqlite")
+
+    Returns:
+        tuple: (filtered query, ordering expression ranking the best matches first,
+            or None when the search has no words or phrases)
+    """
+    if search.amount_min is not None:
+        query = query.filter(func.abs(Transaction.amount) >= search.amount_min)
+    if search.amount_max is not None:
+        query = query.filter(func.abs(Transaction.amount) <= search.amount_max)
+    if search.date_from is not None:
+        query = query.filter(Transaction.effective_date >= search.date_from)
+    if search.date_to is not None:
+        query = query.filter(Transaction.effective_date < search.date_to)
+
+    included = [[term] for term in search.terms] + search.phrases
+    ordering = None
+
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import match
+
+        columns = [getattr(Transaction, name) for name in SEARCH_COLUMNS]
+        if included:
+            relevance = match(*columns, against=_mysql_boolean(included, prefix=True)).in_boolean_mode()
+            query = query.filter(relevance > 0)
+            ordering = desc(relevance)
+        if search.excluded:
+            excluded = match(
+                *columns, against=_mysql_boolean(search.excluded, required=False)
+            ).in_boolean_mode()
+            query = query.filter(not_(excluded > 0))
+
+    elif dialect_name == "sqlite":
+        fts = table(SEARCH_FTS_TABLE, column("rowid"))
+        fts_match = literal_column(SEARCH_FTS_TABLE).op("MATCH")
+        transaction_rowid = literal_column("transactions.rowid")
+        if included:
+            matches = (
+                select(fts.c.rowid, func.bm25(literal_column(SEARCH_FTS_TABLE)).label("rank"))
+                .where(fts_match(_fts5_match(included, prefix=True)))
+                .subquery("search_matches")
+            )
+            query = query.join(matches, matches.c.rowid == transaction_rowid)
+            ordering = asc(matches.c.rank)  # bm25: lower is more relevant
+        for words in search.excluded:
+            query = query.filter(
+                transaction_rowid.notin_(select(fts.c.rowid).where(fts_match(_fts5_match([words]))))
+            )
+
+    else:
+        searchable = [func.coalesce(getattr(Transaction, name), "") for name in SEARCH_COLUMNS]
+        for words in included:
+            pattern = "%" + " ".join(words) + "%"
+            query = query.filter(or_(*(value.ilike(pattern) for value in searchable)))
+        for words in search.excluded:
+            pattern = "%" + " ".join(words) + "%"
+            query = query.filter(and_(*(not_(value.ilike(pattern)) for value in searchable)))
+
+    return query, ordering
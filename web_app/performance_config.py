@@ -20,18 +20,6 @@ def apply_performance_optimizations(app: Flask):
     except ImportError:
         print("  ⚠️ flask-compress not available, compression disabled")
     
-    # Configure caching
-    try:
-        from flask_caching import Cache
-        cache_config = {
-            'CACHE_TYPE': 'simple',
-            'CACHE_DEFAULT_TIMEOUT': 300
-        }
-        cache = Cache(app, config=cache_config)
-        print("  ✅ Flask caching enabled")
-    except ImportError:
-        print("  ⚠️ flask-caching not available, caching disabled")
-    
     # Set performance-related config
     app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 31536000  # 1 year for static files
     
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Measure the web app's startup cost: module import, create_app() and database queries.
+
+Each run starts a fresh interpreter, so imports and connections are never reused
+between runs. Run from the web_app directory with DATABASE_URL set:
+
+    python startup_benchmark.py --runs 5
+    python startup_benchmark.py --json > startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Executed in each child interpreter; prints one JSON line as its last output
+CHILD_SCRIPT = r"""
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import database_config
+from sqlalchemy import event
+
+phase = "import"
+queries = {"import": 0, "create_app": 0}
+
+
+@event.listens_for(database_config.engine, "before_cursor_execute")
+def count_query(*args):
+    queries[phase] += 1
+
+
+import app
+
+imported = time.perf_counter()
+phase = "create_app"
+app.create_app()
+ready = time.perf_counter()
+
+print(json.dumps({
+    "import_seconds": imported - start,
+    "create_app_seconds": ready - imported,
+    "import_queries": queries["import"],
+    "create_app_queries": queries["create_app"],
+    "modules_loaded": len(sys.modules),
+    "numpy_loaded": "numpy" in sys.modules,
+    "pandas_loaded": "pandas" in sys.modules,
+}))
+"""
+
+TIMED_METRICS = ("import_seconds", "create_app_seconds")
+
+
+def run_once():
+    """
+    Start the app in a fresh interpreter and collect its measurements.
+
+    Returns:
+        dict: Measurements printed by CHILD_SCRIPT
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    lines = result.stdout.strip().splitlines()
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(f"Startup failed:\n{result.stderr or result.stdout}")
+    return json.loads(lines[-1])
+
+
+def summarize(runs):
+    """
+    Summarize the measurements of several runs.
+
+    Args:
+        runs (list): Results of run_once
+
+    Returns:
+        dict: Median, min and max of the timings, and the last run's other values
+    """
+    summary = {"runs": len(runs)}
+    for metric in TIMED_METRICS:
+        values = [run[metric] for run in runs]
+        summary[metric] = {
+            "median": statistics.median(values),
+            "min": min(values),
+            "max": max(values),
+        }
+    for key, value in runs[-1].items():
+        if key not in TIMED_METRICS:
+            summary[key] = value
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh starts to time")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    summary = summarize([run_once() for _ in range(args.runs)])
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"Startup benchmark ({summary['runs']} runs)")
+    for metric in TIMED_METRICS:
+        timing = summary[metric]
+        print(
+            f"  {metric:<20} median {timing['median'] * 1000:8.1f} ms  "
+            f"(min {timing['min'] * 1000:.1f}, max {timing['max'] * 1000:.1f})"
+        )
+    for key in ("import_queries", "create_app_queries", "modules_loaded", "numpy_loaded", "pandas_loaded"):
+        print(f"  {key:<20} {summary[key]}")
+
+
+if __name__ == "__main__":
+    main()